@@ -26,3 +26,29 @@ def track_time(batch_size):
             g = dgl.batch(graphs)
 
     return t.elapsed_secs / 100
+
+
+@utils.benchmark('time')
+@utils.parametrize('batch_size', [32, 256, 1024])
+@utils.parametrize('packed', [False, True])
+@utils.parametrize('shuffle', [False, True])
+def track_time_collate(batch_size, packed, shuffle):
+    ds = dgl.data.QM7bDataset()
+    if packed:
+        ds = dgl.dataloading.PackedGraphDataset.from_dataset(ds)
+    collator = dgl.dataloading.GraphCollator()
+    if shuffle:
+        indices = torch.randperm(len(ds))[:batch_size].tolist()
+    else:
+        indices = list(range(batch_size))
+
+    # dry run
+    for _ in range(10):
+        g, labels = collator.collate([ds[i] for i in indices])
+
+    # timing
+    with utils.Timer() as t:
+        for _ in range(100):
+            g, labels = collator.collate([ds[i] for i in indices])
+
+    return t.elapsed_secs / 100
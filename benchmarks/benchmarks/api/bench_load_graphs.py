@@ -0,0 +1,58 @@
+import os
+import resource
+import time
+import dgl
+import torch
+import torch.multiprocessing as mp
+
+from .. import utils
+
+
+def _bin_path(graph_name):
+    return '/tmp/dataset/bench_load_graphs/{}.bin'.format(graph_name)
+
+
+def _prepare(graph_name):
+    path = _bin_path(graph_name)
+    if not os.path.exists(path):
+        graph = utils.get_graph(graph_name, 'csc')
+        graph.ndata['feat'] = torch.randn(graph.num_nodes(), 128)
+        dgl.save_graphs(path, [graph])
+    return path
+
+
+def _load(path, mmap, queue):
+    tic = time.time()
+    g_list, _ = dgl.load_graphs(path, mmap=mmap)
+    # touch the structure and a slice of the features, as a trainer would at startup
+    g_list[0].in_degrees()
+    g_list[0].ndata['feat'][:1000].sum()
+    elapsed = time.time() - tic
+    # ru_maxrss is in KB on Linux
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def _run(graph_name, mmap):
+    # load in a fresh process so that the peak RSS only covers load_graphs
+    path = _prepare(graph_name)
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(path, mmap, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+@utils.benchmark('time', timeout=600)
+@utils.parametrize('graph_name', ['reddit', 'ogbn-products'])
+@utils.parametrize('mmap', [False, True])
+def track_time(graph_name, mmap):
+    return _run(graph_name, mmap)[0]
+
+
+@utils.benchmark('memory', timeout=600)
+@utils.parametrize('graph_name', ['reddit', 'ogbn-products'])
+@utils.parametrize('mmap', [False, True])
+def track_memory(graph_name, mmap):
+    return _run(graph_name, mmap)[1]
@@ -0,0 +1,41 @@
+import time
+import dgl
+import torch
+
+from .. import utils
+
+def _unfused(sampler, seeds):
+    # random walk traces followed by counting, as done before the fused kernel
+    seeds = seeds.repeat_interleave(sampler.num_random_walks)
+    paths, _ = dgl.sampling.random_walk(
+        sampler.G, seeds, metapath=sampler.full_metapath, restart_prob=sampler.restart_prob)
+    src = paths[:, sampler.metapath_hops::sampler.metapath_hops].reshape(-1)
+    dst = paths[:, 0].repeat_interleave(sampler.num_traversals)
+    return dgl.sampling.pinsage._select_pinsage_neighbors(
+        src, dst, sampler.num_random_walks * sampler.num_traversals, sampler.num_neighbors)
+
+@utils.benchmark('time')
+@utils.parametrize('num_seeds', [1000, 10000, 50000])
+@utils.parametrize('num_random_walks', [10, 100])
+@utils.parametrize('fused', [False, True])
+def track_time(num_seeds, num_random_walks, fused):
+    num_items, num_users = 100000, 200000
+    src = torch.randint(0, num_items, (2000000,))
+    dst = torch.randint(0, num_users, (2000000,))
+    g = dgl.heterograph({
+        ('item', 'bought-by', 'user'): (src, dst),
+        ('user', 'bought', 'item'): (dst, src)})
+    sampler = dgl.sampling.PinSAGESampler(g, 'item', 'user', 3, 0.5, num_random_walks, 10)
+    seeds = torch.randint(0, num_items, (num_seeds,))
+    run = sampler if fused else (lambda seeds: _unfused(sampler, seeds))
+
+    # dry run
+    for i in range(3):
+        run(seeds)
+
+    # timing
+    with utils.Timer() as t:
+        for i in range(10):
+            run(seeds)
+
+    return t.elapsed_secs / 10
@@ -0,0 +1,68 @@
+import time
+import dgl
+import torch
+
+from dgl.distributed import rpc
+from dgl.distributed.graph_services import SamplingRequest, SubgraphResponse, \
+    SAMPLING_SERVICE_ID
+from dgl.distributed.kvstore import PullRequest, PullResponse, KVSTORE_PULL
+
+from .. import utils
+
+NUM_MESSAGES = 2000
+
+
+def _messages(msg_type, num_ids):
+    ids = torch.randint(0, 100000000, (num_ids,))
+    if msg_type == 'pull':
+        return [PullRequest('feat', ids), PullResponse(0, torch.randn(num_ids, 16))]
+    return [SamplingRequest(ids, 10, 'in', None, False),
+            SubgraphResponse(ids, ids, ids)]
+
+
+def _register(codec):
+    if codec:
+        rpc.register_service(KVSTORE_PULL, PullRequest, PullResponse,
+                             req_schema='sT', res_schema='qT')
+        rpc.register_service(SAMPLING_SERVICE_ID, SamplingRequest, SubgraphResponse,
+                             req_schema='Tsz?q', res_schema='TTT')
+    else:
+        rpc.register_service(KVSTORE_PULL, PullRequest, PullResponse)
+        rpc.register_service(SAMPLING_SERVICE_ID, SamplingRequest, SubgraphResponse)
+
+
+def _roundtrip(msg):
+    # serialize into an RPC message, which copies the non-tensor payload, and
+    # deserialize from it as the receiver does
+    data, tensors = rpc.serialize_to_payload(msg)
+    rpc_msg = rpc.RPCMessage(0, 0, 0, 0, data, tensors)
+    rpc.deserialize_from_payload(msg.__class__, rpc_msg.data, rpc_msg.tensors)
+    return len(data)
+
+
+@utils.benchmark('time')
+@utils.parametrize('msg_type', ['pull', 'sampling'])
+@utils.parametrize('num_ids', [1000, 100000])
+@utils.parametrize('codec', [False, True])
+def track_time(msg_type, num_ids, codec):
+    """Time to serialize and deserialize one request and its response, i.e. the
+    inverse of the number of message pairs per second."""
+    _register(codec)
+    msgs = _messages(msg_type, num_ids)
+    for msg in msgs:
+        _roundtrip(msg)
+    tic = time.time()
+    for _ in range(NUM_MESSAGES):
+        for msg in msgs:
+            _roundtrip(msg)
+    return (time.time() - tic) / NUM_MESSAGES
+
+
+@utils.benchmark('bytes')
+@utils.parametrize('msg_type', ['pull', 'sampling'])
+@utils.parametrize('codec', [False, True])
+def track_bytes(msg_type, codec):
+    """Bytes of the serialized payload copied for one request and its response.
+    Tensors are sent as tensor payloads without copying in both modes."""
+    _register(codec)
+    return sum(_roundtrip(msg) for msg in _messages(msg_type, 1000))
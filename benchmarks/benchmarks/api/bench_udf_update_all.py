@@ -8,7 +8,7 @@ from .. import utils
 
 
 @utils.benchmark('time', timeout=600)
-@utils.parametrize('graph_name', ['pubmed', 'ogbn-arxiv'])
+@utils.parametrize('graph_name', ['pubmed', 'ogbn-arxiv', 'power-law'])
 @utils.parametrize('format', ['coo'])  # only coo supports udf
 @utils.parametrize('feat_size', [8, 64, 512])
 @utils.parametrize('msg_type', ['copy_u', 'u_mul_e'])
@@ -103,6 +103,8 @@ def get_graph(name, format = None):
             dgl.save_graphs(bin_path, [g])
     elif name.startswith("ogb"):
         g = get_ogb_graph(name)
+    elif name == "power-law":
+        g = get_power_law_graph()
     else:
         raise Exception("Unknown dataset")
     # GRAPH_CACHE[name] = g
@@ -140,6 +142,17 @@ def get_friendster():
     return dgl.graph((src, dst))
 
 
+def get_power_law_graph(num_nodes=100000, avg_degree=10, exponent=1.2, seed=42):
+    # Synthetic graph whose in-degrees follow a Zipf-like distribution, which
+    # produces thousands of distinct in-degrees.
+    rng = np.random.default_rng(seed)
+    num_edges = num_nodes * avg_degree
+    weights = 1. / np.arange(1, num_nodes + 1) ** exponent
+    dst = rng.choice(num_nodes, num_edges, p=weights / weights.sum())
+    src = rng.integers(0, num_nodes, num_edges)
+    return dgl.graph((src, dst), num_nodes=num_nodes)
+
+
 class OGBDataset(object):
     def __init__(self, g, num_labels, predict_category=None):
         self._g = g
@@ -347,16 +360,32 @@ def setup_track_flops(*args, **kwargs):
     torch.random.manual_seed(42)
 
 
+def setup_track_memory(*args, **kwargs):
+    # fix random seed
+    np.random.seed(42)
+    torch.random.manual_seed(42)
+
+
+def setup_track_bytes(*args, **kwargs):
+    # fix random seed
+    np.random.seed(42)
+    torch.random.manual_seed(42)
+
+
 TRACK_UNITS = {
     'time': 's',
     'acc': '%',
     'flops': 'GFLOPS',
+    'memory': 'MB',
+    'bytes': 'B',
 }
 
 TRACK_SETUP = {
     'time': setup_track_time,
     'acc': setup_track_acc,
     'flops': setup_track_flops,
+    'memory': setup_track_memory,
+    'bytes': setup_track_bytes,
 }
 
 
@@ -527,6 +556,8 @@ def benchmark(track_type, timeout=60):
             - 'time' : For timing. Unit: second.
             - 'acc' : For accuracy. Unit: percentage, value between 0 and 100.
             - 'flops' : Unit: GFlops, number of floating point operations per second.
+            - 'memory' : Unit: MB, e.g. peak resident set size.
+            - 'bytes' : Unit: byte, e.g. size of a message.
     timeout : int
         Timeout threshold in second.
 
@@ -538,7 +569,7 @@ def benchmark(track_type, timeout=60):
         def foo():
             pass
     """
-    assert track_type in ['time', 'acc', 'flops']
+    assert track_type in ['time', 'acc', 'flops', 'memory', 'bytes']
 
     def _wrapper(func):
         func.unit = TRACK_UNITS[track_type]
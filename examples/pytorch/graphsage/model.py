@@ -5,7 +5,6 @@ import dgl
 import dgl.nn as dglnn
 import sklearn.linear_model as lm
 import sklearn.metrics as skm
-import tqdm
 
 class SAGE(nn.Module):
     def __init__(self, in_feats, n_hidden, n_classes, n_layers, activation, dropout):
@@ -49,35 +48,10 @@ class SAGE(nn.Module):
         # lots of computations in the first few layers are repeated.
         # Therefore, we compute the representation of all nodes layer by layer.  The nodes
         # on each layer are of course splitted in batches.
-        # TODO: can we standardize this?
-        for l, layer in enumerate(self.layers):
-            y = th.zeros(g.num_nodes(), self.n_hidden if l != len(self.layers) - 1 else self.n_classes)
-
-            sampler = dgl.dataloading.MultiLayerFullNeighborSampler(1)
-            dataloader = dgl.dataloading.NodeDataLoader(
-                g,
-                th.arange(g.num_nodes()).to(g.device),
-                sampler,
-                device=device if num_workers == 0 else None,
-                batch_size=batch_size,
-                shuffle=False,
-                drop_last=False,
-                num_workers=num_workers)
-
-            for input_nodes, output_nodes, blocks in tqdm.tqdm(dataloader):
-                block = blocks[0]
-
-                block = block.int().to(device)
-                h = x[input_nodes].to(device)
-                h = layer(block, h)
-                if l != len(self.layers) - 1:
-                    h = self.activation(h)
-                    h = self.dropout(h)
-
-                y[output_nodes] = h.cpu()
-
-            x = y
-        return y
+        return dgl.dataloading.layerwise_inference(
+            g, self.layers, x, batch_size, device=device,
+            activation=lambda h: self.dropout(self.activation(h)),
+            num_workers=num_workers)
 
 def compute_acc_unsupervised(emb, labels, train_nids, val_nids, test_nids):
     """
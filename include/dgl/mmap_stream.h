@@ -0,0 +1,87 @@
+/*!
+ *  Copyright (c) 2022 by Contributors
+ * \file dgl/mmap_stream.h
+ * \brief Read-only stream backed up by a memory-mapped file.
+ */
+#ifndef DGL_MMAP_STREAM_H_
+#define DGL_MMAP_STREAM_H_
+
+#include <dgl/runtime/ndarray.h>
+#include <dmlc/io.h>
+#include <dmlc/logging.h>
+
+#include <memory>
+#include <string>
+#include <vector>
+
+namespace dgl {
+
+/*!
+ * \brief A read-only stream over a memory-mapped file.
+ *
+ * When an NDArray is loaded from this stream (see NDArray::Load), the returned
+ * NDArray points directly into the mapped file instead of holding a copy of the
+ * data. The file is mapped privately (copy-on-write), so the pages are shared by
+ * all the processes mapping the same file and loaded on demand, while writing to
+ * the NDArray never modifies the file. The mapping is released when the stream and
+ * all the NDArrays loaded from it are destroyed.
+ *
+ * For example:
+ *
+ * MMapReadStream strm("graph.bin");
+ * NDArray arr;
+ * strm.Read(&arr);  // arr is a view of the file content
+ */
+class MMapReadStream : public dmlc::SeekStream {
+ public:
+  /*!
+   * \brief Map the whole file into memory.
+   * \param filename The local file to map.
+   */
+  explicit MMapReadStream(const std::string& filename);
+
+  /*! \brief Whether memory-mapped files are supported on the current platform. */
+  static bool IsSupported();
+
+  size_t Read(void* ptr, size_t size) override;
+
+  void Write(const void* ptr, size_t size) override {
+    LOG(FATAL) << "MMapReadStream is read-only.";
+  }
+
+  void Seek(size_t pos) override {
+    CHECK_LE(pos, size_) << "Seek out of the range of the file.";
+    pos_ = pos;
+  }
+
+  size_t Tell() override { return pos_; }
+
+  /*!
+   * \brief Return an NDArray that views the next \a nbytes bytes of the file and
+   * move forward the stream.
+   *
+   * If the current position is not aligned to the element size, the data is
+   * copied instead.
+   *
+   * \param shape The shape of the NDArray.
+   * \param dtype The data type of the NDArray.
+   * \param nbytes The number of bytes of the data.
+   * \return The NDArray.
+   */
+  runtime::NDArray ViewNDArray(const std::vector<int64_t>& shape, DLDataType dtype,
+                               int64_t nbytes);
+
+  using dmlc::Stream::Read;
+  using dmlc::Stream::Write;
+
+ private:
+  struct Mapping;
+  std::shared_ptr<Mapping> mapping_;
+  const char* data_ = nullptr;
+  size_t size_ = 0;
+  size_t pos_ = 0;
+};
+
+}  // namespace dgl
+
+#endif  // DGL_MMAP_STREAM_H_
@@ -116,22 +116,19 @@ def invoke_udf_reduce(graph, func, msgdata, *, orig_nid=None):
     msgdata = Frame(msgdata)
 
     # degree bucketing
-    unique_degs, bucketor = _bucketing(degs)
+    unique_degs, bucketor, bkt_eids = _bucketing(degs, _in_edges_dst(graph))
     bkt_rsts = []
     bkt_nodes = []
-    for deg, node_bkt, orig_nid_bkt in zip(unique_degs, bucketor(nodes), bucketor(orig_nid)):
+    for deg, node_bkt, orig_nid_bkt, eid_bkt in zip(
+            unique_degs, bucketor(nodes), bucketor(orig_nid), bkt_eids):
         if deg == 0:
             # skip reduce function for zero-degree nodes
             continue
         bkt_nodes.append(node_bkt)
         ndata_bkt = dstdata.subframe(node_bkt)
 
-        # order the incoming edges per node by edge ID
-        eid_bkt = F.zerocopy_to_numpy(graph.in_edges(node_bkt, form='eid'))
+        # incoming edges are already grouped per node and ordered by edge ID
         assert len(eid_bkt) == deg * len(node_bkt)
-        eid_bkt = np.sort(eid_bkt.reshape((len(node_bkt), deg)), 1)
-        eid_bkt = F.zerocopy_from_numpy(eid_bkt.flatten())
-
         msgdata_bkt = msgdata.subframe(eid_bkt)
         # reshape all msg tensors to (num_nodes_bkt, degree, feat_size)
         maildata = {}
@@ -157,32 +154,63 @@ def invoke_udf_reduce(graph, func, msgdata, *, orig_nid=None):
 
     return retf
 
-def _bucketing(val):
+def _in_edges_dst(graph):
+    """Return the destination node of every edge in edge ID order as a numpy array."""
+    _, dst = graph.edges(order='eid')
+    return F.asnumpy(dst)
+
+def _bucketing(val, edge_dst=None):
     """Internal function to create groups on the values.
 
+    The values are grouped with a single stable sort followed by a segment
+    split, so the cost does not grow with the number of unique values.
+
     Parameters
     ----------
     val : Tensor
         Value tensor.
+    edge_dst : numpy.ndarray, optional
+        If given, treat :attr:`val` as the in-degrees of the nodes and
+        ``edge_dst[i]`` as the destination node of edge ``i``. The edges are
+        then grouped in the same way as the nodes.
 
     Returns
     -------
-    unique_val : Tensor
+    unique_val : numpy.ndarray
         Unique values.
     bucketor : callable[Tensor -> list[Tensor]]
         A bucketing function that splits the given tensor data as the same
         way of how the :attr:`val` tensor is grouped.
+    bkt_eids : list[Tensor]
+        Only returned if :attr:`edge_dst` is given. The IDs of the incoming
+        edges of each bucket. Within a bucket, the edges are grouped by their
+        destination nodes in the same order as the bucketed nodes, and the
+        edges of each node are ordered by edge ID.
     """
-    sorted_val, idx = F.sort_1d(val)
-    unique_val = F.asnumpy(F.unique(sorted_val))
-    bkt_idx = []
-    for v in unique_val:
-        eqidx = F.nonzero_1d(F.equal(sorted_val, v))
-        bkt_idx.append(F.gather_row(idx, eqidx))
+    np_val = F.asnumpy(val)
+    order = np.argsort(np_val, kind='stable')
+    unique_val, bkt_sizes = np.unique(np_val[order], return_counts=True)
+    bkt_offsets = np.concatenate([[0], np.cumsum(bkt_sizes)])
+    idx = F.copy_to(F.zerocopy_from_numpy(order), F.context(val))
+    bkt_idx = [F.narrow_row(idx, bkt_offsets[i], bkt_offsets[i + 1])
+               for i in range(len(unique_val))]
     def bucketor(data):
         bkts = [F.gather_row(data, idx) for idx in bkt_idx]
         return bkts
-    return unique_val, bucketor
+    if edge_dst is None:
+        return unique_val, bucketor
+
+    # Sort the edges by the position of their destination nodes in the bucketed
+    # node order. The sort is stable, so edges of the same node stay ordered by
+    # edge ID and every bucket owns a contiguous range of the permutation.
+    rank = np.empty((len(order),), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    perm = np.argsort(rank[edge_dst], kind='stable')
+    eids = F.copy_to(F.zerocopy_from_numpy(perm), F.context(val))
+    edge_offsets = np.concatenate([[0], np.cumsum(unique_val * bkt_sizes)])
+    bkt_eids = [F.narrow_row(eids, edge_offsets[i], edge_offsets[i + 1])
+                for i in range(len(unique_val))]
+    return unique_val, bucketor, bkt_eids
 
 def data_dict_to_list(graph, data_dict, func, target):
     """Get node or edge feature data of the given name for all the types.
@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from .dgl_dataset import DGLDataset
 from .utils import save_graphs, load_graphs
@@ -33,6 +34,16 @@ class DGLCSVDataset(DGLDataset):
         A callable object which is used to parse corresponding column graph
         data. Default: None. If None, a default data parser is applied
         which load data directly and tries to convert list into array.
+    chunk_size : int, optional
+        If given, CSV files are read and parsed in chunks of this many rows, so
+        that only one chunk of raw data is kept in memory at a time. IDs and
+        parsed data are accumulated into preallocated arrays. Data parsers are
+        then called once per chunk and must return arrays of the chunk length.
+        Default: None, which reads every CSV file at once.
+    num_workers : int, optional
+        Number of processes used to load the CSV files in parallel, one file per
+        process at a time. Data parsers must be picklable if it is positive.
+        Default: 0, which loads the files in the main process.
 
     Attributes
     ----------
@@ -46,7 +57,8 @@ class DGLCSVDataset(DGLDataset):
     """
     META_YAML_NAME = 'meta.yaml'
 
-    def __init__(self, data_path, force_reload=False, verbose=True, node_data_parser=None, edge_data_parser=None, graph_data_parser=None):
+    def __init__(self, data_path, force_reload=False, verbose=True, node_data_parser=None,
+                 edge_data_parser=None, graph_data_parser=None, chunk_size=None, num_workers=0):
         from .csv_dataset_base import load_yaml_with_sanity_check, DefaultDataParser
         self.graphs = None
         self.data = None
@@ -54,6 +66,8 @@ class DGLCSVDataset(DGLDataset):
         self.edge_data_parser = {} if edge_data_parser is None else edge_data_parser
         self.graph_data_parser = graph_data_parser
         self.default_data_parser = DefaultDataParser()
+        self.chunk_size = chunk_size
+        self.num_workers = num_workers
         meta_yaml_path = os.path.join(data_path, DGLCSVDataset.META_YAML_NAME)
         if not os.path.exists(meta_yaml_path):
             raise DGLError(
@@ -70,32 +84,40 @@ class DGLCSVDataset(DGLDataset):
         from .csv_dataset_base import NodeData, EdgeData, GraphData, DGLGraphConstructor
         meta_yaml = self.meta_yaml
         base_dir = self.raw_dir
-        node_data = []
+        tasks = []
         for meta_node in meta_yaml.node_data:
             if meta_node is None:
                 continue
             ntype = meta_node.ntype
             data_parser = self.node_data_parser.get(
                 ntype, self.default_data_parser)
-            ndata = NodeData.load_from_csv(
-                meta_node, base_dir=base_dir, separator=meta_yaml.separator, data_parser=data_parser)
-            node_data.append(ndata)
-        edge_data = []
+            tasks.append((NodeData.load_from_csv, meta_node, data_parser))
         for meta_edge in meta_yaml.edge_data:
             if meta_edge is None:
                 continue
             etype = tuple(meta_edge.etype)
             data_parser = self.edge_data_parser.get(
                 etype, self.default_data_parser)
-            edata = EdgeData.load_from_csv(
-                meta_edge, base_dir=base_dir, separator=meta_yaml.separator, data_parser=data_parser)
-            edge_data.append(edata)
-        graph_data = None
+            tasks.append((EdgeData.load_from_csv, meta_edge, data_parser))
         if meta_yaml.graph_data is not None:
             meta_graph = meta_yaml.graph_data
             data_parser = self.default_data_parser if self.graph_data_parser is None else self.graph_data_parser
-            graph_data = GraphData.load_from_csv(
-                meta_graph, base_dir=base_dir, separator=meta_yaml.separator, data_parser=data_parser)
+            tasks.append((GraphData.load_from_csv, meta_graph, data_parser))
+        kwargs = {'base_dir': base_dir, 'separator': meta_yaml.separator,
+                  'chunk_size': self.chunk_size}
+        if self.num_workers > 0 and len(tasks) > 1:
+            with ProcessPoolExecutor(min(self.num_workers, len(tasks))) as pool:
+                futures = [pool.submit(load, meta, data_parser=data_parser, **kwargs)
+                           for load, meta, data_parser in tasks]
+                results = [future.result() for future in futures]
+        else:
+            results = [load(meta, data_parser=data_parser, **kwargs)
+                       for load, meta, data_parser in tasks]
+        node_data = [r for r in results if isinstance(r, NodeData)]
+        edge_data = [r for r in results if isinstance(r, EdgeData)]
+        graph_data = None
+        if meta_yaml.graph_data is not None:
+            graph_data = results[-1]
         # construct graphs
         self.graphs, self.data = DGLGraphConstructor.construct_graphs(
             node_data, edge_data, graph_data)
@@ -1,4 +1,5 @@
 import os
+import warnings
 import numpy as np
 from typing import List, Optional, Callable
 from .. import backend as F
@@ -77,14 +78,119 @@ def _validate_data_length(data_dict):
             "All data are required to have same length while some of them does not. Length of data={}".format(str(len_dict)))
 
 
+def _count_lines(file_path, block_size=1 << 24):
+    """ Count the lines of a file without parsing it. Internal use only. """
+    count = 0
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            count += block.count(b'\n')
+    return count
+
+
+class _ArrayBuffer:
+    """ Preallocated buffer to which arrays are appended along the first axis.
+        It grows geometrically if the initial capacity is exceeded. Internal use only.
+    """
+
+    def __init__(self, capacity, dtype=None):
+        self.capacity = capacity
+        self.dtype = dtype
+        self.buffer = None
+        self.size = 0
+
+    def append(self, arr):
+        arr = np.asarray(arr, dtype=self.dtype)
+        if arr.ndim == 0:
+            arr = arr.reshape(1)
+        if self.buffer is None:
+            self.buffer = np.empty((max(self.capacity, len(arr)),) + arr.shape[1:],
+                                   dtype=arr.dtype)
+        elif arr.shape[1:] != self.buffer.shape[1:]:
+            raise DGLError("Inconsistent data shape across chunks: {} vs {}.".format(
+                self.buffer.shape[1:], arr.shape[1:]))
+        else:
+            dtype = np.result_type(self.buffer.dtype, arr.dtype)
+            if dtype != self.buffer.dtype:
+                self.buffer = self.buffer.astype(dtype)
+        end = self.size + len(arr)
+        if end > len(self.buffer):
+            buffer = np.empty((max(end, 2 * len(self.buffer)),) + self.buffer.shape[1:],
+                              dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+        self.buffer[self.size:end] = arr
+        self.size = end
+
+    def finalize(self):
+        if self.buffer is None:
+            return np.empty((0,), dtype=self.dtype or np.float64)
+        if self.size < len(self.buffer):
+            # shrink in place so that the unused capacity is given back
+            self.buffer.resize((self.size,) + self.buffer.shape[1:], refcheck=False)
+        return self.buffer
+
+
+def _map_node_ids(sorted_ids, ids, ntype):
+    """ Map the node IDs in CSV to their positions in the sorted unique node IDs.
+        Internal use only.
+    """
+    pos = np.searchsorted(sorted_ids, ids)
+    if len(ids) > 0:
+        found = pos < len(sorted_ids)
+        found[found] = sorted_ids[pos[found]] == ids[found]
+        if not np.all(found):
+            raise DGLError("Found node IDs of type [{}] in edge CSV but not in node CSV: {}.".format(
+                ntype, np.unique(ids[~found])))
+    return pos
+
+
 class BaseData:
     """ Class of base data which is inherited by Node/Edge/GraphData. Internal use only. """
     @staticmethod
-    def read_csv(file_name, base_dir, separator):
+    def read_csv(file_name, base_dir, separator, chunk_size=None):
         csv_path = file_name
         if base_dir is not None:
             csv_path = os.path.join(base_dir, csv_path)
-        return pd.read_csv(csv_path, sep=separator)
+        return pd.read_csv(csv_path, sep=separator, chunksize=chunk_size)
+
+    @staticmethod
+    def read_csv_in_chunks(file_name, base_dir, separator, chunk_size, id_fields,
+                           data_parser: Callable):
+        """ Read a CSV file chunk by chunk and parse every chunk right away, so that
+            at most one chunk of raw data is kept in memory.
+
+            ``id_fields`` maps the name of every ID column to its description, which
+            is used in the error message if the column is missing. The ID columns are
+            accumulated into int64 buffers preallocated with the number of lines of
+            the file, and the parsed data into buffers of the same size.
+
+            Returns the dictionaries of ID columns and parsed data.
+        """
+        csv_path = file_name
+        if base_dir is not None:
+            csv_path = os.path.join(base_dir, csv_path)
+        num_rows = _count_lines(csv_path)
+        ids = {field: _ArrayBuffer(num_rows, dtype=np.int64) for field in id_fields}
+        missing = set()
+        data = {}
+        for i, df in enumerate(pd.read_csv(csv_path, sep=separator, chunksize=chunk_size)):
+            if i == 0:
+                missing = {field for field in id_fields if field not in df}
+                for field, desc in id_fields.items():
+                    if field in missing and desc is not None:
+                        raise DGLError("Missing {} field [{}] in file [{}].".format(
+                            desc, field, file_name))
+            for field, buffer in ids.items():
+                if field not in missing:
+                    buffer.append(BaseData.pop_from_dataframe(df, field))
+            for key, value in data_parser(df).items():
+                if key not in data:
+                    data[key] = _ArrayBuffer(num_rows)
+                data[key].append(value)
+        ids = {field: None if field in missing else buffer.finalize()
+               for field, buffer in ids.items()}
+        data = {key: buffer.finalize() for key, buffer in data.items()}
+        return ids, data
 
     @staticmethod
     def pop_from_dataframe(df: pd.DataFrame, item: str):
@@ -100,7 +206,7 @@ class NodeData(BaseData):
     """ Class of node data which is used for DGLGraph construction. Internal use only. """
 
     def __init__(self, node_id, data, type=None, graph_id=None):
-        self.id = np.array(node_id, dtype=np.int64)
+        self.id = np.asarray(node_id, dtype=np.int64)
         self.data = data
         self.type = type if type is not None else '_V'
         self.graph_id = np.array(graph_id, dtype=np.int) if graph_id is not None else np.full(
@@ -108,7 +214,14 @@ class NodeData(BaseData):
         _validate_data_length({**{'id': self.id, 'graph_id': self.graph_id}, **self.data})
 
     @staticmethod
-    def load_from_csv(meta: MetaNode, data_parser: Callable, base_dir=None, separator=','):
+    def load_from_csv(meta: MetaNode, data_parser: Callable, base_dir=None, separator=',',
+                      chunk_size=None):
+        if chunk_size is not None:
+            ids, ndata = BaseData.read_csv_in_chunks(
+                meta.file_name, base_dir, separator, chunk_size,
+                {meta.node_id_field: 'node id', meta.graph_id_field: None}, data_parser)
+            return NodeData(ids[meta.node_id_field], ndata, type=meta.ntype,
+                            graph_id=ids[meta.graph_id_field])
         df = BaseData.read_csv(meta.file_name, base_dir, separator)
         node_ids = BaseData.pop_from_dataframe(df, meta.node_id_field)
         graph_ids = BaseData.pop_from_dataframe(df, meta.graph_id_field)
@@ -134,8 +247,8 @@ class NodeData(BaseData):
                         "There exist duplicated ids and only the first ones are kept.")
                 if graph_id not in node_dict:
                     node_dict[graph_id] = {}
-                node_dict[graph_id][n_data.type] = {'mapping': {index: i for i,
-                                                                index in enumerate(ids[u_indices])},
+                # new node IDs are the positions in the sorted unique IDs
+                node_dict[graph_id][n_data.type] = {'mapping': u_ids,
                                                     'data': {k: F.tensor(v[idx][u_indices])
                                                              for k, v in n_data.data.items()}}
         return node_dict
@@ -145,8 +258,8 @@ class EdgeData(BaseData):
     """ Class of edge data which is used for DGLGraph construction. Internal use only. """
 
     def __init__(self, src_id, dst_id, data, type=None, graph_id=None):
-        self.src = np.array(src_id, dtype=np.int64)
-        self.dst = np.array(dst_id, dtype=np.int64)
+        self.src = np.asarray(src_id, dtype=np.int64)
+        self.dst = np.asarray(dst_id, dtype=np.int64)
         self.data = data
         self.type = type if type is not None else ('_V', '_E', '_V')
         self.graph_id = np.array(graph_id, dtype=np.int) if graph_id is not None else np.full(
@@ -154,7 +267,15 @@ class EdgeData(BaseData):
         _validate_data_length({**{'src': self.src, 'dst': self.dst, 'graph_id': self.graph_id}, **self.data})
 
     @staticmethod
-    def load_from_csv(meta: MetaEdge, data_parser: Callable, base_dir=None, separator=','):
+    def load_from_csv(meta: MetaEdge, data_parser: Callable, base_dir=None, separator=',',
+                      chunk_size=None):
+        if chunk_size is not None:
+            ids, edata = BaseData.read_csv_in_chunks(
+                meta.file_name, base_dir, separator, chunk_size,
+                {meta.src_id_field: 'src id', meta.dst_id_field: 'dst id',
+                 meta.graph_id_field: None}, data_parser)
+            return EdgeData(ids[meta.src_id_field], ids[meta.dst_id_field], edata,
+                            type=tuple(meta.etype), graph_id=ids[meta.graph_id_field])
         df = BaseData.read_csv(meta.file_name, base_dir, separator)
         src_ids = BaseData.pop_from_dataframe(df, meta.src_id_field)
         if src_ids is None:
@@ -181,8 +302,8 @@ class EdgeData(BaseData):
                 idx = e_data.graph_id == graph_id
                 src_mapping = node_dict[graph_id][src_type]['mapping']
                 dst_mapping = node_dict[graph_id][dst_type]['mapping']
-                src_ids = [src_mapping[index] for index in e_data.src[idx]]
-                dst_ids = [dst_mapping[index] for index in e_data.dst[idx]]
+                src_ids = _map_node_ids(src_mapping, e_data.src[idx], src_type)
+                dst_ids = _map_node_ids(dst_mapping, e_data.dst[idx], dst_type)
                 if graph_id not in edge_dict:
                     edge_dict[graph_id] = {}
                 edge_dict[graph_id][e_data.type] = {'edges': (F.tensor(src_ids), F.tensor(dst_ids)),
@@ -200,7 +321,13 @@ class GraphData(BaseData):
         _validate_data_length({**{'graph_id': self.graph_id}, **self.data})
 
     @staticmethod
-    def load_from_csv(meta: MetaGraph, data_parser: Callable, base_dir=None, separator=','):
+    def load_from_csv(meta: MetaGraph, data_parser: Callable, base_dir=None, separator=',',
+                      chunk_size=None):
+        if chunk_size is not None:
+            ids, gdata = BaseData.read_csv_in_chunks(
+                meta.file_name, base_dir, separator, chunk_size,
+                {meta.graph_id_field: 'graph id'}, data_parser)
+            return GraphData(ids[meta.graph_id_field], gdata)
         df = BaseData.read_csv(meta.file_name, base_dir, separator)
         graph_ids = BaseData.pop_from_dataframe(df, meta.graph_id_field)
         if graph_ids is None:
@@ -282,9 +409,42 @@ class DefaultDataParser:
             if 'Unnamed' in header:
                 dgl_warning("Unamed column is found. Ignored...")
                 continue
-            dt = df[header].to_numpy().squeeze()
+            # a chunk may have a single row, which squeeze() would turn into a scalar
+            dt = np.atleast_1d(df[header].to_numpy().squeeze())
             if len(dt) > 0 and isinstance(dt[0], str):
                 #probably consists of list of numeric values
-                dt = np.array([ast.literal_eval(row) for row in dt])
+                parsed = _parse_numeric_lists(dt)
+                if parsed is None:
+                    parsed = np.array([ast.literal_eval(row) for row in dt])
+                dt = parsed
             data[header] = dt
         return data
+
+
+_BRACKETS = str.maketrans('', '', '[]')
+
+
+def _parse_numeric_lists(cells):
+    """ Parse an array of strings like '[0.1, 0.2]' into a 2D numpy array in one go
+        instead of evaluating every cell. Returns None if the cells are not flat lists
+        of numbers of the same length, in which case the caller should fall back to
+        ``ast.literal_eval``. Internal use only.
+    """
+    cells = np.asarray(cells, dtype=str)
+    if np.any(np.char.count(cells, '[') != 1):
+        return None
+    row_len = np.char.count(cells, ',') + 1
+    if np.any(row_len != row_len[0]):
+        return None
+    joined = ','.join(cells).translate(_BRACKETS)
+    is_float = any(c in joined for c in '.eEnN')
+    with warnings.catch_warnings():
+        # numpy warns instead of failing if it cannot parse the whole string
+        warnings.simplefilter('ignore', DeprecationWarning)
+        try:
+            values = np.fromstring(joined, dtype=np.float64 if is_float else np.int64, sep=',')
+        except ValueError:
+            return None
+    if values.size != len(cells) * row_len[0]:
+        return None
+    return values.reshape(len(cells), row_len[0])
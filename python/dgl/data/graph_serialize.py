@@ -134,7 +134,7 @@ def save_graphs(filename, g_list, labels=None):
 
 
 
-def load_graphs(filename, idx_list=None):
+def load_graphs(filename, idx_list=None, mmap=False):
     """Load graphs and optionally their labels from file saved by :func:`save_graphs`.
 
     Besides loading from local files, DGL supports loading the graphs directly
@@ -148,6 +148,14 @@ def load_graphs(filename, idx_list=None):
     idx_list: list[int], optional
         The indices of the graphs to be loaded if the file contains multiple graphs.
         Default is loading all the graphs stored in the file.
+    mmap: bool, optional
+        If True, the graph structures and the node/edge features are mapped from the
+        file instead of being copied into memory. The pages are then loaded on demand
+        and shared by all the processes loading the same file. The file is mapped
+        copy-on-write, so in-place modification of the loaded tensors never changes
+        the file. Only supported for local files saved by the current version of DGL
+        on non-Windows platforms. The file must not be modified while the graphs are
+        in use. Default: False.
 
     Returns
     --------
@@ -165,6 +173,7 @@ def load_graphs(filename, idx_list=None):
     >>> from dgl.data.utils import load_graphs
     >>> glist, label_dict = load_graphs("./data.bin") # glist will be [g1, g2]
     >>> glist, label_dict = load_graphs("./data.bin", [0]) # glist will be [g1]
+    >>> glist, label_dict = load_graphs("./data.bin", mmap=True) # no copy of the data
 
     See Also
     --------
@@ -172,24 +181,32 @@ def load_graphs(filename, idx_list=None):
     """
     # if it is local file, do some sanity check
     check_local_file_exists(filename)
+    if mmap:
+        if not is_local_path(filename):
+            raise DGLError("mmap=True is only supported for local files.")
+        if not _CAPI_IsMMapSupported():
+            raise DGLError("mmap=True is not supported on this platform.")
     version = _CAPI_GetFileVersion(filename)
     if version == 1:
+        if mmap:
+            raise DGLError("mmap=True is not supported for graph files saved by "
+                           "old version of dgl. Please save it again with the current format.")
         dgl_warning(
             "You are loading a graph file saved by old version of dgl.  \
             Please consider saving it again with the current format.")
         return load_graph_v1(filename, idx_list)
     elif version == 2:
-        return load_graph_v2(filename, idx_list)
+        return load_graph_v2(filename, idx_list, mmap)
     else:
         raise DGLError("Invalid DGL Version Number.")
 
 
-def load_graph_v2(filename, idx_list=None):
+def load_graph_v2(filename, idx_list=None, mmap=False):
     """Internal functions for loading DGLHeteroGraphs."""
     if idx_list is None:
         idx_list = []
     assert isinstance(idx_list, list)
-    heterograph_list = _CAPI_LoadGraphFiles_V2(filename, idx_list)
+    heterograph_list = _CAPI_LoadGraphFiles_V2(filename, idx_list, mmap)
     label_dict = load_labels_v2(filename)
     return [gdata.get_graph() for gdata in heterograph_list], label_dict
 
@@ -19,7 +19,11 @@ from .neighbor_sampler import *
 from .cluster_gcn import *
 from .shadow import *
 from .base import *
+from .frontier_cache import *
+from .packed import *
+from .profiler import *
 from . import negative_sampler
 if F.get_preferred_backend() == 'pytorch':
     from .dataloader import *
     from .dist_dataloader import *
+    from .inference import *
@@ -47,13 +47,18 @@ class BlockSampler(object):
     Moreover, it assumes that the input node features will be put in the first block's
     ``srcdata``, the output node labels will be put in the last block's ``dstdata``, and
     the edge data will be put in all the blocks' ``edata``.
+
+    A :class:`~dgl.dataloading.FrontierCache` can be given as :attr:`frontier_cache` to
+    reuse the sampled neighbors across minibatches and epochs, if the sampler supports it
+    (e.g. :class:`~dgl.dataloading.NeighborSampler`).
     """
     def __init__(self, prefetch_node_feats=None, prefetch_labels=None,
-                 prefetch_edge_feats=None, output_device=None):
+                 prefetch_edge_feats=None, output_device=None, frontier_cache=None):
         self.prefetch_node_feats = prefetch_node_feats or []
         self.prefetch_labels = prefetch_labels or []
         self.prefetch_edge_feats = prefetch_edge_feats or []
         self.output_device = output_device
+        self.frontier_cache = frontier_cache
 
     def sample_blocks(self, g, seed_nodes, exclude_eids=None):
         """Generates a list of blocks from the given seed nodes.
@@ -1,8 +1,12 @@
 """DGL PyTorch DataLoaders"""
 from collections.abc import Mapping, Sequence
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue, Empty, Full
 import itertools
+import os
 import threading
+import time
 from distutils.version import LooseVersion
 import random
 import math
@@ -13,7 +17,7 @@ import torch
 import torch.distributed as dist
 from torch.utils.data.distributed import DistributedSampler
 
-from ..base import NID, EID, dgl_warning
+from ..base import NID, EID, DGLError, dgl_warning
 from ..batch import batch as batch_graphs
 from ..heterograph import DGLHeteroGraph
 from .. import ndarray as nd
@@ -23,6 +27,8 @@ from ..utils import (
 from ..frame import LazyFeature
 from ..storages import wrap_storage
 from .base import BlockSampler, EdgeBlockSampler
+from .packed import PackedGraphIndex, PackedGraphBatch
+from .profiler import DataLoaderProfiler
 from .. import backend as F
 
 class _TensorizedDatasetIter(object):
@@ -314,33 +320,252 @@ def _assign_for(item, feat):
         return item
 
 
-def _prefetcher_entry(dataloader_it, dataloader, queue, num_threads, use_alternate_streams):
+class _SampledBatch(object):
+    """A batch returned by :class:`CollateWrapper` with the time span of its sampling,
+    when the DataLoader is being profiled."""
+    __slots__ = ['batch', 'span']
+
+    def __init__(self, batch, span):
+        self.batch = batch
+        self.span = span
+
+
+def _start_batch_record(batch, profiler):
+    """Unwraps a batch returned by :class:`CollateWrapper` and starts its profiling record
+    if the DataLoader is being profiled."""
+    sample_span = None
+    if isinstance(batch, _SampledBatch):
+        batch, sample_span = batch.batch, batch.span
+    if profiler is None:
+        return batch, None
+    record = profiler.new_record()
+    if sample_span is not None:
+        record.spans['sample'] = sample_span
+        if sample_span[2] != os.getpid():
+            record.spans['ipc'] = (sample_span[1], time.time(), os.getpid())
+
+    def _add_block(item):
+        if isinstance(item, DGLHeteroGraph) and item.is_block:
+            record.blocks.append(
+                (item.num_src_nodes(), item.num_dst_nodes(), item.num_edges()))
+        return item
+    recursive_apply(batch, _add_block)
+    return batch, record
+
+
+def _num_bytes(data):
+    """Returns the total number of bytes of the tensors in a nested structure."""
+    total = [0]
+
+    def _add(x):
+        if isinstance(x, _PrefetchedGraphFeatures):
+            _add(x.node_feats)
+            _add(x.edge_feats)
+        elif isinstance(x, Mapping):
+            for v in x.values():
+                _add(v)
+        elif isinstance(x, Sequence) and not isinstance(x, str):
+            for v in x:
+                _add(v)
+        elif torch.is_tensor(x):
+            total[0] += x.element_size() * x.numel()
+    _add(data)
+    return total[0]
+
+
+def _record_span(record, stage, tic, data=None):
+    """Records the time span of a stage started at ``tic``, as well as the number of
+    bytes of the given data."""
+    record.spans[stage] = (tic, time.time(), os.getpid())
+    if data is not None:
+        record.bytes[stage] = _num_bytes(data)
+
+
+class _PrefetchStageStats(object):
+    """Counters of one stage of the prefetching pipeline.
+
+    ``busy_time`` is the time spent on the work of the stage, ``input_wait_time`` the time
+    spent waiting for the previous stage and ``output_wait_time`` the time spent waiting for
+    the next stage to free a slot in the output queue.  ``occupancy_sum`` accumulates the
+    fraction of the output queue that is filled whenever the stage outputs a batch.
+    """
+    __slots__ = ['num_batches', 'busy_time', 'input_wait_time', 'output_wait_time',
+                 'occupancy_sum', 'lock']
+
+    def __init__(self):
+        self.num_batches = 0
+        self.busy_time = 0.
+        self.input_wait_time = 0.
+        self.output_wait_time = 0.
+        self.occupancy_sum = 0.
+        # the feature gathering stage updates busy_time from several threads
+        self.lock = threading.Lock()
+
+    def add_busy_time(self, elapsed):
+        """Adds to the busy time in a thread-safe manner."""
+        with self.lock:
+            self.busy_time += elapsed
+
+    def as_dict(self):
+        """Returns the counters as a dictionary."""
+        return {
+            'num_batches': self.num_batches,
+            'busy_time': self.busy_time,
+            'input_wait_time': self.input_wait_time,
+            'output_wait_time': self.output_wait_time,
+            'mean_occupancy': self.occupancy_sum / max(self.num_batches, 1)}
+
+
+_PREFETCH_STAGES = ['sample', 'fetch', 'transfer']
+
+
+def _get_prefetch_depth(prefetch_depth):
+    if isinstance(prefetch_depth, int):
+        prefetch_depth = [prefetch_depth] * len(_PREFETCH_STAGES)
+    elif isinstance(prefetch_depth, Mapping):
+        prefetch_depth = [prefetch_depth.get(stage, 1) for stage in _PREFETCH_STAGES]
+    else:
+        prefetch_depth = list(prefetch_depth)
+    if len(prefetch_depth) != len(_PREFETCH_STAGES) or \
+            any(not isinstance(d, int) or d <= 0 for d in prefetch_depth):
+        raise DGLError(
+            'prefetch_depth must be a positive integer, or a sequence or dict of positive '
+            'integers for the stages {}.'.format(_PREFETCH_STAGES))
+    return prefetch_depth
+
+
+def _stage_get(queue, stats, stop=None):
+    # Returns None if the consumer stopped iterating.
+    tic = time.time()
+    while stop is None or not stop.is_set():
+        try:
+            item = queue.get(timeout=None if stop is None else 0.1)
+            stats.input_wait_time += time.time() - tic
+            return item
+        except Empty:
+            continue
+    return None
+
+
+def _stage_put(queue, item, stats, stop):
+    # Gives up if the consumer stopped iterating so that the stage threads can exit.
+    tic = time.time()
+    stats.occupancy_sum += queue.qsize() / queue.maxsize
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            stats.output_wait_time += time.time() - tic
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _sample_stage_entry(dataloader_it, dataloader, out_queue, stats, stop, num_threads,
+                        profiler, records):
     # PyTorch will set the number of threads to 1 which slows down pin_memory() calls
     # in main process if a prefetching thread is created.
     if num_threads is not None:
         torch.set_num_threads(num_threads)
-    if use_alternate_streams:
-        stream = (
-                torch.cuda.Stream(device=dataloader.device)
-                if dataloader.device.type == 'cuda' else None)
-    else:
-        stream = None
 
     try:
-        for batch in dataloader_it:
+        while not stop.is_set():
+            tic = time.time()
+            try:
+                batch = next(dataloader_it)
+            except StopIteration:
+                break
+            batch, record = _start_batch_record(batch, profiler)
+            if record is not None:
+                records.append(record)
             batch = recursive_apply(batch, restore_parent_storage_columns, dataloader.graph)
-            feats = _prefetch(batch, dataloader, stream)
-
-            queue.put((
-                # batch will be already in pinned memory as per the behavior of
-                # PyTorch DataLoader.
-                recursive_apply(batch, lambda x: x.to(dataloader.device, non_blocking=True)),
-                feats,
-                stream.record_event() if stream is not None else None,
-                None))
-        queue.put((None, None, None, None))
+            stats.busy_time += time.time() - tic
+            if not _stage_put(out_queue, (batch, None), stats, stop):
+                return
+            stats.num_batches += 1
+        _stage_put(out_queue, (None, None), stats, stop)
+    except:     # pylint: disable=bare-except
+        _stage_put(out_queue, (None, ExceptionWrapper(where='in prefetcher')), stats, stop)
+
+
+def _fetch_stage_entry(dataloader, in_queue, out_queue, stats, stop, num_threads,
+                       num_fetch_threads, use_alternate_streams, records):
+    local = threading.local()
+
+    def _init_fetch_thread():
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        if use_alternate_streams and dataloader.device.type == 'cuda':
+            local.stream = torch.cuda.Stream(device=dataloader.device)
+        else:
+            local.stream = None
+
+    def _fetch(batch, record):
+        tic = time.time()
+        feats = _prefetch(batch, dataloader, local.stream)
+        stream_event = local.stream.record_event() if local.stream is not None else None
+        stats.add_busy_time(time.time() - tic)
+        if record is not None:
+            _record_span(record, 'fetch', tic, feats)
+        return feats, stream_event
+
+    # The futures are put in the output queue in the order of the batches, so the
+    # batches are gathered concurrently but still delivered in order.
+    executor = ThreadPoolExecutor(num_fetch_threads, initializer=_init_fetch_thread)
+    try:
+        while True:
+            item = _stage_get(in_queue, stats, stop)
+            if item is None:
+                return
+            batch, exception = item
+            if batch is None:
+                _stage_put(out_queue, (None, None, exception), stats, stop)
+                return
+            record = records[stats.num_batches] if records is not None else None
+            if not _stage_put(
+                    out_queue, (batch, executor.submit(_fetch, batch, record), None), stats,
+                    stop):
+                return
+            stats.num_batches += 1
+    except:     # pylint: disable=bare-except
+        _stage_put(
+            out_queue, (None, None, ExceptionWrapper(where='in prefetcher')), stats, stop)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _transfer_stage_entry(dataloader, in_queue, out_queue, stats, stop, num_threads,
+                          records):
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+
+    try:
+        while True:
+            item = _stage_get(in_queue, stats, stop)
+            if item is None:
+                return
+            batch, future, exception = item
+            if batch is None:
+                _stage_put(out_queue, (None, None, None, exception), stats, stop)
+                return
+            tic = time.time()
+            feats, stream_event = future.result()
+            stats.input_wait_time += time.time() - tic
+            tic = time.time()
+            # batch will be already in pinned memory as per the behavior of
+            # PyTorch DataLoader.
+            batch = recursive_apply(
+                batch, lambda x: x.to(dataloader.device, non_blocking=True))
+            stats.busy_time += time.time() - tic
+            if records is not None:
+                _record_span(records[stats.num_batches], 'transfer', tic, batch)
+            if not _stage_put(out_queue, (batch, feats, stream_event, None), stats, stop):
+                return
+            stats.num_batches += 1
     except:     # pylint: disable=bare-except
-        queue.put((None, None, None, ExceptionWrapper(where='in prefetcher')))
+        _stage_put(
+            out_queue, (None, None, None, ExceptionWrapper(where='in prefetcher')),
+            stats, stop)
 
 
 # DGLHeteroGraphs have the semantics of lazy feature slicing with subgraphs.  Such behavior depends
@@ -395,8 +620,7 @@ def restore_parent_storage_columns(item, g):
 
 class _PrefetchingIter(object):
     def __init__(self, dataloader, dataloader_it, use_thread=False, use_alternate_streams=True,
-                 num_threads=None):
-        self.queue = Queue(1)
+                 num_threads=None, prefetch_depth=1, num_fetch_threads=1, profiler=None):
         self.dataloader_it = dataloader_it
         self.dataloader = dataloader
         self.graph_sampler = self.dataloader.graph_sampler
@@ -405,45 +629,98 @@ class _PrefetchingIter(object):
 
         self.use_thread = use_thread
         self.use_alternate_streams = use_alternate_streams
+        self.stats = {stage: _PrefetchStageStats() for stage in _PREFETCH_STAGES + ['consumer']}
+        self.profiler = profiler
+        # The profiling records of the batches in order, which every stage indexes with
+        # the number of batches it has output.
+        self.records = None
+        if profiler is not None:
+            profiler.start_epoch()
+            self.records = []
         if use_thread:
-            thread = threading.Thread(
-                target=_prefetcher_entry,
-                args=(dataloader_it, dataloader, self.queue, num_threads, use_alternate_streams),
-                daemon=True)
-            thread.start()
-            self.thread = thread
+            # The prefetcher is a pipeline of three stages connected by bounded queues, each
+            # running in its own thread: (1) getting the sampled batches from the PyTorch
+            # DataLoader, (2) gathering the features with a thread pool and (3) copying the
+            # batches to the target device.
+            queues = [Queue(depth) for depth in _get_prefetch_depth(prefetch_depth)]
+            self.queue = queues[-1]
+            self.stop = threading.Event()
+            self.threads = [
+                threading.Thread(
+                    target=_sample_stage_entry,
+                    args=(dataloader_it, dataloader, queues[0], self.stats['sample'],
+                          self.stop, num_threads, profiler, self.records),
+                    daemon=True),
+                threading.Thread(
+                    target=_fetch_stage_entry,
+                    args=(dataloader, queues[0], queues[1], self.stats['fetch'], self.stop,
+                          num_threads, num_fetch_threads, use_alternate_streams,
+                          self.records),
+                    daemon=True),
+                threading.Thread(
+                    target=_transfer_stage_entry,
+                    args=(dataloader, queues[1], queues[2], self.stats['transfer'],
+                          self.stop, num_threads, self.records),
+                    daemon=True)]
+            for thread in self.threads:
+                thread.start()
 
     def __iter__(self):
         return self
 
+    def __del__(self):
+        # Let the stage threads exit if the iteration is abandoned.
+        if getattr(self, 'stop', None) is not None:
+            self.stop.set()
+
     def _next_non_threaded(self):
         batch = next(self.dataloader_it)
+        batch, record = _start_batch_record(batch, self.profiler)
+        if record is not None:
+            self.records.append(record)
         batch = recursive_apply(batch, restore_parent_storage_columns, self.dataloader.graph)
         device = self.dataloader.device
         if self.use_alternate_streams:
             stream = torch.cuda.Stream(device=device) if device.type == 'cuda' else None
         else:
             stream = None
+        tic = time.time()
         feats = _prefetch(batch, self.dataloader, stream)
+        if record is not None:
+            _record_span(record, 'fetch', tic, feats)
+        tic = time.time()
         batch = recursive_apply(batch, lambda x: x.to(device, non_blocking=True))
+        if record is not None:
+            _record_span(record, 'transfer', tic, batch)
         stream_event = stream.record_event() if stream is not None else None
         return batch, feats, stream_event
 
     def _next_threaded(self):
-        batch, feats, stream_event, exception = self.queue.get()
+        batch, feats, stream_event, exception = _stage_get(self.queue, self.stats['consumer'])
         if batch is None:
-            self.thread.join()
+            self.stop.set()
+            for thread in self.threads:
+                thread.join()
             if exception is None:
                 raise StopIteration
             exception.reraise()
+        self.stats['consumer'].num_batches += 1
         return batch, feats, stream_event
 
     def __next__(self):
+        if self.profiler is not None:
+            tic = time.time()
+            num_batches = len(self.records) if not self.use_thread else \
+                self.stats['consumer'].num_batches
         batch, feats, stream_event = \
             self._next_non_threaded() if not self.use_thread else self._next_threaded()
         batch = recursive_apply_pair(batch, feats, _assign_for)
         if stream_event is not None:
             stream_event.wait()
+        if self.profiler is not None:
+            record = self.records[num_batches]
+            _record_span(record, 'wait', tic)
+            self.profiler.finish(record)
         return batch
 
 
@@ -455,10 +732,17 @@ class CollateWrapper(object):
     def __init__(self, sample_func, g):
         self.sample_func = sample_func
         self.g = g
+        # Whether to return the time span of sampling with the batch for profiling.
+        self.profile = False
 
     def __call__(self, items):
+        if self.profile:
+            tic = time.time()
         batch = self.sample_func(self.g, items)
-        return recursive_apply(batch, remove_parent_storage_columns, self.g)
+        batch = recursive_apply(batch, remove_parent_storage_columns, self.g)
+        if self.profile:
+            batch = _SampledBatch(batch, (tic, time.time(), os.getpid()))
+        return batch
 
 
 class WorkerInitWrapper(object):
@@ -486,10 +770,23 @@ def create_tensorized_dataset(indices, batch_size, drop_last, use_ddp, ddp_seed)
 
 
 class DataLoader(torch.utils.data.DataLoader):
-    """DataLoader class."""
+    """DataLoader class.
+
+    With :attr:`use_prefetch_thread`, the batches are prefetched by a pipeline of three
+    stages, each in its own thread: getting the sampled batches, gathering their features
+    and copying them to :attr:`device`.  :attr:`prefetch_depth` is the number of batches
+    each stage can hold ahead of the next one, either an int for all the stages or a
+    sequence or dict for the stages ``'sample'``, ``'fetch'`` and ``'transfer'``.
+    :attr:`num_fetch_threads` is the number of threads gathering the features of
+    different batches concurrently.  The batches are always returned in order.
+
+    :attr:`prefetch_stats` has the counters of every stage in the current or last
+    iteration to find the bottleneck of the pipeline.
+    """
     def __init__(self, graph, indices, graph_sampler, device='cpu', use_ddp=False,
                  ddp_seed=0, batch_size=1, drop_last=False, shuffle=False,
-                 use_prefetch_thread=False, use_alternate_streams=True, **kwargs):
+                 use_prefetch_thread=False, use_alternate_streams=True, prefetch_depth=1,
+                 num_fetch_threads=1, **kwargs):
         self.graph = graph
 
         try:
@@ -518,6 +815,12 @@ class DataLoader(torch.utils.data.DataLoader):
         if self.device.type == 'cuda' and self.device.index is None:
             self.device = torch.device('cuda', torch.cuda.current_device())
         self.use_prefetch_thread = use_prefetch_thread
+        self.prefetch_depth = _get_prefetch_depth(prefetch_depth)
+        if num_fetch_threads <= 0:
+            raise DGLError('num_fetch_threads must be a positive integer.')
+        self.num_fetch_threads = num_fetch_threads
+        self._prefetch_stats = None
+        self._profiler = None
         worker_init_fn = WorkerInitWrapper(kwargs.get('worker_init_fn', None))
 
         # Instantiate all the formats if the number of workers is greater than 0.
@@ -539,9 +842,69 @@ class DataLoader(torch.utils.data.DataLoader):
         # When using multiprocessing PyTorch sometimes set the number of PyTorch threads to 1
         # when spawning new Python threads.  This drastically slows down pinning features.
         num_threads = torch.get_num_threads() if self.num_workers > 0 else None
-        return _PrefetchingIter(
+        it = _PrefetchingIter(
             self, super().__iter__(), use_thread=self.use_prefetch_thread,
-            use_alternate_streams=self.use_alternate_streams, num_threads=num_threads)
+            use_alternate_streams=self.use_alternate_streams, num_threads=num_threads,
+            prefetch_depth=self.prefetch_depth, num_fetch_threads=self.num_fetch_threads,
+            profiler=self._profiler)
+        self._prefetch_stats = it.stats
+        return it
+
+    @contextmanager
+    def profile(self, profiler=None):
+        """Context manager recording the timing breakdown of every batch loaded within it.
+
+        Parameters
+        ----------
+        profiler : DataLoaderProfiler, optional
+            The profiler to record to, e.g. to keep the records of several epochs or to
+            pass a callback.  If None, a new one is created.
+
+        Returns
+        -------
+        DataLoaderProfiler
+            The profiler.
+
+        Examples
+        --------
+        >>> with dataloader.profile() as prof:
+        ...     for epoch in range(2):
+        ...         for input_nodes, output_nodes, blocks in dataloader:
+        ...             train_on(blocks)
+        >>> prof.summary(epoch=0)
+        >>> prof.export_json('dataloader.json')
+
+        Notes
+        -----
+        With ``persistent_workers=True``, the ``'sample'`` and ``'ipc'`` stages are only
+        recorded if the profiling starts before the first iteration, since the worker
+        processes are not recreated afterwards.
+        """
+        profiler = profiler if profiler is not None else DataLoaderProfiler()
+        self._profiler = profiler
+        self.collate_fn.profile = True
+        try:
+            yield profiler
+        finally:
+            self._profiler = None
+            self.collate_fn.profile = False
+
+    @property
+    def prefetch_stats(self):
+        """The counters of the prefetching pipeline in the current or last iteration.
+
+        A dict from the stage names ``'sample'``, ``'fetch'``, ``'transfer'`` and
+        ``'consumer'`` (the training loop) to dicts with the number of batches a stage
+        output, the time in seconds it spent working (``busy_time``), waiting for the
+        previous stage (``input_wait_time``) and waiting for the next stage to take a batch
+        (``output_wait_time``), as well as the average fraction of its output queue that
+        was filled when it had a batch ready (``mean_occupancy``).  The bottleneck is the
+        stage with a high busy time whose previous stage has a full output queue.  The
+        counters are only updated with :attr:`use_prefetch_thread`.
+        """
+        if self._prefetch_stats is None:
+            return None
+        return {stage: stats.as_dict() for stage, stats in self._prefetch_stats.items()}
 
     # To allow data other than node/edge data to be prefetched.
     def attach_data(self, name, data):
@@ -606,6 +969,12 @@ class GraphCollator(object):
 
     If the set of graphs has no graph-level data, the collate function will yield a batched graph.
 
+    The graphs of a :class:`~dgl.dataloading.PackedGraphDataset` are batched directly
+    from the packed arrays without calling :func:`dgl.batch`.  If the dataset is in
+    shared memory, a dataloader worker process returns a
+    :class:`~dgl.dataloading.packed.PackedGraphBatch` holding only the graph indices
+    instead, which :class:`GraphDataLoader` batches in the main process.
+
     Examples
     --------
     To train a GNN for graph classification on a set of graphs in ``dataset`` (assume
@@ -644,6 +1013,13 @@ class GraphCollator(object):
         if isinstance(elem, DGLHeteroGraph):
             batched_graphs = batch_graphs(items)
             return batched_graphs
+        elif isinstance(elem, PackedGraphIndex):
+            indices = [item.index for item in items]
+            if elem.dataset.is_shared and torch.utils.data.get_worker_info() is not None:
+                # only send the indices back, the main process batches the graphs
+                # directly from shared memory
+                return PackedGraphBatch(elem.dataset, indices)
+            return elem.dataset.batch(indices)
         elif F.is_tensor(elem):
             return F.stack(items, 0)
         elif elem_type.__module__ == 'numpy' and elem_type.__name__ != 'str_' \
@@ -677,6 +1053,18 @@ class GraphCollator(object):
 
         raise TypeError(self.graph_collate_err_msg_format.format(elem_type))
 
+def _materialize_packed_batches(batch):
+    """Batch the graphs of every :class:`PackedGraphBatch` returned by the workers."""
+    if isinstance(batch, PackedGraphBatch):
+        return batch.graph()
+    elif isinstance(batch, Mapping):
+        return {k: _materialize_packed_batches(v) for k, v in batch.items()}
+    elif isinstance(batch, tuple) and hasattr(batch, '_fields'):  # namedtuple
+        return type(batch)(*(_materialize_packed_batches(v) for v in batch))
+    elif isinstance(batch, (list, tuple)):
+        return type(batch)(_materialize_packed_batches(v) for v in batch)
+    return batch
+
 class GraphDataLoader(torch.utils.data.DataLoader):
     """PyTorch dataloader for batch-iterating over a set of graphs, generating the batched
     graph and corresponding label tensor (if provided) of the said minibatch.
@@ -746,6 +1134,12 @@ class GraphDataLoader(torch.utils.data.DataLoader):
 
         super().__init__(dataset=dataset, collate_fn=self.collate, **dataloader_kwargs)
 
+    def __iter__(self):
+        it = super().__iter__()
+        if self.num_workers == 0:
+            return it
+        return map(_materialize_packed_batches, it)
+
     def set_epoch(self, epoch):
         """Sets the epoch number for the underlying sampler which ensures all replicas
         to use a different ordering for each epoch.
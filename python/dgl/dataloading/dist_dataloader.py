@@ -1,7 +1,8 @@
 """Distributed dataloaders.
 """
 import inspect
-from ..distributed import DistDataLoader
+from ..distributed import DistDataLoader, sample_blocks
+from ..base import DGLError
 # Still depends on the legacy NodeCollator...
 from .._dataloading.dataloader import NodeCollator, EdgeCollator
 
@@ -101,3 +102,48 @@ class DistEdgeDataLoader(DistDataLoader):
                          **dataloader_kwargs)
 
         self.device = device
+
+class DistNeighborSampler(object):
+    """Neighbor sampler for :class:`DistNodeDataLoader` that samples all the layers
+    and gathers the input node features with :func:`dgl.distributed.sample_blocks`,
+    which takes one or two round trips to the servers per minibatch instead of one
+    per layer plus one for the features.
+
+    Only homogeneous graphs are supported, and edges cannot be excluded.
+
+    Parameters
+    ----------
+    fanouts : list[int]
+        List of neighbors to sample per edge type for each GNN layer, with the i-th
+        element being the fanout for the i-th GNN layer.  If -1 is given, all the
+        neighbors are selected.
+    feat_names : list[str], optional
+        The names of the node data to gather for the input nodes.  They are stored in
+        the ``srcdata`` of the first MFG.
+    prob : str, optional
+        Feature name used as the (unnormalized) probabilities associated with each
+        neighboring edge of a node.
+    replace : bool, optional
+        If True, sample with replacement.
+
+    Examples
+    --------
+    >>> sampler = dgl.dataloading.DistNeighborSampler([10, 25], feat_names=['feat'])
+    >>> dataloader = dgl.dataloading.DistNodeDataLoader(
+    ...     g, train_nid, sampler, batch_size=1024, shuffle=True)
+    >>> for input_nodes, output_nodes, blocks in dataloader:
+    ...     train_on(blocks, blocks[0].srcdata['feat'])
+    """
+    def __init__(self, fanouts, feat_names=None, prob=None, replace=False):
+        self.fanouts = fanouts
+        self.feat_names = feat_names
+        self.prob = prob
+        self.replace = replace
+
+    def sample_blocks(self, g, seed_nodes, exclude_eids=None):
+        """Generate the MFGs of the given output nodes, see
+        :func:`dgl.distributed.sample_blocks`."""
+        if exclude_eids is not None:
+            raise DGLError('DistNeighborSampler does not support excluding edges.')
+        return sample_blocks(g, seed_nodes, self.fanouts, prob=self.prob,
+                             replace=self.replace, feat_names=self.feat_names)
@@ -0,0 +1,241 @@
+"""Cache of sampled neighbors reused across minibatches and epochs."""
+from collections.abc import Mapping
+import time
+
+import numpy as np
+from ..base import EID, DGLError
+from .. import backend as F
+
+__all__ = ['FrontierCache']
+
+class FrontierCache(object):
+    """Cache of the neighbors sampled for every node, which lets a neighbor sampler
+    rebuild the sampled frontiers from the cache instead of running
+    :func:`~dgl.sampling.sample_neighbors` for every minibatch.
+
+    The first time a node is used as a seed on a given layer, its neighbors are sampled
+    and stored.  Afterwards the stored neighbors are reused until the entry expires,
+    either because it was sampled at least :attr:`refresh_every` epochs ago (see
+    :meth:`set_epoch`), or because it is randomly chosen to be resampled with probability
+    :attr:`refresh_prob` upon every access.  Reusing the samples trades some sampling
+    variance for a much lower sampling cost on static graphs with small fanouts.
+
+    The cache lives in the process that does the sampling.  With ``num_workers > 0``
+    every worker process keeps its own cache, so ``persistent_workers=True`` is needed
+    for the cache to survive across epochs, and :attr:`refresh_prob` should be used
+    instead of :attr:`refresh_every` since :meth:`set_epoch` called from the main process
+    does not reach the workers.
+
+    Parameters
+    ----------
+    refresh_every : int, optional
+        Resample the neighbors of a node if they were sampled at least this many epochs
+        ago.  If None, entries never expire by age.
+    refresh_prob : float, optional
+        The probability of resampling the neighbors of a node every time they are
+        accessed.  Default: 0.
+
+    Examples
+    --------
+    >>> cache = dgl.dataloading.FrontierCache(refresh_every=5)
+    >>> sampler = dgl.dataloading.NeighborSampler([10, 10], frontier_cache=cache)
+    >>> dataloader = dgl.dataloading.DataLoader(g, train_nid, sampler, batch_size=1024)
+    >>> for epoch in range(20):
+    ...     cache.set_epoch(epoch)
+    ...     for input_nodes, output_nodes, blocks in dataloader:
+    ...         train_on(blocks)
+    >>> cache.memory_usage, cache.refresh_time, cache.hit_rate
+    (52428800, 1.24, 0.8)
+
+    Notes
+    -----
+    Edges given in ``exclude_eids`` (e.g. by edge prediction dataloaders) are removed from
+    the cached neighbors instead of being resampled, so a node may receive fewer
+    neighbors than the fanout in this case.
+    """
+    def __init__(self, refresh_every=None, refresh_prob=0.):
+        if refresh_every is not None and refresh_every <= 0:
+            raise DGLError('refresh_every must be a positive integer.')
+        if not 0 <= refresh_prob <= 1:
+            raise DGLError('refresh_prob must be between 0 and 1.')
+        self.refresh_every = refresh_every
+        self.refresh_prob = refresh_prob
+        self.epoch = 0
+        self.clear()
+
+    def clear(self):
+        """Drop all the cached neighbors and reset the statistics."""
+        # (layer, ntype) -> epoch when the neighbors of each node were sampled, -1 if never
+        self._sampled_at = {}
+        # ((layer, seed ntype), canonical etype) -> (neighboring edge IDs of each node,
+        # number of valid edge IDs of each node)
+        self._edges = {}
+        self._graph_index = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the hit and miss counters and the refresh time."""
+        self.num_hits = 0
+        self.num_misses = 0
+        self.refresh_time = 0.
+
+    def set_epoch(self, epoch):
+        """Set the current epoch, which determines the expiry of the cached neighbors
+        with :attr:`refresh_every`."""
+        self.epoch = epoch
+
+    @property
+    def hit_rate(self):
+        """Fraction of the seed nodes whose neighbors were served from the cache since
+        the last :meth:`reset_stats` call."""
+        total = self.num_hits + self.num_misses
+        return self.num_hits / total if total > 0 else 0.
+
+    @property
+    def memory_usage(self):
+        """Number of bytes used by the cached neighbors and the bookkeeping arrays.
+
+        Rows of the neighbor buffers that are never written are not counted, as they
+        are never paged in.
+        """
+        nbytes = sum(v.nbytes for v in self._sampled_at.values())
+        num_cached = {k: int((v >= 0).sum()) for k, v in self._sampled_at.items()}
+        for (key, _), (eids, counts) in self._edges.items():
+            nbytes += num_cached[key] * eids.strides[0] + counts.nbytes
+        return nbytes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the cached neighbors are only valid for the graph they were sampled from
+        state['_graph_index'] = None
+        state['_sampled_at'] = {}
+        state['_edges'] = {}
+        return state
+
+    def _buffers(self, g, layer, ntype, etype, fanout, dtype):
+        """Return the bookkeeping and neighbor buffers of a node type and an edge type
+        on a layer, allocating them on first use."""
+        key = (layer, ntype)
+        if key not in self._sampled_at:
+            self._sampled_at[key] = np.full((g.num_nodes(ntype),), -1, dtype=np.int64)
+        ekey = ((layer, ntype), etype)
+        if ekey not in self._edges or self._edges[ekey][0].shape[1] != fanout:
+            # np.empty leaves the pages of the rows never written unallocated.
+            self._edges[ekey] = (
+                np.empty((g.num_nodes(ntype), fanout), dtype=dtype),
+                np.zeros((g.num_nodes(ntype),), dtype=np.int32))
+            self._sampled_at[key][:] = -1
+        return self._sampled_at[key], self._edges[ekey]
+
+    def sample_neighbors(self, g, layer, seed_nodes, fanout, edge_dir='in', prob=None,
+                         replace=False, output_device=None, exclude_edges=None):
+        """Return the frontier of the given seed nodes on the given layer, with the
+        same signature and output as :func:`~dgl.sampling.sample_neighbors` except the
+        extra :attr:`layer` argument identifying the GNN layer being sampled.
+        """
+        if g._graph is not self._graph_index:
+            self.clear()
+            self._graph_index = g._graph
+
+        is_dict = isinstance(seed_nodes, Mapping)
+        if not is_dict:
+            if len(g.ntypes) != 1:
+                raise DGLError('Must specify the seed nodes with a dict on graphs with '
+                               'multiple node types.')
+            seed_nodes = {g.ntypes[0]: seed_nodes}
+        seeds = {k: F.asnumpy(v) if F.is_tensor(v) else np.asarray(v, dtype=np.int64)
+                 for k, v in seed_nodes.items()}
+        if isinstance(fanout, Mapping):
+            fanout = {g.to_canonical_etype(k): v for k, v in fanout.items()}
+        else:
+            fanout = {etype: fanout for etype in g.canonical_etypes}
+        if exclude_edges is not None and not isinstance(exclude_edges, Mapping):
+            exclude_edges = {g.canonical_etypes[0]: exclude_edges}
+        dtype = np.int64 if g.idtype == F.int64 else np.int32
+
+        # the seed node type of each cached edge type
+        seed_ntypes = {}
+        for etype in g.canonical_etypes:
+            ntype = etype[2] if edge_dir == 'in' else etype[0]
+            if fanout.get(etype, 0) > 0 and len(seeds.get(ntype, ())) > 0:
+                seed_ntypes[etype] = ntype
+
+        for etype, ntype in seed_ntypes.items():
+            self._buffers(g, layer, ntype, etype, fanout[etype], dtype)
+
+        # find the seed nodes to resample
+        stale_nodes = {}
+        for ntype in set(seed_ntypes.values()):
+            nodes = seeds[ntype]
+            last = self._sampled_at[layer, ntype][nodes]
+            stale = last < 0
+            if self.refresh_every is not None:
+                stale |= self.epoch - last >= self.refresh_every
+            if self.refresh_prob > 0:
+                stale |= np.random.rand(len(nodes)) < self.refresh_prob
+            num_stale = int(stale.sum())
+            self.num_misses += num_stale
+            self.num_hits += len(nodes) - num_stale
+            if num_stale > 0:
+                stale_nodes[ntype] = np.unique(nodes[stale])
+
+        if len(stale_nodes) > 0:
+            tic = time.time()
+            self._refresh(g, layer, stale_nodes, seed_ntypes, fanout, edge_dir, prob,
+                          replace, dtype)
+            self.refresh_time += time.time() - tic
+
+        # gather the cached edges of the seed nodes
+        edges = {}
+        for etype in g.canonical_etypes:
+            ntype = etype[2] if edge_dir == 'in' else etype[0]
+            if etype in seed_ntypes:
+                eids, counts = self._edges[(layer, ntype), etype]
+                nodes = seeds[ntype]
+                mask = np.arange(eids.shape[1]) < counts[nodes][:, None]
+                eid = eids[nodes][mask]
+            elif fanout.get(etype, 0) == -1 and len(seeds.get(ntype, ())) > 0:
+                nodes = F.zerocopy_from_numpy(seeds[ntype])
+                eid = F.asnumpy(g.in_edges(nodes, form='eid', etype=etype)
+                                if edge_dir == 'in' else
+                                g.out_edges(nodes, form='eid', etype=etype))
+            else:
+                eid = np.zeros((0,), dtype=dtype)
+            if exclude_edges is not None and etype in exclude_edges:
+                eid = eid[~np.isin(eid, F.asnumpy(exclude_edges[etype]))]
+            edges[etype] = F.copy_to(F.zerocopy_from_numpy(eid.astype(dtype)), g.device)
+        if not is_dict and len(g.canonical_etypes) == 1:
+            edges = edges[g.canonical_etypes[0]]
+        return g.edge_subgraph(edges, relabel_nodes=False, output_device=output_device)
+
+    def _refresh(self, g, layer, stale_nodes, seed_ntypes, fanout, edge_dir, prob,
+                 replace, dtype):
+        """Resample the neighbors of the stale nodes and store them in the cache."""
+        sample_fanout = {etype: (fanout[etype] if etype in seed_ntypes else 0)
+                         for etype in g.canonical_etypes}
+        nodes = {k: F.copy_to(F.zerocopy_from_numpy(v.astype(dtype)), g.device)
+                 for k, v in stale_nodes.items()}
+        if len(g.canonical_etypes) == 1:
+            nodes = nodes[g.ntypes[0]]
+            sample_fanout = sample_fanout[g.canonical_etypes[0]]
+        frontier = g.sample_neighbors(
+            nodes, sample_fanout, edge_dir=edge_dir, prob=prob, replace=replace,
+            copy_ndata=False, copy_edata=False)
+
+        for etype, ntype in seed_ntypes.items():
+            if ntype not in stale_nodes:
+                continue
+            sampled_at, (eids, counts) = self._buffers(
+                g, layer, ntype, etype, fanout[etype], dtype)
+            src, dst = frontier.edges(etype=etype)
+            seed = F.asnumpy(dst if edge_dir == 'in' else src)
+            eid = F.asnumpy(frontier.edges[etype].data[EID])
+            # group the sampled edges by their seed node and write each group in a row
+            order = np.argsort(seed, kind='stable')
+            seed = seed[order]
+            uniq, start, num = np.unique(seed, return_index=True, return_counts=True)
+            rank = np.arange(len(seed)) - np.repeat(start, num)
+            eids[seed, rank] = eid[order]
+            counts[stale_nodes[ntype]] = 0
+            counts[uniq] = num
+            sampled_at[stale_nodes[ntype]] = self.epoch
@@ -0,0 +1,173 @@
+"""Layer-wise full-graph inference"""
+import os
+import tempfile
+
+import numpy as np
+import torch
+
+from ..base import DGLError
+from ..frame import LazyFeature
+from .. import backend as F
+from .neighbor_sampler import MultiLayerFullNeighborSampler
+from .dataloader import NodeDataLoader
+
+__all__ = ['layerwise_inference']
+
+class _LayerwiseSampler(object):
+    """Samples the one-layer block with all the neighbors of every chunk of nodes, with
+    the input features of the layer to prefetch."""
+    def __init__(self):
+        self.sampler = MultiLayerFullNeighborSampler(1)
+
+    def sample(self, g, seed_nodes):
+        """Returns the input nodes, the output nodes, the block and the input features."""
+        input_nodes, output_nodes, blocks = self.sampler.sample_blocks(g, seed_nodes)
+        # The IDs are on CPU where the buffers are; a storage on GPU moves them there.
+        return input_nodes, output_nodes, blocks[0], LazyFeature(
+            'h', F.copy_to(input_nodes, F.cpu()))
+
+class _BufferPool(object):
+    """Two buffers reused in turn by the outputs of the layers, in memory or memory-mapped
+    to files if they are larger than :attr:`max_memory` bytes."""
+    def __init__(self, max_memory, buffer_dir):
+        self.max_memory = max_memory
+        self.buffer_dir = buffer_dir
+        # (flat tensor, the numpy memmap backing it or None) of every buffer
+        self.buffers = [None, None]
+
+    def get(self, i, shape, dtype):
+        """Returns buffer :attr:`i` viewed as a tensor of the given shape and dtype, growing
+        it if needed."""
+        numel = int(np.prod(shape))
+        if self.buffers[i] is not None:
+            flat, _ = self.buffers[i]
+            if flat.dtype == dtype and flat.shape[0] >= numel:
+                return flat[:numel].view(*shape)
+            # release the old buffer before allocating the new one
+            self.buffers[i] = None
+        num_bytes = numel * torch.empty((), dtype=dtype).element_size()
+        if self.max_memory is None or num_bytes <= self.max_memory:
+            self.buffers[i] = (torch.empty(numel, dtype=dtype), None)
+        else:
+            np_dtype = torch.empty((), dtype=dtype).numpy().dtype
+            if self.buffer_dir is None:
+                fd, path = tempfile.mkstemp(suffix='.bin')
+                os.close(fd)
+            else:
+                path = os.path.join(self.buffer_dir, 'buffer_{}.bin'.format(i))
+            arr = np.memmap(path, dtype=np_dtype, mode='w+', shape=(numel,))
+            if self.buffer_dir is None:
+                # the file is removed once it is unmapped
+                os.remove(path)
+            self.buffers[i] = (torch.from_numpy(arr), arr)
+        return self.buffers[i][0][:numel].view(*shape)
+
+def layerwise_inference(g, layers, feat, batch_size, device='cpu', activation=None,
+                        max_memory=None, buffer_dir=None, prefetch_depth=2, **kwargs):
+    """Compute the outputs of a multi-layer GNN on all the nodes of a graph layer by
+    layer, with all the neighbors of every node.
+
+    Computing the outputs of all the nodes with multi-layer blocks repeats the
+    computation of the first layers for the nodes shared by the neighborhoods of
+    different output nodes.  Instead, this function computes the outputs of every layer
+    for all the nodes, in chunks of :attr:`batch_size` nodes with the blocks of
+    :class:`~dgl.dataloading.MultiLayerFullNeighborSampler` of one layer, before moving to
+    the next layer.
+
+    The blocks and input features of the next chunks are sampled and gathered by a
+    :class:`~dgl.dataloading.NodeDataLoader` with a prefetching thread while the current
+    chunk is computed.  The outputs of the layers are written to two buffers reused by
+    all the layers in turn, which are memory-mapped to files if they are larger than
+    :attr:`max_memory`, so graphs whose hidden representations do not fit in memory can
+    be handled.
+
+    Parameters
+    ----------
+    g : DGLGraph
+        The graph.  Must have only one node type.
+    layers : list[callable]
+        The layers, called as ``layer(block, h)`` with a block and the input features of
+        its source nodes, and returning the output features of its destination nodes.
+    feat : Tensor or str
+        The input features of all the nodes, or the name of the node feature in
+        ``g.ndata``.
+    batch_size : int
+        The number of nodes in every chunk.
+    device : device, optional
+        The device to compute the layers on.
+    activation : callable, optional
+        The function applied to the outputs of every layer except the last one.
+    max_memory : int, optional
+        The maximum number of bytes of an in-memory buffer.  The buffers larger than this
+        are memory-mapped to files.  If None, the buffers are always in memory.
+    buffer_dir : str, optional
+        The directory of the memory-mapped buffers.  If None, they are anonymous temporary
+        files.  Otherwise the files are kept, and the returned tensor is backed by one of
+        them.
+    prefetch_depth : int, optional
+        The number of chunks prefetched ahead of the computation.  See
+        :class:`~dgl.dataloading.DataLoader`.
+    kwargs : dict
+        Other arguments of :class:`~dgl.dataloading.NodeDataLoader`, e.g.
+        :attr:`num_workers`.
+
+    Returns
+    -------
+    Tensor
+        The outputs of the last layer for all the nodes, on CPU.
+
+    Examples
+    --------
+    Computing the outputs of a GraphSAGE model trained with neighbor sampling:
+
+    >>> model.eval()
+    >>> y = dgl.dataloading.layerwise_inference(
+    ...     g, model.layers, 'feat', batch_size=4096, device='cuda',
+    ...     activation=lambda h: model.dropout(model.activation(h)), num_workers=4)
+
+    With hidden representations of 300M nodes, spilling the buffers larger than 16 GB to
+    a local disk:
+
+    >>> y = dgl.dataloading.layerwise_inference(
+    ...     g, model.layers, 'feat', batch_size=65536, device='cuda',
+    ...     activation=torch.relu, max_memory=16 << 30, buffer_dir='/local/scratch')
+    """
+    if len(g.ntypes) != 1:
+        raise DGLError('layerwise_inference only supports graphs with one node type.')
+    if len(layers) == 0:
+        raise DGLError('There must be at least one layer.')
+    if isinstance(feat, str):
+        feat = g.ndata[feat]
+    num_nodes = g.num_nodes()
+    device = torch.device(device)
+
+    dataloader = NodeDataLoader(
+        g, g.nodes(), _LayerwiseSampler(), device=device, batch_size=batch_size,
+        shuffle=False, drop_last=False, use_prefetch_thread=True,
+        prefetch_depth=prefetch_depth, **kwargs)
+    pool = _BufferPool(max_memory, buffer_dir)
+    h_in = feat
+    with torch.no_grad():
+        for l, layer in enumerate(layers):
+            dataloader.attach_data('h', h_in)
+            h_out = None
+            for _, output_nodes, block, h in dataloader:
+                h = layer(block, h)
+                if l != len(layers) - 1 and activation is not None:
+                    h = activation(h)
+                if h_out is None:
+                    # The layer reading from buffer i writes to the other one.
+                    h_out = pool.get(l % 2, (num_nodes,) + tuple(h.shape[1:]), h.dtype)
+                h = h.cpu()
+                output_nodes = output_nodes.cpu()
+                start, end = int(output_nodes[0]), int(output_nodes[-1]) + 1
+                if end - start == output_nodes.shape[0]:
+                    # the nodes are not shuffled so every chunk is a range of node IDs
+                    h_out[start:end] = h
+                else:
+                    h_out[output_nodes] = h
+            if h_out is None:
+                # the graph has no nodes
+                return torch.empty(0, *feat.shape[1:], dtype=feat.dtype)
+            h_in = h_out
+    return h_out
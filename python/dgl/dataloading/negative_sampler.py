@@ -1,11 +1,150 @@
 """Negative samplers"""
 from collections.abc import Mapping
+import numpy as np
 from .. import backend as F
+from ..base import DGLError
+
+class _EdgeLookup(object):
+    """Sorted array of the edges of one edge type, encoded as ``src * num_dst + dst``,
+    for vectorized edge existence checks.  Built once per graph and edge type."""
+    def __init__(self, g, canonical_etype):
+        utype, _, vtype = canonical_etype
+        self.num_src = g.num_nodes(utype)
+        self.num_dst = g.num_nodes(vtype)
+        if self.num_src * self.num_dst >= 2 ** 63:
+            raise DGLError('Too many nodes to encode the node pairs of edge type {}'.format(
+                canonical_etype))
+        src, dst = g.edges(etype=canonical_etype)
+        self.keys = np.unique(F.asnumpy(src).astype(np.int64) * self.num_dst +
+                              F.asnumpy(dst).astype(np.int64))
+        self.num_self_loops = 0
+        if utype == vtype:
+            src, dst = np.divmod(self.keys, self.num_dst)
+            self.num_self_loops = int(np.sum(src == dst))
+
+    def contains(self, src, dst):
+        """Whether the pairs of nodes are edges.  Broadcasts like numpy."""
+        keys = np.asarray(src, dtype=np.int64) * self.num_dst + np.asarray(dst, dtype=np.int64)
+        if len(self.keys) == 0:
+            return np.zeros(keys.shape, dtype=bool)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        return self.keys[pos] == keys
+
+    def successors(self, u):
+        """The destination nodes of the edges from node ``u``."""
+        start, end = np.searchsorted(self.keys, [u * self.num_dst, (u + 1) * self.num_dst])
+        return self.keys[start:end] - u * self.num_dst
+
+def _randint(shape, high):
+    return F.asnumpy(F.randint(shape, F.int64, F.cpu(), 0, high))
+
+def _per_source_negatives(lookup, src, k, exclude_self_loops, max_rounds=10):
+    """Sample exactly ``k`` destination nodes for every source node in ``src`` such that
+    the pairs are not edges.
+
+    All the rows are sampled together with an oversampling factor estimated from the
+    density of the graph; the rows that still lack negatives are resampled, and the
+    complement of the neighbors is enumerated for the rare rows that keep failing.
+    """
+    num_dst = lookup.num_dst
+    out = np.empty((len(src), k), dtype=np.int64)
+    filled = np.zeros((len(src),), dtype=np.int64)
+    density = (len(lookup.keys) + 1) / max(lookup.num_src * num_dst, 1)
+    num_cands = int(np.ceil(k / max(1. - density, 1e-3) * 1.2)) + 1
+    for _ in range(max_rounds):
+        rows = np.nonzero(filled < k)[0]
+        if len(rows) == 0:
+            break
+        row_src = src[rows, None]
+        cands = _randint((len(rows), num_cands), num_dst)
+        valid = ~lookup.contains(row_src, cands)
+        if exclude_self_loops:
+            valid &= cands != row_src
+        # the position of every valid candidate in the output row
+        pos = np.cumsum(valid, axis=1) - 1 + filled[rows, None]
+        r, c = np.nonzero(valid & (pos < k))
+        out[rows[r], pos[r, c]] = cands[r, c]
+        filled[rows] = np.minimum(filled[rows] + valid.sum(1), k)
+    for row in np.nonzero(filled < k)[0]:
+        u = src[row]
+        excluded = lookup.successors(u)
+        if exclude_self_loops:
+            excluded = np.union1d(excluded, [u])
+        negs = np.setdiff1d(np.arange(num_dst), excluded)
+        if len(negs) == 0:
+            raise DGLError('Node {} is connected to all the nodes; cannot sample '
+                           'negative edges for it.'.format(u))
+        out[row, filled[row]:] = negs[_randint((k - filled[row],), len(negs))]
+    return out.reshape(-1)
+
+def _global_negatives(lookup, num_samples, exclude_self_loops, replace, max_rounds=100):
+    """Sample exactly ``num_samples`` node pairs that are not edges, or all of them if
+    there are fewer and ``replace`` is False."""
+    num_src, num_dst = lookup.num_src, lookup.num_dst
+    num_pairs = num_src * num_dst
+    num_negs = num_pairs - len(lookup.keys)
+    if exclude_self_loops:
+        num_negs -= min(num_src, num_dst) - lookup.num_self_loops
+    if not replace:
+        num_samples = min(num_samples, num_negs)
+    if num_negs <= 0 or num_samples <= 0:
+        return np.zeros((0,), np.int64), np.zeros((0,), np.int64)
+    keys = []
+    num_found = 0
+    for _ in range(max_rounds):
+        remaining = num_samples - num_found
+        num_cands = int(np.ceil(remaining * num_pairs / num_negs * 1.2)) + 16
+        src = _randint((num_cands,), num_src)
+        dst = _randint((num_cands,), num_dst)
+        valid = ~lookup.contains(src, dst)
+        if exclude_self_loops:
+            valid &= src != dst
+        cand_keys = src[valid] * num_dst + dst[valid]
+        if not replace:
+            _, first = np.unique(cand_keys, return_index=True)
+            cand_keys = cand_keys[np.sort(first)]
+            if num_found > 0:
+                cand_keys = cand_keys[~np.isin(cand_keys, np.concatenate(keys))]
+        keys.append(cand_keys[:remaining])
+        num_found += len(keys[-1])
+        if num_found == num_samples:
+            break
+    keys = np.concatenate(keys)
+    if len(keys) < num_samples:
+        # Only happens without replacement when almost all negative pairs are requested.
+        all_keys = np.setdiff1d(np.arange(num_pairs), lookup.keys)
+        if exclude_self_loops:
+            all_keys = all_keys[all_keys // num_dst != all_keys % num_dst]
+        rest = np.setdiff1d(all_keys, keys)
+        rest = rest[np.argsort(_randint((len(rest),), 2 ** 62))[:num_samples - len(keys)]]
+        keys = np.concatenate([keys, rest])
+    return np.divmod(keys, num_dst)
 
 class _BaseNegativeSampler(object):
     def _generate(self, g, eids, canonical_etype):
         raise NotImplementedError
 
+    def _lookup(self, g, canonical_etype):
+        """Return the edge lookup of the edge type, building it on the first use."""
+        cache = getattr(self, '_lookup_cache', None)
+        # Hold the graph index so that it cannot be collected and its ID reused.
+        if cache is None or cache[0] is not g._graph:
+            cache = self._lookup_cache = (g._graph, {})
+        if canonical_etype not in cache[1]:
+            cache[1][canonical_etype] = _EdgeLookup(g, canonical_etype)
+        return cache[1][canonical_etype]
+
+    def __getstate__(self):
+        # The lookup is rebuilt in every process instead of being pickled.
+        state = self.__dict__.copy()
+        state.pop('_lookup_cache', None)
+        return state
+
+    @staticmethod
+    def _to_tensor(arr, like):
+        return F.copy_to(F.astype(F.zerocopy_from_numpy(arr), F.dtype(like)), F.context(like))
+
     def __call__(self, g, eids):
         """Returns negative samples.
 
@@ -44,6 +183,13 @@ class PerSourceUniform(_BaseNegativeSampler):
     ----------
     k : int
         The number of negative samples per edge.
+    exclude_positive_edges : bool, optional
+        If True, ``(u, v')`` is never an edge of the graph, and exactly :attr:`k`
+        such pairs are still returned for every edge.  The edges of every edge type are
+        indexed once on the first call and reused afterwards.  (Default: False)
+    exclude_self_loops : bool, optional
+        Whether to exclude self-loops.  Only effective together with
+        :attr:`exclude_positive_edges`.  (Default: False)
 
     Examples
     --------
@@ -52,8 +198,10 @@ class PerSourceUniform(_BaseNegativeSampler):
     >>> neg_sampler(g, torch.tensor([0, 1]))
     (tensor([0, 0, 1, 1]), tensor([1, 0, 2, 3]))
     """
-    def __init__(self, k):
+    def __init__(self, k, exclude_positive_edges=False, exclude_self_loops=False):
         self.k = k
+        self.exclude_positive_edges = exclude_positive_edges
+        self.exclude_self_loops = exclude_self_loops
 
     def _generate(self, g, eids, canonical_etype):
         _, _, vtype = canonical_etype
@@ -62,6 +210,11 @@ class PerSourceUniform(_BaseNegativeSampler):
         ctx = F.context(eids)
         shape = (shape[0] * self.k,)
         src, _ = g.find_edges(eids, etype=canonical_etype)
+        if self.exclude_positive_edges:
+            lookup = self._lookup(g, canonical_etype)
+            dst = _per_source_negatives(lookup, F.asnumpy(src).astype(np.int64), self.k,
+                                        self.exclude_self_loops)
+            return F.repeat(src, self.k, 0), self._to_tensor(dst, src)
         src = F.repeat(src, self.k, 0)
         dst = F.randint(shape, dtype, ctx, 0, g.num_nodes(vtype))
         return src, dst
@@ -89,11 +242,17 @@ class GlobalUniform(_BaseNegativeSampler):
     replace : bool, optional
         Whether to sample with replacement.  Setting it to True will make things
         faster.  (Default: True)
+    exact : bool, optional
+        If True, exactly :attr:`k` negative samples per edge are returned, unless
+        ``replace`` is False and the graph does not have that many unique negative pairs.
+        The edges of every edge type are indexed once on the first call and the negative
+        pairs are sampled with vectorized lookups in this index.  (Default: False)
 
     Notes
     -----
-    This negative sampler will try to generate as many negative samples as possible, but
-    it may rarely return less than :attr:`k` negative samples per edge.
+    Unless :attr:`exact` is True, this negative sampler will try to generate as many
+    negative samples as possible, but it may rarely return less than :attr:`k` negative
+    samples per edge.
     This is more likely to happen if a graph is so small or dense that not many unique
     negative samples exist.
 
@@ -104,11 +263,108 @@ class GlobalUniform(_BaseNegativeSampler):
     >>> neg_sampler(g, torch.LongTensor([0, 1]))
     (tensor([0, 1, 3, 2]), tensor([2, 0, 2, 1]))
     """
-    def __init__(self, k, exclude_self_loops=True, replace=False):
+    def __init__(self, k, exclude_self_loops=True, replace=False, exact=False):
         self.k = k
         self.exclude_self_loops = exclude_self_loops
         self.replace = replace
+        self.exact = exact
 
     def _generate(self, g, eids, canonical_etype):
+        if self.exact:
+            utype, _, vtype = canonical_etype
+            lookup = self._lookup(g, canonical_etype)
+            src, dst = _global_negatives(
+                lookup, len(eids) * self.k, self.exclude_self_loops and utype == vtype,
+                self.replace)
+            return self._to_tensor(src, eids), self._to_tensor(dst, eids)
         return g.global_uniform_negative_sampling(
             len(eids) * self.k, self.exclude_self_loops, self.replace, canonical_etype)
+
+class InBatch(_BaseNegativeSampler):
+    """Negative sampler that pairs the source node of every edge in the minibatch with
+    the destination nodes of the other edges in the minibatch.
+
+    For each edge ``(u, v)`` in the minibatch, DGL generates pairs ``(u, v')``, where
+    ``v'`` is the destination node of another edge of the same type in the minibatch.
+    Since all the negative destination nodes are in the minibatch already, no new node
+    representations need to be computed for them.
+
+    Parameters
+    ----------
+    k : int, optional
+        The number of negative samples per edge, drawn uniformly with replacement from
+        the other edges in the minibatch.  If None, every edge is paired with all the
+        other edges.  (Default: None)
+    exclude_positive_edges : bool, optional
+        Whether to drop the pairs that are edges of the graph, in which case fewer than
+        :attr:`k` pairs per edge may be returned.  (Default: False)
+
+    Examples
+    --------
+    >>> g = dgl.graph(([0, 1, 2], [1, 2, 3]))
+    >>> neg_sampler = dgl.dataloading.negative_sampler.InBatch()
+    >>> neg_sampler(g, torch.tensor([0, 1, 2]))
+    (tensor([0, 0, 1, 1, 2, 2]), tensor([2, 3, 1, 3, 1, 2]))
+    """
+    def __init__(self, k=None, exclude_positive_edges=False):
+        self.k = k
+        self.exclude_positive_edges = exclude_positive_edges
+
+    def _generate(self, g, eids, canonical_etype):
+        src, dst = g.find_edges(eids, etype=canonical_etype)
+        num_edges = len(eids)
+        if num_edges < 2:
+            return src[:0], dst[:0]
+        if self.k is None:
+            # all the (i, j) with j != i
+            row = np.repeat(np.arange(num_edges), num_edges - 1)
+            col = np.tile(np.arange(num_edges - 1), num_edges)
+            col = col + (col >= row)
+        else:
+            row = np.repeat(np.arange(num_edges), self.k)
+            col = (row + 1 + _randint((len(row),), num_edges - 1)) % num_edges
+        neg_src = F.asnumpy(src)[row]
+        neg_dst = F.asnumpy(dst)[col]
+        if self.exclude_positive_edges:
+            keep = ~self._lookup(g, canonical_etype).contains(neg_src, neg_dst)
+            neg_src, neg_dst = neg_src[keep], neg_dst[keep]
+        return self._to_tensor(neg_src, src), self._to_tensor(neg_dst, dst)
+
+class SharedUniform(_BaseNegativeSampler):
+    """Negative sampler that draws one set of negative destination nodes for the whole
+    minibatch and pairs every source node with all of them.
+
+    For every edge type in the minibatch, DGL draws :attr:`k` nodes ``v'_1, ..., v'_k``
+    of type ``dsttype`` uniformly, and generates the pairs ``(u, v'_j)`` for every edge
+    ``(u, v)`` in the minibatch.  Only :attr:`k` new destination nodes enter the
+    minibatch, regardless of the minibatch size.
+
+    Parameters
+    ----------
+    k : int
+        The number of shared negative destination nodes per minibatch.
+    exclude_positive_edges : bool, optional
+        Whether to drop the pairs that are edges of the graph, in which case fewer than
+        :attr:`k` pairs per edge may be returned.  (Default: False)
+
+    Examples
+    --------
+    >>> g = dgl.graph(([0, 1, 2], [1, 2, 3]))
+    >>> neg_sampler = dgl.dataloading.negative_sampler.SharedUniform(2)
+    >>> neg_sampler(g, torch.tensor([0, 1]))
+    (tensor([0, 0, 1, 1]), tensor([3, 0, 3, 0]))
+    """
+    def __init__(self, k, exclude_positive_edges=False):
+        self.k = k
+        self.exclude_positive_edges = exclude_positive_edges
+
+    def _generate(self, g, eids, canonical_etype):
+        _, _, vtype = canonical_etype
+        src, _ = g.find_edges(eids, etype=canonical_etype)
+        pool = _randint((self.k,), g.num_nodes(vtype))
+        neg_src = np.repeat(F.asnumpy(src), self.k)
+        neg_dst = np.tile(pool, len(eids))
+        if self.exclude_positive_edges:
+            keep = ~self._lookup(g, canonical_etype).contains(neg_src, neg_dst)
+            neg_src, neg_dst = neg_src[keep], neg_dst[keep]
+        return self._to_tensor(neg_src, src), self._to_tensor(neg_dst, src)
@@ -27,6 +27,10 @@ class NeighborSampler(BlockSampler):
         If given, the probability of each neighbor being sampled is proportional
         to the edge feature value with the given name in ``g.edata``.  The feature must be
         a scalar on each edge.
+    frontier_cache : FrontierCache, optional
+        If given, the sampled neighbors of every node are cached and reused across
+        minibatches and epochs until they expire.  See
+        :class:`~dgl.dataloading.FrontierCache`.
 
     Examples
     --------
@@ -55,6 +59,16 @@ class NeighborSampler(BlockSampler):
     >>> g.edata['p'] = torch.rand(g.num_edges())   # any non-negative 1D vector works
     >>> sampler = dgl.dataloading.NeighborSampler([5, 10, 15], prob='p')
 
+    To reuse the sampled neighbors of every node for 5 epochs instead of resampling them
+    for every minibatch:
+
+    >>> cache = dgl.dataloading.FrontierCache(refresh_every=5)
+    >>> sampler = dgl.dataloading.NeighborSampler([5, 10, 15], frontier_cache=cache)
+    >>> for epoch in range(n_epochs):
+    ...     cache.set_epoch(epoch)
+    ...     for input_nodes, output_nodes, blocks in dataloader:
+    ...         train_on(blocks)
+
     Notes
     -----
     For the concept of MFGs, please refer to
@@ -71,11 +85,18 @@ class NeighborSampler(BlockSampler):
     def sample_blocks(self, g, seed_nodes, exclude_eids=None):
         output_nodes = seed_nodes
         blocks = []
-        for fanout in reversed(self.fanouts):
-            frontier = g.sample_neighbors(
-                seed_nodes, fanout, edge_dir=self.edge_dir, prob=self.prob,
-                replace=self.replace, output_device=self.output_device,
-                exclude_edges=exclude_eids)
+        for layer in reversed(range(len(self.fanouts))):
+            fanout = self.fanouts[layer]
+            if self.frontier_cache is not None:
+                frontier = self.frontier_cache.sample_neighbors(
+                    g, layer, seed_nodes, fanout, edge_dir=self.edge_dir, prob=self.prob,
+                    replace=self.replace, output_device=self.output_device,
+                    exclude_edges=exclude_eids)
+            else:
+                frontier = g.sample_neighbors(
+                    seed_nodes, fanout, edge_dir=self.edge_dir, prob=self.prob,
+                    replace=self.replace, output_device=self.output_device,
+                    exclude_edges=exclude_eids)
             eid = frontier.edata[EID]
             block = to_block(frontier, seed_nodes)
             block.edata[EID] = eid
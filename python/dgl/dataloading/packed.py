@@ -0,0 +1,333 @@
+"""Dataset of many small graphs packed into contiguous arrays."""
+from collections.abc import Mapping
+import weakref
+
+import numpy as np
+from ..base import DGLError
+from ..convert import graph as create_graph
+from ..utils import create_shared_mem_array, get_shared_mem_array
+from .. import backend as F
+
+__all__ = ['PackedGraphDataset']
+
+# The datasets in shared memory created or attached by the current process, by name, so
+# that unpickling one of them again (e.g. with a batch sent back from a worker) reuses
+# the arrays already mapped.
+_SHARED_DATASETS = weakref.WeakValueDictionary()
+
+class PackedGraphIndex(object):
+    """Reference to a graph in a :class:`PackedGraphDataset`.
+
+    This is the item returned by indexing the dataset in place of a
+    :class:`~dgl.DGLGraph`.  It is turned into a graph when collated by
+    :class:`~dgl.dataloading.GraphCollator`, or by :meth:`PackedGraphDataset.batch`.
+    """
+    __slots__ = ['dataset', 'index']
+
+    def __init__(self, dataset, index):
+        self.dataset = dataset
+        self.index = index
+
+    def graph(self):
+        """Return the referenced graph as a :class:`~dgl.DGLGraph`."""
+        return self.dataset.batch([self.index])
+
+class PackedGraphBatch(object):
+    """Batch of graphs in a :class:`PackedGraphDataset` in shared memory, which is
+    not materialized yet.
+
+    :class:`~dgl.dataloading.GraphCollator` returns it in place of the batched graph
+    in dataloader worker processes, so that only the indices of the graphs are sent
+    back to the main process, where :class:`~dgl.dataloading.GraphDataLoader` batches
+    the graphs directly from shared memory.
+    """
+    __slots__ = ['dataset', 'indices']
+
+    def __init__(self, dataset, indices):
+        self.dataset = dataset
+        self.indices = indices
+
+    def graph(self):
+        """Return the batched graph as a :class:`~dgl.DGLGraph`."""
+        return self.dataset.batch(self.indices)
+
+class PackedGraphDataset(object):
+    """Dataset of homogeneous graphs packed into contiguous arrays for fast batching.
+
+    The structures of all the graphs are stored in one pair of source and destination
+    node ID arrays, with the node IDs relative to their own graph, and the node and
+    edge features of all the graphs are concatenated into one tensor per feature.
+    The graph boundaries are kept as offset arrays.
+
+    Indexing the dataset returns a :class:`PackedGraphIndex` instead of a
+    :class:`~dgl.DGLGraph` (together with the labels if any).
+    :class:`~dgl.dataloading.GraphCollator`, and hence
+    :class:`~dgl.dataloading.GraphDataLoader`, batches these references by slicing
+    the offset arrays and gathering the rows of every feature at once, without
+    creating any per-graph :class:`~dgl.DGLGraph` object or calling
+    :func:`~dgl.batch`.  This makes collation much cheaper for datasets of many small
+    graphs, e.g. molecules.
+
+    The batched graph has the same structure, features, and
+    :meth:`~dgl.DGLGraph.batch_num_nodes` / :meth:`~dgl.DGLGraph.batch_num_edges`
+    as the one returned by :func:`dgl.batch` on the original graphs.
+
+    Parameters
+    ----------
+    graphs : list[DGLGraph]
+        The graphs.  They must be homogeneous graphs with the same node and edge
+        feature names and the same ID type.
+    labels : Tensor or dict[str, Tensor], optional
+        The labels of the graphs, whose first dimension is the number of graphs.
+
+    Examples
+    --------
+    >>> dataset = dgl.dataloading.PackedGraphDataset.from_dataset(dgl.data.QM7bDataset())
+    >>> dataloader = dgl.dataloading.GraphDataLoader(
+    ...     dataset, batch_size=1024, shuffle=True, num_workers=4)
+    >>> for batched_graph, labels in dataloader:
+    ...     train_on(batched_graph, labels)
+
+    With multiple workers, move the dataset to shared memory first so that the workers
+    do not receive their own copies of it:
+
+    >>> dataset = dataset.shared_memory('qm7b')
+    >>> dataloader = dgl.dataloading.GraphDataLoader(
+    ...     dataset, batch_size=1024, shuffle=True, num_workers=4)
+    """
+    def __init__(self, graphs, labels=None):
+        if len(graphs) == 0:
+            raise DGLError('Expect at least one graph.')
+        g0 = graphs[0]
+        for g in graphs:
+            if len(g.ntypes) != 1 or len(g.etypes) != 1:
+                raise DGLError('PackedGraphDataset only supports homogeneous graphs.')
+            if g.is_block:
+                raise DGLError('PackedGraphDataset does not support blocks.')
+            if g.idtype != g0.idtype:
+                raise DGLError('All the graphs must have the same ID type.')
+            if set(g.ndata.keys()) != set(g0.ndata.keys()) or \
+                    set(g.edata.keys()) != set(g0.edata.keys()):
+                raise DGLError('All the graphs must have the same node and edge features.')
+        self.idtype = g0.idtype
+        num_nodes = np.array([g.num_nodes() for g in graphs], dtype=np.int64)
+        num_edges = np.array([g.num_edges() for g in graphs], dtype=np.int64)
+        self.node_offsets = np.concatenate([[0], np.cumsum(num_nodes)])
+        self.edge_offsets = np.concatenate([[0], np.cumsum(num_edges)])
+        edges = [g.edges() for g in graphs]
+        self.src = np.concatenate([F.asnumpy(F.astype(u, F.int64)) for u, _ in edges])
+        self.dst = np.concatenate([F.asnumpy(F.astype(v, F.int64)) for _, v in edges])
+        self.ndata = {k: F.cat([g.ndata[k] for g in graphs], 0) for k in g0.ndata.keys()}
+        self.edata = {k: F.cat([g.edata[k] for g in graphs], 0) for k in g0.edata.keys()}
+        if labels is not None:
+            label_dict = labels if isinstance(labels, Mapping) else {None: labels}
+            for v in label_dict.values():
+                if F.shape(v)[0] != len(graphs):
+                    raise DGLError('Expect {} labels, got {}.'.format(
+                        len(graphs), F.shape(v)[0]))
+        self.labels = labels
+        self._shm_name = None
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Pack the graphs of a dataset whose items are either graphs or pairs of a
+        graph and its label, e.g. the graph classification datasets in
+        :mod:`dgl.data`.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            The dataset.
+
+        Returns
+        -------
+        PackedGraphDataset
+            The packed dataset.
+        """
+        items = [dataset[i] for i in range(len(dataset))]
+        if not isinstance(items[0], tuple):
+            return cls(items)
+        if len(items[0]) != 2:
+            raise DGLError('Expect the items of the dataset to be graphs or pairs of a '
+                           'graph and its label.')
+        labels = [label if F.is_tensor(label) else F.tensor(label) for _, label in items]
+        return cls([g for g, _ in items], F.stack(labels, 0))
+
+    @property
+    def is_shared(self):
+        """Whether the dataset is in shared memory."""
+        return self._shm_name is not None
+
+    def shared_memory(self, name):
+        """Return a copy of the dataset whose structure, features and labels are in
+        shared memory.
+
+        Pickling the returned dataset, e.g. when sending it to dataloader worker
+        processes, only pickles the names of the shared memory arrays, which the
+        receiving process maps without copying them.  The shared memory is released
+        when the returned dataset is deleted in the current process.
+
+        With multiple workers, :class:`~dgl.dataloading.GraphDataLoader` also lets the
+        workers return only the indices of the graphs in every batch, and batches the
+        graphs in the main process.
+
+        Parameters
+        ----------
+        name : str
+            The name of the shared memory, which must be unique among the processes
+            on the machine.
+
+        Returns
+        -------
+        PackedGraphDataset
+            The dataset in shared memory.
+        """
+        arrays = {}
+        for field, data in self._arrays().items():
+            if np.prod(F.shape(data)) == 0:
+                # empty shared memory cannot be mapped
+                arrays[field] = data
+                continue
+            arr = create_shared_mem_array('{}_{}'.format(name, field), F.shape(data),
+                                          F.dtype(data))
+            F.zerocopy_to_numpy(arr)[:] = F.asnumpy(data)
+            arrays[field] = arr
+        ret = PackedGraphDataset.__new__(PackedGraphDataset)
+        ret._set_arrays(arrays, self._keys())
+        ret.idtype = self.idtype
+        ret._shm_name = name
+        _SHARED_DATASETS[name] = ret
+        return ret
+
+    def _keys(self):
+        """Return the node feature names, the edge feature names and the label names,
+        which is None without labels and ``[None]`` with a single label tensor."""
+        if self.labels is None:
+            label_keys = None
+        elif isinstance(self.labels, Mapping):
+            label_keys = list(self.labels.keys())
+        else:
+            label_keys = [None]
+        return list(self.ndata.keys()), list(self.edata.keys()), label_keys
+
+    def _arrays(self):
+        """Return all the arrays of the dataset as tensors, by field name."""
+        ndata_keys, edata_keys, label_keys = self._keys()
+        arrays = {k: F.zerocopy_from_numpy(getattr(self, k))
+                  for k in ['node_offsets', 'edge_offsets', 'src', 'dst']}
+        for i, k in enumerate(ndata_keys):
+            arrays['ndata_%d' % i] = self.ndata[k]
+        for i, k in enumerate(edata_keys):
+            arrays['edata_%d' % i] = self.edata[k]
+        if label_keys == [None]:
+            arrays['labels_0'] = self.labels
+        elif label_keys is not None:
+            for i, k in enumerate(label_keys):
+                arrays['labels_%d' % i] = self.labels[k]
+        return arrays
+
+    def _set_arrays(self, arrays, keys):
+        """Inverse of :meth:`_arrays`."""
+        ndata_keys, edata_keys, label_keys = keys
+        for k in ['node_offsets', 'edge_offsets', 'src', 'dst']:
+            setattr(self, k, F.zerocopy_to_numpy(arrays[k]))
+        self.ndata = {k: arrays['ndata_%d' % i] for i, k in enumerate(ndata_keys)}
+        self.edata = {k: arrays['edata_%d' % i] for i, k in enumerate(edata_keys)}
+        if label_keys is None:
+            self.labels = None
+        elif label_keys == [None]:
+            self.labels = arrays['labels_0']
+        else:
+            self.labels = {k: arrays['labels_%d' % i] for i, k in enumerate(label_keys)}
+
+    def __getstate__(self):
+        if self._shm_name is None:
+            return self.__dict__
+        # only pickle where to find the shared arrays
+        arrays = {field: data if np.prod(F.shape(data)) == 0
+                  else (tuple(F.shape(data)), F.dtype(data))
+                  for field, data in self._arrays().items()}
+        return {'_shm_name': self._shm_name, 'idtype': self.idtype,
+                'keys': self._keys(), 'arrays': arrays}
+
+    def __setstate__(self, state):
+        name = state.get('_shm_name')
+        if name is None:
+            self._shm_name = None
+            self.__dict__.update(state)
+            return
+        if name in _SHARED_DATASETS:
+            self.__dict__.update(_SHARED_DATASETS[name].__dict__)
+            return
+        arrays = {field: get_shared_mem_array('{}_{}'.format(name, field), *spec)
+                  if isinstance(spec, tuple) else spec
+                  for field, spec in state['arrays'].items()}
+        self._set_arrays(arrays, state['keys'])
+        self.idtype = state['idtype']
+        self._shm_name = name
+        _SHARED_DATASETS[name] = self
+
+    def __len__(self):
+        return len(self.node_offsets) - 1
+
+    def __getitem__(self, idx):
+        item = PackedGraphIndex(self, idx)
+        if self.labels is None:
+            return item
+        elif isinstance(self.labels, Mapping):
+            return item, {k: v[idx] for k, v in self.labels.items()}
+        else:
+            return item, self.labels[idx]
+
+    @staticmethod
+    def _ranges(offsets, index, contiguous):
+        """Return the node or edge IDs of the given graphs, as a slice if the graphs
+        are contiguous or as an ID array otherwise, and the count of every graph."""
+        start = offsets[index]
+        count = offsets[index + 1] - start
+        if contiguous:
+            return slice(int(start[0]), int(start[0] + count.sum())), count
+        # the position of every element in the batch, shifted by the start of its graph
+        shift = np.repeat(start - np.concatenate([[0], np.cumsum(count)[:-1]]), count)
+        return np.arange(int(count.sum())) + shift, count
+
+    @staticmethod
+    def _gather(data, ids):
+        if isinstance(ids, slice):
+            # copy so that in-place updates on the batch do not modify the dataset
+            return F.clone(F.narrow_row(data, ids.start, ids.stop))
+        return F.gather_row(data, F.zerocopy_from_numpy(ids))
+
+    def batch(self, indices):
+        """Batch the graphs with the given indices into one graph.
+
+        Parameters
+        ----------
+        indices : list[int] or Tensor
+            The indices of the graphs.
+
+        Returns
+        -------
+        DGLGraph
+            The batched graph.
+        """
+        index = np.asarray(F.asnumpy(indices) if F.is_tensor(indices) else indices,
+                           dtype=np.int64)
+        # without shuffling, every feature is copied from a single contiguous range
+        contiguous = bool(np.all(index[1:] == index[:-1] + 1))
+        node_ids, num_nodes = self._ranges(self.node_offsets, index, contiguous)
+        edge_ids, num_edges = self._ranges(self.edge_offsets, index, contiguous)
+        # relabel the nodes with their position in the batch
+        batch_offsets = np.concatenate([[0], np.cumsum(num_nodes)[:-1]])
+        shift = np.repeat(batch_offsets, num_edges)
+        src = self.src[edge_ids] + shift
+        dst = self.dst[edge_ids] + shift
+        g = create_graph((F.zerocopy_from_numpy(src), F.zerocopy_from_numpy(dst)),
+                         num_nodes=int(num_nodes.sum()), idtype=self.idtype)
+        for k, v in self.ndata.items():
+            g.ndata[k] = self._gather(v, node_ids)
+        for k, v in self.edata.items():
+            g.edata[k] = self._gather(v, edge_ids)
+        g.set_batch_num_nodes(F.copy_to(F.tensor(num_nodes, dtype=self.idtype), g.device))
+        g.set_batch_num_edges(F.copy_to(F.tensor(num_edges, dtype=self.idtype), g.device))
+        return g
@@ -0,0 +1,182 @@
+"""Per-batch timing breakdown of the DataLoaders."""
+import json
+import os
+import threading
+
+import numpy as np
+
+__all__ = ['DataLoaderProfiler']
+
+# The stages of loading a batch, in the order a batch goes through them.
+_STAGES = ['sample', 'ipc', 'fetch', 'transfer', 'wait']
+
+class _BatchRecord(object):
+    """The timing breakdown of one batch."""
+    __slots__ = ['epoch', 'index', 'spans', 'bytes', 'blocks']
+
+    def __init__(self, epoch, index):
+        self.epoch = epoch
+        self.index = index
+        # stage -> (start time, end time, process ID)
+        self.spans = {}
+        # stage -> number of bytes
+        self.bytes = {}
+        # (number of source nodes, number of destination nodes, number of edges) of
+        # every block
+        self.blocks = []
+
+    def as_dict(self):
+        """Returns the record as a JSON-serializable dictionary."""
+        return {
+            'epoch': self.epoch,
+            'index': self.index,
+            'times': {stage: end - start for stage, (start, end, _) in self.spans.items()},
+            'bytes': dict(self.bytes),
+            'blocks': [list(block) for block in self.blocks]}
+
+
+class DataLoaderProfiler(object):
+    """Profiler recording where the time of every batch of a
+    :class:`~dgl.dataloading.DataLoader` goes.
+
+    For every batch, the profiler records the wall time of the following stages:
+
+    * ``'sample'``: running the graph sampler, in the worker processes if
+      ``num_workers > 0``.
+    * ``'ipc'``: sending the sampled batch from the worker process to the main process.
+    * ``'fetch'``: gathering the prefetched features from the feature storages.
+    * ``'transfer'``: copying the sampled batch to the device of the DataLoader.
+    * ``'wait'``: the time the training loop waited for the batch.
+
+    as well as the number of bytes of the features gathered (``'fetch'``) and of the
+    tensors in the batch copied to the device (``'transfer'``), and the numbers of
+    source nodes, destination nodes and edges of every block.
+
+    It is enabled by :meth:`DataLoader.profile <dgl.dataloading.DataLoader.profile>` and
+    costs nothing when it is not.  Every iteration over the DataLoader while the profiler
+    is enabled counts as an epoch.  The time of the stages running on a GPU does not
+    include the asynchronous kernels.
+
+    Parameters
+    ----------
+    on_batch : callable, optional
+        A function called with the record of every batch as a dict, once the batch is
+        returned to the training loop.
+
+    Examples
+    --------
+    >>> with dataloader.profile() as prof:
+    ...     for input_nodes, output_nodes, blocks in dataloader:
+    ...         train_on(blocks)
+    >>> prof.summary()['time']['sample']
+    {'total': 10.3, 'mean': 0.0103, 'max': 0.0312}
+    >>> prof.export_chrome_trace('dataloader.json')
+
+    The trace can be viewed in ``chrome://tracing`` or https://ui.perfetto.dev.
+    """
+    def __init__(self, on_batch=None):
+        self.on_batch = on_batch
+        self.records = []
+        self.epoch = -1
+        self._num_batches = 0
+        self._lock = threading.Lock()
+
+    def start_epoch(self):
+        """Starts recording a new epoch."""
+        with self._lock:
+            self.epoch += 1
+            self._num_batches = 0
+
+    def new_record(self):
+        """Appends the record of a new batch of the current epoch and returns it."""
+        with self._lock:
+            record = _BatchRecord(self.epoch, self._num_batches)
+            self._num_batches += 1
+            self.records.append(record)
+            return record
+
+    def finish(self, record):
+        """Called when the batch of the record is returned to the training loop."""
+        if self.on_batch is not None:
+            self.on_batch(record.as_dict())
+
+    def clear(self):
+        """Removes all the records."""
+        with self._lock:
+            self.records = []
+            self.epoch = -1
+            self._num_batches = 0
+
+    def summary(self, epoch=None):
+        """Aggregates the records of an epoch.
+
+        Parameters
+        ----------
+        epoch : int, optional
+            The epoch to summarize.  If None, the last epoch.
+
+        Returns
+        -------
+        dict
+            A dict with the number of batches (``'num_batches'``), the total, mean and
+            maximum time in seconds of every stage (``'time'``), the total number of bytes
+            moved by every stage (``'bytes'``), and the mean numbers of source nodes,
+            destination nodes and edges of every block (``'blocks'``).
+        """
+        epoch = self.epoch if epoch is None else epoch
+        records = [record for record in self.records if record.epoch == epoch]
+        times = {}
+        for stage in _STAGES:
+            elapsed = np.array([record.spans[stage][1] - record.spans[stage][0]
+                                for record in records if stage in record.spans])
+            if len(elapsed) > 0:
+                times[stage] = {'total': float(elapsed.sum()), 'mean': float(elapsed.mean()),
+                                'max': float(elapsed.max())}
+        num_bytes = {}
+        for record in records:
+            for stage, n in record.bytes.items():
+                num_bytes[stage] = num_bytes.get(stage, 0) + n
+        blocks = []
+        sizes = [record.blocks for record in records if len(record.blocks) > 0]
+        if len(sizes) > 0 and all(len(s) == len(sizes[0]) for s in sizes):
+            mean = np.array(sizes, dtype=np.float64).mean(0)
+            blocks = [{'num_src_nodes': float(b[0]), 'num_dst_nodes': float(b[1]),
+                       'num_edges': float(b[2])} for b in mean]
+        return {'epoch': epoch, 'num_batches': len(records), 'time': times,
+                'bytes': num_bytes, 'blocks': blocks}
+
+    def export_json(self, path):
+        """Writes the summaries of all the epochs and the records of all the batches to a
+        JSON file."""
+        with open(path, 'w') as f:
+            json.dump({
+                'summary': [self.summary(epoch) for epoch in range(self.epoch + 1)],
+                'batches': [record.as_dict() for record in self.records]}, f)
+
+    def export_chrome_trace(self, path):
+        """Writes the stages of all the batches to a JSON file in the Chrome trace event
+        format, with one row per stage and process."""
+        events = []
+        processes = set()
+        for record in self.records:
+            for stage, (start, end, pid) in record.spans.items():
+                processes.add(pid)
+                args = {'epoch': record.epoch, 'batch': record.index}
+                if stage in record.bytes:
+                    args['bytes'] = record.bytes[stage]
+                if stage == 'sample' and len(record.blocks) > 0:
+                    args['blocks'] = [list(block) for block in record.blocks]
+                events.append({
+                    'name': stage, 'cat': 'dataloader', 'ph': 'X', 'pid': pid,
+                    'tid': _STAGES.index(stage), 'ts': start * 1e6,
+                    'dur': (end - start) * 1e6, 'args': args})
+        for pid in processes:
+            events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid,
+                'args': {'name': 'main' if pid == os.getpid() else 'worker {}'.format(pid)}})
+            for tid, stage in enumerate(_STAGES):
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                    'args': {'name': stage}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -21,45 +21,120 @@ from Xie et al.
 import os
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import torch as th
-from dgl import DGLGraph
+from dgl.convert import graph as dgl_graph
 from dgl.sparse import libra_vertex_cut
-from dgl.sparse import libra2dgl_build_dict
-from dgl.sparse import libra2dgl_set_lr
-from dgl.sparse import libra2dgl_build_adjlist
 from dgl.data.utils import save_graphs, save_tensors
 from dgl.base import DGLError
 
 
-def libra_partition(num_community, G, resultdir):
+def _local_ids(u, v):
+    """
+    Assigns consecutive local node IDs to the end nodes of the edges of a partition,
+    in the order of their first appearance in the edge list.
+
+    Returns the global node IDs of the local nodes and the local end node IDs of
+    every edge.
+    """
+    uv = np.stack([u, v], 1).reshape(-1)
+    nodes, first, inverse = np.unique(uv, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    local = rank[inverse].reshape(-1, 2)
+    return nodes[order], local[:, 0], local[:, 1]
+
+
+def _split_node_dict(part_nodes, num_nodes, num_community):
+    """
+    Builds the database of the clones of the split nodes, for the nodes of all the
+    partitions concatenated in partition order; the position of a node in this order
+    is the node ID used by DistGNN across partitions.
+
+    Returns, for every clone, the IDs of the clones of the same node in the other
+    partitions (padded with -1), whether the node is not split (``inner_node``), and
+    the root of the 1-level tree among the clones of the node (-200 if not split).
+    """
+    clone_node = np.concatenate(part_nodes)
+    num_clones = np.bincount(clone_node, minlength=num_nodes)
+    clone_start = np.cumsum(num_clones) - num_clones
+    # the clones of every node, sorted by node and then by partition
+    order = np.argsort(clone_node, kind='stable')
+    sorted_count = num_clones[clone_node[order]]
+    sorted_start = clone_start[clone_node[order]]
+    rank = np.arange(len(order)) - sorted_start
+
+    adj_sorted = np.full((len(order), num_community - 1), -1, dtype=np.int64)
+    for j in range(num_community - 1):
+        # the j-th other clone, skipping the clone itself
+        src_rank = j + (j >= rank)
+        valid = src_rank < sorted_count
+        adj_sorted[valid, j] = order[sorted_start[valid] + src_rank[valid]]
+    adj = np.empty_like(adj_sorted)
+    adj[order] = adj_sorted
+
+    # pick a random clone of every node as the root of its 1-level tree
+    has_clone = num_clones > 0
+    root = np.full(num_nodes, -200, dtype=np.int64)
+    root[has_clone] = order[clone_start[has_clone] + (
+        np.random.rand(int(has_clone.sum())) * num_clones[has_clone]).astype(np.int64)]
+    split = num_clones[clone_node] > 1
+    lr = np.where(split, root[clone_node], -200)
+    return adj, (~split).astype(np.int32), lr
+
+
+def libra_partition(num_community, G, resultdir, num_workers=None):
     """
     Performs vertex-cut based graph partitioning and converts the partitioning
     output to DGL input format.
 
+    The edge assignment of Libra is kept in memory and converted to the partition
+    graphs directly, the partitions being built and written in parallel.
+
     Parameters
     ----------
     num_community : Number of partitions to create
     G : Input graph to be partitioned
     resultdir : Output location for storing the partitioned graphs
+    num_workers : Number of threads building and writing the partitions,
+                  one per partition by default
 
     Output
     ------
-    1. Creates X partition folder as XCommunities (say, X=2, so, 2Communities)
-       XCommunities contains file name communityZ.txt per partition Z (Z <- 0 .. X-1);
-       each such file contains a list of edges assigned to that partition.
-       These files constitute the output of Libra graph partitioner
-       (An intermediate result of this function).
-    2. The folder also contains partZ folders, each of these folders stores
+    1. Creates partZ folders in resultdir, each of these folders stores
        DGL/DistGNN graphs for the Z partitions;
        these graph files are used as input to DistGNN.
-    3. The folder also contains a json file which contains partitions' information.
+    2. The folder also contains a json file which contains partitions' information,
+       including the statistics returned by this function under ``libra_stats``.
+
+    Returns
+    -------
+    A dict of the partitioning statistics: the number of nodes and edges of every
+    partition, the replication factor (average number of clones of the nodes with
+    edges), the node and edge balance (maximum over average partition size), and the
+    time of the vertex cut, of building the partitions and of writing them.
     """
 
     num_nodes = G.number_of_nodes()   # number of nodes
     num_edges = G.number_of_edges()   # number of edges
-    print("Number of nodes in the graph: ", num_nodes)
-    print("Number of edges in the graph: ", num_edges)
 
+    try:
+        feat = G.ndata['feat']
+    except KeyError:
+        feat = G.ndata['features']
+
+    try:
+        labels = G.ndata['label']
+    except KeyError:
+        labels = G.ndata['labels']
+
+    trainm = G.ndata['train_mask'].int()
+    testm = G.ndata['test_mask'].int()
+    valm = G.ndata['val_mask'].int()
+
+    tic = time.time()
     in_d = G.in_degrees()
     out_d = G.out_degrees()
     node_degree = in_d + out_d
@@ -69,60 +144,37 @@ def libra_partition(num_community, G, resultdir):
     weight_ = th.ones(u_t.shape[0], dtype=th.int64)
     community_weights = th.zeros(num_community, dtype=th.int64)
 
-    # self_loop = 0
-    # for p, q in zip(u_t, v_t):
-    #     if p == q:
-    #         self_loop += 1
-    # print("#self loops in the dataset: ", self_loop)
-
-    # del G
-
-    ## call to C/C++ code
+    ## call to C/C++ code, with an empty output location to only get the assignment
     out = th.zeros(u_t.shape[0], dtype=th.int32)
     libra_vertex_cut(num_community, node_degree, edgenum_unassigned, community_weights,
-                     u_t, v_t, weight_, out, num_nodes, num_edges, resultdir)
-
-    print("Max partition size: ", int(community_weights.max()))
-    print(" ** Converting libra partitions to dgl graphs **")
-    fsize = int(community_weights.max()) + 1024   ## max edges in partition
-    # print("fsize: ", fsize, flush=True)
-
-    node_map = th.zeros(num_community, dtype=th.int64)
-    indices = th.zeros(num_nodes, dtype=th.int64)
-    lrtensor = th.zeros(num_nodes, dtype=th.int64)
-    gdt_key = th.zeros(num_nodes, dtype=th.int64)
-    gdt_value = th.zeros([num_nodes, num_community], dtype=th.int64)
-    offset = th.zeros(1, dtype=th.int64)
-    ldt_ar = []
-
-    gg_ar = [DGLGraph() for i in range(num_community)]
-    part_nodes = []
-
-    print(">>> ", "num_nodes   ", " ", "num_edges")
-    ## Iterator over number of partitions
-    for i in range(num_community):
-        g = gg_ar[i]
-
-        a_t = th.zeros(fsize, dtype=th.int64)
-        b_t = th.zeros(fsize, dtype=th.int64)
-        ldt_key = th.zeros(fsize, dtype=th.int64)
-        ldt_ar.append(ldt_key)
-
-        ## building node, parition dictionary
-        ## Assign local node ids and mapping to global node ids
-        ret = libra2dgl_build_dict(a_t, b_t, indices, ldt_key, gdt_key, gdt_value,
-                                   node_map, offset, num_community, i, fsize, resultdir)
-
-        num_nodes_partition = int(ret[0])
-        num_edges_partition = int(ret[1])
-        part_nodes.append(num_nodes_partition)
-        print(">>> ", num_nodes_partition, " ", num_edges_partition)
-        g.add_edges(a_t[0:num_edges_partition], b_t[0:num_edges_partition])
-
-    ########################################################
-    ## fixing lr - 1-level tree for the split-nodes
-    libra2dgl_set_lr(gdt_key, gdt_value, lrtensor, num_community, num_nodes)
-    ########################################################
+                     u_t, v_t, weight_, out, num_nodes, num_edges, "")
+    vertex_cut_time = time.time() - tic
+
+    tic = time.time()
+    u = u_t.numpy()
+    v = v_t.numpy()
+    assignment = out.numpy()
+    # the edges of every partition, in edge ID order
+    edge_order = np.argsort(assignment, kind='stable')
+    part_num_edges = np.bincount(assignment, minlength=num_community)
+    edge_offsets = np.concatenate([[0], np.cumsum(part_num_edges)])
+
+    def _build(i):
+        eids = edge_order[edge_offsets[i]:edge_offsets[i + 1]]
+        return _local_ids(u[eids], v[eids])
+
+    num_workers = num_workers or num_community
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        parts = list(executor.map(_build, range(num_community)))
+    part_nodes = [nodes for nodes, _, _ in parts]
+    part_num_nodes = np.array([len(nodes) for nodes in part_nodes], dtype=np.int64)
+    node_map = np.cumsum(part_num_nodes)
+    node_offsets = node_map - part_num_nodes
+
+    ## database of the clones of the split nodes and 1-level tree among them
+    adj, inner_node, lr = _split_node_dict(part_nodes, num_nodes, num_community)
+    build_time = time.time() - tic
+
     #graph_name = dataset
     graph_name = resultdir.split("_")[-1].split("/")[0]
     part_method = 'Libra'
@@ -132,6 +184,15 @@ def libra_partition(num_community, G, resultdir):
     edge_map_val = 0
     out_path = resultdir
 
+    num_assigned = int((np.bincount(np.concatenate(part_nodes), minlength=num_nodes) > 0).sum())
+    stats = {'part_num_nodes': part_num_nodes.tolist(),
+             'part_num_edges': part_num_edges.tolist(),
+             'replication_factor': float(part_num_nodes.sum()) / max(num_assigned, 1),
+             'node_balance': float(part_num_nodes.max() / part_num_nodes.mean()),
+             'edge_balance': float(part_num_edges.max() / part_num_edges.mean()),
+             'vertex_cut_time': vertex_cut_time,
+             'build_time': build_time}
+
     part_metadata = {'graph_name': graph_name,
                      'num_nodes': G.number_of_nodes(),
                      'num_edges': G.number_of_edges(),
@@ -140,105 +201,55 @@ def libra_partition(num_community, G, resultdir):
                      'halo_hops': num_hops,
                      'node_map': node_map_val,
                      'edge_map': edge_map_val}
-    ############################################################
-
-    for i in range(num_community):
-        g = gg_ar[0]
-        num_nodes_partition = part_nodes[i]
-        adj = th.zeros([num_nodes_partition, num_community - 1], dtype=th.int64)
-        inner_node = th.zeros(num_nodes_partition, dtype=th.int32)
-        lr_t = th.zeros(num_nodes_partition, dtype=th.int64)
-        ldt = ldt_ar[0]
-
-        try:
-            feat = G.ndata['feat']
-        except KeyError:
-            feat = G.ndata['features']
-
-        try:
-            labels = G.ndata['label']
-        except KeyError:
-            labels = G.ndata['labels']
-
-        trainm = G.ndata['train_mask'].int()
-        testm = G.ndata['test_mask'].int()
-        valm = G.ndata['val_mask'].int()
-
-        feat_size = feat.shape[1]
-        gfeat = th.zeros([num_nodes_partition, feat_size], dtype=feat.dtype)
-
-        glabels = th.zeros(num_nodes_partition, dtype=labels.dtype)
-        gtrainm = th.zeros(num_nodes_partition, dtype=trainm.dtype)
-        gtestm = th.zeros(num_nodes_partition, dtype=testm.dtype)
-        gvalm = th.zeros(num_nodes_partition, dtype=valm.dtype)
-
-        ## build remote node databse per local node
-        ## gather feats, train, test, val, and labels for each partition
-        libra2dgl_build_adjlist(feat, gfeat, adj, inner_node, ldt, gdt_key,
-                                gdt_value, node_map, lr_t, lrtensor, num_nodes_partition,
-                                num_community, i, feat_size, labels, trainm, testm, valm,
-                                glabels, gtrainm, gtestm, gvalm, feat.shape[0])
-
-
-        g.ndata['adj'] = adj    ## database of remote clones
-        g.ndata['inner_node'] = inner_node   ## split node '0' else '1'
-        g.ndata['feat'] = gfeat    ## gathered features
-        g.ndata['lf'] = lr_t   ## 1-level tree among split nodes
-
-        g.ndata['label'] = glabels
-        g.ndata['train_mask'] = gtrainm
-        g.ndata['test_mask'] = gtestm
-        g.ndata['val_mask'] = gvalm
-
-        # Validation code, run only small graphs
-        # for l in range(num_nodes_partition):
-        #     index = int(ldt[l])
-        #     assert glabels[l] == labels[index]
-        #     assert gtrainm[l] == trainm[index]
-        #     assert gtestm[l] == testm[index]
-        #     for j in range(feat_size):
-        #         assert gfeat[l][j] == feat[index][j]
-
-        print("Writing partition {} to file".format(i), flush=True)
-
-        part = g
-        part_id = i
-        part_dir = os.path.join(out_path, "part" + str(part_id))
+
+    def _write(i):
+        nodes, src, dst = parts[i]
+        begin, end = node_offsets[i], node_map[i]
+        g = dgl_graph((th.from_numpy(src), th.from_numpy(dst)), num_nodes=len(nodes))
+        index = th.from_numpy(nodes)
+        g.ndata['adj'] = th.from_numpy(adj[begin:end])    ## database of remote clones
+        g.ndata['inner_node'] = th.from_numpy(inner_node[begin:end])  ## split node '0' else '1'
+        g.ndata['feat'] = feat[index]    ## gathered features
+        g.ndata['lf'] = th.from_numpy(lr[begin:end])   ## 1-level tree among split nodes
+
+        g.ndata['label'] = labels[index]
+        g.ndata['train_mask'] = trainm[index]
+        g.ndata['test_mask'] = testm[index]
+        g.ndata['val_mask'] = valm[index]
+
+        part_dir = os.path.join(out_path, "part" + str(i))
         node_feat_file = os.path.join(part_dir, "node_feat.dgl")
         edge_feat_file = os.path.join(part_dir, "edge_feat.dgl")
         part_graph_file = os.path.join(part_dir, "graph.dgl")
-        part_metadata['part-{}'.format(part_id)] = {'node_feats': node_feat_file,
-                                                    'edge_feats': edge_feat_file,
-                                                    'part_graph': part_graph_file}
         os.makedirs(part_dir, mode=0o775, exist_ok=True)
-        save_tensors(node_feat_file, part.ndata)
-        save_graphs(part_graph_file, [part])
+        save_tensors(node_feat_file, g.ndata)
+        save_graphs(part_graph_file, [g])
+        return {'node_feats': node_feat_file,
+                'edge_feats': edge_feat_file,
+                'part_graph': part_graph_file}
 
-        del g
-        del gg_ar[0]
-        del ldt
-        del ldt_ar[0]
+    tic = time.time()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for i, files in enumerate(executor.map(_write, range(num_community))):
+            part_metadata['part-{}'.format(i)] = files
+    stats['write_time'] = time.time() - tic
+    part_metadata['libra_stats'] = stats
 
     with open('{}/{}.json'.format(out_path, graph_name), 'w') as outfile:
         json.dump(part_metadata, outfile, sort_keys=True, indent=4)
 
-    print("Conversion libra2dgl completed !!!")
+    return stats
 
 
-def partition_graph(num_community, G, resultdir):
+def partition_graph(num_community, G, resultdir, num_workers=None):
     """
     Performs vertex-cut based graph partitioning and converts the partitioning
     output to DGL input format.
 
     Given a graph, this function will create a folder named ``XCommunities`` where ``X``
-    stands for the number of communities.  It will contain ``X`` files named
-    ``communityZ.txt`` for each partition Z (from 0 to X-1);
-    each such file contains a list of edges assigned to that partition.
-    These files constitute the output of Libra graph partitioner.
-
-    The folder also contains X subfolders named ``partZ``, each of these folders stores
-    DGL/DistGNN graphs for partition Z; these graph files are used as input to
-    DistGNN.
+    stands for the number of communities.  It will contain X subfolders named ``partZ``
+    for each partition Z (from 0 to X-1), each of these folders stores DGL/DistGNN
+    graphs for partition Z; these graph files are used as input to DistGNN.
 
     The folder also contains a json file which contains partitions' information.
 
@@ -258,34 +269,37 @@ def partition_graph(num_community, G, resultdir):
         Input graph to be partitioned.
     resultdir : str
         Output location for storing the partitioned graphs.
+    num_workers : int, optional
+        Number of threads building and writing the partitions.  Default: one per
+        partition.
+
+    Returns
+    -------
+    dict
+        The partitioning statistics: ``part_num_nodes`` and ``part_num_edges`` with the
+        number of nodes and edges of every partition, ``replication_factor`` with the
+        average number of partitions every node (with edges) is split into,
+        ``node_balance`` and ``edge_balance`` with the ratio of the largest partition
+        to the average one, and ``vertex_cut_time``, ``build_time`` and ``write_time``
+        with the time in seconds of the vertex cut, of building the partitions and of
+        writing them.  They are also stored in the json file under ``libra_stats``.
     """
-
-    print("num partitions: ", num_community)
-    print("output location: ", resultdir)
-
     ## create ouptut directory
-    try:
-        os.makedirs(resultdir, mode=0o775, exist_ok=True)
-    except:
-        raise DGLError("Error: Could not create directory: ", resultdir)
-
-    tic = time.time()
-    print("####################################################################")
-    print("Executing parititons: ", num_community)
-    ltic = time.time()
     try:
         resultdir = os.path.join(resultdir, str(num_community) + "Communities")
         os.makedirs(resultdir, mode=0o775, exist_ok=True)
     except:
-        raise DGLError("Error: Could not create sub-directory: ", resultdir)
+        raise DGLError("Error: Could not create directory: ", resultdir)
 
     ## Libra partitioning
-    libra_partition(num_community, G, resultdir)
-
-    ltoc = time.time()
-    print("Time taken by {} partitions {:0.4f} sec".format(num_community, ltoc - ltic))
-    print()
-
-    toc = time.time()
-    print("Generated ", num_community, " partitions in {:0.4f} sec".format(toc - tic), flush=True)
-    print("Partitioning completed successfully !!!")
+    stats = libra_partition(num_community, G, resultdir, num_workers)
+
+    print("Generated {} partitions in {:0.4f} sec (vertex cut {:0.4f} sec, build {:0.4f} "
+          "sec, write {:0.4f} sec), replication factor {:0.4f}, node balance {:0.4f}, "
+          "edge balance {:0.4f}".format(
+              num_community,
+              stats['vertex_cut_time'] + stats['build_time'] + stats['write_time'],
+              stats['vertex_cut_time'], stats['build_time'], stats['write_time'],
+              stats['replication_factor'], stats['node_balance'], stats['edge_balance']),
+          flush=True)
+    return stats
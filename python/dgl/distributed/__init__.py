@@ -14,18 +14,20 @@ This includes a few submodules:
 import os
 import sys
 
-from .dist_graph import DistGraphServer, DistGraph, node_split, edge_split
+from .dist_graph import DistGraphServer, DistGraph, node_split, edge_split, node_clusters
 from .dist_tensor import DistTensor
-from .partition import partition_graph, load_partition, load_partition_book
+from .partition import partition_graph, partition_graph_out_of_core, load_partition, \
+    load_partition_book
 from .graph_partition_book import GraphPartitionBook, PartitionPolicy
 from .nn import *
 from . import optim
 
 from .rpc import *
-from .rpc_server import start_server
-from .rpc_client import connect_to_server, shutdown_servers
+from .rpc_server import start_server, ServerStats
+from .rpc_client import connect_to_server, shutdown_servers, get_server_stats
 from .dist_context import initialize, exit_client
 from .kvstore import KVServer, KVClient
 from .server_state import ServerState
 from .dist_dataloader import DistDataLoader
-from .graph_services import sample_neighbors, sample_etype_neighbors, in_subgraph
+from .graph_services import sample_neighbors, sample_etype_neighbors, in_subgraph, \
+    sample_blocks
@@ -229,13 +229,17 @@ def initialize(ip_config, num_servers=1, num_workers=0,
         formats = [f.strip() for f in formats]
         rpc.reset()
         keep_alive = bool(int(os.environ.get('DGL_KEEP_ALIVE', 0)))
+        num_kv_workers = os.environ.get('DGL_SERVER_NUM_KV_WORKERS')
         serv = DistGraphServer(int(os.environ.get('DGL_SERVER_ID')),
                                os.environ.get('DGL_IP_CONFIG'),
                                int(os.environ.get('DGL_NUM_SERVER')),
                                int(os.environ.get('DGL_NUM_CLIENT')),
                                os.environ.get('DGL_CONF_PATH'),
                                graph_format=formats,
-                               keep_alive=keep_alive)
+                               keep_alive=keep_alive,
+                               num_workers=int(os.environ.get('DGL_SERVER_NUM_WORKERS', 0)),
+                               num_kv_workers=None if num_kv_workers is None
+                               else int(num_kv_workers))
         serv.start()
         sys.exit()
     else:
@@ -10,9 +10,12 @@ from ..heterograph import DGLHeteroGraph
 from ..convert import heterograph as dgl_heterograph
 from ..convert import graph as dgl_graph
 from ..transform import compact_graphs
+from ..subgraph import node_subgraph
+from ..partition import metis_partition_assignment
 from .. import heterograph_index
 from .. import backend as F
-from ..base import NID, EID, NTYPE, ETYPE, ALL, is_all
+from .. import utils
+from ..base import NID, EID, NTYPE, ETYPE, ALL, is_all, DGLError
 from .kvstore import KVServer, get_kvstore
 from .._ffi.ndarray import empty_shared_mem
 from ..ndarray import exist_shared_mem_array
@@ -168,6 +171,14 @@ class HeteroEdgeView(object):
         assert isinstance(key, str)
         return EdgeSpace(data=EdgeDataView(self._graph, key))
 
+def _pull_many(g, data, keys, idx):
+    idx = utils.toindex(idx)
+    idx = idx.tousertensor()
+    tensors = {key: data[key] for key in keys}
+    # pylint: disable=protected-access
+    res = g._client.pull_many({tensor._name: idx for tensor in tensors.values()})
+    return {key: res[tensor._name] for key, tensor in tensors.items()}
+
 class NodeDataView(MutableMapping):
     """The data view class when dist_graph.ndata[...].data is called.
     """
@@ -197,6 +208,26 @@ class NodeDataView(MutableMapping):
     def _get_names(self):
         return list(self._data.keys())
 
+    def pull_many(self, keys, idx):
+        """Read the rows of multiple node data with the same node IDs at once.
+
+        It is equivalent to ``{key: self[key][idx] for key in keys}``, but issues only
+        one request to every remote machine.
+
+        Parameters
+        ----------
+        keys : list of str
+            The names of the node data.
+        idx : tensor
+            The node IDs.
+
+        Returns
+        -------
+        dict[str, tensor]
+            The data of every name.
+        """
+        return _pull_many(self._graph, self._data, keys, idx)
+
     def __getitem__(self, key):
         return self._data[key]
 
@@ -251,6 +282,26 @@ class EdgeDataView(MutableMapping):
     def _get_names(self):
         return list(self._data.keys())
 
+    def pull_many(self, keys, idx):
+        """Read the rows of multiple edge data with the same edge IDs at once.
+
+        It is equivalent to ``{key: self[key][idx] for key in keys}``, but issues only
+        one request to every remote machine.
+
+        Parameters
+        ----------
+        keys : list of str
+            The names of the edge data.
+        idx : tensor
+            The edge IDs.
+
+        Returns
+        -------
+        dict[str, tensor]
+            The data of every name.
+        """
+        return _pull_many(self._graph, self._data, keys, idx)
+
     def __getitem__(self, key):
         return self._data[key]
 
@@ -311,10 +362,16 @@ class DistGraphServer(KVServer):
         The graph formats.
     keep_alive : bool
         Whether to keep server alive when clients exit
+    num_workers : int
+        Number of threads processing sampling requests.  If 0, requests are processed
+        one by one.  See :func:`~dgl.distributed.start_server`.
+    num_kv_workers : int, optional
+        Number of threads processing KVStore requests.  Defaults to :attr:`num_workers`.
     '''
     def __init__(self, server_id, ip_config, num_servers,
                  num_clients, part_config, disable_shared_mem=False,
-                 graph_format=('csc', 'coo'), keep_alive=False):
+                 graph_format=('csc', 'coo'), keep_alive=False, num_workers=0,
+                 num_kv_workers=None):
         super(DistGraphServer, self).__init__(server_id=server_id,
                                               ip_config=ip_config,
                                               num_servers=num_servers,
@@ -322,6 +379,8 @@ class DistGraphServer(KVServer):
         self.ip_config = ip_config
         self.num_servers = num_servers
         self.keep_alive = keep_alive
+        self.num_workers = num_workers
+        self.num_kv_workers = num_kv_workers
         # Load graph partition data.
         if self.is_backup_server():
             # The backup server doesn't load the graph partition. It'll initialized afterwards.
@@ -376,7 +435,8 @@ class DistGraphServer(KVServer):
         start_server(server_id=self.server_id,
                      ip_config=self.ip_config,
                      num_servers=self.num_servers,
-                     num_clients=self.num_clients, server_state=server_state)
+                     num_clients=self.num_clients, server_state=server_state,
+                     num_workers=self.num_workers, num_kv_workers=self.num_kv_workers)
 
 class DistGraph:
     '''The class for accessing a distributed graph.
@@ -1514,6 +1574,59 @@ def node_split(nodes, partition_book=None, ntype='_N', rank=None, force_even=Tru
         local_nids = partition_book.partid2nids(partition_book.partid)
         return _split_local(partition_book, rank, nodes, local_nids)
 
+def node_clusters(g, nodes, num_clusters):
+    ''' Assign the given nodes to clusters of the local partition with METIS.
+
+    The inner nodes of the local partition are partitioned into :attr:`num_clusters`
+    clusters, and every given node gets the ID of its cluster.  Nodes outside of the
+    local partition get -1.  Together with the partition book, the cluster IDs allow
+    :class:`DistDataLoader` to put the seed nodes whose neighborhoods overlap in
+    the same minibatches.
+
+    Parameters
+    ----------
+    g : DistGraph
+        The distributed graph.  It must have a local partition, i.e. the client must
+        be co-located with a server.
+    nodes : 1D tensor
+        The node IDs, e.g. the training nodes returned by :func:`node_split`.
+    num_clusters : int
+        The number of clusters of the local partition.
+
+    Returns
+    -------
+    1D tensor
+        The cluster ID of every node.
+
+    Examples
+    --------
+    >>> train_nid = dgl.distributed.node_split(g.ndata['train_mask'])
+    >>> clusters = dgl.distributed.node_clusters(g, train_nid, 64)
+    >>> dataloader = dgl.distributed.DistDataLoader(
+    ...     train_nid, 1024, shuffle=True, collate_fn=sample,
+    ...     partition_book=g.get_partition_book(), cluster_ids=clusters)
+    '''
+    local_g = g.local_partition
+    if local_g is None:
+        raise DGLError('node_clusters requires the local partition, which is not '
+                       'available on a client not co-located with a server.')
+    inner = F.nonzero_1d(local_g.ndata['inner_node'])
+    inner_g = node_subgraph(local_g, inner, store_ids=False)
+    if num_clusters > 1:
+        assignment = F.asnumpy(metis_partition_assignment(inner_g.long(), num_clusters))
+    else:
+        assignment = np.zeros((inner_g.number_of_nodes(),), dtype=np.int64)
+    inner_nids = F.asnumpy(F.gather_row(local_g.ndata[NID], inner))
+    nodes = F.asnumpy(utils.toindex(nodes).tousertensor())
+
+    order = np.argsort(inner_nids)
+    pos = np.searchsorted(inner_nids[order], nodes)
+    pos = np.minimum(pos, len(order) - 1)
+    found = inner_nids[order[pos]] == nodes
+    cluster_ids = np.full((len(nodes),), -1, dtype=np.int64)
+    cluster_ids[found] = assignment[order[pos[found]]]
+    return F.tensor(cluster_ids)
+
 def edge_split(edges, partition_book=None, etype='_E', rank=None, force_even=True,
                edge_trainer_ids=None):
     ''' Split edges and return a subset for the local rank.
@@ -2,6 +2,8 @@
 
 import os
 
+import numpy as np
+
 from .dist_context import is_initialized
 from .kvstore import get_kvstore
 from .role import get_role
@@ -15,6 +17,73 @@ def _default_init_data(shape, dtype):
 # These IDs can identify the anonymous distributed tensors.
 DIST_TENSOR_ID = 0
 
+class _RemoteRowCache:
+    """A read cache of selected rows of a distributed tensor in the current process.
+
+    Parameters
+    ----------
+    kvstore : KVClient
+        The KVStore client.
+    name : str
+        The data name in the KVStore.
+    ids : numpy.ndarray
+        The sorted IDs of the rows to cache.
+    row_bytes : int
+        The number of bytes of a row.
+    """
+    def __init__(self, kvstore, name, ids, row_bytes):
+        self.kvstore = kvstore
+        self.name = name
+        self.ids = ids
+        self.row_bytes = row_bytes
+        self.num_hits = 0
+        self.num_misses = 0
+        self.data = None
+        self.version = None
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the cached rows from the KVStore."""
+        self.version = self.kvstore.get_data_version(self.name)
+        if len(self.ids) > 0:
+            self.data = self.kvstore.pull(name=self.name, id_tensor=F.tensor(self.ids))
+
+    def pull(self, idx):
+        """Read the rows of the given IDs, and only pull the rows that are not cached."""
+        if self.kvstore.get_data_version(self.name) != self.version:
+            # the data has been written by this process since the cache was filled
+            self.refresh()
+        np_idx = F.asnumpy(idx)
+        if len(self.ids) == 0 or len(np_idx) == 0:
+            self.num_misses += len(np_idx)
+            return self.kvstore.pull(name=self.name, id_tensor=idx)
+        pos = np.minimum(np.searchsorted(self.ids, np_idx), len(self.ids) - 1)
+        hit = self.ids[pos] == np_idx
+        num_hits = int(np.sum(hit))
+        self.num_hits += num_hits
+        self.num_misses += len(np_idx) - num_hits
+        if num_hits == 0:
+            return self.kvstore.pull(name=self.name, id_tensor=idx)
+        # rows of the misses are overwritten right after
+        data = F.gather_row(self.data, F.tensor(pos))
+        if num_hits < len(np_idx):
+            miss = F.tensor(np.nonzero(~hit)[0])
+            miss_data = self.kvstore.pull(name=self.name, id_tensor=F.gather_row(idx, miss))
+            data = F.scatter_row(data, miss, miss_data)
+        return data
+
+    def stats(self):
+        """Return the cache statistics."""
+        total = self.num_hits + self.num_misses
+        return {
+            'num_cached': len(self.ids),
+            'cache_bytes': len(self.ids) * self.row_bytes,
+            'num_hits': self.num_hits,
+            'num_misses': self.num_misses,
+            'hit_rate': self.num_hits / total if total > 0 else 0.,
+            'bytes_saved': self.num_hits * self.row_bytes,
+        }
+
 class DistTensor:
     ''' Distributed tensor.
 
@@ -112,6 +181,7 @@ class DistTensor:
         self._shape = shape
         self._dtype = dtype
         self._attach = attach
+        self._cache = None
 
         part_policies = self.kvstore.all_possible_part_policy
         # If a user doesn't provide a partition policy, we should find one based on
@@ -172,6 +242,8 @@ class DistTensor:
     def __getitem__(self, idx):
         idx = utils.toindex(idx)
         idx = idx.tousertensor()
+        if self._cache is not None:
+            return self._cache.pull(idx)
         return self.kvstore.pull(name=self._name, id_tensor=idx)
 
     def __setitem__(self, idx, val):
@@ -248,6 +320,76 @@ class DistTensor:
         '''
         return self.kvstore.count_nonzero(name=self._name)
 
+    def enable_cache(self, cache_bytes, priority):
+        '''Cache the rows of remote IDs with the highest priority in the current process.
+
+        Reading rows owned by other machines requires network communication. With the cache
+        enabled, the rows of the remote IDs with the highest priority (e.g., the node degrees
+        or how often the nodes are sampled) are read once and kept in the memory of the current
+        process, and only the rows that are not cached are pulled afterwards. Rows of the local
+        partition are never cached because they are read from shared memory.
+
+        Writes to the tensor from the current process (including the updates of
+        ``DistEmbedding`` by sparse optimizers) invalidate the cache and make the next read
+        refresh all cached rows. Writes from other processes are not visible until
+        :meth:`refresh_cache` is called, e.g., after a barrier. Therefore the cache is mostly
+        useful for tensors that are rarely written, such as input node features.
+
+        Parameters
+        ----------
+        cache_bytes : int
+            The maximum size of the cache in bytes.
+        priority : tensor
+            The priority of every row. Its length must be the same as the first
+            dimension of the tensor.
+
+        Examples
+        --------
+        >>> g.ndata['feat'].enable_cache(1024 ** 3, g.in_degrees())
+        >>> feat = g.ndata['feat'][input_nodes]
+        >>> g.ndata['feat'].cache_stats()['hit_rate']
+        0.62
+        '''
+        priority = F.asnumpy(priority)
+        assert len(priority) == self._shape[0], \
+                'The priority must have the same length as the first dimension of the tensor.'
+        itemsize = F.asnumpy(F.zeros((1,), self._dtype, F.cpu())).itemsize
+        row_bytes = itemsize * int(np.prod(self._shape[1:]))
+        capacity = int(cache_bytes // row_bytes)
+        all_ids = F.arange(0, self._shape[0])
+        partid = F.asnumpy(self._part_policy.to_partid(all_ids))
+        remote_ids = np.nonzero(partid != self._part_policy.part_id)[0]
+        if capacity < len(remote_ids):
+            top = np.argpartition(-priority[remote_ids], capacity)[:capacity]
+            remote_ids = remote_ids[top]
+        self._cache = _RemoteRowCache(self.kvstore, self._name, np.sort(remote_ids), row_bytes)
+
+    def disable_cache(self):
+        '''Disable the cache enabled by :meth:`enable_cache` and release its memory.'''
+        self._cache = None
+
+    def refresh_cache(self):
+        '''Re-read all the cached rows from the KVStore.
+
+        It is necessary if the tensor has been written by other processes.
+        '''
+        if self._cache is not None:
+            self._cache.refresh()
+
+    def cache_stats(self):
+        '''Return the statistics of the cache enabled by :meth:`enable_cache`.
+
+        Returns
+        -------
+        dict or None
+            ``num_cached`` and ``cache_bytes`` are the number of cached rows and their size
+            in bytes. ``num_hits`` and ``num_misses`` are the number of rows read from the cache
+            and from the KVStore. ``hit_rate`` is the fraction of cached reads.
+            ``bytes_saved`` is the number of bytes that are read from the cache.
+            None if the cache is not enabled.
+        '''
+        return self._cache.stats() if self._cache is not None else None
+
     def _attach_group_id(self, name):
         """Attach group ID if needed
 
@@ -3,16 +3,18 @@ from collections import namedtuple
 import numpy as np
 
 from .rpc import Request, Response, send_requests_to_machine, recv_responses
+from .rpc import round_trip_lock, synchronized
 from ..sampling import sample_neighbors as local_sample_neighbors
 from ..sampling import sample_etype_neighbors as local_sample_etype_neighbors
 from ..subgraph import in_subgraph as local_in_subgraph
 from .rpc import register_service
-from ..convert import graph, heterograph
-from ..base import NID, EID
+from . import locality
+from ..convert import graph, heterograph, create_block
+from ..base import NID, EID, DGLError
 from ..utils import toindex
 from .. import backend as F
 
-__all__ = ['sample_neighbors', 'in_subgraph', 'find_edges']
+__all__ = ['sample_neighbors', 'in_subgraph', 'find_edges', 'sample_blocks']
 
 SAMPLING_SERVICE_ID = 6657
 INSUBGRAPH_SERVICE_ID = 6658
@@ -20,6 +22,7 @@ EDGES_SERVICE_ID = 6659
 OUTDEGREE_SERVICE_ID = 6660
 INDEGREE_SERVICE_ID = 6661
 ETYPE_SAMPLING_SERVICE_ID = 6662
+SAMPLE_GATHER_SERVICE_ID = 6663
 
 class SubgraphResponse(Response):
     """The response for sampling and in_subgraph"""
@@ -139,9 +142,117 @@ def _in_subgraph(local_g, partition_book, seed_nodes):
     return global_src, global_dst, global_eids
 
 
+def _sample_and_gather(local_g, partition_book, kv_store, seed_nodes, fanouts, prob,
+                       replace, feat_names):
+    """ Sample multiple layers from local partition and gather the input node features.
+
+    Starting from the seed nodes, the in-neighbors of the nodes owned by the local
+    partition are sampled with ``fanouts[0]``.  The seed nodes and the sampled source nodes form
+    the seed nodes of the next layer, sampled with ``fanouts[1]``, and so on.  The
+    neighbors of the seed nodes owned by other partitions cannot be sampled here; they
+    are returned as pending nodes so that the caller can send them to their owners.
+
+    After the last layer, the features of the nodes owned by the local partition are
+    read from the KVStore.  All the node IDs are global IDs.
+
+    Returns
+    -------
+    tuple
+        The lists of the source nodes, destination nodes, edge IDs, sampled nodes and
+        pending nodes of every layer, followed by the input nodes whose features are
+        gathered and the list of their features.
+    """
+    partid = partition_book.partid
+    nodes = F.asnumpy(seed_nodes)
+    srcs, dsts, eids, sampled, pending = [], [], [], [], []
+    for fanout in fanouts:
+        owned = F.asnumpy(partition_book.nid2partid(F.zerocopy_from_numpy(nodes))) == partid
+        local_nids = F.zerocopy_from_numpy(nodes[owned])
+        if len(nodes[owned]) > 0:
+            src, dst, eid = _sample_neighbors(local_g, partition_book, local_nids,
+                                              fanout, 'in', prob, replace)
+        else:
+            src = dst = eid = F.zerocopy_from_numpy(np.zeros((0,), dtype=np.int64))
+        srcs.append(src)
+        dsts.append(dst)
+        eids.append(eid)
+        sampled.append(local_nids)
+        pending.append(F.zerocopy_from_numpy(nodes[~owned]))
+        nodes = np.unique(np.concatenate([nodes[owned], F.asnumpy(src)]))
+
+    feats = []
+    if kv_store is not None and len(feat_names) > 0:
+        owned = F.asnumpy(partition_book.nid2partid(F.zerocopy_from_numpy(nodes))) == partid
+        nodes = nodes[owned]
+    else:
+        nodes = nodes[:0]
+    feat_nids = F.zerocopy_from_numpy(nodes)
+    if len(nodes) > 0:
+        for name in feat_names:
+            local_id = kv_store.part_policy[name].to_local(feat_nids)
+            feats.append(kv_store.pull_handlers[name](kv_store.data_store, name, local_id))
+    return srcs, dsts, eids, sampled, pending, feat_nids, feats
+
+class SampleGatherResponse(Response):
+    """The response for fused multi-layer sampling and feature gathering"""
+
+    def __init__(self, depth, srcs, dsts, eids, sampled, pending, feat_nids, feats):
+        self.depth = depth
+        self.srcs = srcs
+        self.dsts = dsts
+        self.eids = eids
+        self.sampled = sampled
+        self.pending = pending
+        self.feat_nids = feat_nids
+        self.feats = feats
+
+    def __setstate__(self, state):
+        self.depth, num_layers = state[0], state[1]
+        tensors = state[2:]
+        self.srcs, self.dsts, self.eids, self.sampled, self.pending = [
+            list(tensors[i * num_layers:(i + 1) * num_layers]) for i in range(5)]
+        self.feat_nids = tensors[5 * num_layers]
+        self.feats = list(tensors[5 * num_layers + 1:])
+
+    def __getstate__(self):
+        # Keep the tensors at the top level of the state so that they are sent
+        # as tensor payloads instead of being pickled.
+        return (self.depth, len(self.srcs)) + tuple(
+            self.srcs + self.dsts + self.eids + self.sampled + self.pending +
+            [self.feat_nids] + self.feats)
+
+class SampleGatherRequest(Request):
+    """Fused multi-layer sampling and feature gathering request"""
+
+    dispatch_queue = 'sampling'
+
+    def __init__(self, nodes, depth, fan_outs, prob=None, replace=False, feat_names=()):
+        self.seed_nodes = nodes
+        self.depth = depth
+        self.prob = prob
+        self.replace = replace
+        self.fan_outs = list(fan_outs)
+        self.feat_names = list(feat_names)
+
+    def __setstate__(self, state):
+        self.seed_nodes, self.depth, self.prob, self.replace, self.fan_outs, \
+            self.feat_names = state
+
+    def __getstate__(self):
+        return self.seed_nodes, self.depth, self.prob, self.replace, self.fan_outs, \
+            self.feat_names
+
+    def process_request(self, server_state):
+        result = _sample_and_gather(server_state.graph, server_state.partition_book,
+                                    server_state.kv_store, self.seed_nodes, self.fan_outs,
+                                    self.prob, self.replace, self.feat_names)
+        return SampleGatherResponse(self.depth, *result)
+
 class SamplingRequest(Request):
     """Sampling Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, nodes, fan_out, edge_dir='in', prob=None, replace=False):
         self.seed_nodes = nodes
         self.edge_dir = edge_dir
@@ -167,6 +278,8 @@ class SamplingRequest(Request):
 class SamplingRequestEtype(Request):
     """Sampling Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, nodes, etype_field, fan_out, edge_dir='in', prob=None, replace=False):
         self.seed_nodes = nodes
         self.edge_dir = edge_dir
@@ -199,6 +312,8 @@ class SamplingRequestEtype(Request):
 class EdgesRequest(Request):
     """Edges Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, edge_ids, order_id):
         self.edge_ids = edge_ids
         self.order_id = order_id
@@ -219,6 +334,8 @@ class EdgesRequest(Request):
 class InDegreeRequest(Request):
     """In-degree Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, n, order_id):
         self.n = n
         self.order_id = order_id
@@ -252,6 +369,8 @@ class InDegreeResponse(Response):
 class OutDegreeRequest(Request):
     """Out-degree Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, n, order_id):
         self.n = n
         self.order_id = order_id
@@ -285,6 +404,8 @@ class OutDegreeResponse(Response):
 class InSubgraphRequest(Request):
     """InSubgraph Request"""
 
+    dispatch_queue = 'sampling'
+
     def __init__(self, nodes):
         self.seed_nodes = nodes
 
@@ -325,6 +446,7 @@ def merge_graphs(res_list, num_nodes):
 
 LocalSampledGraph = namedtuple('LocalSampledGraph', 'global_src global_dst global_eids')
 
+@synchronized
 def _distributed_access(g, nodes, issue_remote_req, local_access):
     '''A routine that fetches local neighborhood of nodes from the distributed graph.
 
@@ -378,11 +500,13 @@ def _distributed_access(g, nodes, issue_remote_req, local_access):
     if local_nids is not None:
         src, dst, eids = local_access(g.local_partition, partition_book, local_nids)
         res_list.append(LocalSampledGraph(src, dst, eids))
+        locality.add_counts(local_edges=len(src))
 
     # receive responses from remote machines.
     if msgseq2pos is not None:
         results = recv_responses(msgseq2pos)
         res_list.extend(results)
+        locality.add_counts(remote_edges=sum(len(res.global_src) for res in results))
 
     sampled_graph = merge_graphs(res_list, g.number_of_nodes())
     return sampled_graph
@@ -586,6 +710,193 @@ def sample_neighbors(g, nodes, fanout, edge_dir='in', prob=None, replace=False):
     else:
         return frontier
 
+def _build_block(dst_nodes, chunks, idtype):
+    """Build the block of one layer from the sampled edges in global IDs.
+
+    The neighbors of a node may be sampled more than once, e.g. when it is reached
+    from the seed nodes of two partitions.  Only the first sample of every destination
+    node is kept, and the samples of nodes not among the destination nodes are dropped.
+    Like :func:`~dgl.to_block`, the source nodes start with the destination nodes,
+    followed by the other sampled neighbors in the order of appearance.
+    """
+    done = np.zeros((0,), dtype=np.int64)
+    srcs, dsts, eids = [], [], []
+    for src, dst, eid, sampled in chunks:
+        keep = sampled[np.isin(sampled, dst_nodes) & ~np.isin(sampled, done)]
+        done = np.concatenate([done, keep])
+        mask = np.isin(dst, keep)
+        srcs.append(src[mask])
+        dsts.append(dst[mask])
+        eids.append(eid[mask])
+    src = np.concatenate(srcs) if srcs else np.zeros((0,), dtype=np.int64)
+    dst = np.concatenate(dsts) if dsts else np.zeros((0,), dtype=np.int64)
+    eid = np.concatenate(eids) if eids else np.zeros((0,), dtype=np.int64)
+
+    uniq_src, first = np.unique(src, return_index=True)
+    first = first[~np.isin(uniq_src, dst_nodes)]
+    src_nodes = np.concatenate([dst_nodes, src[np.sort(first)]])
+    order = np.argsort(src_nodes, kind='stable')
+    src_local = order[np.searchsorted(src_nodes[order], src)]
+    dst_order = np.argsort(dst_nodes, kind='stable')
+    dst_local = dst_order[np.searchsorted(dst_nodes[dst_order], dst)]
+
+    block = create_block((F.zerocopy_from_numpy(src_local), F.zerocopy_from_numpy(dst_local)),
+                         num_src_nodes=len(src_nodes), num_dst_nodes=len(dst_nodes),
+                         idtype=idtype)
+    block.srcdata[NID] = F.zerocopy_from_numpy(src_nodes)
+    block.dstdata[NID] = F.zerocopy_from_numpy(dst_nodes)
+    block.edata[EID] = F.zerocopy_from_numpy(eid)
+    return block, src_nodes
+
+def sample_blocks(g, seed_nodes, fanouts, prob=None, replace=False, feat_names=None):
+    """Sample the neighbors of the given nodes for multiple layers from a distributed
+    graph, and gather the features of the input nodes.
+
+    It returns the same MFGs as a :class:`~dgl.dataloading.NeighborSampler` with the
+    same fanouts, but with a much smaller number of round trips to the servers.
+    Instead of one request per layer for the sampling and one more for the input
+    features, all the layers are sampled on the server owning each seed node.  A
+    server samples the neighbors of the nodes it owns layer by layer, and returns
+    the features of the input nodes it owns together with the sampled edges.  The
+    nodes reached from a partition but owned by another one are sent to their owner
+    in a follow-up round, and the features of the input nodes not returned by any
+    server are read with a final pull.  With a good partitioning, a minibatch usually
+    takes one or two round trips.
+
+    Only homogeneous graphs and inbound edges are supported.
+
+    Parameters
+    ----------
+    g : DistGraph
+        The distributed graph.
+    seed_nodes : tensor
+        The output nodes of the minibatch.  Must not contain duplicates.
+    fanouts : list[int]
+        The number of edges to be sampled for each node on each layer, in the same
+        order as :class:`~dgl.dataloading.NeighborSampler`, i.e. ``fanouts[-1]``
+        applies to the seed nodes.  If -1 is given, all of the neighbors are selected.
+    prob : str, optional
+        Feature name used as the (unnormalized) probabilities associated with each
+        neighboring edge of a node.
+    replace : bool, optional
+        If True, sample with replacement.
+    feat_names : list[str], optional
+        The names of the node data to gather for the input nodes.  They are stored in
+        the ``srcdata`` of the first MFG.
+
+    Returns
+    -------
+    input_nodes : tensor
+        The input nodes of the minibatch.
+    output_nodes : tensor
+        The output nodes of the minibatch.
+    blocks : list[DGLGraph]
+        The MFGs, with the original node and edge IDs stored as ``dgl.NID`` and
+        ``dgl.EID``.
+
+    Examples
+    --------
+    >>> input_nodes, output_nodes, blocks = dgl.distributed.sample_blocks(
+    ...     g, seeds, [10, 25], feat_names=['feat'])
+    >>> feat = blocks[0].srcdata['feat']
+    """
+    gpb = g.get_partition_book()
+    if len(gpb.etypes) > 1:
+        raise DGLError('sample_blocks only supports homogeneous graphs.')
+    if isinstance(seed_nodes, dict):
+        assert len(seed_nodes) == 1
+        seed_nodes = list(seed_nodes.values())[0]
+    seeds = F.asnumpy(toindex(seed_nodes).tousertensor())
+    feat_names = list(feat_names) if feat_names is not None else []
+    # pylint: disable=protected-access
+    kv_names = [g.ndata[name]._name for name in feat_names]
+    # the fanout of every layer, starting from the layer of the seed nodes
+    depth_fanouts = list(reversed(fanouts))
+    num_layers = len(depth_fanouts)
+
+    chunks = [[] for _ in range(num_layers)]
+    feat_chunks = []
+    work = {0: seeds}
+    while len(work) > 0:
+        req_list = []
+        local_work = []
+        for depth, nodes in work.items():
+            partid = F.asnumpy(gpb.nid2partid(F.zerocopy_from_numpy(nodes)))
+            for pid in np.unique(partid):
+                node_id = F.zerocopy_from_numpy(nodes[partid == pid])
+                if pid == gpb.partid and g.local_partition is not None:
+                    local_work.append((depth, node_id))
+                else:
+                    req_list.append((pid, SampleGatherRequest(
+                        node_id, depth, depth_fanouts[depth:], prob, replace, kv_names)))
+        with round_trip_lock():
+            msgseq2pos = None
+            if len(req_list) > 0:
+                msgseq2pos = send_requests_to_machine(req_list)
+            # The local input node features are read by the final pull without any
+            # communication.
+            res_list = [SampleGatherResponse(depth, *_sample_and_gather(
+                g.local_partition, gpb, None, node_id, depth_fanouts[depth:], prob, replace,
+                [])) for depth, node_id in local_work]
+            locality.add_counts(
+                local_edges=sum(len(src) for res in res_list for src in res.srcs))
+            if msgseq2pos is not None:
+                results = recv_responses(msgseq2pos)
+                res_list.extend(results)
+                locality.add_counts(
+                    remote_edges=sum(len(src) for res in results for src in res.srcs),
+                    remote_feats=sum(len(res.feat_nids) * len(res.feats) for res in results))
+
+        pending = {}
+        for res in res_list:
+            for i in range(len(res.srcs)):
+                depth = res.depth + i
+                chunks[depth].append(tuple(F.asnumpy(x) for x in (
+                    res.srcs[i], res.dsts[i], res.eids[i], res.sampled[i])))
+                pending.setdefault(depth, []).append(F.asnumpy(res.pending[i]))
+            if len(res.feats) > 0:
+                feat_chunks.append((F.asnumpy(res.feat_nids), res.feats))
+        work = {}
+        for depth, nodes in pending.items():
+            nodes = np.unique(np.concatenate(nodes))
+            sampled = np.concatenate([chunk[3] for chunk in chunks[depth]])
+            nodes = nodes[~np.isin(nodes, sampled)]
+            if len(nodes) > 0:
+                work[depth] = nodes
+
+    blocks = []
+    nodes = seeds
+    for depth in range(num_layers):
+        block, nodes = _build_block(nodes, chunks[depth], g.idtype)
+        blocks.insert(0, block)
+    input_nodes = F.zerocopy_from_numpy(nodes)
+
+    if len(feat_names) > 0:
+        found = np.zeros((len(nodes),), dtype=bool)
+        feat_idx = None
+        if len(feat_chunks) > 0:
+            feat_nids = np.concatenate([nids for nids, _ in feat_chunks])
+            uniq_nids, first = np.unique(feat_nids, return_index=True)
+            pos = np.minimum(np.searchsorted(uniq_nids, nodes), len(uniq_nids) - 1)
+            found = uniq_nids[pos] == nodes
+            feat_idx = F.zerocopy_from_numpy(first[pos[found]])
+        missing = np.nonzero(~found)[0]
+        pulled = None
+        if len(missing) > 0:
+            pulled = g.ndata.pull_many(feat_names, F.zerocopy_from_numpy(nodes[missing]))
+        for i, name in enumerate(feat_names):
+            feat = g.ndata[name]
+            data = F.zeros((len(nodes),) + tuple(feat.shape[1:]), feat.dtype, F.cpu())
+            if feat_idx is not None:
+                rows = F.cat([feats[i] for _, feats in feat_chunks], 0)
+                data = F.scatter_row(data, F.zerocopy_from_numpy(np.nonzero(found)[0]),
+                                     F.gather_row(rows, feat_idx))
+            if pulled is not None:
+                data = F.scatter_row(data, F.zerocopy_from_numpy(missing), pulled[name])
+            blocks[0].srcdata[name] = data
+    return input_nodes, blocks[-1].dstdata[NID], blocks
+
+@synchronized
 def _distributed_edge_access(g, edges, issue_remote_req, local_access):
     """A routine that fetches local edges from distributed graph.
 
@@ -714,6 +1025,7 @@ def in_subgraph(g, nodes):
         return _in_subgraph(local_g, partition_book, local_nids)
     return _distributed_access(g, nodes, issue_remote_req, local_access)
 
+@synchronized
 def _distributed_get_node_property(g, n, issue_remote_req, local_access):
     req_list = []
     partition_book = g.get_partition_book()
@@ -776,9 +1088,17 @@ def out_degrees(g, u):
         return _out_degrees(local_g, partition_book, u)
     return _distributed_get_node_property(g, u, issue_remote_req, local_access)
 
-register_service(SAMPLING_SERVICE_ID, SamplingRequest, SubgraphResponse)
-register_service(EDGES_SERVICE_ID, EdgesRequest, FindEdgeResponse)
-register_service(INSUBGRAPH_SERVICE_ID, InSubgraphRequest, SubgraphResponse)
-register_service(OUTDEGREE_SERVICE_ID, OutDegreeRequest, OutDegreeResponse)
-register_service(INDEGREE_SERVICE_ID, InDegreeRequest, InDegreeResponse)
-register_service(ETYPE_SAMPLING_SERVICE_ID, SamplingRequestEtype, SubgraphResponse)
+register_service(SAMPLING_SERVICE_ID, SamplingRequest, SubgraphResponse,
+                 req_schema='Tsz?q', res_schema='TTT')
+register_service(EDGES_SERVICE_ID, EdgesRequest, FindEdgeResponse,
+                 req_schema='Tq', res_schema='TTq')
+register_service(INSUBGRAPH_SERVICE_ID, InSubgraphRequest, SubgraphResponse,
+                 req_schema='T', res_schema='TTT')
+register_service(OUTDEGREE_SERVICE_ID, OutDegreeRequest, OutDegreeResponse,
+                 req_schema='Tq', res_schema='Tq')
+register_service(INDEGREE_SERVICE_ID, InDegreeRequest, InDegreeResponse,
+                 req_schema='Tq', res_schema='Tq')
+register_service(ETYPE_SAMPLING_SERVICE_ID, SamplingRequestEtype, SubgraphResponse,
+                 req_schema='Tsz?Ts', res_schema='TTT')
+register_service(SAMPLE_GATHER_SERVICE_ID, SampleGatherRequest, SampleGatherResponse,
+                 req_schema='Tqz?QS', res_schema='qqT*')
@@ -4,6 +4,7 @@ import os
 import numpy as np
 
 from . import rpc
+from . import locality
 from .graph_partition_book import NodePartitionPolicy, EdgePartitionPolicy
 from .standalone_kvstore import KVClient as SA_KVClient
 
@@ -45,6 +46,8 @@ class PullRequest(rpc.Request):
     id_tensor : tensor
         a vector storing the data ID
     """
+    dispatch_queue = 'kv'
+
     def __init__(self, name, id_tensor):
         self.name = name
         self.id_tensor = id_tensor
@@ -82,6 +85,8 @@ class PushRequest(rpc.Request):
     data_tensor : tensor
         a tensor with the same row size of data ID
     """
+    dispatch_queue = 'kv'
+
     def __init__(self, name, id_tensor, data_tensor):
         self.name = name
         self.id_tensor = id_tensor
@@ -100,8 +105,9 @@ class PushRequest(rpc.Request):
         if self.name not in kv_store.data_store:
             raise RuntimeError("KVServer Cannot find data tensor with name: %s" % self.name)
         local_id = kv_store.part_policy[self.name].to_local(self.id_tensor)
-        kv_store.push_handlers[self.name](kv_store.data_store, self.name,
-                                          local_id, self.data_tensor)
+        with server_state.lock(self.name):
+            kv_store.push_handlers[self.name](kv_store.data_store, self.name,
+                                              local_id, self.data_tensor)
 
 INIT_DATA = 901233
 INIT_MSG = 'Init'
@@ -571,6 +577,79 @@ class CountLocalNonzeroRequest(rpc.Request):
         res = CountLocalNonzeroResponse(num_local_nonzero)
         return res
 
+KVSTORE_PULL_MANY = 901242
+
+class PullManyResponse(rpc.Response):
+    """Send the sliced data tensors of multiple data names back to the client.
+
+    Parameters
+    ----------
+    server_id : int
+        ID of current server
+    data_tensors : list of tensor
+        sliced data tensors, in the same order as the names in the request
+    """
+    def __init__(self, server_id, data_tensors):
+        self.server_id = server_id
+        self.data_tensors = data_tensors
+
+    def __getstate__(self):
+        # Keep the tensors at the top level of the state so that they are sent
+        # as tensor payloads instead of being pickled.
+        return (self.server_id,) + tuple(self.data_tensors)
+
+    def __setstate__(self, state):
+        self.server_id = state[0]
+        self.data_tensors = list(state[1:])
+
+class PullManyRequest(rpc.Request):
+    """Send the ID tensors of multiple data names to server in one message and get
+    the target data tensors as response.
+
+    Data names that are pulled with the same IDs share one ID tensor.
+
+    Parameters
+    ----------
+    names : list of str
+        data names
+    id_pos : list of int
+        for each data name, the position of its ID tensor in :attr:`id_tensors`
+    id_tensors : list of tensor
+        vectors storing the data IDs
+    """
+    dispatch_queue = 'kv'
+
+    def __init__(self, names, id_pos, id_tensors):
+        self.names = names
+        self.id_pos = id_pos
+        self.id_tensors = id_tensors
+
+    def __getstate__(self):
+        return (self.names, self.id_pos) + tuple(self.id_tensors)
+
+    def __setstate__(self, state):
+        self.names, self.id_pos = state[0], state[1]
+        self.id_tensors = list(state[2:])
+
+    def process_request(self, server_state):
+        kv_store = server_state.kv_store
+        local_ids = {}
+        data_tensors = []
+        for name, pos in zip(self.names, self.id_pos):
+            if name not in kv_store.part_policy:
+                raise RuntimeError("KVServer cannot find partition policy with name: %s" % name)
+            if name not in kv_store.data_store:
+                raise RuntimeError("KVServer Cannot find data tensor with name: %s" % name)
+            # map the IDs to local IDs only once per ID tensor and partition policy
+            policy = kv_store.part_policy[name]
+            key = (pos, policy.policy_str)
+            if key not in local_ids:
+                local_ids[key] = policy.to_local(self.id_tensors[pos])
+            data_tensors.append(
+                kv_store.pull_handlers[name](kv_store.data_store, name, local_ids[key]))
+        res = PullManyResponse(kv_store.server_id, data_tensors)
+        return res
+
 ############################ KVServer ###############################
 
 def default_push_handler(target, name, id_tensor, data_tensor):
@@ -644,10 +723,13 @@ class KVServer(object):
         # Register services on server
         rpc.register_service(KVSTORE_PULL,
                              PullRequest,
-                             PullResponse)
+                             PullResponse,
+                             req_schema='sT',
+                             res_schema='qT')
         rpc.register_service(KVSTORE_PUSH,
                              PushRequest,
-                             None)
+                             None,
+                             req_schema='sTT')
         rpc.register_service(INIT_DATA,
                              InitDataRequest,
                              InitDataResponse)
@@ -675,6 +757,11 @@ class KVServer(object):
         rpc.register_service(COUNT_LOCAL_NONZERO,
                              CountLocalNonzeroRequest,
                              CountLocalNonzeroResponse)
+        rpc.register_service(KVSTORE_PULL_MANY,
+                             PullManyRequest,
+                             PullManyResponse,
+                             req_schema='SQT*',
+                             res_schema='qT*')
         # Store the tensor data with specified data name
         self._data_store = {}
         # Store original tensor data names when instantiating DistGraphServer
@@ -857,10 +944,13 @@ class KVClient(object):
         # Register services on client
         rpc.register_service(KVSTORE_PULL,
                              PullRequest,
-                             PullResponse)
+                             PullResponse,
+                             req_schema='sT',
+                             res_schema='qT')
         rpc.register_service(KVSTORE_PUSH,
                              PushRequest,
-                             None)
+                             None,
+                             req_schema='sTT')
         rpc.register_service(INIT_DATA,
                              InitDataRequest,
                              InitDataResponse)
@@ -888,6 +978,11 @@ class KVClient(object):
         rpc.register_service(COUNT_LOCAL_NONZERO,
                              CountLocalNonzeroRequest,
                              CountLocalNonzeroResponse)
+        rpc.register_service(KVSTORE_PULL_MANY,
+                             PullManyRequest,
+                             PullManyResponse,
+                             req_schema='SQT*',
+                             res_schema='qT*')
         # Store the tensor data with specified data name
         self._data_store = {}
         # Store the partition information with specified data name
@@ -912,6 +1007,8 @@ class KVClient(object):
         # push and pull handler
         self._pull_handlers = {}
         self._push_handlers = {}
+        # The number of pushes to every data from this client
+        self._data_version = {}
         # register role on server-0
         self._role = role
 
@@ -940,6 +1037,7 @@ class KVClient(object):
         """Get the number of servers"""
         return self._server_count
 
+    @rpc.synchronized
     def barrier(self):
         """Barrier for all client nodes.
 
@@ -950,6 +1048,7 @@ class KVClient(object):
         response = rpc.recv_response()
         assert response.msg == BARRIER_MSG
 
+    @rpc.synchronized
     def register_push_handler(self, name, func):
         """Register UDF push function.
 
@@ -983,6 +1082,7 @@ class KVClient(object):
         self._push_handlers[name] = func
         self.barrier()
 
+    @rpc.synchronized
     def register_pull_handler(self, name, func):
         """Register UDF pull function.
 
@@ -1015,6 +1115,7 @@ class KVClient(object):
         self._pull_handlers[name] = func
         self.barrier()
 
+    @rpc.synchronized
     def init_data(self, name, shape, dtype, part_policy, init_func, is_gdata=True):
         """Send message to kvserver to initialize new data tensor and mapping this
         data from server side to client side.
@@ -1095,6 +1196,7 @@ class KVClient(object):
             assert response.msg == SEND_META_TO_BACKUP_MSG
         self.barrier()
 
+    @rpc.synchronized
     def delete_data(self, name):
         """Send message to kvserver to delete tensor and clear the meta data
 
@@ -1129,6 +1231,7 @@ class KVClient(object):
         del self._push_handlers[name]
         self.barrier()
 
+    @rpc.synchronized
     def map_shared_data(self, partition_book):
         """Mapping shared-memory tensor from server to client.
 
@@ -1232,6 +1335,23 @@ class KVClient(object):
         return machine_id
 
 
+    def get_data_version(self, name):
+        """Get the version stamp of the data, which is increased every time the data
+        is pushed by this client.
+
+        Parameters
+        ----------
+        name : str
+            data name
+
+        Returns
+        -------
+        int
+            the version stamp
+        """
+        return self._data_version.get(name, 0)
+
+    @rpc.synchronized
     def push(self, name, id_tensor, data_tensor):
         """Push data to KVServer.
 
@@ -1252,6 +1372,7 @@ class KVClient(object):
         assert F.ndim(id_tensor) == 1, 'ID must be a vector.'
         assert F.shape(id_tensor)[0] == F.shape(data_tensor)[0], \
         'The data must has the same row size with ID.'
+        self._data_version[name] = self._data_version.get(name, 0) + 1
         # partition data
         machine_id = self._part_policy[name].to_partid(id_tensor)
         # sort index by machine id
@@ -1281,6 +1402,7 @@ class KVClient(object):
         if local_id is not None: # local push
             self._push_handlers[name](self._data_store, name, local_id, local_data)
 
+    @rpc.synchronized
     def pull(self, name, id_tensor):
         """Pull message from KVServer.
 
@@ -1302,6 +1424,7 @@ class KVClient(object):
         assert F.ndim(id_tensor) == 1, 'ID must be a vector.'
         if self._pull_handlers[name] is default_pull_handler: # Use fast-pull
             part_id = self._part_policy[name].to_partid(id_tensor)
+            self._count_pulled_rows(F.asnumpy(part_id))
             return rpc.fast_pull(name, id_tensor, part_id, KVSTORE_PULL,
                                  self._machine_count,
                                  self._group_count,
@@ -1317,6 +1440,7 @@ class KVClient(object):
             back_sorted_id = F.tensor(np.argsort(F.asnumpy(sorted_id)))
             id_tensor = id_tensor[sorted_id]
             machine, count = np.unique(F.asnumpy(machine_id), return_counts=True)
+            self._count_pulled_rows(machine, count)
             # pull data from server by order
             start = 0
             pull_count = 0
@@ -1351,11 +1475,114 @@ class KVClient(object):
             data_tensor = F.cat(seq=[response.data_tensor for response in response_list], dim=0)
             return data_tensor[back_sorted_id] # return data with original index order
 
+    @rpc.synchronized
+    def pull_many(self, name_ids):
+        """Pull multiple data tensors from KVServer.
+
+        Compared with calling :meth:`pull` for every data name, the IDs of the data
+        names sharing the same ID tensor and partition policy are mapped to
+        partitions only once, and only one message is sent to every remote machine.
+
+        Parameters
+        ----------
+        name_ids : dict[str, tensor]
+            a dictionary from data name to a vector storing the ID list
+
+        Returns
+        -------
+        dict[str, tensor]
+            a dictionary from data name to the data tensor with the same row size of
+            the corresponding ID list.
+        """
+        # group the data names by ID tensor and partition policy
+        groups = {}
+        for name, id_tensor in name_ids.items():
+            assert len(name) > 0, 'name cannot be empty.'
+            key = (id(id_tensor), self._part_policy[name].policy_str)
+            if key not in groups:
+                groups[key] = (id_tensor, [])
+            groups[key][1].append(name)
+
+        # split the IDs of each group by machine
+        # machine ID -> (names, ID positions, ID tensors)
+        remote_requests = {}
+        group_splits = []
+        local_pulls = []
+        for id_tensor, names in groups.values():
+            id_tensor = utils.toindex(id_tensor)
+            id_tensor = id_tensor.tousertensor()
+            assert F.ndim(id_tensor) == 1, 'ID must be a vector.'
+            policy = self._part_policy[names[0]]
+            machine_id = F.asnumpy(policy.to_partid(id_tensor))
+            # sort index by machine id
+            sorted_id = np.argsort(machine_id)
+            back_sorted_id = F.tensor(np.argsort(sorted_id))
+            id_tensor = id_tensor[F.tensor(sorted_id)]
+            machine, count = np.unique(machine_id, return_counts=True)
+            self._count_pulled_rows(machine, count * len(names))
+            group_splits.append((names, machine, back_sorted_id))
+            start = 0
+            for machine_idx, cnt in zip(machine, count):
+                partial_id = id_tensor[start:start + cnt]
+                start += cnt
+                if machine_idx == self._machine_id:
+                    # Note that DO NOT pull local data right now because we can overlap
+                    # communication-local_pull here
+                    local_pulls.append((names, policy.to_local(partial_id)))
+                else:
+                    req_names, req_pos, req_ids = remote_requests.setdefault(
+                        machine_idx, ([], [], []))
+                    req_names.extend(names)
+                    req_pos.extend([len(req_ids)] * len(names))
+                    req_ids.append(partial_id)
+        for machine_idx, (req_names, req_pos, req_ids) in remote_requests.items():
+            request = PullManyRequest(req_names, req_pos, req_ids)
+            rpc.send_request_to_machine(machine_idx, request)
+
+        # local pull
+        data = {}
+        for names, local_id in local_pulls:
+            for name in names:
+                data[self._machine_id, name] = \
+                    self._pull_handlers[name](self._data_store, name, local_id)
+        # wait response from remote server nodes
+        for _ in range(len(remote_requests)):
+            response = rpc.recv_response()
+            machine_idx = response.server_id // self._group_count
+            for name, data_tensor in zip(remote_requests[machine_idx][0],
+                                         response.data_tensors):
+                data[machine_idx, name] = data_tensor
+
+        # concat the data by machine ID and restore the original index order
+        results = {}
+        for names, machine, back_sorted_id in group_splits:
+            for name in names:
+                if len(machine) == 0:
+                    dtype, shape, _ = self.get_data_meta(name)
+                    results[name] = F.zeros((0,) + tuple(shape[1:]), dtype, F.cpu())
+                    continue
+                data_tensor = F.cat([data[machine_idx, name] for machine_idx in machine], 0)
+                results[name] = data_tensor[back_sorted_id]
+        return results
+
+    def _count_pulled_rows(self, machine_id, count=None):
+        """Record the numbers of local and remote rows pulled for the locality
+        statistics, given the machine ID of every row, or the unique machine IDs and
+        the number of rows on each of them."""
+        if count is None:
+            num_local = int((machine_id == self._machine_id).sum())
+            num_total = len(machine_id)
+        else:
+            num_local = int(count[machine_id == self._machine_id].sum())
+            num_total = int(count.sum())
+        locality.add_counts(local_feats=num_local, remote_feats=num_total - num_local)
+
     def _take_id(self, elem):
         """Used by sort response list
         """
         return elem.server_id
 
+    @rpc.synchronized
     def count_nonzero(self, name):
         """Count nonzero value by pull request from KVServers.
 
@@ -0,0 +1,51 @@
+"""Counters of the graph structure and features that the current process reads from
+the local partition and from remote machines.
+
+They are used to measure the data locality of distributed training, e.g. by
+:attr:`DistDataLoader.locality_stats`.
+"""
+
+_COUNTERS = {'local_edges': 0, 'remote_edges': 0, 'local_feats': 0, 'remote_feats': 0}
+
+def add_counts(local_edges=0, remote_edges=0, local_feats=0, remote_feats=0):
+    """Add to the numbers of sampled edges and pulled feature rows.
+
+    Parameters
+    ----------
+    local_edges : int, optional
+        The number of edges sampled from the local partition.
+    remote_edges : int, optional
+        The number of edges sampled by remote machines.
+    local_feats : int, optional
+        The number of feature rows read from the local partition.
+    remote_feats : int, optional
+        The number of feature rows pulled from remote machines.
+    """
+    _COUNTERS['local_edges'] += int(local_edges)
+    _COUNTERS['remote_edges'] += int(remote_edges)
+    _COUNTERS['local_feats'] += int(local_feats)
+    _COUNTERS['remote_feats'] += int(remote_feats)
+
+def get_counts():
+    """Return a copy of the counters of the current process."""
+    return dict(_COUNTERS)
+
+def reset_counts():
+    """Reset the counters of the current process."""
+    for key in _COUNTERS:
+        _COUNTERS[key] = 0
+
+def diff_counts(after, before):
+    """Return the counts accumulated between two snapshots from :func:`get_counts`."""
+    return {key: after[key] - before[key] for key in after}
+
+def summarize_counts(counts):
+    """Return the counts together with the fraction of the sampled edges and of the
+    pulled feature rows that are local, under keys ``'local_edge_ratio'`` and
+    ``'local_feat_ratio'``."""
+    summary = dict(counts)
+    for kind in ('edge', 'feat'):
+        local, remote = counts['local_%ss' % kind], counts['remote_%ss' % kind]
+        summary['local_%s_ratio' % kind] = local / (local + remote) if local + remote > 0 \
+            else 0.
+    return summary
@@ -1,5 +1,8 @@
 """Node embedding optimizers for distributed training"""
 import abc
+import queue
+import threading
+import time
 from abc import abstractmethod
 import torch as th
 
@@ -12,14 +15,31 @@ class DistSparseGradOptimizer(abc.ABC):
 
     Note: dgl dist sparse optimizer only work with dgl.distributed.DistEmbedding
 
+    By default, every :meth:`step` exchanges the gradients among all trainers, updates the
+    embeddings and waits for all trainers to finish with a barrier. If :attr:`staleness`
+    is given, the gradient exchange and the updates run in a background thread instead,
+    and :meth:`step` only waits if more than :attr:`staleness` steps of this trainer are
+    not applied yet. As the exchange of every step involves all trainers, a trainer is
+    at most ``staleness + 1`` steps ahead of the slowest one. Call :meth:`flush` to
+    apply all the pending updates, e.g., before saving a checkpoint, and before any
+    collective operation on the KVStore such as ``DistTensor`` creation or
+    ``dgl.distributed`` barriers.
+
+    The time a trainer waits in :meth:`step` (for the barrier in the synchronous mode,
+    or for the background thread to catch up in the asynchronous mode) is recorded in
+    :attr:`last_stall_time` and :attr:`total_stall_time`.
+
     Parameters
     ----------
     params : list of DistEmbedding
         The list of DistEmbedding.
     lr : float
         The learning rate.
+    staleness : int, optional
+        The maximum number of steps whose updates may be pending when :meth:`step`
+        returns. Default: None, which updates the embeddings synchronously.
     '''
-    def __init__(self, params, lr):
+    def __init__(self, params, lr, staleness=None):
         self._params = params
         self._lr = lr
         self._rank = None
@@ -35,6 +55,23 @@ class DistSparseGradOptimizer(abc.ABC):
             self._rank = 0
             self._world_size = 1
 
+        assert staleness is None or staleness >= 0, 'staleness must be non-negative'
+        self._staleness = staleness
+        self._group = None
+        if staleness is not None and self._world_size > 1:
+            # The background thread exchanges gradients in its own process group so that
+            # it never interleaves with the collectives of the training loop.
+            self._group = th.distributed.new_group(backend='gloo')
+        self._queue = None
+        self._thread = None
+        self._cond = threading.Condition()
+        self._num_pending = 0
+        self._error = None
+
+        self.num_steps = 0
+        self.last_stall_time = 0.
+        self.total_stall_time = 0.
+
     def step(self):
         ''' The step function.
 
@@ -42,98 +79,176 @@ class DistSparseGradOptimizer(abc.ABC):
         of the embeddings involved in a mini-batch to DGL's servers and update the embeddings.
         '''
         with th.no_grad():
-            local_indics = {emb.name: [] for emb in self._params}
-            local_grads = {emb.name: [] for emb in self._params}
-            device = th.device('cpu')
-            for emb in self._params:
-                name = emb._tensor.name
-                kvstore = emb._tensor.kvstore
-                trace = emb._trace
-                trainers_per_server = self._world_size // kvstore.num_servers
-
-                idics = [t[0] for t in trace]
-                grads = [t[1].grad.data for t in trace]
-                # If the sparse embedding is not used in the previous forward step
-                # The idx and grad will be empty, initialize them as empty tensors to
-                # avoid crashing the optimizer step logic.
-                #
-                # Note: we cannot skip the gradient exchange and update steps as other
-                # working processes may send gradient update requests corresponding
-                # to certain embedding to this process.
-                idics = th.cat(idics, dim=0) if len(idics) != 0 else \
-                    th.zeros((0,), dtype=th.long, device=th.device('cpu'))
-                grads = th.cat(grads, dim=0) if len(grads) != 0 else \
-                    th.zeros((0, emb.embedding_dim), dtype=th.float32, device=th.device('cpu'))
-                device = grads.device
-
-                # will send grad to each corresponding trainer
-                if self._world_size > 1:
-                    # get idx split from kvstore
-                    idx_split = kvstore.get_partid(name, idics)
-                    idx_split_size = []
-                    idics_list = []
-                    grad_list = []
-                    # split idx and grad first
-                    for i in range(kvstore.num_servers):
-                        mask = idx_split == i
-                        idx_i = idics[mask]
-                        grad_i = grads[mask]
-
-                        if trainers_per_server <= 1:
-                            idx_split_size.append(th.tensor([idx_i.shape[0]], dtype=th.int64))
-                            idics_list.append(idx_i)
-                            grad_list.append(grad_i)
-                        else:
-                            kv_idx_split = th.remainder(idx_i, trainers_per_server).long()
-                            for j in range(trainers_per_server):
-                                mask = kv_idx_split == j
-                                idx_j = idx_i[mask]
-                                grad_j = grad_i[mask]
-                                idx_split_size.append(th.tensor([idx_j.shape[0]], dtype=th.int64))
-                                idics_list.append(idx_j)
-                                grad_list.append(grad_j)
-
-                    # if one machine launch multiple KVServer, they share the same storage.
-                    # For each machine, the pytorch rank is num_trainers * machine_id + i
-
-                    # use scatter to sync across trainers about the p2p tensor size
-                    # Note: If we have GPU nccl support, we can use all_to_all to
-                    # sync information here
-                    gather_list = list(th.empty([self._world_size],
-                                                dtype=th.int64).chunk(self._world_size))
-                    alltoall_cpu(self._rank, self._world_size, gather_list, idx_split_size)
-                    # use cpu until we have GPU alltoallv
-                    idx_gather_list = [th.empty((int(num_emb),),
-                                                dtype=idics.dtype) for num_emb in gather_list]
-                    alltoallv_cpu(self._rank, self._world_size, idx_gather_list, idics_list)
-                    local_indics[name] = idx_gather_list
-                    grad_gather_list = [th.empty((int(num_emb), grads.shape[1]),
-                                                 dtype=grads.dtype) for num_emb in gather_list]
-                    alltoallv_cpu(self._rank, self._world_size, grad_gather_list, grad_list)
-                    local_grads[name] = grad_gather_list
-                else:
-                    local_indics[name] = [idics]
-                    local_grads[name] = [grads]
-
+            idics, grads = self._collect_grads()
             if self._clean_grad:
                 # clean gradient track
                 for emb in self._params:
                     emb.reset_trace()
                 self._clean_grad = False
 
-            # do local update
-            for emb in self._params:
-                name = emb._tensor.name
-
-                idx = th.cat(local_indics[name], dim=0)
-                grad = th.cat(local_grads[name], dim=0)
-                self.update(idx.to(device, non_blocking=True),
-                            grad.to(device, non_blocking=True), emb)
-
-        # synchronized gradient update
+            if self._staleness is None:
+                self._exchange_and_update(idics, grads)
+        start = time.time()
+        if self._staleness is None:
+            # synchronized gradient update
+            if self._world_size > 1:
+                th.distributed.barrier()
+        else:
+            self._start_thread()
+            with self._cond:
+                self._num_pending += 1
+                self._queue.put((idics, grads))
+                while self._num_pending > self._staleness and self._error is None:
+                    self._cond.wait()
+            self._check_error()
+        self.last_stall_time = time.time() - start
+        self.total_stall_time += self.last_stall_time
+        self.num_steps += 1
+
+    def flush(self):
+        ''' Wait until the updates of all the previous steps of all trainers are applied.
+
+        It returns immediately in the synchronous mode.
+        '''
+        if self._staleness is None:
+            return
+        with self._cond:
+            while self._num_pending > 0 and self._error is None:
+                self._cond.wait()
+        self._check_error()
+        # The other trainers may still be applying the gradients sent by this trainer.
         if self._world_size > 1:
             th.distributed.barrier()
 
+    def reset_stats(self):
+        ''' Reset the step counter and the stall time.
+        '''
+        self.num_steps = 0
+        self.last_stall_time = 0.
+        self.total_stall_time = 0.
+
+    def _start_thread(self):
+        if self._thread is not None:
+            return
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._update_loop, daemon=True)
+        self._thread.start()
+
+    def _update_loop(self):
+        while True:
+            idics, grads = self._queue.get()
+            try:
+                if self._error is None:
+                    with th.no_grad():
+                        self._exchange_and_update(idics, grads)
+            except Exception as error:      # pylint: disable=broad-except
+                self._error = error
+            with self._cond:
+                self._num_pending -= 1
+                self._cond.notify_all()
+
+    def _check_error(self):
+        if self._error is not None:
+            raise RuntimeError('Failed to update the sparse embeddings in the background '
+                               'thread.') from self._error
+
+    def _collect_grads(self):
+        ''' Collect the indices and the gradients of every embedding from its trace. '''
+        all_idics = {}
+        all_grads = {}
+        for emb in self._params:
+            name = emb._tensor.name
+            trace = emb._trace
+            idics = [t[0] for t in trace]
+            grads = [t[1].grad.data for t in trace]
+            # If the sparse embedding is not used in the previous forward step
+            # The idx and grad will be empty, initialize them as empty tensors to
+            # avoid crashing the optimizer step logic.
+            #
+            # Note: we cannot skip the gradient exchange and update steps as other
+            # working processes may send gradient update requests corresponding
+            # to certain embedding to this process.
+            all_idics[name] = th.cat(idics, dim=0) if len(idics) != 0 else \
+                th.zeros((0,), dtype=th.long, device=th.device('cpu'))
+            all_grads[name] = th.cat(grads, dim=0) if len(grads) != 0 else \
+                th.zeros((0, emb.embedding_dim), dtype=th.float32, device=th.device('cpu'))
+        return all_idics, all_grads
+
+    def _exchange_and_update(self, all_idics, all_grads):
+        ''' Send the gradients to the trainers owning the embeddings and apply the
+        gradients received. '''
+        local_indics = {emb.name: [] for emb in self._params}
+        local_grads = {emb.name: [] for emb in self._params}
+        device = th.device('cpu')
+        for emb in self._params:
+            name = emb._tensor.name
+            kvstore = emb._tensor.kvstore
+            trainers_per_server = self._world_size // kvstore.num_servers
+            idics = all_idics[name]
+            grads = all_grads[name]
+            device = grads.device
+
+            # will send grad to each corresponding trainer
+            if self._world_size > 1:
+                # get idx split from kvstore
+                idx_split = kvstore.get_partid(name, idics)
+                idx_split_size = []
+                idics_list = []
+                grad_list = []
+                # split idx and grad first
+                for i in range(kvstore.num_servers):
+                    mask = idx_split == i
+                    idx_i = idics[mask]
+                    grad_i = grads[mask]
+
+                    if trainers_per_server <= 1:
+                        idx_split_size.append(th.tensor([idx_i.shape[0]], dtype=th.int64))
+                        idics_list.append(idx_i)
+                        grad_list.append(grad_i)
+                    else:
+                        kv_idx_split = th.remainder(idx_i, trainers_per_server).long()
+                        for j in range(trainers_per_server):
+                            mask = kv_idx_split == j
+                            idx_j = idx_i[mask]
+                            grad_j = grad_i[mask]
+                            idx_split_size.append(th.tensor([idx_j.shape[0]], dtype=th.int64))
+                            idics_list.append(idx_j)
+                            grad_list.append(grad_j)
+
+                # if one machine launch multiple KVServer, they share the same storage.
+                # For each machine, the pytorch rank is num_trainers * machine_id + i
+
+                # use scatter to sync across trainers about the p2p tensor size
+                # Note: If we have GPU nccl support, we can use all_to_all to
+                # sync information here
+                gather_list = list(th.empty([self._world_size],
+                                            dtype=th.int64).chunk(self._world_size))
+                alltoall_cpu(self._rank, self._world_size, gather_list, idx_split_size,
+                             group=self._group)
+                # use cpu until we have GPU alltoallv
+                idx_gather_list = [th.empty((int(num_emb),),
+                                            dtype=idics.dtype) for num_emb in gather_list]
+                alltoallv_cpu(self._rank, self._world_size, idx_gather_list, idics_list,
+                              group=self._group)
+                local_indics[name] = idx_gather_list
+                grad_gather_list = [th.empty((int(num_emb), grads.shape[1]),
+                                             dtype=grads.dtype) for num_emb in gather_list]
+                alltoallv_cpu(self._rank, self._world_size, grad_gather_list, grad_list,
+                              group=self._group)
+                local_grads[name] = grad_gather_list
+            else:
+                local_indics[name] = [idics]
+                local_grads[name] = [grads]
+
+        # do local update
+        for emb in self._params:
+            name = emb._tensor.name
+
+            idx = th.cat(local_indics[name], dim=0)
+            grad = th.cat(local_grads[name], dim=0)
+            self.update(idx.to(device, non_blocking=True),
+                        grad.to(device, non_blocking=True), emb)
+
     @abstractmethod
     def update(self, idx, grad, emb):
         """ Update embeddings in a sparse manner
@@ -191,9 +306,13 @@ class SparseAdagrad(DistSparseGradOptimizer):
     eps : float, Optional
         The term added to the denominator to improve numerical stability
         Default: 1e-10
+    staleness : int, Optional
+        If given, update the embeddings asynchronously with at most this many pending
+        steps. See :class:`DistSparseGradOptimizer`.
+        Default: None
     '''
-    def __init__(self, params, lr, eps=1e-10):
-        super(SparseAdagrad, self).__init__(params, lr)
+    def __init__(self, params, lr, eps=1e-10, staleness=None):
+        super(SparseAdagrad, self).__init__(params, lr, staleness)
         self._eps = eps
         # We need to register a state sum for each embedding in the kvstore.
         self._state = {}
@@ -273,9 +392,13 @@ class SparseAdam(DistSparseGradOptimizer):
     eps : float, Optional
         The term added to the denominator to improve numerical stability
         Default: 1e-8
+    staleness : int, Optional
+        If given, update the embeddings asynchronously with at most this many pending
+        steps. See :class:`DistSparseGradOptimizer`.
+        Default: None
     '''
-    def __init__(self, params, lr, betas=(0.9, 0.999), eps=1e-08):
-        super(SparseAdam, self).__init__(params, lr)
+    def __init__(self, params, lr, betas=(0.9, 0.999), eps=1e-08, staleness=None):
+        super(SparseAdam, self).__init__(params, lr, staleness)
         self._eps = eps
         # We need to register a state sum for each embedding in the kvstore.
         self._beta1 = betas[0]
@@ -3,7 +3,7 @@
 import torch as th
 import torch.distributed as dist
 
-def alltoall_cpu(rank, world_size, output_tensor_list, input_tensor_list):
+def alltoall_cpu(rank, world_size, output_tensor_list, input_tensor_list, group=None):
     """Each process scatters list of input tensors to all processes in a cluster
     and return gathered list of tensors in output list. The tensors should have the same shape.
 
@@ -17,12 +17,15 @@ def alltoall_cpu(rank, world_size, output_tensor_list, input_tensor_list):
         The received tensors
     input_tensor_list : List of tensor
         The tensors to exchange
+    group : ProcessGroup, optional
+        The process group to work on. Default: the default process group.
     """
     input_tensor_list = [tensor.to(th.device('cpu')) for tensor in input_tensor_list]
     for i in range(world_size):
-        dist.scatter(output_tensor_list[i], input_tensor_list if i == rank else [], src=i)
+        dist.scatter(output_tensor_list[i], input_tensor_list if i == rank else [], src=i,
+                     group=group)
 
-def alltoallv_cpu(rank, world_size, output_tensor_list, input_tensor_list):
+def alltoallv_cpu(rank, world_size, output_tensor_list, input_tensor_list, group=None):
     """Each process scatters list of input tensors to all processes in a cluster
     and return gathered list of tensors in output list.
 
@@ -36,6 +39,8 @@ def alltoallv_cpu(rank, world_size, output_tensor_list, input_tensor_list):
         The received tensors
     input_tensor_list : List of tensor
         The tensors to exchange
+    group : ProcessGroup, optional
+        The process group to work on. Default: the default process group.
     """
     # send tensor to each target trainer using torch.distributed.isend
     # isend is async
@@ -44,11 +49,11 @@ def alltoallv_cpu(rank, world_size, output_tensor_list, input_tensor_list):
         if i == rank:
             output_tensor_list[i] = input_tensor_list[i].to(th.device('cpu'))
         else:
-            sender = dist.isend(input_tensor_list[i].to(th.device('cpu')), dst=i)
+            sender = dist.isend(input_tensor_list[i].to(th.device('cpu')), dst=i, group=group)
             senders.append(sender)
 
     for i in range(world_size):
         if i != rank:
-            dist.recv(output_tensor_list[i], src=i)
+            dist.recv(output_tensor_list[i], src=i, group=group)
 
-    th.distributed.barrier()
+    th.distributed.barrier(group=group)
@@ -2,12 +2,16 @@
 
 import json
 import os
+import shutil
+import tempfile
 import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 from .. import backend as F
-from ..base import NID, EID, NTYPE, ETYPE, dgl_warning
-from ..convert import to_homogeneous
+from ..base import NID, EID, NTYPE, ETYPE, dgl_warning, DGLError
+from ..convert import to_homogeneous, graph as dgl_graph
 from ..random import choice as random_choice
 from ..data.utils import load_graphs, save_graphs, load_tensors, save_tensors
 from ..partition import metis_partition_assignment, partition_graph_with_halo, get_peak_mem
@@ -862,3 +866,319 @@ def partition_graph(g, graph_name, num_parts, out_path, num_hops=1, part_method=
 
     if return_mapping:
         return orig_nids, orig_eids
+
+def _load_npy(arr):
+    return np.load(arr, mmap_mode='r') if isinstance(arr, str) else arr
+
+def _read_part_edges(tmp_dir, part_id, name, start=0, count=-1):
+    path = os.path.join(tmp_dir, 'part{}_{}.bin'.format(part_id, name))
+    with open(path, 'rb') as f:
+        f.seek(start * 8)
+        return np.fromfile(f, dtype=np.int64, count=count)
+
+def _build_partition(part_id, tmp_dir, num_hops, node_offsets, edge_offsets, chunk_size,
+                     node_feats, edge_feats, part_dir):
+    """Build the halo subgraph and the feature shards of one partition from the edge
+    buckets written by :func:`partition_graph_out_of_core`. Runs in a worker process."""
+    start = time.time()
+    node_start, node_end = node_offsets[part_id], node_offsets[part_id + 1]
+    num_inner_edges = edge_offsets[part_id + 1] - edge_offsets[part_id]
+    src = [_read_part_edges(tmp_dir, part_id, 'src')]
+    dst = [_read_part_edges(tmp_dir, part_id, 'dst')]
+    eids = [np.arange(edge_offsets[part_id], edge_offsets[part_id + 1])]
+    orig_eids = [_read_part_edges(tmp_dir, part_id, 'eid')]
+
+    # Every hop adds the in-edges of the nodes reached by the previous hop.  The
+    # in-edges of a node are all in the bucket of its partition.
+    src_nodes = src[0]
+    seen = np.arange(node_start, node_end)
+    for _ in range(num_hops - 1):
+        frontier = np.setdiff1d(src_nodes, seen)
+        if len(frontier) == 0:
+            break
+        seen = np.union1d(seen, frontier)
+        hop_src = []
+        frontier_parts = np.searchsorted(node_offsets, frontier, side='right') - 1
+        for i in np.unique(frontier_parts):
+            targets = frontier[frontier_parts == i]
+            num_edges = edge_offsets[i + 1] - edge_offsets[i]
+            for off in range(0, num_edges, chunk_size):
+                chunk_dst = _read_part_edges(tmp_dir, i, 'dst', off, chunk_size)
+                idx = np.nonzero(np.isin(chunk_dst, targets))[0]
+                if len(idx) == 0:
+                    continue
+                chunk_src = _read_part_edges(tmp_dir, i, 'src', off, chunk_size)
+                chunk_eid = _read_part_edges(tmp_dir, i, 'eid', off, chunk_size)
+                src.append(chunk_src[idx])
+                dst.append(chunk_dst[idx])
+                eids.append(edge_offsets[i] + off + idx)
+                orig_eids.append(chunk_eid[idx])
+                hop_src.append(chunk_src[idx])
+        src_nodes = np.concatenate(hop_src) if hop_src else np.zeros((0,), np.int64)
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+    eids = np.concatenate(eids)
+    orig_eids = np.concatenate(orig_eids)
+    # The inner edges come first in the order of their IDs; so do the HALO edges.
+    order = np.concatenate([np.arange(num_inner_edges),
+                            num_inner_edges + np.argsort(eids[num_inner_edges:], kind='stable')])
+    src, dst, eids, orig_eids = src[order], dst[order], eids[order], orig_eids[order]
+
+    # The inner nodes come first, followed by the HALO nodes sorted by their IDs.
+    num_inner = node_end - node_start
+    ends = np.concatenate([src, dst])
+    halo_nodes = np.unique(ends[(ends < node_start) | (ends >= node_end)])
+    def to_local(ids):
+        is_inner = (ids >= node_start) & (ids < node_end)
+        return np.where(is_inner, ids - node_start,
+                        num_inner + np.searchsorted(halo_nodes, ids))
+    nids = np.concatenate([np.arange(node_start, node_end), halo_nodes])
+    inner_node = np.zeros((len(nids),), dtype=np.int8)
+    inner_node[:num_inner] = 1
+    inner_edge = np.zeros((len(eids),), dtype=np.int8)
+    inner_edge[:num_inner_edges] = 1
+
+    orig_nids = np.load(os.path.join(tmp_dir, 'orig_nids.npy'), mmap_mode='r')
+    part = dgl_graph((F.zerocopy_from_numpy(to_local(src)), F.zerocopy_from_numpy(to_local(dst))),
+                 num_nodes=len(nids), idtype=F.int64)
+    part.ndata[NID] = F.zerocopy_from_numpy(nids)
+    part.ndata['inner_node'] = F.zerocopy_from_numpy(inner_node)
+    part.ndata['part_id'] = F.zerocopy_from_numpy(
+        np.searchsorted(node_offsets, nids, side='right') - 1)
+    part.ndata['orig_id'] = F.zerocopy_from_numpy(np.asarray(orig_nids[nids]))
+    part.edata[EID] = F.zerocopy_from_numpy(eids)
+    part.edata['inner_edge'] = F.zerocopy_from_numpy(inner_edge)
+    part.edata['orig_id'] = F.zerocopy_from_numpy(orig_eids)
+
+    # Only the features of the inner nodes and edges are stored.
+    inner_orig_nids = np.asarray(orig_nids[node_start:node_end])
+    inner_orig_eids = orig_eids[:num_inner_edges]
+    node_feat_file = os.path.join(part_dir, "node_feat.dgl")
+    edge_feat_file = os.path.join(part_dir, "edge_feat.dgl")
+    part_graph_file = os.path.join(part_dir, "graph.dgl")
+    os.makedirs(part_dir, mode=0o775, exist_ok=True)
+    save_tensors(node_feat_file, {
+        '_N/' + name: F.zerocopy_from_numpy(np.ascontiguousarray(_load_npy(arr)[inner_orig_nids]))
+        for name, arr in node_feats.items()})
+    save_tensors(edge_feat_file, {
+        '_E/' + name: F.zerocopy_from_numpy(np.ascontiguousarray(_load_npy(arr)[inner_orig_eids]))
+        for name, arr in edge_feats.items()})
+    save_graphs(part_graph_file, [part])
+    print('Building partition {} with {} nodes ({} inner) and {} edges ({} inner) takes '
+          '{:.3f}s, peak mem: {:.3f} GB'.format(part_id, len(nids), num_inner, len(eids),
+                                                num_inner_edges, time.time() - start,
+                                                get_peak_mem()))
+    return node_feat_file, edge_feat_file, part_graph_file
+
+def partition_graph_out_of_core(edges, num_nodes, graph_name, num_parts, out_path, num_hops=1,
+                                part_method="metis", node_feats=None, edge_feats=None,
+                                balance_edges=False, chunk_size=1 << 24, num_workers=None,
+                                return_mapping=False):
+    ''' Partition a homogeneous graph stored on disk for distributed training.
+
+    This is an alternative of :func:`partition_graph` for graphs whose structure and
+    features do not fit in the memory of one machine together. The input graph is
+    never materialized as a DGLGraph with its features:
+
+    1. Nodes are assigned to partitions. The "random" method only needs the number of
+       nodes. The "metis" method builds a DGLGraph of the graph structure alone.
+    2. Nodes are reshuffled so that the nodes of a partition have contiguous IDs.
+    3. Edges are streamed from disk in chunks of :attr:`chunk_size` and appended to
+       per-partition buckets in a temporary directory under :attr:`out_path`. An edge
+       belongs to the partition of its destination node.
+    4. The HALO subgraph and the feature shards of every partition are built from the
+       buckets in separate worker processes, so each worker only holds the data of
+       its own partition.
+
+    The output has the same layout as :func:`partition_graph` with ``reshuffle=True``
+    and can be loaded with :func:`load_partition`. The node and edge features are
+    stored under the names ``'_N/<name>'`` and ``'_E/<name>'``.
+
+    The time and the peak memory of every stage are printed.
+
+    Parameters
+    ----------
+    edges : str or (numpy.ndarray, numpy.ndarray)
+        The path of a ``.npy`` file storing an int array of shape ``(2, num_edges)``,
+        whose rows are the source and destination node IDs, or a pair of arrays
+        (e.g., ``numpy.memmap``) storing the source and destination node IDs.
+    num_nodes : int
+        The number of nodes in the graph.
+    graph_name : str
+        The name of the graph.
+    num_parts : int
+        The number of partitions.
+    out_path : str
+        The path to store the files for all partitioned data.
+    num_hops : int, optional
+        The number of hops of HALO nodes we construct on a partition graph structure.
+        Must be at least 1. Default: 1.
+    part_method : str, optional
+        The partition method. It supports "random" and "metis". Default: "metis".
+    node_feats : dict[str, str or numpy.ndarray], optional
+        The node features, each either the path of a ``.npy`` file or an array with
+        ``num_nodes`` rows. Arrays that are not memory-mapped ``.npy`` files are first
+        saved to the temporary directory so that the workers can memory-map them.
+    edge_feats : dict[str, str or numpy.ndarray], optional
+        The edge features, in the same form as :attr:`node_feats`.
+    balance_edges : bool, optional
+        Indicate whether to balance the edges in each partition. This argument is
+        used by the Metis algorithm.
+    chunk_size : int, optional
+        The number of edges read from disk at a time.
+    num_workers : int, optional
+        The number of worker processes building partitions. Default: the smaller of
+        :attr:`num_parts` and the number of CPUs.
+    return_mapping : bool, optional
+        Whether to return the mapping between the shuffled node/edge IDs and the
+        original node/edge IDs.
+
+    Returns
+    -------
+    Tensor, optional
+        If `return_mapping=True`, the original node ID of every shuffled node ID.
+    Tensor, optional
+        If `return_mapping=True`, the original edge ID of every shuffled edge ID.
+
+    Examples
+    --------
+    >>> np.save('edges.npy', np.stack([src, dst]))
+    >>> np.save('feat.npy', feat)
+    >>> dgl.distributed.partition_graph_out_of_core(
+    ...     'edges.npy', num_nodes, 'test', 4, 'output/', node_feats={'feat': 'feat.npy'})
+    >>> g, node_feats, edge_feats, gpb, graph_name, _, _ = dgl.distributed.load_partition(
+    ...     'output/test.json', 0)
+    '''
+    if num_hops < 1:
+        raise DGLError('partition_graph_out_of_core requires num_hops >= 1.')
+    if part_method not in ('metis', 'random'):
+        raise DGLError('Unknown partitioning method: ' + part_method)
+    if isinstance(edges, str):
+        edges = np.load(edges, mmap_mode='r')
+    src_ids, dst_ids = edges[0], edges[1]
+    num_edges = len(src_ids)
+    node_feats = {} if node_feats is None else node_feats
+    edge_feats = {} if edge_feats is None else edge_feats
+    os.makedirs(out_path, mode=0o775, exist_ok=True)
+    out_path = os.path.abspath(out_path)
+    tmp_dir = tempfile.mkdtemp(prefix='tmp_{}_'.format(graph_name), dir=out_path)
+    try:
+        # Features are handed to the workers as .npy files that they memory-map.
+        def to_npy(feats, prefix):
+            res = {}
+            for name, arr in feats.items():
+                if not isinstance(arr, str):
+                    path = os.path.join(tmp_dir, '{}_{}.npy'.format(prefix, len(res)))
+                    np.save(path, F.asnumpy(arr) if F.is_tensor(arr) else arr)
+                    arr = path
+                res[name] = arr
+            return res
+        node_feats = to_npy(node_feats, 'node_feat')
+        edge_feats = to_npy(edge_feats, 'edge_feat')
+
+        start = time.time()
+        if num_parts == 1:
+            node_parts = np.zeros((num_nodes,), dtype=np.int64)
+        elif part_method == 'metis':
+            src = np.concatenate([np.asarray(src_ids[i:i + chunk_size], dtype=np.int64)
+                                  for i in range(0, num_edges, chunk_size)])
+            dst = np.concatenate([np.asarray(dst_ids[i:i + chunk_size], dtype=np.int64)
+                                  for i in range(0, num_edges, chunk_size)])
+            sim_g = dgl_graph((F.zerocopy_from_numpy(src), F.zerocopy_from_numpy(dst)),
+                          num_nodes=num_nodes)
+            src = dst = None
+            node_parts = F.asnumpy(metis_partition_assignment(sim_g, num_parts,
+                                                              balance_edges=balance_edges))
+            sim_g = None
+        else:
+            node_parts = F.asnumpy(random_choice(num_parts, num_nodes))
+        print('Assigning nodes to partitions takes {:.3f}s, peak mem: {:.3f} GB'.format(
+            time.time() - start, get_peak_mem()))
+
+        start = time.time()
+        orig_nids = np.argsort(node_parts, kind='stable')
+        new_nids = np.empty((num_nodes,), dtype=np.int64)
+        new_nids[orig_nids] = np.arange(num_nodes)
+        node_offsets = np.zeros((num_parts + 1,), dtype=np.int64)
+        node_offsets[1:] = np.cumsum(np.bincount(node_parts, minlength=num_parts))
+        np.save(os.path.join(tmp_dir, 'orig_nids.npy'), orig_nids)
+        print('Reshuffling nodes takes {:.3f}s, peak mem: {:.3f} GB'.format(
+            time.time() - start, get_peak_mem()))
+
+        # Stream the edges into per-partition buckets with the reshuffled node IDs.
+        start = time.time()
+        edge_counts = np.zeros((num_parts,), dtype=np.int64)
+        num_cuts = 0
+        files = [{name: open(os.path.join(tmp_dir, 'part{}_{}.bin'.format(i, name)), 'wb')
+                  for name in ('src', 'dst', 'eid')} for i in range(num_parts)]
+        try:
+            for off in range(0, num_edges, chunk_size):
+                src = new_nids[np.asarray(src_ids[off:off + chunk_size], dtype=np.int64)]
+                dst = new_nids[np.asarray(dst_ids[off:off + chunk_size], dtype=np.int64)]
+                eid = np.arange(off, off + len(src))
+                dst_parts = np.searchsorted(node_offsets, dst, side='right') - 1
+                src_parts = np.searchsorted(node_offsets, src, side='right') - 1
+                num_cuts += int(np.sum(src_parts != dst_parts))
+                order = np.argsort(dst_parts, kind='stable')
+                bounds = np.searchsorted(dst_parts[order], np.arange(num_parts + 1))
+                for i in range(num_parts):
+                    idx = order[bounds[i]:bounds[i + 1]]
+                    if len(idx) == 0:
+                        continue
+                    src[idx].tofile(files[i]['src'])
+                    dst[idx].tofile(files[i]['dst'])
+                    eid[idx].tofile(files[i]['eid'])
+                    edge_counts[i] += len(idx)
+        finally:
+            for part_files in files:
+                for f in part_files.values():
+                    f.close()
+        new_nids = None
+        edge_offsets = np.zeros((num_parts + 1,), dtype=np.int64)
+        edge_offsets[1:] = np.cumsum(edge_counts)
+        print('Bucketing edges into partitions takes {:.3f}s, peak mem: {:.3f} GB'.format(
+            time.time() - start, get_peak_mem()))
+
+        start = time.time()
+        if num_workers is None:
+            num_workers = min(num_parts, os.cpu_count() or 1)
+        args = [(i, tmp_dir, num_hops, node_offsets, edge_offsets, chunk_size,
+                 node_feats, edge_feats, os.path.join(out_path, "part" + str(i)))
+                for i in range(num_parts)]
+        if num_workers > 1:
+            ctx = mp.get_context('spawn')
+            with ProcessPoolExecutor(num_workers, mp_context=ctx) as pool:
+                part_files = list(pool.map(_build_partition, *zip(*args)))
+        else:
+            part_files = [_build_partition(*arg) for arg in args]
+        print('Building partitions takes {:.3f}s, peak mem: {:.3f} GB'.format(
+            time.time() - start, get_peak_mem()))
+
+        part_metadata = {'graph_name': graph_name,
+                         'num_nodes': int(num_nodes),
+                         'num_edges': int(num_edges),
+                         'part_method': part_method,
+                         'num_parts': num_parts,
+                         'halo_hops': num_hops,
+                         'node_map': {'_N': [[int(node_offsets[i]), int(node_offsets[i + 1])]
+                                             for i in range(num_parts)]},
+                         'edge_map': {'_E': [[int(edge_offsets[i]), int(edge_offsets[i + 1])]
+                                             for i in range(num_parts)]},
+                         'ntypes': {'_N': 0},
+                         'etypes': {'_E': 0}}
+        for i, (node_feat_file, edge_feat_file, part_graph_file) in enumerate(part_files):
+            part_metadata['part-{}'.format(i)] = {
+                'node_feats': os.path.relpath(node_feat_file, out_path),
+                'edge_feats': os.path.relpath(edge_feat_file, out_path),
+                'part_graph': os.path.relpath(part_graph_file, out_path)}
+        with open('{}/{}.json'.format(out_path, graph_name), 'w') as outfile:
+            json.dump(part_metadata, outfile, sort_keys=True, indent=4)
+        print('There are {} edges in the graph and {} edge cuts for {} partitions.'.format(
+            num_edges, num_cuts, num_parts))
+
+        if return_mapping:
+            orig_eids = np.concatenate([_read_part_edges(tmp_dir, i, 'eid')
+                                        for i in range(num_parts)])
+            return F.zerocopy_from_numpy(orig_nids), F.zerocopy_from_numpy(orig_eids)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
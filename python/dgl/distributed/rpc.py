@@ -2,8 +2,13 @@
 server and clients."""
 import os
 import abc
+import array
+import functools
 import pickle
 import random
+import struct
+import sys
+import threading
 import numpy as np
 
 from .constants import SERVER_EXIT, SERVER_KEEP_ALIVE
@@ -19,11 +24,13 @@ __all__ = ['set_rank', 'get_rank', 'Request', 'Response', 'register_service', \
 'get_num_machines', 'set_num_machines', 'get_machine_id', 'set_machine_id', \
 'send_request', 'recv_request', 'send_response', 'recv_response', 'remote_call', \
 'send_request_to_machine', 'remote_call_to_machine', 'fast_pull', \
-'get_num_client', 'set_num_client', 'client_barrier', 'copy_data_to_shared_memory']
+'get_num_client', 'set_num_client', 'client_barrier', 'copy_data_to_shared_memory', \
+'WireSchema']
 
 REQUEST_CLASS_TO_SERVICE_ID = {}
 RESPONSE_CLASS_TO_SERVICE_ID = {}
 SERVICE_ID_TO_PROPERTY = {}
+CLASS_TO_WIRE_SCHEMA = {}
 
 DEFUALT_PORT = 30050
 
@@ -99,6 +106,33 @@ def read_ip_config(filename, num_servers):
         print("Error: data format on each line should be: [ip] [port]")
     return server_namebook
 
+# The responses are not routed to the thread that sent the requests, so the threads of a
+# process must not interleave their round trips of requests and responses.
+_ROUND_TRIP_LOCK = threading.RLock()
+
+def round_trip_lock():
+    """Return the reentrant lock of the round trips of requests and responses.
+
+    A thread sending requests must hold it until it receives all their responses, so that
+    it does not receive the responses to the requests of another thread of the process,
+    e.g. the background thread of an asynchronous sparse optimizer.
+
+    Examples
+    --------
+    >>> with rpc.round_trip_lock():
+    ...     msgseq2pos = rpc.send_requests_to_machine(req_list)
+    ...     results = rpc.recv_responses(msgseq2pos)
+    """
+    return _ROUND_TRIP_LOCK
+
+def synchronized(func):
+    """Decorator running the function under :func:`round_trip_lock`."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _ROUND_TRIP_LOCK:
+            return func(*args, **kwargs)
+    return wrapper
+
 def reset():
     """Reset the rpc context
     """
@@ -301,7 +335,7 @@ def set_msg_seq(msg_seq):
     """
     _CAPI_DGLRPCSetMsgSeq(int(msg_seq))
 
-def register_service(service_id, req_cls, res_cls=None):
+def register_service(service_id, req_cls, res_cls=None, req_schema=None, res_schema=None):
     """Register a service to RPC.
 
     Parameter
@@ -312,11 +346,24 @@ def register_service(service_id, req_cls, res_cls=None):
         Request class.
     res_cls : class, optional
         Response class. If none, the service has no response.
+    req_schema : WireSchema or str, optional
+        Schema of the states of the request class.  If given, the requests are
+        serialized with the binary codec of :class:`WireSchema` instead of pickle.
+    res_schema : WireSchema or str, optional
+        Schema of the states of the response class.
     """
     REQUEST_CLASS_TO_SERVICE_ID[req_cls] = service_id
     if res_cls is not None:
         RESPONSE_CLASS_TO_SERVICE_ID[res_cls] = service_id
     SERVICE_ID_TO_PROPERTY[service_id] = (req_cls, res_cls)
+    for cls, schema in [(req_cls, req_schema), (res_cls, res_schema)]:
+        if cls is None:
+            continue
+        if schema is None:
+            CLASS_TO_WIRE_SCHEMA.pop(cls, None)
+        else:
+            CLASS_TO_WIRE_SCHEMA[cls] = schema if isinstance(schema, WireSchema) \
+                else WireSchema(schema)
 
 def get_service_property(service_id):
     """Get service property.
@@ -336,6 +383,11 @@ def get_service_property(service_id):
 class Request:
     """Base request class"""
 
+    # The queue of the multi-threaded server (see :func:`start_server`) this request is
+    # dispatched to: ``'kv'`` for KVStore traffic, ``'sampling'`` for graph queries, or
+    # None to process it in the receiving thread once all the queued requests are done.
+    dispatch_queue = None
+
     @abc.abstractmethod
     def __getstate__(self):
         """Get serializable states.
@@ -406,10 +458,194 @@ class Response:
             raise DGLError('Response class {} has not been registered as a service.'.format(cls))
         return sid
 
+_WIRE_MAGIC = b'DGLW'
+_NONE_LEN = 0xFFFFFFFF
+_LEN = struct.Struct('<I')
+
+def _is_int(val):
+    return isinstance(val, (int, np.integer)) and not isinstance(val, bool)
+
+def _is_float(val):
+    return isinstance(val, (float, int, np.floating, np.integer)) and not isinstance(val, bool)
+
+def _is_bool(val):
+    return isinstance(val, (bool, np.bool_))
+
+def _encode_str(val):
+    if not isinstance(val, str):
+        return None
+    val = val.encode('utf-8')
+    return _LEN.pack(len(val)) + val
+
+def _decode_str(data, offset):
+    length, = _LEN.unpack_from(data, offset)
+    offset += 4
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+def _encode_optional_str(val):
+    if val is None:
+        return _LEN.pack(_NONE_LEN)
+    return _encode_str(val)
+
+def _decode_optional_str(data, offset):
+    length, = _LEN.unpack_from(data, offset)
+    if length == _NONE_LEN:
+        return None, offset + 4
+    return _decode_str(data, offset)
+
+def _encode_strs(val):
+    # the strings are joined by NUL characters, which are not allowed in them
+    if not isinstance(val, (list, tuple)):
+        return None
+    try:
+        joined = '\0'.join(val)
+    except TypeError:
+        return None
+    if joined.count('\0') != max(len(val) - 1, 0):
+        return None
+    joined = joined.encode('utf-8')
+    return _LEN.pack(len(val)) + _LEN.pack(len(joined)) + joined
+
+def _decode_strs(data, offset):
+    num, length = struct.unpack_from('<II', data, offset)
+    offset += 8
+    if num == 0:
+        return [], offset
+    return data[offset:offset + length].decode('utf-8').split('\0'), offset + length
+
+def _encode_ints(val):
+    if not isinstance(val, (list, tuple)):
+        return None
+    try:
+        arr = array.array('q', val)
+    except TypeError:
+        return None
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return _LEN.pack(len(arr)) + arr.tobytes()
+
+def _decode_ints(data, offset):
+    num, = _LEN.unpack_from(data, offset)
+    offset += 4
+    arr = array.array('q')
+    arr.frombytes(data[offset:offset + num * 8])
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tolist(), offset + num * 8
+
+class WireSchema:
+    """Schema-based binary codec of the states of a Request or Response class.
+
+    The schema is a string with one character per element of the state returned by
+    ``__getstate__``:
+
+    * ``'T'``: a tensor, sent as a tensor payload without copying.
+    * ``'T*'``: any number of tensors.  Only allowed at the end of the schema.
+    * ``'q'``: an integer, stored as int64.
+    * ``'d'``: a float, stored as float64.
+    * ``'?'``: a bool.
+    * ``'s'``: a string.
+    * ``'z'``: a string or None.
+    * ``'S'``: a list of strings without NUL characters.
+    * ``'Q'``: a list of integers.
+
+    Integers, floats and bools are packed into a fixed-size header, followed by the
+    variable-length fields.  A state not matching the schema (e.g. an edge type
+    dictionary given instead of an integer fanout) is pickled instead, so the schema
+    only needs to describe the common case.
+
+    The schema is parsed once into the positions and the handlers of the fields, so
+    that encoding and decoding a message only loops over these tables.
+
+    Parameters
+    ----------
+    schema : str
+        The schema string.
+
+    Examples
+    --------
+    >>> rpc.register_service(KVSTORE_PULL, PullRequest, PullResponse,
+    ...                      req_schema='sT', res_schema='qT')
+    """
+    # code -> type check of the fixed-size fields
+    _FIXED = {'q': _is_int, 'd': _is_float, '?': _is_bool}
+    # code -> (encoder, decoder) of the variable-length fields
+    _VARIABLE = {
+        's': (_encode_str, _decode_str),
+        'z': (_encode_optional_str, _decode_optional_str),
+        'S': (_encode_strs, _decode_strs),
+        'Q': (_encode_ints, _decode_ints),
+    }
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.rest_tensors = schema.endswith('T*')
+        self.fields = schema[:-2] if self.rest_tensors else schema
+        # positions of the tensors, (position, type check) of the fixed-size fields and
+        # (position, encoder, decoder) of the variable-length fields
+        self._tensor_fields = []
+        self._fixed_fields = []
+        self._variable_fields = []
+        for pos, code in enumerate(self.fields):
+            if code == 'T':
+                self._tensor_fields.append(pos)
+            elif code in self._FIXED:
+                self._fixed_fields.append((pos, self._FIXED[code]))
+            elif code in self._VARIABLE:
+                self._variable_fields.append((pos,) + self._VARIABLE[code])
+            else:
+                raise DGLError('Invalid wire schema {}: unknown code {}.'.format(schema, code))
+        self._fixed = struct.Struct('<' + ''.join(c for c in self.fields if c in self._FIXED))
+
+    def encode(self, state):
+        """Encode the state into a payload buffer and a list of tensors.
+
+        Returns None if the state does not match the schema.
+        """
+        num = len(self.fields)
+        if len(state) < num if self.rest_tensors else len(state) != num:
+            return None
+        for pos in self._tensor_fields:
+            if not F.is_tensor(state[pos]):
+                return None
+        for pos, check in self._fixed_fields:
+            if not check(state[pos]):
+                return None
+        pieces = [_WIRE_MAGIC, self._fixed.pack(*[state[pos] for pos, _ in self._fixed_fields])]
+        for pos, encode, _ in self._variable_fields:
+            piece = encode(state[pos])
+            if piece is None:
+                return None
+            pieces.append(piece)
+        tensors = [state[pos] for pos in self._tensor_fields]
+        if self.rest_tensors:
+            for val in state[num:]:
+                if not F.is_tensor(val):
+                    return None
+                tensors.append(val)
+        return bytearray(b''.join(pieces)), tensors
+
+    def decode(self, data, tensors):
+        """Decode the state from a payload buffer and a list of tensors."""
+        state = [None] * len(self.fields)
+        values = self._fixed.unpack_from(data, len(_WIRE_MAGIC))
+        for (pos, _), val in zip(self._fixed_fields, values):
+            state[pos] = val
+        offset = len(_WIRE_MAGIC) + self._fixed.size
+        for pos, _, decode in self._variable_fields:
+            state[pos], offset = decode(data, offset)
+        for i, pos in enumerate(self._tensor_fields):
+            state[pos] = tensors[i]
+        if self.rest_tensors:
+            state.extend(tensors[len(self._tensor_fields):])
+        return state
+
 def serialize_to_payload(serializable):
     """Serialize an object to payloads.
 
-    The object must have implemented the __getstate__ function.
+    The object must have implemented the __getstate__ function.  If a
+    :class:`WireSchema` is registered for its class and the state matches it, the
+    binary codec is used; otherwise the non-tensor states are pickled.
 
     Parameters
     ----------
@@ -426,6 +662,11 @@ def serialize_to_payload(serializable):
     state = serializable.__getstate__()
     if not isinstance(state, tuple):
         state = (state,)
+    schema = CLASS_TO_WIRE_SCHEMA.get(serializable.__class__, None)
+    if schema is not None:
+        payload = schema.encode(state)
+        if payload is not None:
+            return payload
     nonarray_pos = []
     nonarray_state = []
     array_state = []
@@ -462,18 +703,27 @@ def deserialize_from_payload(cls, data, tensors):
     object
         De-serialized object of class cls.
     """
-    pos, nonarray_state = pickle.loads(data)
-    # Use _PLACEHOLDER to distinguish with other deserizliaed elements
-    state = [_PLACEHOLDER] * (len(nonarray_state) + len(tensors))
-    for i, no_state in zip(pos, nonarray_state):
-        state[i] = no_state
-    if len(tensors) != 0:
-        j = 0
-        state_len = len(state)
-        for i in range(state_len):
-            if state[i] is _PLACEHOLDER:
-                state[i] = tensors[j]
-                j += 1
+    if data[:len(_WIRE_MAGIC)] == _WIRE_MAGIC:
+        # Pickled payloads always start with the PROTO opcode, so they never collide
+        # with the magic number.
+        schema = CLASS_TO_WIRE_SCHEMA.get(cls, None)
+        if schema is None:
+            raise DGLError('Got a binary payload for {}, but no wire schema is '
+                           'registered for it.'.format(cls))
+        state = schema.decode(data, tensors)
+    else:
+        pos, nonarray_state = pickle.loads(data)
+        # Use _PLACEHOLDER to distinguish with other deserizliaed elements
+        state = [_PLACEHOLDER] * (len(nonarray_state) + len(tensors))
+        for i, no_state in zip(pos, nonarray_state):
+            state[i] = no_state
+        if len(tensors) != 0:
+            j = 0
+            state_len = len(state)
+            for i in range(state_len):
+                if state[i] is _PLACEHOLDER:
+                    state[i] = tensors[j]
+                    j += 1
     if len(state) == 1:
         state = state[0]
     else:
@@ -612,7 +862,7 @@ def send_request_to_machine(target, request):
     msg = RPCMessage(service_id, msg_seq, client_id, server_id, data, tensors, get_group_id())
     send_rpc_message(msg, server_id)
 
-def send_response(target, response, group_id):
+def send_response(target, response, group_id, msg_seq=None):
     """Send one response to the target client.
 
     Serialize the given response object to an :class:`RPCMessage` and send it
@@ -631,13 +881,17 @@ def send_response(target, response, group_id):
         The response to send.
     group_id : int
         Group ID of target client.
+    msg_seq : int, optional
+        Sequence number of the request being responded to.  Defaults to the sequence
+        number of the last received request.
 
     Raises
     ------
     ConnectionError if there is any problem with the connection.
     """
     service_id = response.service_id
-    msg_seq = get_msg_seq()
+    if msg_seq is None:
+        msg_seq = get_msg_seq()
     client_id = target
     server_id = get_rank()
     data, tensors = serialize_to_payload(response)
@@ -685,6 +939,19 @@ def recv_request(timeout=0):
                        'different from my rank {}!'.format(msg.server_id, get_rank()))
     return req, msg.client_id, msg.group_id
 
+def _deserialize_response(msg):
+    """De-serialize the response carried by a message.  Raises the error reported by the
+    server if it failed to process the request."""
+    if msg.service_id == SERVER_ERROR:
+        err = deserialize_from_payload(ServerErrorResponse, msg.data, msg.tensors)
+        raise DGLError('Server {} failed to process a request: {}'.format(
+            err.server_id, err.msg))
+    _, res_cls = SERVICE_ID_TO_PROPERTY[msg.service_id]
+    if res_cls is None:
+        raise DGLError('Got response message from service ID {}, '
+                       'but no response class is registered.'.format(msg.service_id))
+    return deserialize_from_payload(res_cls, msg.data, msg.tensors)
+
 def recv_response(timeout=0):
     """Receive one response.
 
@@ -711,11 +978,7 @@ def recv_response(timeout=0):
     msg = recv_rpc_message(timeout)
     if msg is None:
         return None
-    _, res_cls = SERVICE_ID_TO_PROPERTY[msg.service_id]
-    if res_cls is None:
-        raise DGLError('Got response message from service ID {}, '
-                       'but no response class is registered.'.format(msg.service_id))
-    res = deserialize_from_payload(res_cls, msg.data, msg.tensors)
+    res = _deserialize_response(msg)
     if msg.client_id != get_rank() and get_rank() != -1:
         raise DGLError('Got response of request sent by client {}, '
                        'different from my rank {}!'.format(msg.client_id, get_rank()))
@@ -724,6 +987,7 @@ def recv_response(timeout=0):
                        "different from my group {}!".format(msg.group_id, get_group_id()))
     return res
 
+@synchronized
 def remote_call(target_and_requests, timeout=0):
     """Invoke registered services on remote servers and collect responses.
 
@@ -774,11 +1038,7 @@ def remote_call(target_and_requests, timeout=0):
         # recv response
         msg = recv_rpc_message(timeout)
         num_res -= 1
-        _, res_cls = SERVICE_ID_TO_PROPERTY[msg.service_id]
-        if res_cls is None:
-            raise DGLError('Got response message from service ID {}, '
-                           'but no response class is registered.'.format(msg.service_id))
-        res = deserialize_from_payload(res_cls, msg.data, msg.tensors)
+        res = _deserialize_response(msg)
         if msg.client_id != myrank:
             raise DGLError('Got reponse of request sent by client {}, '
                            'different from my rank {}!'.format(msg.client_id, myrank))
@@ -851,11 +1111,7 @@ def recv_responses(msgseq2pos, timeout=0):
         # recv response
         msg = recv_rpc_message(timeout)
         num_res -= 1
-        _, res_cls = SERVICE_ID_TO_PROPERTY[msg.service_id]
-        if res_cls is None:
-            raise DGLError('Got response message from service ID {}, '
-                           'but no response class is registered.'.format(msg.service_id))
-        res = deserialize_from_payload(res_cls, msg.data, msg.tensors)
+        res = _deserialize_response(msg)
         if msg.client_id != myrank:
             raise DGLError('Got reponse of request sent by client {}, '
                            'different from my rank {}!'.format(msg.client_id, myrank))
@@ -863,6 +1119,7 @@ def recv_responses(msgseq2pos, timeout=0):
         all_res[msgseq2pos[msg.msg_seq]] = res
     return all_res
 
+@synchronized
 def remote_call_to_machine(target_and_requests, timeout=0):
     """Invoke registered services on remote machine
     (which will ramdom select a server to process the request) and collect responses.
@@ -1175,6 +1432,75 @@ class ClientBarrierRequest(Request):
             return res_list
         return None
 
+SERVER_ERROR = 22456
+
+class ServerErrorResponse(Response):
+    """Tell a client that a server failed to process its request.
+
+    The clients raise the error as soon as they receive it, so it needs no registration.
+
+    Parameters
+    ----------
+    server_id : int
+        ID of the server
+    msg : str
+        The error message
+    """
+    def __init__(self, server_id, msg):
+        self.server_id = server_id
+        self.msg = msg
+
+    def __getstate__(self):
+        return self.server_id, self.msg
+
+    def __setstate__(self, state):
+        self.server_id, self.msg = state
+
+    @property
+    def service_id(self):
+        """Get service ID."""
+        return SERVER_ERROR
+
+GET_SERVER_STATS = 22455
+
+class ServerStatsResponse(Response):
+    """Send the request statistics of a server to client.
+
+    Parameters
+    ----------
+    server_id : int
+        ID of the server
+    stats : dict
+        The statistics returned by :meth:`ServerStats.summary`
+    """
+    def __init__(self, server_id, stats):
+        self.server_id = server_id
+        self.stats = stats
+
+    def __getstate__(self):
+        return self.server_id, self.stats
+
+    def __setstate__(self, state):
+        self.server_id, self.stats = state
+
+class ServerStatsRequest(Request):
+    """Ask a server for its request statistics."""
+    def __init__(self, reset=False):
+        self.reset = reset
+
+    def __getstate__(self):
+        return self.reset
+
+    def __setstate__(self, state):
+        self.reset = state
+
+    def process_request(self, server_state):
+        stats = server_state.rpc_stats
+        res = ServerStatsResponse(get_rank(), stats.summary() if stats is not None else {})
+        if self.reset and stats is not None:
+            stats.reset()
+        return res
+
 def set_group_id(group_id):
     """Set current group ID
 
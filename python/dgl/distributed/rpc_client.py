@@ -143,6 +143,9 @@ def connect_to_server(ip_config, num_servers, max_queue_size=MAX_QUEUE_SIZE,
     rpc.register_service(rpc.CLIENT_BARRIER,
                          rpc.ClientBarrierRequest,
                          rpc.ClientBarrierResponse)
+    rpc.register_service(rpc.GET_SERVER_STATS,
+                         rpc.ServerStatsRequest,
+                         rpc.ServerStatsResponse)
     rpc.register_sig_handler()
     server_namebook = rpc.read_ip_config(ip_config, num_servers)
     num_servers = len(server_namebook)
@@ -193,6 +196,34 @@ def connect_to_server(ip_config, num_servers, max_queue_size=MAX_QUEUE_SIZE,
     atexit.register(exit_client)
     set_initialized(True)
 
+@rpc.synchronized
+def get_server_stats(reset=False):
+    """Get the request statistics of all the servers.
+
+    The client must be connected to the servers, and should not have any request
+    in flight.
+
+    Parameters
+    ----------
+    reset : bool, optional
+        Whether to reset the statistics on the servers afterwards.
+
+    Returns
+    -------
+    list[dict]
+        The statistics of every server, indexed by server ID.  See
+        :meth:`~dgl.distributed.rpc_server.ServerStats.summary` for the format.
+    """
+    req = rpc.ServerStatsRequest(reset)
+    num_servers = rpc.get_num_server()
+    for server_id in range(num_servers):
+        rpc.send_request(server_id, req)
+    stats = [None] * num_servers
+    for _ in range(num_servers):
+        res = rpc.recv_response()
+        stats[res.server_id] = res.stats
+    return stats
+
 def shutdown_servers(ip_config, num_servers):
     """Issue commands to remote servers to shut them down.
 
@@ -1,12 +1,187 @@
 """Functions used by server."""
 
+import queue
+import threading
 import time
+import traceback
+
+import numpy as np
 from ..base import DGLError
 from . import rpc
 from .constants import MAX_QUEUE_SIZE, SERVER_EXIT, SERVER_KEEP_ALIVE
 
+class ServerStats(object):
+    """Per-service request statistics of a server.
+
+    For every service it records the number of requests, the current and the maximum
+    number of queued requests, and histograms of the time spent waiting in the queue
+    and of the time spent processing.  Bucket ``i`` of a histogram counts the
+    requests taking between ``2 ** (i - 1)`` and ``2 ** i`` microseconds (bucket 0
+    counts those under one microsecond).
+    """
+    NUM_BUCKETS = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the statistics except the current queue depths."""
+        with self._lock:
+            depth = getattr(self, '_depth', {})
+            self._depth = {k: v for k, v in depth.items() if v > 0}
+            self._max_depth = dict(self._depth)
+            self._count = {}
+            self._wait_hist = {}
+            self._latency_hist = {}
+
+    @classmethod
+    def _bucket(cls, seconds):
+        usec = int(seconds * 1e6)
+        return min(usec.bit_length(), cls.NUM_BUCKETS - 1)
+
+    def enqueue(self, service_id):
+        """Record that a request is queued."""
+        with self._lock:
+            depth = self._depth.get(service_id, 0) + 1
+            self._depth[service_id] = depth
+            if depth > self._max_depth.get(service_id, 0):
+                self._max_depth[service_id] = depth
+
+    def record(self, service_id, wait_time, latency, queued=True):
+        """Record a processed request with its queueing and processing time."""
+        with self._lock:
+            if queued:
+                self._depth[service_id] -= 1
+            if service_id not in self._count:
+                self._count[service_id] = 0
+                self._wait_hist[service_id] = np.zeros(self.NUM_BUCKETS, dtype=np.int64)
+                self._latency_hist[service_id] = np.zeros(self.NUM_BUCKETS, dtype=np.int64)
+            self._count[service_id] += 1
+            self._wait_hist[service_id][self._bucket(wait_time)] += 1
+            self._latency_hist[service_id][self._bucket(latency)] += 1
+
+    def summary(self):
+        """Return the statistics as a dict keyed by service ID.
+
+        Each value is a dict with keys ``'count'``, ``'queue_depth'``,
+        ``'max_queue_depth'``, ``'wait_hist'`` and ``'latency_hist'``, where the
+        histograms are lists of bucket counts.
+        """
+        with self._lock:
+            return {
+                sid: {'count': self._count[sid],
+                      'queue_depth': self._depth.get(sid, 0),
+                      'max_queue_depth': self._max_depth.get(sid, 0),
+                      'wait_hist': self._wait_hist[sid].tolist(),
+                      'latency_hist': self._latency_hist[sid].tolist()}
+                for sid in self._count}
+
+def _send_responses(res, client_id, group_id, msg_seq):
+    """Send the responses returned by ``process_request``.  Returns the control
+    string if the request asks the server to exit or keep alive."""
+    if res is None:
+        return None
+    if isinstance(res, list):
+        for target_id, res_data in res:
+            rpc.send_response(target_id, res_data, group_id, msg_seq)
+    elif isinstance(res, str):
+        if res in (SERVER_EXIT, SERVER_KEEP_ALIVE):
+            return res
+        raise DGLError("Unexpected response: {}".format(res))
+    else:
+        rpc.send_response(client_id, res, group_id, msg_seq)
+    return None
+
+class _Dispatcher(object):
+    """Process requests with pools of worker threads.
+
+    Sampling requests go to a shared queue served by ``num_workers`` threads.  KVStore
+    requests go to ``num_kv_workers`` queues with one thread each, and the requests of a
+    client always go to the same queue, so that a pull issued after a push by the same
+    client still sees the pushed data.
+    """
+    def __init__(self, server_state, stats, num_workers, num_kv_workers):
+        self._server_state = server_state
+        self._stats = stats
+        self._sampling_queue = queue.Queue()
+        self._kv_queues = [queue.Queue() for _ in range(num_kv_workers)]
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._error = None
+        self._threads = []
+        for _ in range(num_workers):
+            self._start(self._sampling_queue)
+        for kv_queue in self._kv_queues:
+            self._start(kv_queue)
+
+    def _start(self, work_queue):
+        thread = threading.Thread(target=self._worker, args=(work_queue,), daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _worker(self, work_queue):
+        while True:
+            item = work_queue.get()
+            if item is None:
+                break
+            req, client_id, group_id, msg_seq, enqueue_time = item
+            start = time.time()
+            try:
+                res = req.process_request(self._server_state)
+                if isinstance(res, str):
+                    raise DGLError('Queued request {} cannot control the server.'.format(
+                        type(req).__name__))
+                _send_responses(res, client_id, group_id, msg_seq)
+            except Exception as e:      # pylint: disable=broad-except
+                traceback.print_exc()
+                # The client waiting for the response raises the error right away, and
+                # the server stops at the next request it receives.
+                with self._cond:
+                    if self._error is None:
+                        self._error = e
+                rpc.send_response(client_id, rpc.ServerErrorResponse(
+                    rpc.get_rank(), '{}: {}'.format(type(e).__name__, e)), group_id, msg_seq)
+            self._stats.record(req.service_id, start - enqueue_time, time.time() - start)
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def check_error(self):
+        """Re-raise the first error raised by a worker thread."""
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, req, client_id, group_id, msg_seq):
+        """Queue a request."""
+        self.check_error()
+        with self._cond:
+            self._pending += 1
+        self._stats.enqueue(req.service_id)
+        item = (req, client_id, group_id, msg_seq, time.time())
+        if req.dispatch_queue == 'kv':
+            self._kv_queues[client_id % len(self._kv_queues)].put(item)
+        else:
+            self._sampling_queue.put(item)
+
+    def drain(self):
+        """Wait until all the queued requests are processed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0)
+        self.check_error()
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.drain()
+        for _ in range(len(self._threads) - len(self._kv_queues)):
+            self._sampling_queue.put(None)
+        for kv_queue in self._kv_queues:
+            kv_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
 def start_server(server_id, ip_config, num_servers, num_clients, server_state, \
-    max_queue_size=MAX_QUEUE_SIZE, net_type='socket'):
+    max_queue_size=MAX_QUEUE_SIZE, net_type='socket', num_workers=0, num_kv_workers=None):
     """Start DGL server, which will be shared with all the rpc services.
 
     This is a blocking function -- it returns only when the server shutdown.
@@ -32,12 +207,33 @@ def start_server(server_id, ip_config, num_servers, num_clients, server_state, \
         it will not allocate 20GB memory at once.
     net_type : str
         Networking type. Current options are: 'socket'.
+    num_workers : int
+        Number of threads processing the sampling requests.  If 0, all the requests
+        are processed one by one in the receiving thread.  Otherwise, sampling requests
+        and KVStore requests are put into separate queues served by separate threads,
+        so that a slow sampling request does not hold back the pulls behind it.
+        Other requests (e.g. barriers) are still processed in the receiving thread, once
+        all the queued requests are done.
+    num_kv_workers : int, optional
+        Number of threads processing the KVStore requests if :attr:`num_workers` is
+        positive.  Defaults to :attr:`num_workers`.
+
+    Notes
+    -----
+    The per-service queue depth and latency histograms of the server are collected in
+    ``server_state.rpc_stats`` (see :class:`ServerStats`), which clients can query with
+    :func:`~dgl.distributed.get_server_stats`.
     """
     assert server_id >= 0, 'server_id (%d) cannot be a negative number.' % server_id
     assert num_servers > 0, 'num_servers (%d) must be a positive number.' % num_servers
     assert num_clients >= 0, 'num_client (%d) cannot be a negative number.' % num_clients
     assert max_queue_size > 0, 'queue_size (%d) cannot be a negative number.' % max_queue_size
     assert net_type in ('socket'), 'net_type (%s) can only be \'socket\'' % net_type
+    assert num_workers >= 0, 'num_workers (%d) cannot be a negative number.' % num_workers
+    if num_kv_workers is None:
+        num_kv_workers = num_workers
+    assert num_workers == 0 or num_kv_workers > 0, \
+        'num_kv_workers (%d) must be a positive number.' % num_kv_workers
     if server_state.keep_alive:
         print("As configured, this server will keep alive for multiple"
               " client groups until force shutdown request is received.")
@@ -56,6 +252,9 @@ def start_server(server_id, ip_config, num_servers, num_clients, server_state, \
     rpc.register_service(rpc.CLIENT_BARRIER,
                          rpc.ClientBarrierRequest,
                          rpc.ClientBarrierResponse)
+    rpc.register_service(rpc.GET_SERVER_STATS,
+                         rpc.ServerStatsRequest,
+                         rpc.ServerStatsResponse)
     rpc.set_rank(server_id)
     server_namebook = rpc.read_ip_config(ip_config, num_servers)
     machine_id = server_namebook[server_id][0]
@@ -71,6 +270,11 @@ def start_server(server_id, ip_config, num_servers, num_clients, server_state, \
         "Server is waiting for connections non-blockingly on [{}:{}]...".format(ip_addr, port))
     rpc.receiver_wait(ip_addr, port, num_clients, blocking=False)
     rpc.set_num_client(num_clients)
+    stats = ServerStats()
+    server_state.rpc_stats = stats
+    dispatcher = None
+    if num_workers > 0:
+        dispatcher = _Dispatcher(server_state, stats, num_workers, num_kv_workers)
     recv_clients = {}
     while True:
         # go through if any client group is ready for connection
@@ -94,25 +298,28 @@ def start_server(server_id, ip_config, num_servers, num_clients, server_state, \
                     rpc.send_response(client_id, register_res, group_id)
         # receive incomming client requests
         req, client_id, group_id = rpc.recv_request()
+        msg_seq = rpc.get_msg_seq()
         if isinstance(req, rpc.ClientRegisterRequest):
             if group_id not in recv_clients:
                 recv_clients[group_id] = []
             recv_clients[group_id].append(req.ip_addr)
             continue
 
+        if dispatcher is not None:
+            if req.dispatch_queue is not None:
+                dispatcher.submit(req, client_id, group_id, msg_seq)
+                continue
+            # Requests like barriers must see the effects of all the requests before them.
+            dispatcher.drain()
+        start = time.time()
         res = req.process_request(server_state)
-        if res is not None:
-            if isinstance(res, list):
-                for response in res:
-                    target_id, res_data = response
-                    rpc.send_response(target_id, res_data, group_id)
-            elif isinstance(res, str):
-                if res == SERVER_EXIT:
-                    print("Server is exiting...")
-                    return
-                elif res == SERVER_KEEP_ALIVE:
-                    print("Server keeps alive while client group~{} is exiting...".format(group_id))
-                else:
-                    raise DGLError("Unexpected response: {}".format(res))
-            else:
-                rpc.send_response(client_id, res, group_id)
+        if not isinstance(res, str):
+            stats.record(req.service_id, 0., time.time() - start, queued=False)
+        res = _send_responses(res, client_id, group_id, msg_seq)
+        if res == SERVER_EXIT:
+            print("Server is exiting...")
+            if dispatcher is not None:
+                dispatcher.shutdown()
+            return
+        elif res == SERVER_KEEP_ALIVE:
+            print("Server keeps alive while client group~{} is exiting...".format(group_id))
@@ -1,4 +1,5 @@
 """Server data"""
+import threading
 
 from .._ffi.function import _init_api
 
@@ -40,6 +41,8 @@ class ServerState:
         Graph Partition book
     keep_alive : bool
         whether to keep alive which supports any number of client groups connect
+    rpc_stats : ServerStats
+        Request statistics collected by :func:`~dgl.distributed.start_server`
     """
 
     def __init__(self, kv_store, local_g, partition_book, keep_alive=False):
@@ -48,6 +51,20 @@ class ServerState:
         self.partition_book = partition_book
         self._keep_alive = keep_alive
         self._roles = {}
+        self.rpc_stats = None
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, name):
+        """Get the lock of the data with the given name.
+
+        A multi-threaded server processes requests concurrently, so the push
+        handlers hold this lock while updating the data.
+        """
+        with self._locks_guard:
+            if name not in self._locks:
+                self._locks[name] = threading.Lock()
+            return self._locks[name]
 
     @property
     def roles(self):
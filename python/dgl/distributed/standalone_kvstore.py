@@ -18,6 +18,8 @@ class KVClient(object):
         self._pull_handlers = {}
         # Store all graph data name
         self._gdata_name_list = set()
+        # The number of pushes to every data
+        self._data_version = {}
 
     @property
     def all_possible_part_policy(self):
@@ -71,8 +73,13 @@ class KVClient(object):
         '''get the metadata of data'''
         return F.dtype(self._data[name]), F.shape(self._data[name]), None
 
+    def get_data_version(self, name):
+        '''get the number of pushes to the data'''
+        return self._data_version.get(name, 0)
+
     def push(self, name, id_tensor, data_tensor):
         '''push data to kvstore'''
+        self._data_version[name] = self._data_version.get(name, 0) + 1
         if name in self._push_handlers:
             self._push_handlers[name](self._data, name, id_tensor, data_tensor)
         else:
@@ -85,6 +92,10 @@ class KVClient(object):
         else:
             return F.gather_row(self._data[name], id_tensor)
 
+    def pull_many(self, name_ids):
+        '''pull multiple data from kvstore'''
+        return {name: self.pull(name, id_tensor) for name, id_tensor in name_ids.items()}
+
     def map_shared_data(self, partition_book):
         '''Mapping shared-memory tensor from server to client.'''
 
@@ -9,36 +9,95 @@ from .base import DGLError, dgl_warning
 from .init import zero_initializer
 from .storages import TensorStorage
 
+# Whether the columns sharing a lazy index also share the data materialized from it.
+_VIEW_MODE = False
+
+def set_view_mode(enabled):
+    """Enable or disable the view mode of the frames.
+
+    Copies of a column with a pending index selection (e.g. the columns of the frames of
+    :meth:`DGLGraph.local_scope`, or of the subgraphs of subgraphs) normally perform the
+    index selection separately upon their first read.  In view mode, the data selected by
+    one of them is shared with the others, so repeated ``ndata[...]`` accesses on the same
+    subgraph materialize the data only once, at the cost of keeping it alive as long as
+    any of these columns.  The columns then behave like views of the same tensor: the
+    in-place modifications of the tensor returned by one of them are visible to the
+    others, while assigning new data to a column only affects that column.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to enable the view mode.
+    """
+    global _VIEW_MODE     # pylint: disable=global-statement
+    _VIEW_MODE = enabled
+
 class _LazyIndex(object):
+    """An immutable chain of index tensors to apply one after the other, shared by the
+    columns sliced with the same indices."""
+    # Chains longer than this are flattened when sliced.
+    MAX_CHAIN_LENGTH = 4
+
     def __init__(self, index):
         if isinstance(index, list):
             self._indices = index
         else:
             self._indices = [index]
+        self._flat = None
+        # ID of the storage -> (storage, device, data) of the data materialized from the
+        # storages in view mode
+        self._views = {}
 
     def __len__(self):
         return len(self._indices[-1])
 
+    def __getstate__(self):
+        # the memoized results are not sent to other processes
+        return {'_indices': [self._flat] if self._flat is not None else self._indices}
+
+    def __setstate__(self, state):
+        self.__init__(state['_indices'])
+
     def slice(self, index):
         """ Create a new _LazyIndex object sliced by the given index tensor.
         """
+        indices = [self._flat] if self._flat is not None else self._indices
         # if our indices are in the same context, lets just slice now and free
         # memory, otherwise do nothing until we have to
-        if F.context(self._indices[-1]) == F.context(index):
-            return _LazyIndex(self._indices[:-1] + [F.gather_row(self._indices[-1], index)])
-        return _LazyIndex(self._indices + [index])
+        if F.context(indices[-1]) == F.context(index):
+            return _LazyIndex(indices[:-1] + [F.gather_row(indices[-1], index)])
+        if len(indices) >= self.MAX_CHAIN_LENGTH:
+            # compact the chain so that it does not grow with every nested subgraph
+            return _LazyIndex(self.flatten()).slice(index)
+        return _LazyIndex(indices + [index])
 
     def flatten(self):
         """ Evaluate the chain of indices, and return a single index tensor.
+
+        The result is memoized.
         """
+        if self._flat is not None:
+            return self._flat
         flat_index = self._indices[0]
         # here we actually need to resolve it
         for index in self._indices[1:]:
             if F.context(index) != F.context(flat_index):
                 index = F.copy_to(index, F.context(flat_index))
             flat_index = F.gather_row(flat_index, index)
+        self._flat = flat_index
         return flat_index
 
+    def get_view(self, storage, device):
+        """Return the data materialized from the given storage in view mode, or None."""
+        view = self._views.get(id(storage))
+        if view is not None and view[0] is storage and view[1] == device:
+            return view[2]
+        return None
+
+    def set_view(self, storage, device, data):
+        """Record the data materialized from the given storage in view mode."""
+        self._views[id(storage)] = (storage, device, data)
+
 class LazyFeature(object):
     """Placeholder for prefetching from DataLoader.
     """
@@ -158,9 +217,22 @@ class Column(TensorStorage):
     @property
     def data(self):
         """Return the feature data. Perform index selecting if needed."""
+        if isinstance(self.index, _LazyIndex) and _VIEW_MODE:
+            lazy_index, storage, device = self.index, self.storage, self.device
+            view = lazy_index.get_view(storage, device)
+            if view is None:
+                self.index = lazy_index.flatten()
+                view = self._materialize()
+                lazy_index.set_view(storage, device, view)
+            self.storage, self.index, self.device = view, None, None
+            return self.storage
+        if isinstance(self.index, _LazyIndex):
+            self.index = self.index.flatten()
+        return self._materialize()
+
+    def _materialize(self):
+        """Perform the pending index selection and device transfer."""
         if self.index is not None:
-            if isinstance(self.index, _LazyIndex):
-                self.index = self.index.flatten()
             # If index and storage is not in the same context,
             # copy index to the same context of storage.
             # Copy index is usually cheaper than copy data
@@ -283,7 +355,7 @@ class Column(TensorStorage):
         """
         return Column(F.clone(self.data), copy.deepcopy(self.scheme))
 
-    def subcolumn(self, rowids):
+    def subcolumn(self, rowids, memo=None):
         """Return a subcolumn.
 
         The resulting column will share the same storage as this column so this operation
@@ -296,6 +368,10 @@ class Column(TensorStorage):
         ----------
         rowids : Tensor
             Row IDs.
+        memo : dict, optional
+            The indices already sliced by the same row IDs, keyed by the ID of the index of
+            their column.  Columns sharing the same index share the sliced index, so the
+            index selection is computed once for all of them.
 
         Returns
         -------
@@ -303,12 +379,19 @@ class Column(TensorStorage):
             Sub-column
         """
         if self.index is None:
-            return Column(self.storage, self.scheme, rowids, self.device)
+            index = _LazyIndex(rowids) if _VIEW_MODE else rowids
+            return Column(self.storage, self.scheme, index, self.device)
         else:
+            key = id(self.index)
+            if memo is not None and key in memo:
+                return Column(self.storage, self.scheme, memo[key][1], self.device)
             index = self.index
             if not isinstance(index, _LazyIndex):
                 index = _LazyIndex(self.index)
             index = index.slice(rowids)
+            if memo is not None:
+                # keep the sliced index alive so that its ID is not reused
+                memo[key] = (self.index, index)
             return Column(self.storage, self.scheme, index, self.device)
 
     @staticmethod
@@ -674,7 +757,8 @@ class Frame(MutableMapping):
         Frame
             A new subframe.
         """
-        subcols = {k : col.subcolumn(rowids) for k, col in self._columns.items()}
+        memo = {}
+        subcols = {k : col.subcolumn(rowids, memo) for k, col in self._columns.items()}
         subf = Frame(subcols, len(rowids))
         subf._initializers = self._initializers
         subf._default_initializer = self._default_initializer
@@ -9,5 +9,7 @@ from .randomwalks import *
 from .pinsage import *
 from .neighbor import *
 from .node2vec_randomwalk import *
+from .randomwalk_stream import *
+from .sampling_index import *
 from .negative import *
 from . import utils
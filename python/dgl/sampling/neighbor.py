@@ -7,6 +7,7 @@ from ..heterograph import DGLHeteroGraph
 from .. import ndarray as nd
 from .. import utils
 from .utils import EidExcluder
+from .sampling_index import NeighborSamplingIndex
 
 __all__ = [
     'sample_etype_neighbors',
@@ -183,7 +184,7 @@ def sample_neighbors(g, nodes, fanout, edge_dir='in', prob=None, replace=False,
         Determines whether to sample inbound or outbound edges.
 
         Can take either ``in`` for inbound edges or ``out`` for outbound edges.
-    prob : str, optional
+    prob : str or NeighborSamplingIndex, optional
         Feature name used as the (unnormalized) probabilities associated with each
         neighboring edge of a node.  The feature must have only one element for each
         edge.
@@ -192,6 +193,9 @@ def sample_neighbors(g, nodes, fanout, edge_dir='in', prob=None, replace=False,
         inbound/outbound edges for every node must be positive (though they don't have
         to sum up to one).  Otherwise, the result will be undefined.
 
+        If a :class:`~dgl.sampling.NeighborSamplingIndex` built on the graph is given,
+        the neighbors are sampled with the precomputed probabilities of the index.
+
         If :attr:`prob` is not None, GPU sampling is not supported.
     exclude_edges: tensor or dict
         Edge IDs to exclude during sampling neighbors for the seed nodes.
@@ -287,6 +291,10 @@ def sample_neighbors(g, nodes, fanout, edge_dir='in', prob=None, replace=False,
     tensor([False, False, False])
 
     """
+    if isinstance(prob, NeighborSamplingIndex):
+        return prob.sample_neighbors(
+            g, nodes, fanout, edge_dir=edge_dir, replace=replace,
+            exclude_edges=exclude_edges, output_device=output_device)
     if F.device_type(g.device) == 'cpu' and not g.is_pinned():
         frontier = _sample_neighbors(
             g, nodes, fanout, edge_dir=edge_dir, prob=prob, replace=replace,
@@ -5,6 +5,7 @@ from .._ffi.function import _init_api
 
 from .. import backend as F
 from .. import convert
+from .. import ndarray as nd
 from .randomwalks import random_walk
 from .. import utils
 
@@ -22,6 +23,21 @@ def _select_pinsage_neighbors(src, dst, num_samples_per_node, k):
     counts = F.from_dgl_nd(counts)
     return (src, dst, counts)
 
+def _pinsage_neighbors(g, seed_nodes, metapath, restart_prob, num_random_walks, num_hops, k):
+    """Run the random walks from every seed node and select the ``k`` most visited nodes
+    at the end of every traversal, all at once.
+
+    This is fusing ``random_walk()`` and ``_select_pinsage_neighbors()``, with the seed
+    nodes processed in parallel and the visits counted without materializing the traces.
+    """
+    metapath = F.to_dgl_nd(utils.prepare_tensor(
+        g, [g.get_etype_id(etype) for etype in metapath], 'metapath'))
+    p_nd = [nd.array([], ctx=nd.cpu()) for _ in g.canonical_etypes]
+    src, dst, counts = _CAPI_DGLSamplingPinSageNeighbors(
+        g._graph, F.to_dgl_nd(seed_nodes), metapath, p_nd, F.to_dgl_nd(restart_prob),
+        num_random_walks, num_hops, k)
+    return F.from_dgl_nd(src), F.from_dgl_nd(dst), F.from_dgl_nd(counts)
+
 class RandomWalkNeighborSampler(object):
     """PinSage-like neighbor sampler extended to any heterogeneous graphs.
 
@@ -114,14 +130,20 @@ class RandomWalkNeighborSampler(object):
         """
         seed_nodes = utils.prepare_tensor(self.G, seed_nodes, 'seed_nodes')
 
-        seed_nodes = F.repeat(seed_nodes, self.num_random_walks, 0)
-        paths, _ = random_walk(
-            self.G, seed_nodes, metapath=self.full_metapath, restart_prob=self.restart_prob)
-        src = F.reshape(paths[:, self.metapath_hops::self.metapath_hops], (-1,))
-        dst = F.repeat(paths[:, 0], self.num_traversals, 0)
-
-        src, dst, counts = _select_pinsage_neighbors(
-            src, dst, (self.num_random_walks * self.num_traversals), self.num_neighbors)
+        if self.G.device == F.cpu():
+            src, dst, counts = _pinsage_neighbors(
+                self.G, seed_nodes, self.full_metapath, self.restart_prob,
+                self.num_random_walks, self.metapath_hops, self.num_neighbors)
+        else:
+            seed_nodes = F.repeat(seed_nodes, self.num_random_walks, 0)
+            paths, _ = random_walk(
+                self.G, seed_nodes, metapath=self.full_metapath,
+                restart_prob=self.restart_prob)
+            src = F.reshape(paths[:, self.metapath_hops::self.metapath_hops], (-1,))
+            dst = F.repeat(paths[:, 0], self.num_traversals, 0)
+
+            src, dst, counts = _select_pinsage_neighbors(
+                src, dst, (self.num_random_walks * self.num_traversals), self.num_neighbors)
         neighbor_graph = convert.heterograph(
             {(self.ntype, '_E', self.ntype): (src, dst)},
             {self.ntype: self.G.number_of_nodes(self.ntype)}
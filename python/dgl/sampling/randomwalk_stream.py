@@ -0,0 +1,181 @@
+"""Streaming random walk generation"""
+from queue import Queue, Full
+import threading
+import time
+
+import numpy as np
+
+from .. import backend as F
+from ..base import DGLError
+from .. import utils
+from ..utils.exception import ExceptionWrapper
+from .randomwalks import random_walk
+
+__all__ = ['RandomWalkStream']
+
+class RandomWalkStream(object):
+    """Iterator generating random walk traces in chunks of a fixed number of walks.
+
+    Every node in :attr:`nodes` starts :attr:`num_walks` random walks.  Instead of
+    returning all the traces in one tensor like :func:`~dgl.sampling.random_walk`, the
+    walks are generated in chunks of :attr:`chunk_size` walks by a background thread,
+    while the previous chunks are being consumed, so the memory usage does not depend
+    on the total number of walks.  The traces can also be written to a memory-mapped
+    file of ``int32`` node IDs, e.g. to build a DeepWalk or node2vec corpus that does
+    not fit in memory.
+
+    The walks are generated round by round: the first round has one walk from every
+    node in :attr:`nodes` in order, then the second round, and so on.
+
+    Parameters
+    ----------
+    g : DGLGraph
+        The graph.
+    nodes : Tensor or iterable[int]
+        The node IDs to start the random walks from.
+    walk_fn : callable, optional
+        The random walk function, called as ``walk_fn(g, seeds, **kwargs)`` for every
+        chunk and returning the traces as the first element if it returns a tuple, e.g.
+        :func:`~dgl.sampling.random_walk` (the default) or
+        :func:`~dgl.sampling.node2vec_random_walk`.
+    num_walks : int, optional
+        The number of random walks from every node.  Default: 1.
+    chunk_size : int, optional
+        The number of walks in every chunk.  Default: 65536.
+    output : str, optional
+        If given, the path of the file to write the traces to, as a row-major ``int32``
+        array of shape ``(len(nodes) * num_walks, trace_length)`` padded with -1 as the
+        traces returned by :attr:`walk_fn`.  It can be read with
+        ``numpy.memmap(output, dtype=numpy.int32, mode='r').reshape(-1, trace_length)``.
+    num_prefetch : int, optional
+        The number of chunks the background thread generates ahead of the consumer.
+        Default: 2.
+    kwargs : dict
+        Other arguments of :attr:`walk_fn`, e.g. ``length`` or ``metapath`` for
+        :func:`~dgl.sampling.random_walk`.
+
+    Attributes
+    ----------
+    trace_length : int
+        The length of every trace, known after the first chunk is generated.
+    num_generated : int
+        The number of walks generated by the current or last iteration.
+    walks_per_second : float
+        The throughput of walk generation in the current or last iteration, excluding the
+        time spent waiting for the consumer.
+
+    Examples
+    --------
+    Generate 10 walks of length 80 from every node and write them to a file:
+
+    >>> stream = dgl.sampling.RandomWalkStream(
+    ...     g, g.nodes(), num_walks=10, chunk_size=100000, output='walks.bin', length=80)
+    >>> for traces in stream:
+    ...     pass
+    >>> stream.walks_per_second
+    1053255.6
+    >>> walks = np.memmap('walks.bin', dtype=np.int32, mode='r').reshape(
+    ...     -1, stream.trace_length)
+
+    Train on node2vec walks chunk by chunk:
+
+    >>> stream = dgl.sampling.RandomWalkStream(
+    ...     g, g.nodes(), dgl.sampling.node2vec_random_walk, num_walks=10,
+    ...     p=1, q=0.5, walk_length=80)
+    >>> for traces in stream:
+    ...     train_skip_gram(traces)
+    """
+    def __init__(self, g, nodes, walk_fn=random_walk, *, num_walks=1, chunk_size=65536,
+                 output=None, num_prefetch=2, **kwargs):
+        if chunk_size <= 0:
+            raise DGLError('chunk_size must be a positive integer.')
+        if output is not None and g.num_nodes() > np.iinfo(np.int32).max:
+            raise DGLError('Cannot write the node IDs of a graph with more than {} nodes '
+                           'as int32.'.format(np.iinfo(np.int32).max))
+        self.g = g
+        self.nodes = utils.prepare_tensor(g, nodes, 'nodes')
+        self.walk_fn = walk_fn
+        self.num_walks = num_walks
+        self.chunk_size = chunk_size
+        self.output = output
+        self.num_prefetch = num_prefetch
+        self.kwargs = kwargs
+        self.trace_length = None
+        self.num_generated = 0
+        self.walk_time = 0.
+
+    @property
+    def total_walks(self):
+        """The total number of walks."""
+        return F.shape(self.nodes)[0] * self.num_walks
+
+    def __len__(self):
+        return (self.total_walks + self.chunk_size - 1) // self.chunk_size
+
+    @property
+    def walks_per_second(self):
+        """The number of walks generated per second."""
+        return self.num_generated / self.walk_time if self.walk_time > 0 else 0.
+
+    def _walk(self, start, end):
+        """Generate the traces of the walks from ``start`` to ``end``."""
+        # the seed of the i-th walk is nodes[i % len(nodes)]
+        index = np.arange(start, end) % F.shape(self.nodes)[0]
+        index = F.copy_to(F.zerocopy_from_numpy(index), F.context(self.nodes))
+        traces = self.walk_fn(self.g, F.gather_row(self.nodes, index), **self.kwargs)
+        return traces[0] if isinstance(traces, tuple) else traces
+
+    def _generate(self, queue, stop):
+        """Entry of the background thread."""
+        def _put(item):
+            # give up if the consumer stopped iterating
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        try:
+            out = None
+            for start in range(0, self.total_walks, self.chunk_size):
+                end = min(start + self.chunk_size, self.total_walks)
+                tic = time.time()
+                traces = self._walk(start, end)
+                if self.output is not None:
+                    if out is None:
+                        self.trace_length = F.shape(traces)[1]
+                        out = np.memmap(self.output, dtype=np.int32, mode='w+',
+                                        shape=(self.total_walks, self.trace_length))
+                    out[start:end] = F.asnumpy(traces)
+                self.trace_length = F.shape(traces)[1]
+                self.walk_time += time.time() - tic
+                self.num_generated += end - start
+                if not _put((traces, None)):
+                    break
+            if out is not None:
+                out.flush()
+                del out
+            _put((None, None))
+        except:     # pylint: disable=bare-except
+            _put((None, ExceptionWrapper(where='in random walk generation')))
+
+    def __iter__(self):
+        self.num_generated = 0
+        self.walk_time = 0.
+        queue = Queue(self.num_prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._generate, args=(queue, stop), daemon=True)
+        thread.start()
+        try:
+            while True:
+                traces, exception = queue.get()
+                if traces is None:
+                    if exception is not None:
+                        exception.reraise()
+                    return
+                yield traces
+        finally:
+            stop.set()
+            thread.join()
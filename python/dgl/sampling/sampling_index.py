@@ -0,0 +1,263 @@
+"""Precomputed index for weighted neighbor sampling."""
+from collections.abc import Mapping
+
+import numpy as np
+from ..base import DGLError
+from .. import backend as F
+
+__all__ = ['NeighborSamplingIndex']
+
+def _segment_ranges(starts, lengths):
+    """Return the positions of all the elements of the given segments, concatenated."""
+    shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(int(lengths.sum()), dtype=np.int64) + shift
+
+class NeighborSamplingIndex(object):
+    """Index for sampling neighbors with probabilities given by an edge feature, built
+    once and reused by every sampling call.
+
+    For every node, the index stores the cumulative sums of the probabilities of its
+    inbound (or outbound) edges in the order of the compressed sparse column (or row)
+    representation of the graph.  Drawing a neighbor is then a binary search in these
+    sums, so sampling :math:`k` neighbors of a node of degree :math:`d` costs
+    :math:`O(k \\log d)` instead of :math:`O(d)` for
+    :func:`~dgl.sampling.sample_neighbors` with :attr:`prob`.
+
+    Pass the index as the :attr:`prob` argument of :func:`~dgl.sampling.sample_neighbors`
+    (or of :class:`~dgl.dataloading.NeighborSampler`) to use it.  The index must be
+    rebuilt with :meth:`update` whenever the probabilities change.  Biased sampling with
+    :func:`~dgl.sampling.sample_neighbors_biased` can use it as well by storing the bias
+    of the tag of every neighbor as an edge feature.
+
+    Parameters
+    ----------
+    g : DGLGraph
+        The graph.
+    prob : str
+        The edge feature of the (unnormalized) probabilities, with the same requirements
+        as the :attr:`prob` argument of :func:`~dgl.sampling.sample_neighbors`.  The
+        neighbors connected by edge types without the feature are sampled uniformly.
+    edge_dir : str, optional
+        Whether to sample the inbound (``'in'``) or outbound (``'out'``) edges.
+
+    Examples
+    --------
+    >>> g.edata['w'] = torch.rand(g.num_edges())
+    >>> index = dgl.sampling.NeighborSamplingIndex(g, 'w')
+    >>> sg = dgl.sampling.sample_neighbors(g, seeds, 10, prob=index)
+    >>> index.memory_usage
+    12000008
+
+    After changing the probabilities of some edges:
+
+    >>> g.edata['w'][eids] = new_weights
+    >>> index.update(g, eids)
+
+    Notes
+    -----
+    Sampling without replacement draws neighbors with replacement and drops the
+    duplicates, which is repeated a few times before falling back to sampling the
+    remaining neighbors from the whole neighborhood of the node.  It is therefore
+    fastest when the fanout is small compared to the number of neighbors with a
+    non-negligible probability.
+    """
+    # rounds of drawing with replacement before the fallback without replacement
+    _MAX_DRAW_ROUNDS = 4
+
+    def __init__(self, g, prob, edge_dir='in'):
+        if edge_dir not in ('in', 'out'):
+            raise DGLError('edge_dir must be either "in" or "out".')
+        self.prob = prob
+        self.edge_dir = edge_dir
+        self._graph_index = g._graph
+        # canonical etype -> (indptr, edge IDs and cumulative sums in the sparse order,
+        # position of every edge ID in the sparse order)
+        self._tables = {}
+        for etype in g.canonical_etypes:
+            indptr, _, eids = g.adj_sparse('csc' if edge_dir == 'in' else 'csr', etype)
+            indptr = F.asnumpy(indptr).astype(np.int64)
+            eids = F.asnumpy(eids).astype(np.int64)
+            if len(eids) == 0:
+                eids = np.arange(g.num_edges(etype), dtype=np.int64)
+            positions = np.empty_like(eids)
+            positions[eids] = np.arange(len(eids))
+            self._tables[etype] = (indptr, eids, np.zeros(len(eids)), positions)
+            self._refresh(g, etype, np.arange(len(indptr) - 1))
+
+    @property
+    def memory_usage(self):
+        """Number of bytes used by the index."""
+        return sum(arr.nbytes for table in self._tables.values() for arr in table)
+
+    def _check_graph(self, g):
+        if g._graph is not self._graph_index:
+            raise DGLError('The sampling index was built on a different graph.')
+
+    def _refresh(self, g, etype, nodes):
+        """Recompute the cumulative sums of the given nodes."""
+        indptr, eids, cum, _ = self._tables[etype]
+        starts = indptr[nodes]
+        lengths = indptr[nodes + 1] - starts
+        pos = _segment_ranges(starts, lengths)
+        if self.prob in g.edges[etype].data:
+            weight = g.edges[etype].data[self.prob]
+            if F.ndim(weight) != 1:
+                weight = F.reshape(weight, (-1,))
+            weight = F.asnumpy(weight).astype(np.float64)[eids[pos]]
+            if np.any(weight < 0):
+                raise DGLError('The probabilities must be non-negative.')
+        else:
+            weight = np.ones(len(pos))
+        total = np.cumsum(weight)
+        base = np.concatenate([[0.], total])[np.cumsum(lengths) - lengths]
+        cum[pos] = total - np.repeat(base, lengths)
+
+    def update(self, g, eids=None):
+        """Rebuild the index after the probabilities of some edges changed.
+
+        Only the nodes incident to the given edges are recomputed.
+
+        Parameters
+        ----------
+        g : DGLGraph
+            The graph the index was built on.
+        eids : Tensor or dict[etype, Tensor], optional
+            The IDs of the edges whose probabilities changed.  If None, the whole index
+            is rebuilt.
+        """
+        self._check_graph(g)
+        if eids is None:
+            for etype, (indptr, _, _, _) in self._tables.items():
+                self._refresh(g, etype, np.arange(len(indptr) - 1))
+            return
+        if not isinstance(eids, Mapping):
+            if len(g.canonical_etypes) != 1:
+                raise DGLError('Must specify the edge IDs with a dict on graphs with '
+                               'multiple edge types.')
+            eids = {g.canonical_etypes[0]: eids}
+        for etype, ids in eids.items():
+            etype = g.to_canonical_etype(etype)
+            indptr, _, _, positions = self._tables[etype]
+            ids = F.asnumpy(ids) if F.is_tensor(ids) else np.asarray(ids, dtype=np.int64)
+            nodes = np.unique(np.searchsorted(indptr, positions[ids], side='right') - 1)
+            self._refresh(g, etype, nodes)
+
+    @staticmethod
+    def _draw(cum, starts, ends, totals):
+        """Draw one position in every segment with the probabilities of the elements,
+        by binary search in the cumulative sums."""
+        target = np.random.rand(len(starts)) * totals
+        lo = starts.copy()
+        hi = ends - 1
+        # find the first position whose cumulative sum exceeds the target
+        while True:
+            active = np.nonzero(lo < hi)[0]
+            if len(active) == 0:
+                return lo
+            mid = (lo[active] + hi[active]) // 2
+            right = cum[mid] <= target[active]
+            lo[active[right]] = mid[right] + 1
+            hi[active[~right]] = mid[~right]
+
+    @staticmethod
+    def _weights(cum, pos, starts, lengths):
+        """Return the probabilities of the elements at the given positions, which
+        are the concatenated ranges of the given segments."""
+        prev = np.concatenate([[0.], cum])[pos]
+        prev[np.cumsum(lengths) - lengths] = 0.
+        return cum[pos] - prev
+
+    def _sample(self, etype, seeds, fanout, replace):
+        """Return the edge IDs sampled for the given unique seed nodes."""
+        indptr, eids, cum, _ = self._tables[etype]
+        starts = indptr[seeds]
+        lengths = indptr[seeds + 1] - starts
+        if fanout == -1:
+            return eids[_segment_ranges(starts, lengths)]
+        totals = cum[np.maximum(starts + lengths - 1, 0)] if len(cum) > 0 else \
+            np.zeros(len(seeds))
+        valid = (lengths > 0) & (totals > 0)
+        if replace:
+            rows = np.repeat(np.nonzero(valid)[0], fanout)
+            return eids[self._draw(cum, starts[rows], starts[rows] + lengths[rows],
+                                   totals[rows])]
+
+        # nodes with at most fanout neighbors take all of those with positive probability
+        small = valid & (lengths <= fanout)
+        pos = _segment_ranges(starts[small], lengths[small])
+        picked = [pos[self._weights(cum, pos, starts[small], lengths[small]) > 0]]
+
+        large = np.nonzero(valid & (lengths > fanout))[0]
+        starts, lengths, totals = starts[large], lengths[large], totals[large]
+        chosen = np.zeros(0, dtype=np.int64)
+        need = np.full(len(large), fanout)
+        for _ in range(self._MAX_DRAW_ROUNDS):
+            active = np.nonzero(need > 0)[0]
+            if len(active) == 0:
+                break
+            rows = np.repeat(active, need[active])
+            drawn = self._draw(cum, starts[rows], starts[rows] + lengths[rows], totals[rows])
+            chosen = np.unique(np.concatenate([chosen, drawn]))
+            # the seeds are sorted, so their segments are disjoint and in order
+            rows = np.searchsorted(starts, chosen, side='right') - 1
+            need = fanout - np.bincount(rows, minlength=len(large))
+        picked.append(chosen)
+
+        # sample the rest from the whole neighborhood by the keys of Efraimidis and
+        # Spirakis, excluding the neighbors already chosen
+        left = np.nonzero(need > 0)[0]
+        if len(left) > 0:
+            pos = _segment_ranges(starts[left], lengths[left])
+            rows = np.repeat(np.arange(len(left)), lengths[left])
+            weight = self._weights(cum, pos, starts[left], lengths[left])
+            with np.errstate(divide='ignore'):
+                key = np.log(1 - np.random.rand(len(pos))) / weight
+            key[(weight == 0) | np.isin(pos, chosen)] = -np.inf
+            order = np.lexsort((-key, rows))
+            rank = np.arange(len(pos)) - np.repeat(np.cumsum(lengths[left]) - lengths[left],
+                                                   lengths[left])
+            selected = order[(rank < need[left][rows[order]]) & (key[order] > -np.inf)]
+            picked.append(pos[selected])
+        return eids[np.concatenate(picked)]
+
+    def sample_neighbors(self, g, nodes, fanout, edge_dir='in', replace=False,
+                         exclude_edges=None, output_device=None):
+        """Sample the neighbors of the given nodes, with the same signature and output
+        as :func:`~dgl.sampling.sample_neighbors` with this index as :attr:`prob`.
+
+        The node and edge features are always copied to the sampled graph.
+        """
+        self._check_graph(g)
+        if edge_dir != self.edge_dir:
+            raise DGLError('The sampling index was built for edge_dir="{}".'.format(
+                self.edge_dir))
+        is_dict = isinstance(nodes, Mapping)
+        if not is_dict:
+            if len(g.ntypes) != 1:
+                raise DGLError('Must specify the seed nodes with a dict on graphs with '
+                               'multiple node types.')
+            nodes = {g.ntypes[0]: nodes}
+        seeds = {k: np.unique(F.asnumpy(v) if F.is_tensor(v) else
+                              np.asarray(v, dtype=np.int64)).astype(np.int64)
+                 for k, v in nodes.items()}
+        if isinstance(fanout, Mapping):
+            fanout = {g.to_canonical_etype(k): v for k, v in fanout.items()}
+        else:
+            fanout = {etype: fanout for etype in g.canonical_etypes}
+        if exclude_edges is not None and not isinstance(exclude_edges, Mapping):
+            exclude_edges = {g.canonical_etypes[0]: exclude_edges}
+        dtype = np.int64 if g.idtype == F.int64 else np.int32
+
+        edges = {}
+        for etype in g.canonical_etypes:
+            ntype = etype[2] if edge_dir == 'in' else etype[0]
+            if fanout.get(etype, 0) != 0 and len(seeds.get(ntype, ())) > 0:
+                eid = self._sample(etype, seeds[ntype], fanout[etype], replace)
+            else:
+                eid = np.zeros((0,), dtype=dtype)
+            if exclude_edges is not None and etype in exclude_edges:
+                eid = eid[~np.isin(eid, F.asnumpy(exclude_edges[etype]))]
+            edges[etype] = F.copy_to(F.zerocopy_from_numpy(eid.astype(dtype)), g.device)
+        if not is_dict and len(g.canonical_etypes) == 1:
+            edges = edges[g.canonical_etypes[0]]
+        return g.edge_subgraph(edges, relabel_nodes=False, output_device=output_device)
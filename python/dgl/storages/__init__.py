@@ -3,6 +3,7 @@ from .. import backend as F
 
 from .base import *
 from .numpy import *
+from .cached import *
 if F.get_preferred_backend() == 'pytorch':
     from .pytorch_tensor import *
 else:
@@ -0,0 +1,218 @@
+"""Feature storage with a bounded CPU-side cache in front of another storage."""
+import threading
+
+import numpy as np
+from .base import FeatureStorage, ThreadedFuture, wrap_storage
+from .. import backend as F
+from ..base import DGLError
+
+def _await(x):
+    return x.wait() if hasattr(x, 'wait') else x
+
+def _num_rows(storage):
+    if hasattr(storage, 'shape'):
+        return storage.shape[0]
+    if hasattr(storage, 'arr'):
+        return storage.arr.shape[0]
+    if hasattr(storage, 'storage') and hasattr(storage.storage, 'shape'):
+        return storage.storage.shape[0]
+    return None
+
+class CachedFeatureStorage(FeatureStorage):
+    """FeatureStorage that keeps the rows of the most frequently accessed IDs of
+    another feature storage in a bounded CPU-side cache.
+
+    This is useful when the features are read from a slow medium (e.g. a
+    ``numpy.memmap`` object on disk) and a small set of IDs, such as hub nodes,
+    appears in almost every minibatch.
+
+    The wrapped object can be a :class:`FeatureStorage` or any object supported by
+    :func:`~dgl.storages.register_storage_wrapper`, e.g. a ``numpy.memmap`` or a
+    tensor.
+
+    Parameters
+    ----------
+    storage : FeatureStorage or object
+        The storage to put the cache in front of.
+    cache_size : int
+        The maximum number of rows to keep in the cache.
+    policy : str, optional
+        The cache policy.  Can be one of:
+
+        * ``'static'``: the cache is filled once upon construction with the rows of
+          :attr:`preload_ids` (or the IDs with the highest :attr:`degrees`) and is
+          never updated afterwards.
+        * ``'lru'``: rows are admitted upon a miss, and the least recently used rows
+          are evicted first.
+        * ``'clock'``: rows are admitted upon a miss, and evicted with the CLOCK
+          (second chance) algorithm.
+
+        Default: ``'lru'``.
+    degrees : Tensor, optional
+        The degree (or any other importance score) of every row.  With the
+        ``'static'`` policy the :attr:`cache_size` rows with the largest values are
+        preloaded.  With other policies they are used to warm up the cache.
+    preload_ids : Tensor, optional
+        The IDs of the rows to preload.  Takes precedence over :attr:`degrees`.
+    num_rows : int, optional
+        The number of rows of the wrapped storage.  Only needed if it cannot be
+        inferred from :attr:`storage`.
+
+    Examples
+    --------
+    >>> feats = np.memmap('feat.npy', mode='r', dtype='float32', shape=(N, 128))
+    >>> storage = dgl.storages.CachedFeatureStorage(
+    ...     feats, 100000, policy='static', degrees=g.in_degrees())
+    >>> dataloader.attach_data('feat', storage)
+    >>> ...
+    >>> storage.hit_rate
+    0.73
+    """
+    POLICIES = ('static', 'lru', 'clock')
+
+    def __init__(self, storage, cache_size, policy='lru', degrees=None, preload_ids=None,
+                 num_rows=None):
+        if policy not in self.POLICIES:
+            raise DGLError('Unknown cache policy {}. Must be one of {}.'.format(
+                policy, self.POLICIES))
+        if num_rows is None:
+            num_rows = _num_rows(storage)
+        if num_rows is None:
+            raise DGLError('Cannot infer the number of rows of {}; please specify '
+                           'num_rows.'.format(type(storage)))
+        self.storage = wrap_storage(storage)
+        self.policy = policy
+        self.capacity = min(int(cache_size), num_rows)
+        self._lock = threading.Lock()
+
+        # slot of every row in the cache buffer, -1 if the row is not cached
+        self._slot_of = np.full((num_rows,), -1, dtype=np.int64)
+        # row ID stored in every slot of the cache buffer, -1 if the slot is empty
+        self._id_of = np.full((self.capacity,), -1, dtype=np.int64)
+        self._buffer = None
+        self._num_cached = 0
+        # LRU: last access time of each slot; CLOCK: reference bit of each slot
+        self._last_access = np.zeros((self.capacity,), dtype=np.int64)
+        self._ref = np.zeros((self.capacity,), dtype=bool)
+        self._clock_hand = 0
+        self._timestamp = 0
+
+        self.num_hits = 0
+        self.num_misses = 0
+
+        if preload_ids is None and degrees is not None:
+            degrees = F.asnumpy(degrees)
+            preload_ids = np.argsort(-degrees, kind='stable')[:self.capacity]
+        if preload_ids is not None:
+            preload_ids = self._to_numpy(preload_ids)
+            _, first = np.unique(preload_ids, return_index=True)
+            preload_ids = preload_ids[np.sort(first)][:self.capacity]
+            self._admit(preload_ids, self._fetch_from_storage(preload_ids))
+
+    @staticmethod
+    def _to_numpy(indices):
+        return indices if isinstance(indices, np.ndarray) else F.asnumpy(indices)
+
+    def requires_ddp(self):
+        return self.storage.requires_ddp()
+
+    @property
+    def num_cached(self):
+        """Number of rows currently in the cache."""
+        return self._num_cached
+
+    @property
+    def hit_rate(self):
+        """Fraction of the requested rows served from the cache since the last
+        :meth:`reset_stats` call."""
+        total = self.num_hits + self.num_misses
+        return self.num_hits / total if total > 0 else 0.
+
+    def reset_stats(self):
+        """Reset the hit and miss counters."""
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def _fetch_from_storage(self, ids):
+        result = _await(self.storage.fetch(F.zerocopy_from_numpy(ids), F.cpu()))
+        return F.asnumpy(result)
+
+    def _evict_lru(self, num, limit):
+        if num >= limit:
+            return np.arange(limit)
+        return np.argpartition(self._last_access[:limit], num - 1)[:num]
+
+    def _evict_clock(self, num, limit):
+        # Sweep from the clock hand: slots with the reference bit unset are victims, and
+        # every slot passed over gets a second chance by clearing its reference bit.
+        order = (np.arange(limit) + self._clock_hand) % limit
+        ref = self._ref[order]
+        victims = np.nonzero(~ref)[0]
+        if len(victims) >= num:
+            victims = victims[:num]
+            last = victims[-1]
+            self._ref[order[:last + 1]] = False
+        else:
+            # A full sweep clears all the bits; the rest come from the second sweep.
+            second = np.nonzero(ref)[0][:num - len(victims)]
+            victims = np.concatenate([victims, second])
+            last = second[-1]
+            self._ref[:limit] = False
+        self._clock_hand = (self._clock_hand + last + 1) % limit
+        return order[victims]
+
+    def _admit(self, ids, rows):
+        """Put the given rows (not in the cache yet) into the cache."""
+        if self.capacity == 0 or len(ids) == 0:
+            return
+        if self._buffer is None:
+            self._buffer = np.empty((self.capacity,) + rows.shape[1:], dtype=rows.dtype)
+        ids = ids[:self.capacity]
+        rows = rows[:self.capacity]
+        # fill the empty slots first, then evict from the slots occupied before this call
+        num_occupied = self._num_cached
+        num_free = min(self.capacity - num_occupied, len(ids))
+        slots = np.arange(num_occupied, num_occupied + num_free)
+        self._num_cached += num_free
+        num_evict = len(ids) - num_free
+        if num_evict > 0:
+            evict = self._evict_lru if self.policy == 'lru' else self._evict_clock
+            evicted = evict(num_evict, num_occupied)
+            self._slot_of[self._id_of[evicted]] = -1
+            slots = np.concatenate([slots, evicted])
+        self._buffer[slots] = rows
+        self._id_of[slots] = ids
+        self._slot_of[ids] = slots
+        self._last_access[slots] = self._timestamp
+        self._ref[slots] = True
+
+    def _fetch(self, indices, device, pin_memory=False):    # pylint: disable=unused-argument
+        ids = self._to_numpy(indices)
+        with self._lock:
+            self._timestamp += 1
+            slots = self._slot_of[ids]
+            hit = slots >= 0
+            num_hits = int(hit.sum())
+            self.num_hits += num_hits
+            self.num_misses += len(ids) - num_hits
+
+            miss_ids, miss_inverse = np.unique(ids[~hit], return_inverse=True)
+            miss_rows = self._fetch_from_storage(miss_ids) if len(miss_ids) > 0 else None
+            if self._buffer is None and miss_rows is None:
+                # nothing has ever been fetched; let the storage decide the shape
+                miss_rows = self._fetch_from_storage(ids[:0])
+            template = miss_rows if self._buffer is None else self._buffer
+            result = np.empty((len(ids),) + template.shape[1:], dtype=template.dtype)
+            if num_hits > 0:
+                hit_slots = slots[hit]
+                result[hit] = self._buffer[hit_slots]
+                self._last_access[hit_slots] = self._timestamp
+                self._ref[hit_slots] = True
+            if len(miss_ids) > 0:
+                result[~hit] = miss_rows[miss_inverse]
+                if self.policy != 'static':
+                    self._admit(miss_ids, miss_rows)
+        return F.copy_to(F.zerocopy_from_numpy(result), device)
+
+    def fetch(self, indices, device, pin_memory=False):
+        return ThreadedFuture(target=self._fetch, args=(indices, device, pin_memory))
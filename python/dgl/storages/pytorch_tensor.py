@@ -1,32 +1,198 @@
 """Feature storages for PyTorch tensors."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 
 import torch
 from .base import FeatureStorage, register_storage_wrapper
 
-def _fetch_cpu(indices, tensor, feature_shape, device, pin_memory):
-    result = torch.empty(
-        indices.shape[0], *feature_shape, dtype=tensor.dtype,
-        pin_memory=pin_memory)
-    torch.index_select(tensor, 0, indices, out=result)
-    result = result.to(device, non_blocking=True)
-    return result
+# Enough threads to saturate the memory bandwidth on most machines.
+_DEFAULT_NUM_THREADS = min(os.cpu_count() or 1, 8)
 
-def _fetch_cuda(indices, tensor, device):
-    return torch.index_select(tensor, 0, indices).to(device)
+# Thread pools shared by all the storages of a process, keyed by the number of threads.
+_EXECUTORS = {}
+_EXECUTORS_PID = None
+_EXECUTORS_LOCK = threading.Lock()
+# Guards the staging rings and the throughput counters of all the storages, which are
+# plain attributes so that the storages (e.g. frame columns) remain picklable.
+_STORAGE_LOCK = threading.Lock()
+
+def _get_executor(num_threads):
+    global _EXECUTORS_PID     # pylint: disable=global-statement
+    with _EXECUTORS_LOCK:
+        # The threads of the pools created before forking do not exist in the child process.
+        if _EXECUTORS_PID != os.getpid():
+            _EXECUTORS.clear()
+            _EXECUTORS_PID = os.getpid()
+        if num_threads not in _EXECUTORS:
+            _EXECUTORS[num_threads] = ThreadPoolExecutor(num_threads)
+        return _EXECUTORS[num_threads]
+
+def _gather_rows(tensor, indices, out, num_threads, chunk_rows):
+    """Gathers the rows of :attr:`tensor` at :attr:`indices` into :attr:`out`, with
+    chunks of :attr:`chunk_rows` rows gathered by :attr:`num_threads` threads."""
+    num_rows = indices.shape[0]
+    if num_threads <= 1 or num_rows <= chunk_rows:
+        torch.index_select(tensor, 0, indices, out=out)
+        return
+    # With strictly increasing indices, a chunk of consecutive IDs is a contiguous block
+    # of the tensor and is copied directly, and the other chunks read the tensor in
+    # increasing addresses, which the hardware prefetcher follows.
+    is_sorted = bool((indices[1:] > indices[:-1]).all())
+
+    def _gather_chunk(start):
+        end = min(start + chunk_rows, num_rows)
+        chunk = indices[start:end]
+        if is_sorted:
+            first, last = int(chunk[0]), int(chunk[-1])
+            if last - first == end - start - 1:
+                out[start:end].copy_(tensor[first:last + 1])
+                return
+        torch.index_select(tensor, 0, chunk, out=out[start:end])
+
+    # torch.index_select releases the GIL, so the chunks are gathered in parallel.
+    for _ in _get_executor(num_threads).map(_gather_chunk, range(0, num_rows, chunk_rows)):
+        pass
+
+class _StagingRing(object):
+    """Ring of reusable pinned buffers holding the gathered rows until they are copied to
+    a GPU, which saves allocating and pinning a new buffer for every fetch."""
+    def __init__(self, num_buffers, feature_shape, dtype):
+        self.feature_shape = feature_shape
+        self.dtype = dtype
+        self.buffers = [None] * num_buffers
+        # the event recorded after the last copy out of every buffer
+        self.events = [None] * num_buffers
+        self.free = Queue()
+        for slot in range(num_buffers):
+            self.free.put(slot)
+
+    def __reduce__(self):
+        # The buffers are not sent to other processes.
+        return _StagingRing, (len(self.buffers), self.feature_shape, self.dtype)
+
+    def acquire(self, num_rows):
+        """Returns a free buffer with :attr:`num_rows` rows and its slot."""
+        slot = self.free.get()
+        if self.events[slot] is not None:
+            self.events[slot].synchronize()
+        if self.buffers[slot] is None or self.buffers[slot].shape[0] < num_rows:
+            # leave some room so that slightly larger batches do not reallocate
+            self.buffers[slot] = torch.empty(
+                num_rows + num_rows // 4, *self.feature_shape, dtype=self.dtype,
+                pin_memory=True)
+        return slot, self.buffers[slot][:num_rows]
+
+    def release(self, slot, device=None):
+        """Returns the buffer to the ring once the copy issued to :attr:`device`, if any,
+        is done."""
+        if device is not None:
+            event = torch.cuda.Event()
+            event.record(torch.cuda.current_stream(device))
+            self.events[slot] = event
+        self.free.put(slot)
 
 @register_storage_wrapper(torch.Tensor)
 class TensorStorage(FeatureStorage):
-    """Feature storages for slicing a PyTorch tensor."""
-    def __init__(self, tensor):
+    """Feature storages for slicing a PyTorch tensor.
+
+    The rows of a CPU tensor are gathered by several threads in chunks of
+    :attr:`chunk_size` bytes.  When they are fetched to a GPU, they are gathered into a
+    ring of :attr:`num_buffers` reusable pinned buffers and asynchronously copied from
+    there.
+
+    Parameters
+    ----------
+    tensor : Tensor
+        The tensor.
+    num_threads : int, optional
+        The number of threads gathering the rows of a CPU tensor.  Default: the number of
+        CPUs, at most 8.
+    num_buffers : int, optional
+        The number of pinned buffers to gather the rows fetched to a GPU into, i.e. the
+        number of fetches whose copies can be in flight.  Default: 4.
+    chunk_size : int, optional
+        The number of bytes every thread gathers at a time.  Default: 256 KiB.
+
+    Attributes
+    ----------
+    last_throughput : float
+        The throughput of gathering the rows of the last fetch in GB/s.
+    bytes_fetched : int
+        The number of bytes gathered since the last :meth:`reset_stats` call.
+    fetch_time : float
+        The time in seconds spent gathering since the last :meth:`reset_stats` call.
+    """
+    def __init__(self, tensor, num_threads=None, num_buffers=4, chunk_size=262144):
         self.storage = tensor
         self.feature_shape = tensor.shape[1:]
         self.is_cuda = (tensor.device.type == 'cuda')
+        self.num_threads = num_threads or _DEFAULT_NUM_THREADS
+        self.num_buffers = num_buffers
+        self.chunk_size = chunk_size
+        self._ring = None
+        self.last_throughput = 0.
+        self.bytes_fetched = 0
+        self.fetch_time = 0.
+
+    @property
+    def throughput(self):
+        """The throughput of gathering the rows in GB/s since the last :meth:`reset_stats`
+        call."""
+        return self.bytes_fetched / self.fetch_time / 1e9 if self.fetch_time > 0 else 0.
+
+    def reset_stats(self):
+        """Reset the throughput counters."""
+        self.bytes_fetched = 0
+        self.fetch_time = 0.
+
+    def _get_ring(self):
+        with _STORAGE_LOCK:
+            if self._ring is None:
+                self._ring = _StagingRing(
+                    self.num_buffers, self.feature_shape, self.storage.dtype)
+            return self._ring
+
+    def _fetch_cpu(self, indices, device, pin_memory):
+        num_rows = indices.shape[0]
+        use_ring = device.type == 'cuda' and self.num_buffers > 0
+        if use_ring:
+            ring = self._get_ring()
+            slot, result = ring.acquire(num_rows)
+        else:
+            result = torch.empty(
+                num_rows, *self.feature_shape, dtype=self.storage.dtype,
+                pin_memory=pin_memory)
+
+        copied = False
+        try:
+            row_bytes = self.storage.element_size() * max(self.feature_shape.numel(), 1)
+            tic = time.time()
+            _gather_rows(self.storage, indices, result, self.num_threads,
+                         max(self.chunk_size // row_bytes, 1))
+            elapsed = time.time() - tic
+            result = result.to(device, non_blocking=True)
+            copied = True
+        finally:
+            if use_ring:
+                # the buffer can only be reused after the copy to the GPU is done
+                ring.release(slot, device if copied else None)
+
+        num_bytes = row_bytes * num_rows
+        with _STORAGE_LOCK:
+            self.last_throughput = num_bytes / elapsed / 1e9 if elapsed > 0 else 0.
+            self.bytes_fetched += num_bytes
+            self.fetch_time += elapsed
+        return result
 
     def fetch(self, indices, device, pin_memory=False):
         device = torch.device(device)
         if not self.is_cuda:
             # CPU to CPU or CUDA - use pin_memory and async transfer if possible
-            return _fetch_cpu(indices, self.storage, self.feature_shape, device, pin_memory)
+            return self._fetch_cpu(indices, device, pin_memory)
         else:
             # CUDA to CUDA or CPU
-            return _fetch_cuda(indices, self.storage, device)
+            indices = indices.to(self.storage.device)
+            return torch.index_select(self.storage, 0, indices).to(device)
@@ -16,6 +16,7 @@ Copyright (c) 2021 Intel Corporation
 #include <dmlc/omp.h>
 #include <dgl/packed_func_ext.h>
 #include <dgl/base_heterograph.h>
+#include <algorithm>
 #include <vector>
 
 #ifdef USE_TVM
@@ -77,7 +78,8 @@ int32_t LeastLoad(int64_t* community_edges, int32_t nc) {
   \param[out] out partition assignment of the edges
   \param[in] N_n number of nodes in the input graph
   \param[in] N_e number of edges in the input graph
-  \param[in] prefix output/partition storage location
+  \param[in] prefix output/partition storage location; if empty, the assignment is only
+  returned in \c out, without writing the partitions to text files or printing progress
 */
 template<typename IdType, typename IdType2>
 void LibraVertexCut(
@@ -106,7 +108,8 @@ void LibraVertexCut(
   int64_t *community_edges = new int64_t[nc]();
   int64_t *cache = new int64_t[nc]();
 
-  int64_t meter = static_cast<int>(N_e/100);
+  const bool verbose = !prefix.empty();
+  int64_t meter = std::max<int64_t>(N_e / 100, 1);
   for (int64_t i=0; i < N_e; i++) {
     IdType u = u_ptr[i];    // edge end vertex 1
     IdType v = v_ptr[i];    // edge end vertex 2
@@ -115,7 +118,7 @@ void LibraVertexCut(
     CHECK(u < N_n);
     CHECK(v < N_n);
 
-    if (i % meter == 0) {
+    if (verbose && i % meter == 0) {
       fprintf(stderr, "."); fflush(0);
     }
 
@@ -262,6 +265,11 @@ void LibraVertexCut(
   }
   delete cache;
 
+  if (!verbose) {
+    delete community_edges;
+    return;
+  }
+
   for (int64_t c=0; c < nc; c++) {
     std::string path = prefix + "/community" + std::to_string(c) +".txt";
 
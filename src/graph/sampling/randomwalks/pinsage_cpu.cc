@@ -0,0 +1,232 @@
+/*!
+ *  Copyright (c) 2022 by Contributors
+ * \file graph/sampling/randomwalks/pinsage_cpu.cc
+ * \brief DGL sampler - CPU implementation of fused PinSAGE random walk and neighbor
+ *        selection
+ */
+
+#include <dgl/array.h>
+#include <dgl/base_heterograph.h>
+#include <dgl/random.h>
+#include <dgl/runtime/parallel_for.h>
+#include <algorithm>
+#include <functional>
+#include <tuple>
+#include <utility>
+#include <vector>
+#include "randomwalks_impl.h"
+#include "randomwalks_cpu.h"
+#include "metapath_randomwalk.h"
+
+namespace dgl {
+
+using namespace dgl::runtime;
+using namespace dgl::aten;
+
+namespace sampling {
+
+namespace impl {
+
+namespace {
+
+/*!
+ * \brief Open-addressing hash map counting the visits of the nodes reached by the
+ *        random walks of one seed node.
+ *
+ * The capacity is fixed to twice the maximum number of visits so it never needs to
+ * grow, and the map is reset in time proportional to the number of distinct nodes
+ * visited, so one map is reused for all the seeds handled by a thread.
+ */
+template<typename IdxType>
+class VisitCounter {
+ public:
+  explicit VisitCounter(int64_t max_visits) {
+    int64_t capacity = 2;
+    shift_ = 63;
+    while (capacity < 2 * max_visits) {
+      capacity <<= 1;
+      --shift_;
+    }
+    mask_ = capacity - 1;
+    keys_.assign(capacity, -1);
+    counts_.assign(capacity, 0);
+    used_.reserve(max_visits);
+  }
+
+  void Add(IdxType node) {
+    int64_t slot = Hash(node);
+    while (keys_[slot] != -1 && keys_[slot] != node)
+      slot = (slot + 1) & mask_;
+    if (keys_[slot] == -1) {
+      keys_[slot] = node;
+      used_.push_back(slot);
+    }
+    ++counts_[slot];
+  }
+
+  /*!
+   * \brief Write the (at most) \c k most visited nodes and their numbers of visits,
+   *        breaking ties by larger node ID, and reset the map.
+   * \return The number of nodes written.
+   */
+  int64_t TopKAndReset(int64_t k, IdxType *nodes, IdxType *counts) {
+    pairs_.clear();
+    for (int64_t slot : used_) {
+      pairs_.emplace_back(counts_[slot], keys_[slot]);
+      keys_[slot] = -1;
+      counts_[slot] = 0;
+    }
+    used_.clear();
+    const int64_t num = std::min(static_cast<int64_t>(pairs_.size()), k);
+    std::partial_sort(pairs_.begin(), pairs_.begin() + num, pairs_.end(),
+                      std::greater<std::pair<IdxType, IdxType>>());
+    for (int64_t i = 0; i < num; ++i) {
+      counts[i] = pairs_[i].first;
+      nodes[i] = pairs_[i].second;
+    }
+    return num;
+  }
+
+ private:
+  int64_t Hash(IdxType node) const {
+    // Fibonacci hashing spreads consecutive node IDs over the table.
+    const uint64_t hash = static_cast<uint64_t>(node) * 11400714819323198485ull;
+    return static_cast<int64_t>(hash >> shift_);
+  }
+
+  int shift_;
+  int64_t mask_;
+  std::vector<IdxType> keys_;
+  std::vector<IdxType> counts_;
+  std::vector<int64_t> used_;
+  std::vector<std::pair<IdxType, IdxType>> pairs_;
+};
+
+};  // namespace
+
+template<DLDeviceType XPU, typename IdxType>
+std::tuple<IdArray, IdArray, IdArray> PinSageNeighbors(
+    const HeteroGraphPtr hg,
+    const IdArray seeds,
+    const TypeArray metapath,
+    const std::vector<FloatArray> &prob,
+    const FloatArray restart_prob,
+    const int64_t num_random_walks,
+    const int64_t num_hops,
+    const int64_t k) {
+  const int64_t num_seeds = seeds->shape[0];
+  const int64_t max_num_steps = metapath->shape[0];
+  const IdxType *seed_data = seeds.Ptr<IdxType>();
+  const IdxType *metapath_data = metapath.Ptr<IdxType>();
+  const int64_t begin_ntype = hg->meta_graph()->FindEdge(metapath_data[0]).first;
+  const int64_t max_nodes = hg->NumVertices(begin_ntype);
+  const int64_t max_visits = num_random_walks * (max_num_steps / num_hops);
+
+  // Materialize all the CSRs before the parallel loop to avoid data races.
+  const int64_t num_etypes = hg->NumEdgeTypes();
+  std::vector<CSRMatrix> edges_by_type(num_etypes);
+  std::vector<bool> csr_has_data(num_etypes);
+  for (int64_t etype = 0; etype < num_etypes; ++etype) {
+    edges_by_type[etype] = hg->GetCSRMatrix(etype);
+    csr_has_data[etype] = CSRHasData(edges_by_type[etype]);
+  }
+  bool is_uniform = true;
+  for (const auto &etype_prob : prob) {
+    if (!IsNullArray(etype_prob)) {
+      is_uniform = false;
+      break;
+    }
+  }
+
+  // Every seed writes its neighbors to its own block of k entries, which are
+  // compacted afterwards.
+  IdArray nodes = IdArray::Empty({num_seeds * k}, seeds->dtype, seeds->ctx);
+  IdArray counts = IdArray::Empty({num_seeds * k}, seeds->dtype, seeds->ctx);
+  std::vector<int64_t> num_selected(num_seeds);
+  IdxType *nodes_data = nodes.Ptr<IdxType>();
+  IdxType *counts_data = counts.Ptr<IdxType>();
+
+  ATEN_FLOAT_TYPE_SWITCH(restart_prob->dtype, DType, "restart probability", {
+    const DType *restart_prob_data = restart_prob.Ptr<DType>();
+    TerminatePredicate<IdxType> terminate =
+      [restart_prob_data] (IdxType *data, dgl_id_t curr, int64_t len) {
+        return RandomEngine::ThreadLocal()->Uniform<DType>() < restart_prob_data[len];
+      };
+
+    parallel_for(0, num_seeds, [&](size_t seed_begin, size_t seed_end) {
+      VisitCounter<IdxType> counter(max_visits);
+      for (auto seed_id = seed_begin; seed_id < seed_end; ++seed_id) {
+        const dgl_id_t seed = seed_data[seed_id];
+        CHECK_LT(seed, max_nodes) << "Seed node ID exceeds the maximum number of nodes.";
+        for (int64_t walk = 0; walk < num_random_walks; ++walk) {
+          dgl_id_t curr = seed;
+          for (int64_t i = 0; i < max_num_steps; ++i) {
+            const auto &succ = is_uniform ?
+              MetapathRandomWalkStepUniform<XPU, IdxType>(
+                  nullptr, curr, i, edges_by_type, csr_has_data, metapath_data, prob,
+                  terminate) :
+              MetapathRandomWalkStep<XPU, IdxType>(
+                  nullptr, curr, i, edges_by_type, csr_has_data, metapath_data, prob,
+                  terminate);
+            curr = std::get<0>(succ);
+            if (curr == -1)
+              break;
+            // Only the nodes reached at the end of every traversal are counted.
+            if ((i + 1) % num_hops == 0)
+              counter.Add(curr);
+            if (std::get<2>(succ))
+              break;
+          }
+        }
+        num_selected[seed_id] = counter.TopKAndReset(
+            k, nodes_data + seed_id * k, counts_data + seed_id * k);
+      }
+    });
+  });
+
+  int64_t total = 0;
+  for (int64_t n : num_selected)
+    total += n;
+  IdArray res_src = IdArray::Empty({total}, seeds->dtype, seeds->ctx);
+  IdArray res_dst = IdArray::Empty({total}, seeds->dtype, seeds->ctx);
+  IdArray res_cnt = IdArray::Empty({total}, seeds->dtype, seeds->ctx);
+  IdxType *res_src_data = res_src.Ptr<IdxType>();
+  IdxType *res_dst_data = res_dst.Ptr<IdxType>();
+  IdxType *res_cnt_data = res_cnt.Ptr<IdxType>();
+  int64_t pos = 0;
+  for (int64_t i = 0; i < num_seeds; ++i) {
+    std::copy(nodes_data + i * k, nodes_data + i * k + num_selected[i], res_src_data + pos);
+    std::copy(counts_data + i * k, counts_data + i * k + num_selected[i], res_cnt_data + pos);
+    std::fill(res_dst_data + pos, res_dst_data + pos + num_selected[i], seed_data[i]);
+    pos += num_selected[i];
+  }
+
+  return std::make_tuple(res_src, res_dst, res_cnt);
+}
+
+template
+std::tuple<IdArray, IdArray, IdArray> PinSageNeighbors<kDLCPU, int32_t>(
+    const HeteroGraphPtr hg,
+    const IdArray seeds,
+    const TypeArray metapath,
+    const std::vector<FloatArray> &prob,
+    const FloatArray restart_prob,
+    const int64_t num_random_walks,
+    const int64_t num_hops,
+    const int64_t k);
+template
+std::tuple<IdArray, IdArray, IdArray> PinSageNeighbors<kDLCPU, int64_t>(
+    const HeteroGraphPtr hg,
+    const IdArray seeds,
+    const TypeArray metapath,
+    const std::vector<FloatArray> &prob,
+    const FloatArray restart_prob,
+    const int64_t num_random_walks,
+    const int64_t num_hops,
+    const int64_t k);
+
+};  // namespace impl
+
+};  // namespace sampling
+
+};  // namespace dgl
@@ -123,6 +123,32 @@ std::tuple<IdArray, IdArray, IdArray> SelectPinSageNeighbors(
   return result;
 }
 
+std::tuple<IdArray, IdArray, IdArray> PinSageNeighbors(
+    const HeteroGraphPtr hg,
+    const IdArray seeds,
+    const TypeArray metapath,
+    const std::vector<FloatArray> &prob,
+    const FloatArray restart_prob,
+    const int64_t num_random_walks,
+    const int64_t num_hops,
+    const int64_t k) {
+  CheckRandomWalkInputs(hg, seeds, metapath, prob);
+  CHECK_EQ(restart_prob->shape[0], metapath->shape[0])
+    << "restart probability must have the same length as the metapath";
+  CHECK(num_hops > 0 && metapath->shape[0] % num_hops == 0)
+    << "the metapath must consist of whole traversals";
+  std::tuple<IdArray, IdArray, IdArray> result;
+
+  ATEN_XPU_SWITCH(hg->Context().device_type, XPU, "PinSageNeighbors", {
+    ATEN_ID_TYPE_SWITCH(seeds->dtype, IdxType, {
+      result = impl::PinSageNeighbors<XPU, IdxType>(
+          hg, seeds, metapath, prob, restart_prob, num_random_walks, num_hops, k);
+    });
+  });
+
+  return result;
+}
+
 };  // namespace sampling
 
 DGL_REGISTER_GLOBAL("sampling.randomwalks._CAPI_DGLSamplingRandomWalk")
@@ -158,6 +184,28 @@ DGL_REGISTER_GLOBAL("sampling.pinsage._CAPI_DGLSamplingSelectPinSageNeighbors")
     *rv = ret;
   });
 
+DGL_REGISTER_GLOBAL("sampling.pinsage._CAPI_DGLSamplingPinSageNeighbors")
+.set_body([] (DGLArgs args, DGLRetValue *rv) {
+    HeteroGraphRef hg = args[0];
+    IdArray seeds = args[1];
+    TypeArray metapath = args[2];
+    List<Value> prob = args[3];
+    FloatArray restart_prob = args[4];
+    int64_t num_random_walks = args[5];
+    int64_t num_hops = args[6];
+    int64_t k = args[7];
+
+    const auto& prob_vec = ListValueToVector<FloatArray>(prob);
+
+    auto result = sampling::PinSageNeighbors(
+        hg.sptr(), seeds, metapath, prob_vec, restart_prob, num_random_walks, num_hops, k);
+    List<Value> ret;
+    ret.push_back(Value(MakeValue(std::get<0>(result))));
+    ret.push_back(Value(MakeValue(std::get<1>(result))));
+    ret.push_back(Value(MakeValue(std::get<2>(result))));
+    *rv = ret;
+  });
+
 DGL_REGISTER_GLOBAL("sampling.randomwalks._CAPI_DGLSamplingRandomWalkWithRestart")
 .set_body([] (DGLArgs args, DGLRetValue *rv) {
     HeteroGraphRef hg = args[0];
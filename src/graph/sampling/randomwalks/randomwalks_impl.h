@@ -122,6 +122,37 @@ std::tuple<IdArray, IdArray, IdArray> SelectPinSageNeighbors(
     const int64_t num_samples_per_node,
     const int64_t k);
 
+/*!
+ * \brief Fused PinSAGE neighbor selection.  Runs metapath-based random walks with
+ *        stepwise restart from every seed node and selects the most visited nodes
+ *        without materializing the traces.
+ * \param hg The heterograph.
+ * \param seeds A 1D array of seed nodes.
+ * \param metapath A 1D array of edge types of the full walk, i.e. the metapath of
+ *        one traversal repeated for every traversal.
+ * \param prob A vector of 1D float arrays, indicating the transition probability of
+ *        each edge by edge type.  An empty float array assumes uniform transition.
+ * \param restart_prob Restart probability array which has the same number of elements
+ *        as \c metapath, indicating the probability to terminate after transition.
+ * \param num_random_walks The number of random walks from every seed node.
+ * \param num_hops The number of edge types in the metapath of one traversal.  Only the
+ *        nodes reached at the end of every traversal are counted.
+ * \param k The maximum number of neighbors to select for every seed node.
+ * \return The selected neighbors, the seed node of every neighbor, and the number of
+ *         visits of every neighbor, grouped by seed node in the order of \c seeds and
+ *         sorted by descending number of visits within every seed node.
+ */
+template<DLDeviceType XPU, typename IdxType>
+std::tuple<IdArray, IdArray, IdArray> PinSageNeighbors(
+    const HeteroGraphPtr hg,
+    const IdArray seeds,
+    const TypeArray metapath,
+    const std::vector<FloatArray> &prob,
+    const FloatArray restart_prob,
+    const int64_t num_random_walks,
+    const int64_t num_hops,
+    const int64_t k);
+
 };  // namespace impl
 
 };  // namespace sampling
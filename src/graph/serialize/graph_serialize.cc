@@ -35,6 +35,7 @@
 
 #include <dgl/graph_op.h>
 #include <dgl/immutable_graph.h>
+#include <dgl/mmap_stream.h>
 #include <dgl/runtime/container.h>
 #include <dgl/runtime/object.h>
 #include <dmlc/io.h>
@@ -152,12 +153,18 @@ DGL_REGISTER_GLOBAL("data.graph_serialize._CAPI_DGLAsHeteroGraph")
     *rv = HeteroGraphRef(ig->AsHeteroGraph());
   });
 
+DGL_REGISTER_GLOBAL("data.graph_serialize._CAPI_IsMMapSupported")
+  .set_body([](DGLArgs args, DGLRetValue *rv) {
+    *rv = MMapReadStream::IsSupported();
+  });
+
 DGL_REGISTER_GLOBAL("data.graph_serialize._CAPI_LoadGraphFiles_V2")
   .set_body([](DGLArgs args, DGLRetValue *rv) {
     std::string filename = args[0];
     List<Value> idxs = args[1];
+    bool mmap = args[2];
     auto idx_list = ListValueToVector<dgl_id_t>(idxs);
-    *rv = List<HeteroGraphData>(LoadHeteroGraphs(filename, idx_list));
+    *rv = List<HeteroGraphData>(LoadHeteroGraphs(filename, idx_list, mmap));
   });
 
 }  // namespace serialize
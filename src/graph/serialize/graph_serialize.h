@@ -92,7 +92,8 @@ bool SaveDGLGraphs(std::string filename, List<GraphData> graph_data,
                    std::vector<NamedTensor> labels_list);
 
 std::vector<HeteroGraphData> LoadHeteroGraphs(const std::string &filename,
-                                              std::vector<dgl_id_t> idx_list);
+                                              std::vector<dgl_id_t> idx_list,
+                                              bool mmap = false);
 
 ImmutableGraphPtr ToImmutableGraph(GraphPtr g);
 
@@ -35,6 +35,7 @@
  */
 #include <dgl/graph_op.h>
 #include <dgl/immutable_graph.h>
+#include <dgl/mmap_stream.h>
 #include <dgl/runtime/container.h>
 #include <dgl/runtime/object.h>
 #include <dmlc/io.h>
@@ -120,9 +121,15 @@ bool SaveHeteroGraphs(std::string filename, List<HeteroGraphData> hdata,
 }
 
 std::vector<HeteroGraphData> LoadHeteroGraphs(const std::string &filename,
-                                              std::vector<dgl_id_t> idx_list) {
-  auto fs = std::unique_ptr<SeekStream>(
-    SeekStream::CreateForRead(filename.c_str(), false));
+                                              std::vector<dgl_id_t> idx_list,
+                                              bool mmap) {
+  std::unique_ptr<SeekStream> fs;
+  if (mmap) {
+    // NDArrays loaded from this stream are views of the file content.
+    fs.reset(new MMapReadStream(filename));
+  } else {
+    fs.reset(SeekStream::CreateForRead(filename.c_str(), false));
+  }
   CHECK(fs) << "File name " << filename << " is not a valid name";
   // Read DGL MetaData
   uint64_t magicNum, graphType, version, num_graph;
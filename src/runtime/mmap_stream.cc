@@ -0,0 +1,125 @@
+/*!
+ *  Copyright (c) 2022 by Contributors
+ * \file runtime/mmap_stream.cc
+ * \brief Read-only stream backed up by a memory-mapped file.
+ */
+#include <dgl/mmap_stream.h>
+#include <dmlc/logging.h>
+
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif  // _WIN32
+
+#include <algorithm>
+#include <cerrno>
+#include <cstdint>
+#include <cstring>
+
+namespace dgl {
+
+using runtime::NDArray;
+
+struct MMapReadStream::Mapping {
+  void* addr = nullptr;
+  size_t size = 0;
+
+  ~Mapping() {
+#ifndef _WIN32
+    if (addr != nullptr && size > 0)
+      munmap(addr, size);
+#endif  // _WIN32
+  }
+};
+
+namespace {
+
+/*! \brief DLPack context keeping the mapping alive while the NDArray is in use. */
+struct MMapTensorCtx {
+  std::shared_ptr<void> mapping;
+  std::vector<int64_t> shape;
+  std::vector<int64_t> stride;
+  DLManagedTensor tensor;
+};
+
+void MMapTensorDLPackDeleter(DLManagedTensor* tensor) {
+  delete static_cast<MMapTensorCtx*>(tensor->manager_ctx);
+}
+
+}  // namespace
+
+bool MMapReadStream::IsSupported() {
+#ifndef _WIN32
+  return true;
+#else
+  return false;
+#endif  // _WIN32
+}
+
+MMapReadStream::MMapReadStream(const std::string& filename)
+    : mapping_(std::make_shared<Mapping>()) {
+#ifndef _WIN32
+  int fd = open(filename.c_str(), O_RDONLY);
+  CHECK_NE(fd, -1) << "Fail to open " << filename << ": " << strerror(errno);
+  struct stat st;
+  CHECK_NE(fstat(fd, &st), -1) << "Fail to stat " << filename << ": " << strerror(errno);
+  size_ = static_cast<size_t>(st.st_size);
+  if (size_ > 0) {
+    // Private mapping: pages are shared until written, and writes are never
+    // carried through to the file.
+    void* addr = mmap(nullptr, size_, PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, 0);
+    CHECK_NE(addr, MAP_FAILED) << "Fail to mmap " << filename << ": " << strerror(errno);
+    mapping_->addr = addr;
+    mapping_->size = size_;
+    data_ = static_cast<const char*>(addr);
+  }
+  close(fd);
+#else
+  LOG(FATAL) << "Memory-mapped files are not supported on Windows.";
+#endif  // _WIN32
+}
+
+size_t MMapReadStream::Read(void* ptr, size_t size) {
+  size_t nread = std::min(size, size_ - pos_);
+  if (nread > 0)
+    std::memcpy(ptr, data_ + pos_, nread);
+  pos_ += nread;
+  return nread;
+}
+
+NDArray MMapReadStream::ViewNDArray(const std::vector<int64_t>& shape, DLDataType dtype,
+                                    int64_t nbytes) {
+  CHECK_LE(pos_ + static_cast<size_t>(nbytes), size_) << "Invalid DLTensor file format";
+  const int elem_bytes = (dtype.bits * dtype.lanes + 7) / 8;
+  const char* ptr = data_ + pos_;
+  if (nbytes == 0 || reinterpret_cast<uintptr_t>(ptr) % elem_bytes != 0) {
+    // Fall back to copying for empty or misaligned arrays.
+    NDArray ret = NDArray::Empty(shape, dtype, DLContext{kDLCPU, 0});
+    CHECK_EQ(Read(ret->data, nbytes), static_cast<size_t>(nbytes))
+      << "Invalid DLTensor file format";
+    return ret;
+  }
+  pos_ += nbytes;
+
+  auto ctx = new MMapTensorCtx();
+  ctx->mapping = mapping_;
+  ctx->shape = shape;
+  ctx->stride.resize(shape.size(), 1);
+  for (int i = static_cast<int>(shape.size()) - 2; i >= 0; --i)
+    ctx->stride[i] = ctx->shape[i + 1] * ctx->stride[i + 1];
+  DLManagedTensor* dlm_tensor = &ctx->tensor;
+  dlm_tensor->manager_ctx = ctx;
+  dlm_tensor->dl_tensor.data = const_cast<char*>(ptr);
+  dlm_tensor->dl_tensor.ctx = DLContext{kDLCPU, 0};
+  dlm_tensor->dl_tensor.ndim = static_cast<int>(shape.size());
+  dlm_tensor->dl_tensor.dtype = dtype;
+  dlm_tensor->dl_tensor.shape = ctx->shape.data();
+  dlm_tensor->dl_tensor.strides = ctx->stride.data();
+  dlm_tensor->dl_tensor.byte_offset = 0;
+  dlm_tensor->deleter = MMapTensorDLPackDeleter;
+  return NDArray::FromDLPack(dlm_tensor);
+}
+
+}  // namespace dgl
@@ -10,6 +10,7 @@
 #include <dgl/runtime/device_api.h>
 #include <dgl/runtime/shared_mem.h>
 #include <dgl/zerocopy_serializer.h>
+#include <dgl/mmap_stream.h>
 #include <dgl/runtime/tensordispatch.h>
 #include "runtime_base.h"
 
@@ -382,17 +383,23 @@ bool NDArray::Load(dmlc::Stream* strm) {
     CHECK(strm->ReadArray(&shape[0], ndim))
         << "Invalid DLTensor file format";
   }
-  NDArray ret = NDArray::Empty(shape, dtype, ctx);
   int64_t num_elems = 1;
-  int elem_bytes = (ret->dtype.bits + 7) / 8;
-  for (int i = 0; i < ret->ndim; ++i) {
-    num_elems *= ret->shape[i];
+  int elem_bytes = (dtype.bits + 7) / 8;
+  for (int i = 0; i < ndim; ++i) {
+    num_elems *= shape[i];
   }
   int64_t data_byte_size;
   CHECK(strm->Read(&data_byte_size))
       << "Invalid DLTensor file format";
   CHECK(data_byte_size == num_elems * elem_bytes)
       << "Invalid DLTensor file format";
+  auto mmap_strm = dynamic_cast<MMapReadStream*>(strm);
+  if (mmap_strm && DMLC_IO_NO_ENDIAN_SWAP) {
+    // View the data in the memory-mapped file directly.
+    *this = mmap_strm->ViewNDArray(shape, dtype, data_byte_size);
+    return true;
+  }
+  NDArray ret = NDArray::Empty(shape, dtype, ctx);
   if (data_byte_size != 0)  {
     // strm->Read will return the total number of elements successfully read.
     // Therefore if data_byte_size is zero, the CHECK below would fail.
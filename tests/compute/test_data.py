@@ -743,6 +743,58 @@ def _test_DGLCSVDataset_single():
                                       F.asnumpy(g.edges[etype].data['label']))
 
 
+def _test_DGLCSVDataset_chunked():
+    with tempfile.TemporaryDirectory() as test_dir:
+        # generate YAML/CSVs
+        meta_yaml_path = os.path.join(test_dir, "meta.yaml")
+        edges_csv_path = os.path.join(test_dir, "test_edges.csv")
+        nodes_csv_path = os.path.join(test_dir, "test_nodes.csv")
+        meta_yaml_data = {'version': '1.0.0', 'dataset_name': 'chunked',
+                          'node_data': [{'file_name': os.path.basename(nodes_csv_path),
+                                         'ntype': 'user'}],
+                          'edge_data': [{'file_name': os.path.basename(edges_csv_path),
+                                         'etype': ['user', 'follow', 'user']}],
+                          }
+        with open(meta_yaml_path, 'w') as f:
+            yaml.dump(meta_yaml_data, f, sort_keys=False)
+        # the last chunks of both files have a single row
+        num_nodes = 100
+        num_edges = 496
+        num_dims = 3
+        # node IDs are neither sorted nor consecutive
+        node_id = np.random.permutation(num_nodes) * 2 + 10
+        feat_ndata = np.random.rand(num_nodes, num_dims)
+        label_ndata = np.random.randint(2, size=(num_nodes, 2))
+        df = pd.DataFrame({'node_id': node_id,
+                           'label': [line.tolist() for line in label_ndata],
+                           'feat': [line.tolist() for line in feat_ndata],
+                           })
+        df.to_csv(nodes_csv_path, index=False)
+        src = np.random.randint(num_nodes, size=num_edges)
+        dst = np.random.randint(num_nodes, size=num_edges)
+        feat_edata = np.random.rand(num_edges, num_dims)
+        df = pd.DataFrame({'src_id': node_id[src],
+                           'dst_id': node_id[dst],
+                           'feat': [line.tolist() for line in feat_edata],
+                           })
+        df.to_csv(edges_csv_path, index=False)
+
+        csv_dataset = data.DGLCSVDataset(
+            test_dir, force_reload=True, chunk_size=33, num_workers=2)
+        assert len(csv_dataset) == 1
+        g = csv_dataset[0]
+        assert g.num_nodes('user') == num_nodes
+        assert g.num_edges('follow') == num_edges
+        order = np.argsort(node_id)
+        assert F.array_equal(F.tensor(feat_ndata[order]), g.ndata['feat'])
+        assert np.array_equal(label_ndata[order], F.asnumpy(g.ndata['label']))
+        u, v = g.edges(order='eid')
+        rank = np.argsort(order)
+        assert np.array_equal(rank[src], F.asnumpy(u))
+        assert np.array_equal(rank[dst], F.asnumpy(v))
+        assert F.array_equal(F.tensor(feat_edata), g.edata['feat'])
+
+
 def _test_DGLCSVDataset_multiple():
     with tempfile.TemporaryDirectory() as test_dir:
         # generate YAML/CSVs
@@ -1010,6 +1062,7 @@ def test_csvdataset():
     _test_load_edge_data_from_csv()
     _test_load_graph_data_from_csv()
     _test_DGLCSVDataset_single()
+    _test_DGLCSVDataset_chunked()
     _test_DGLCSVDataset_multiple()
     _test_DGLCSVDataset_customized_data_parser()
 
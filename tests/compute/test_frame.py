@@ -37,3 +37,62 @@ def test_column_subcolumn():
     i1i2i3 = F.copy_to(F.gather_row(i1i2, F.copy_to(i3, F.context(i1i2))), F.ctx())
     assert F.array_equal(l3.data, F.gather_row(data, i1i2i3))
 
+
+def test_lazy_index_memo():
+    data = F.randn((10, 3))
+    original = Column(data)
+
+    # columns sliced together share their index, flattened once
+    frame = dgl.frame.Frame({'a': original, 'b': Column(F.randn((10, 2)))})
+    sub = frame.subframe(F.tensor([9, 7, 5, 3, 1, 0])).subframe(F.tensor([2, 0, 2, 3]))
+    index = sub._columns['a'].index
+    assert index is sub._columns['b'].index
+    assert isinstance(index, dgl.frame._LazyIndex)
+    flat = index.flatten()
+    assert index.flatten() is flat
+    assert F.array_equal(sub['a'], F.gather_row(data, F.tensor([5, 9, 5, 3])))
+
+    # the chain of indices is compacted when indices of different contexts pile up
+    col = original
+    ids = F.copy_to(F.arange(0, 10), F.cpu())
+    for _ in range(2 * dgl.frame._LazyIndex.MAX_CHAIN_LENGTH):
+        rowids = F.copy_to(F.tensor([1, 0]), F.cpu())
+        col = col.subcolumn(rowids).subcolumn(F.tensor([0, 1]))
+        ids = F.gather_row(ids, rowids)
+        if isinstance(col.index, dgl.frame._LazyIndex):
+            assert len(col.index._indices) <= dgl.frame._LazyIndex.MAX_CHAIN_LENGTH
+    assert F.array_equal(col.data, F.gather_row(data, F.copy_to(ids, F.ctx())))
+
+    # writing to a column does not affect the others sharing its index
+    a, b = sub._columns['a'].clone(), sub._columns['b'].clone()
+    a.update(F.tensor([0]), F.zeros((1, 3)))
+    assert F.array_equal(a.data, F.cat([F.zeros((1, 3)), F.gather_row(data, F.tensor([9, 5, 3]))], 0))
+    assert F.array_equal(b.data, sub['b'])
+
+def test_view_mode():
+    g = dgl.graph(([0, 1, 2, 3], [1, 2, 3, 4]), device=F.ctx())
+    g.ndata['h'] = F.randn((5, 3))
+    dgl.frame.set_view_mode(True)
+    try:
+        sg = dgl.node_subgraph(dgl.node_subgraph(g, F.tensor([0, 1, 2, 4])), F.tensor([1, 2, 3]))
+        with sg.local_scope():
+            h1 = sg.ndata['h']
+        with sg.local_scope():
+            h2 = sg.ndata['h']
+        # the data is materialized once and shared by the local scopes
+        assert h1 is h2
+        assert F.array_equal(h1, F.gather_row(g.ndata['h'], F.tensor([1, 2, 4])))
+        # assigning new data only affects the column assigned to
+        with sg.local_scope():
+            sg.ndata['h'] = F.zeros((3, 3))
+        assert F.array_equal(sg.ndata['h'], h1)
+    finally:
+        dgl.frame.set_view_mode(False)
+
+    sg = dgl.node_subgraph(dgl.node_subgraph(g, F.tensor([0, 1, 2, 4])), F.tensor([1, 2, 3]))
+    with sg.local_scope():
+        h1 = sg.ndata['h']
+    with sg.local_scope():
+        h2 = sg.ndata['h']
+    assert h1 is not h2
+    assert F.array_equal(h1, h2)
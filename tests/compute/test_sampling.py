@@ -1,6 +1,8 @@
 import dgl
 import backend as F
 import numpy as np
+import os
+import tempfile
 import unittest
 from collections import defaultdict
 import pytest
@@ -132,6 +134,39 @@ def test_node2vec():
         g2, [0, 1, 2, 3, 0, 1, 2, 3], 1, 1, 4, prob='p', return_eids=True)
     check_random_walk(g2, ['follow'] * 4, traces, ntypes, 'p', trace_eids=eids)
 
+@unittest.skipIf(F._default_context_str == 'gpu', reason="GPU random walk not implemented")
+def test_random_walk_stream():
+    g = dgl.graph(([0, 1, 1, 2, 3], [1, 2, 3, 0, 0]))
+    nodes = F.tensor([0, 1, 2, 3, 1], dtype=F.int64)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'walks.bin')
+        stream = dgl.sampling.RandomWalkStream(
+            g, nodes, num_walks=3, chunk_size=4, output=path, length=4)
+        assert len(stream) == 4
+        chunks = [F.asnumpy(traces) for traces in stream]
+        assert [len(c) for c in chunks] == [4, 4, 4, 3]
+        traces = np.concatenate(chunks)
+        assert stream.trace_length == 5
+        assert stream.num_generated == 15
+        assert stream.walks_per_second > 0
+        # the walks start from every node in turn
+        assert np.array_equal(traces[:, 0], np.tile(F.asnumpy(nodes), 3))
+        # every step follows an edge
+        src, dst = F.asnumpy(g.edges()[0]), F.asnumpy(g.edges()[1])
+        edges = set(zip(src.tolist(), dst.tolist()))
+        for u, v in zip(traces[:, :-1].reshape(-1), traces[:, 1:].reshape(-1)):
+            assert (u, v) in edges
+        walks = np.memmap(path, dtype=np.int32, mode='r').reshape(-1, stream.trace_length)
+        assert np.array_equal(walks, traces)
+        del walks
+
+    stream = dgl.sampling.RandomWalkStream(
+        g, nodes, dgl.sampling.node2vec_random_walk, chunk_size=2, p=1, q=1, walk_length=3)
+    # stopping early does not hang
+    for traces in stream:
+        assert F.shape(traces) == (2, 4)
+        break
+
 @unittest.skipIf(F._default_context_str == 'gpu', reason="GPU pack traces not implemented")
 def test_pack_traces():
     traces, types = (np.array(
@@ -180,6 +215,18 @@ def test_pinsage_sampling():
     sampler = dgl.sampling.RandomWalkNeighborSampler(g, 4, 0.5, 3, 2, ['AB', 'BC', 'CA'])
     _test_sampler(g, sampler, 'A')
 
+    # deterministic walks: item i -> user i -> item i + 1
+    g = dgl.heterograph({
+        ('item', 'bought-by', 'user'): ([0, 1, 2, 3], [0, 1, 2, 3]),
+        ('user', 'bought', 'item'): ([0, 1, 2, 3], [1, 2, 3, 0])})
+    g = g.to(F.ctx())
+    sampler = dgl.sampling.PinSAGESampler(g, 'item', 'user', 2, 0., 3, 2)
+    neighbor_g = sampler(F.copy_to(F.tensor([0, 2], dtype=F.int64), F.ctx()))
+    u, v = neighbor_g.all_edges(form='uv', order='eid')
+    w = neighbor_g.edata['weights']
+    uvw = set(zip(F.asnumpy(u).tolist(), F.asnumpy(v).tolist(), F.asnumpy(w).tolist()))
+    assert uvw == {(1, 0, 3), (2, 0, 3), (3, 2, 3), (0, 2, 3)}
+
 def _gen_neighbor_sampling_test_graph(hypersparse, reverse):
     if hypersparse:
         # should crash if allocated a CSR
@@ -598,6 +645,51 @@ def test_sample_neighbors_with_0deg():
     sg = dgl.sampling.sample_neighbors(g, F.tensor([1, 2], dtype=F.int64), 2, edge_dir='out', replace=True)
     assert sg.number_of_edges() == 0
 
+@unittest.skipIf(F._default_context_str == 'gpu', reason="GPU sample neighbors with probability is not implemented")
+@pytest.mark.parametrize('edge_dir', ['in', 'out'])
+def test_neighbor_sampling_index(edge_dir):
+    g = dgl.graph(([0, 0, 1, 1, 2, 2, 3, 3, 3, 3], [1, 2, 0, 2, 0, 1, 0, 1, 2, 4]))
+    g.edata['prob'] = F.tensor([0., 1., 1., 0., 1., 1., 2., 0., 3., 1.], dtype=F.float32)
+    index = dgl.sampling.NeighborSamplingIndex(g, 'prob', edge_dir=edge_dir)
+    assert index.memory_usage > 0
+    prob = F.asnumpy(g.edata['prob'])
+    seeds = F.tensor([0, 1, 2, 3], dtype=F.int64)
+
+    def _check(sg, fanout, replace):
+        eids = F.asnumpy(sg.edata[dgl.EID])
+        assert np.all(prob[eids] > 0)
+        src, dst = g.find_edges(F.tensor(eids, dtype=F.int64))
+        seed = F.asnumpy(dst if edge_dir == 'in' else src)
+        for node in F.asnumpy(seeds):
+            candidates = F.asnumpy(g.in_edges(node, form='eid') if edge_dir == 'in'
+                                   else g.out_edges(node, form='eid'))
+            num_positive = int((prob[candidates] > 0).sum())
+            num_sampled = int((seed == node).sum())
+            if replace:
+                assert num_sampled == (fanout if num_positive > 0 else 0)
+            else:
+                assert num_sampled == min(fanout, num_positive)
+                assert len(np.unique(eids[seed == node])) == num_sampled
+
+    for fanout, replace in [(1, False), (2, False), (3, True)]:
+        for _ in range(10):
+            sg = dgl.sampling.sample_neighbors(
+                g, seeds, fanout, edge_dir=edge_dir, prob=index, replace=replace)
+            _check(sg, fanout, replace)
+
+    # incremental rebuild after changing the probabilities
+    g.edata['prob'][F.tensor([0, 3], dtype=F.int64)] = F.tensor([0., 0.])
+    g.edata['prob'][F.tensor([1, 8], dtype=F.int64)] = F.tensor([0., 0.])
+    index.update(g, F.tensor([1, 8], dtype=F.int64))
+    prob = F.asnumpy(g.edata['prob'])
+    for _ in range(10):
+        _check(dgl.sampling.sample_neighbors(
+            g, seeds, 2, edge_dir=edge_dir, prob=index), 2, False)
+
+    with pytest.raises(dgl.DGLError):
+        dgl.sampling.sample_neighbors(
+            g, seeds, 2, edge_dir='out' if edge_dir == 'in' else 'in', prob=index)
+
 def create_test_graph(num_nodes, num_edges_per_node, bipartite=False):
     src = np.concatenate(
         [np.array([i] * num_edges_per_node) for i in range(num_nodes)])
@@ -925,16 +1017,61 @@ def test_global_uniform_negative_sampling(dtype):
     src, dst = dgl.sampling.global_uniform_negative_sampling(g, 20, False, etype='AB')
     assert not F.asnumpy(g.has_edges_between(src, dst, etype='AB')).any()
 
+@pytest.mark.parametrize('dtype', ['int32', 'int64'])
+def test_exact_negative_samplers(dtype):
+    g = dgl.graph((np.random.randint(0, 50, (1500,)), np.random.randint(0, 50, (1500,))),
+                  idtype=dtype).to(F.ctx())
+    eids = F.copy_to(F.tensor(np.arange(200), getattr(F, dtype)), F.ctx())
+    neg_sampler = dgl.dataloading.negative_sampler.PerSourceUniform(
+        100, exclude_positive_edges=True, exclude_self_loops=True)
+    src, dst = neg_sampler(g, eids)
+    assert len(src) == len(dst) == 200 * 100
+    assert F.dtype(dst) == g.idtype
+    assert not F.asnumpy(g.has_edges_between(src, dst)).any()
+    assert not np.any(F.asnumpy(src) == F.asnumpy(dst))
+    pos_src, _ = g.find_edges(eids)
+    assert np.array_equal(F.asnumpy(src), np.repeat(F.asnumpy(pos_src), 100))
+
+    src, dst = dgl.dataloading.negative_sampler.GlobalUniform(5, exact=True)(g, eids)
+    assert len(src) == 1000
+    assert not F.asnumpy(g.has_edges_between(src, dst)).any()
+    assert len(set(zip(F.asnumpy(src).tolist(), F.asnumpy(dst).tolist()))) == 1000
+
+    # fewer unique negative pairs than requested
+    g = dgl.graph(([0, 1], [1, 0]), idtype=dtype).to(F.ctx())
+    src, dst = dgl.dataloading.negative_sampler.GlobalUniform(5, False, exact=True)(
+        g, F.copy_to(F.tensor([0, 1], getattr(F, dtype)), F.ctx()))
+    assert sorted(zip(F.asnumpy(src).tolist(), F.asnumpy(dst).tolist())) == [(0, 0), (1, 1)]
+
+@pytest.mark.parametrize('dtype', ['int32', 'int64'])
+def test_batch_negative_samplers(dtype):
+    g = dgl.graph(([0, 1, 2, 3], [1, 2, 3, 0]), idtype=dtype).to(F.ctx())
+    eids = F.copy_to(F.tensor([0, 1, 2], getattr(F, dtype)), F.ctx())
+    src, dst = dgl.dataloading.negative_sampler.InBatch()(g, eids)
+    assert F.asnumpy(src).tolist() == [0, 0, 1, 1, 2, 2]
+    assert F.asnumpy(dst).tolist() == [2, 3, 1, 3, 1, 2]
+    src, dst = dgl.dataloading.negative_sampler.InBatch(exclude_positive_edges=True)(g, eids)
+    assert not F.asnumpy(g.has_edges_between(src, dst)).any()
+    src, dst = dgl.dataloading.negative_sampler.InBatch(4)(g, eids)
+    assert len(src) == 12
+    assert np.all(np.isin(F.asnumpy(dst), [1, 2, 3]))
+
+    src, dst = dgl.dataloading.negative_sampler.SharedUniform(3)(g, eids)
+    assert len(src) == 9
+    assert len(np.unique(F.asnumpy(dst).reshape(3, 3), axis=0)) == 1
+
 
 if __name__ == '__main__':
     from itertools import product
     for args in product(['coo', 'csr', 'csc'], ['in', 'out'], [False, True]):
         test_sample_neighbors_etype_homogeneous(*args)
     test_random_walk()
+    test_random_walk_stream()
     test_pack_traces()
     test_pinsage_sampling()
     test_sample_neighbors_outedge()
     test_sample_neighbors_topk()
+    test_neighbor_sampling_index('in')
     test_sample_neighbors_topk_outedge()
     test_sample_neighbors_with_0deg()
     test_sample_neighbors_biased_homogeneous()
@@ -943,3 +1080,5 @@ if __name__ == '__main__':
     test_sample_neighbors_exclude_edges_homoG('int32')
     test_global_uniform_negative_sampling('int32')
     test_global_uniform_negative_sampling('int64')
+    test_exact_negative_samplers('int64')
+    test_batch_negative_samplers('int64')
@@ -105,6 +105,37 @@ def test_graph_serialize_without_feature(is_hetero):
 
     os.unlink(path)
 
+@unittest.skipIf(F._default_context_str == 'gpu', reason="GPU not implemented")
+@unittest.skipIf(os.name == 'nt', reason="mmap is not supported on Windows")
+def test_graph_serialize_mmap():
+    num_graphs = 10
+    g_list = construct_graph(num_graphs, True)
+
+    # create a temporary file and immediately release it so DGL can open it.
+    f = tempfile.NamedTemporaryFile(delete=False)
+    path = f.name
+    f.close()
+
+    dgl.save_graphs(path, g_list, {'label': F.arange(0, num_graphs)})
+
+    idx_list = [3, 1]
+    loadg_list, labels = dgl.load_graphs(path, idx_list, mmap=True)
+    assert F.allclose(labels['label'], F.arange(0, num_graphs))
+    for idx, load_g in zip(idx_list, loadg_list):
+        load_edges = load_g.all_edges('uv', 'eid')
+        g_edges = g_list[idx].all_edges('uv', 'eid')
+        assert F.allclose(load_edges[0], g_edges[0])
+        assert F.allclose(load_edges[1], g_edges[1])
+        assert F.allclose(load_g.edata['e1'], g_list[idx].edata['e1'])
+        assert F.allclose(load_g.ndata['n1'], g_list[idx].ndata['n1'])
+
+    # writes to the loaded tensors never change the file
+    loadg_list[0].ndata['n1'][0] = 0.
+    loadg_list, _ = dgl.load_graphs(path, [3])
+    assert F.allclose(loadg_list[0].ndata['n1'], g_list[3].ndata['n1'])
+
+    os.unlink(path)
+
 @unittest.skipIf(F._default_context_str == 'gpu', reason="GPU not implemented")
 @pytest.mark.parametrize('is_hetero', [True, False])
 def test_graph_serialize_with_labels(is_hetero):
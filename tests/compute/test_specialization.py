@@ -303,6 +303,27 @@ def test_spmv_3d_feat(idtype):
     g.update_all(message_func=src_mul_edge_udf, reduce_func=sum_udf) # 3
     assert F.allclose(g.ndata['h'], ans)
 
+@parametrize_dtype
+def test_udf_reduce_skewed_degrees(idtype):
+    # many distinct in-degrees; the mailbox must follow edge ID order
+    n = 200
+    dst = np.concatenate([np.full(i, i) for i in range(n)])
+    np.random.shuffle(dst)
+    src = np.random.randint(0, n, len(dst))
+    g = dgl.graph((src, dst), num_nodes=n + 1, idtype=idtype, device=F.ctx())
+    g.edata['e'] = F.copy_to(F.arange(0, g.num_edges()), F.ctx())
+
+    def reduce_func(nodes):
+        return {'first': nodes.mailbox['m'][:, 0],
+                'last': nodes.mailbox['m'][:, -1]}
+    g.update_all(lambda edges: {'m': edges.data['e']}, reduce_func)
+    first = F.asnumpy(g.ndata['first'])
+    last = F.asnumpy(g.ndata['last'])
+    for v in range(1, n):
+        eids = np.nonzero(dst == v)[0]
+        assert first[v] == eids[0] and last[v] == eids[-1]
+    assert first[0] == 0 and first[n] == 0
+
 if __name__ == '__main__':
     test_v2v_update_all()
     test_v2v_snr()
@@ -315,3 +336,4 @@ if __name__ == '__main__':
     test_update_all_multi_fallback()
     test_pull_multi_fallback()
     test_spmv_3d_feat()
+    test_udf_reduce_skewed_degrees()
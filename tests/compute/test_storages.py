@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pytest
+import dgl
+import backend as F
+
+def _create_memmap(dirname, shape):
+    arr = np.memmap(os.path.join(dirname, 'feat.npy'), mode='w+', dtype='float32', shape=shape)
+    arr[:] = np.random.randn(*shape)
+    return arr
+
+@pytest.mark.parametrize('policy', ['static', 'lru', 'clock'])
+def test_cached_feature_storage(policy):
+    tmpdir = tempfile.TemporaryDirectory()
+    arr = _create_memmap(tmpdir.name, (1000, 4))
+    degrees = F.tensor(np.arange(1000, 0, -1))
+    storage = dgl.storages.CachedFeatureStorage(arr, 100, policy=policy, degrees=degrees)
+    assert storage.num_cached == 100
+
+    for _ in range(20):
+        ids = np.random.zipf(1.5, 300) % 1000
+        result = storage.fetch(F.tensor(ids), F.cpu()).wait()
+        assert np.array_equal(F.asnumpy(result), arr[ids])
+        assert storage.num_cached == 100
+    assert storage.num_hits + storage.num_misses == 20 * 300
+    # the 100 nodes with the highest degrees are preloaded
+    assert storage.hit_rate > 0
+    storage.reset_stats()
+    assert storage.num_hits == 0 and storage.num_misses == 0
+
+def test_cached_feature_storage_admission():
+    tmpdir = tempfile.TemporaryDirectory()
+    arr = _create_memmap(tmpdir.name, (100, 2))
+    storage = dgl.storages.CachedFeatureStorage(arr, 10, policy='lru')
+    storage.fetch(F.tensor([1, 2, 3]), F.cpu()).wait()
+    assert storage.num_misses == 3 and storage.num_cached == 3
+    storage.fetch(F.tensor([1, 2, 3]), F.cpu()).wait()
+    assert storage.num_hits == 3
+    storage.fetch(F.tensor(np.arange(4, 11)), F.cpu()).wait()
+    storage.fetch(F.tensor([1, 2, 3]), F.cpu()).wait()
+    # evicts 4-6 but not the recently used 1-3
+    storage.fetch(F.tensor(np.arange(11, 14)), F.cpu()).wait()
+    storage.reset_stats()
+    storage.fetch(F.tensor([1, 2, 3]), F.cpu()).wait()
+    assert storage.num_hits == 3
+
+@unittest.skipIf(dgl.backend.backend_name != 'pytorch', reason='Only support PyTorch for now')
+@pytest.mark.parametrize('num_threads', [1, 4])
+def test_tensor_storage_gather(num_threads):
+    arr = F.copy_to(F.randn((10000, 16)), F.cpu())
+    # small chunks so that the gather is split across the threads
+    storage = dgl.storages.TensorStorage(arr, num_threads=num_threads, num_buffers=2,
+                                         chunk_size=1024)
+    all_ids = [
+        np.random.randint(0, 10000, 3000),                  # random with duplicates
+        np.sort(np.random.choice(10000, 3000, replace=False)),  # sorted
+        np.arange(2000, 5000),                              # consecutive
+        np.array([5, 3]),                                   # smaller than a chunk
+        np.array([], dtype=np.int64)]
+    results = []
+    for ids in all_ids:
+        results.append(storage.fetch(F.tensor(ids, dtype=F.int64), F.ctx()))
+        assert storage.last_throughput >= 0
+    # the rows fetched to a GPU must stay valid after their staging buffers are reused
+    for ids, result in zip(all_ids, results):
+        assert F.context(result) == F.ctx()
+        assert np.array_equal(F.asnumpy(result), F.asnumpy(arr)[ids])
+    assert storage.bytes_fetched == sum(len(ids) for ids in all_ids) * 16 * 4
+    assert storage.throughput > 0
+    storage.reset_stats()
+    assert storage.bytes_fetched == 0 and storage.throughput == 0
+
+if __name__ == '__main__':
+    test_cached_feature_storage('lru')
+    test_cached_feature_storage_admission()
+    test_tensor_storage_gather(4)
@@ -261,6 +261,19 @@ def check_dist_graph(g, num_clients, num_nodes, num_edges):
     feats = g.ndata['test1'][nids]
     assert np.all(F.asnumpy(feats) == 1)
 
+    # Test the read cache. With one partition, no rows are remote.
+    g.ndata['test1'].enable_cache(1024, g.in_degrees())
+    feats = g.ndata['test1'][nids]
+    assert np.all(F.asnumpy(feats) == 1)
+    stats = g.ndata['test1'].cache_stats()
+    assert stats['num_cached'] == 0
+    assert stats['num_misses'] == len(nids)
+    g.ndata['test1'][nids] = new_feats * 2
+    feats = g.ndata['test1'][nids]
+    assert np.all(F.asnumpy(feats) == 2)
+    g.ndata['test1'].disable_cache()
+    assert g.ndata['test1'].cache_stats() is None
+
     # Test metadata operations.
     assert len(g.ndata['features']) == g.number_of_nodes()
     assert g.ndata['features'].shape == (g.number_of_nodes(), 1)
@@ -573,6 +586,79 @@ def check_server_client_hetero(shared_mem, num_servers, num_clients):
 
     print('clients have terminated')
 
+def run_cache_client(graph_name, num_nodes):
+    os.environ['DGL_NUM_SERVER'] = '1'
+    dgl.distributed.initialize("kv_ip_config.txt")
+    gpb, graph_name, _, _ = load_partition_book('/tmp/dist_graph/{}.json'.format(graph_name),
+                                                0, None)
+    g = DistGraph(graph_name, gpb=gpb)
+    nids = F.arange(0, num_nodes)
+    is_remote = F.asnumpy(gpb.nid2partid(nids)) != 0
+    num_remote = int(np.sum(is_remote))
+    assert 0 < num_remote < num_nodes
+    remote_nids = F.tensor(np.nonzero(is_remote)[0])
+
+    test = dgl.distributed.DistTensor((num_nodes, 2), F.int32, 'test_cache', init_func=emb_init)
+    test[nids] = F.ones((num_nodes, 2), F.int32, F.cpu())
+    # the cache holds all the remote rows, and no local row
+    test.enable_cache(num_nodes * 8, F.tensor(np.random.rand(num_nodes)))
+    stats = test.cache_stats()
+    assert stats['num_cached'] == num_remote
+    assert stats['cache_bytes'] == num_remote * 8
+
+    # repeated reads hit the cache for the remote rows only
+    assert np.all(F.asnumpy(test[nids]) == 1)
+    stats = test.cache_stats()
+    assert stats['num_hits'] == num_remote
+    assert stats['num_misses'] == num_nodes - num_remote
+    assert np.all(F.asnumpy(test[remote_nids]) == 1)
+    stats = test.cache_stats()
+    assert stats['num_hits'] == 2 * num_remote
+    assert stats['bytes_saved'] == 2 * num_remote * 8
+
+    # a write from this process invalidates the cached rows
+    test[remote_nids] = F.ones((num_remote, 2), F.int32, F.cpu()) * 2
+    feats = F.asnumpy(test[nids])
+    assert np.all(feats[is_remote] == 2)
+    assert np.all(feats[~is_remote] == 1)
+    assert test.cache_stats()['num_hits'] == 3 * num_remote
+
+    # an explicit refresh re-reads the cached rows
+    test.refresh_cache()
+    assert np.all(F.asnumpy(test[remote_nids]) == 2)
+    assert test.cache_stats()['num_hits'] == 4 * num_remote
+    test.disable_cache()
+    assert test.cache_stats() is None
+    dgl.distributed.exit_client()
+
+def check_dist_tensor_cache(num_parts):
+    generate_ip_config("kv_ip_config.txt", num_parts, 1)
+    g = create_random_graph(10000)
+    graph_name = 'check_dist_tensor_cache'
+    partition_graph(g, graph_name, num_parts, '/tmp/dist_graph')
+
+    serv_ps = []
+    ctx = mp.get_context('spawn')
+    for serv_id in range(num_parts):
+        p = ctx.Process(target=run_server, args=(graph_name, serv_id, 1, 1, False))
+        serv_ps.append(p)
+        p.start()
+
+    p = ctx.Process(target=run_cache_client, args=(graph_name, g.number_of_nodes()))
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+    for p in serv_ps:
+        p.join()
+
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+@unittest.skipIf(dgl.backend.backend_name == "tensorflow", reason="TF doesn't support some of operations in DistGraph")
+@unittest.skipIf(dgl.backend.backend_name == "mxnet", reason="Turn off Mxnet support")
+def test_dist_tensor_cache():
+    reset_envs()
+    os.environ['DGL_DIST_MODE'] = 'distributed'
+    check_dist_tensor_cache(2)
+
 @unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
 @unittest.skipIf(dgl.backend.backend_name == "tensorflow", reason="TF doesn't support some of operations in DistGraph")
 @unittest.skipIf(dgl.backend.backend_name == "mxnet", reason="Turn off Mxnet support")
@@ -770,6 +856,7 @@ if __name__ == '__main__':
     os.makedirs('/tmp/dist_graph', exist_ok=True)
     test_dist_emb_server_client()
     test_server_client()
+    test_dist_tensor_cache()
     test_split()
     test_split_even()
     test_standalone()
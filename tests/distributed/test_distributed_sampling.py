@@ -313,6 +313,69 @@ def check_rpc_sampling_shuffle(tmpdir, num_server, num_groups=1):
     for p in pserver_list:
         p.join()
 
+def start_sample_blocks_client(rank, tmpdir, disable_shared_mem, g, num_servers):
+    gpb = None
+    if disable_shared_mem:
+        _, _, _, gpb, _, _, _ = load_partition(tmpdir / 'test_sampling.json', rank)
+    dgl.distributed.initialize("rpc_ip_config.txt")
+    dist_graph = DistGraph("test_sampling", gpb=gpb)
+    seeds = F.tensor([0, 10, 99, 66, 1024, 2008])
+    fanouts = [4, 3]
+    input_nodes, output_nodes, blocks = dgl.distributed.sample_blocks(
+        dist_graph, seeds, fanouts, feat_names=['feat'])
+
+    orig_nid = F.zeros((g.number_of_nodes(),), dtype=F.int64, ctx=F.cpu())
+    orig_eid = F.zeros((g.number_of_edges(),), dtype=F.int64, ctx=F.cpu())
+    for i in range(num_servers):
+        part, _, _, _, _, _, _ = load_partition(tmpdir / 'test_sampling.json', i)
+        orig_nid[part.ndata[dgl.NID]] = part.ndata['orig_id']
+        orig_eid[part.edata[dgl.EID]] = part.edata['orig_id']
+
+    assert np.array_equal(F.asnumpy(output_nodes), F.asnumpy(seeds))
+    assert len(blocks) == 2
+    dst_nodes = seeds
+    for block, fanout in zip(reversed(blocks), reversed(fanouts)):
+        assert np.array_equal(F.asnumpy(block.dstdata[dgl.NID]), F.asnumpy(dst_nodes))
+        src_nodes = block.srcdata[dgl.NID]
+        assert np.array_equal(F.asnumpy(src_nodes[:len(dst_nodes)]), F.asnumpy(dst_nodes))
+        src, dst = block.edges()
+        src = orig_nid[F.gather_row(src_nodes, src)]
+        dst = orig_nid[F.gather_row(dst_nodes, dst)]
+        assert np.all(F.asnumpy(g.has_edges_between(src, dst)))
+        eids = orig_eid[block.edata[dgl.EID]]
+        assert np.array_equal(F.asnumpy(g.edge_ids(src, dst)), F.asnumpy(eids))
+        # the neighbors of every destination node are sampled exactly once
+        deg = F.asnumpy(g.in_degrees(orig_nid[dst_nodes]))
+        assert np.array_equal(F.asnumpy(block.in_degrees()), np.minimum(deg, fanout))
+        dst_nodes = src_nodes
+    assert np.array_equal(F.asnumpy(input_nodes), F.asnumpy(dst_nodes))
+    assert np.array_equal(F.asnumpy(blocks[0].srcdata['feat']),
+                          F.asnumpy(g.ndata['feat'][orig_nid[input_nodes]]))
+    dgl.distributed.exit_client()
+
+def check_rpc_sample_blocks_shuffle(tmpdir, num_server):
+    generate_ip_config("rpc_ip_config.txt", num_server, num_server)
+
+    g = CitationGraphDataset("cora")[0]
+    g.readonly()
+    num_parts = num_server
+    num_hops = 1
+
+    partition_graph(g, 'test_sampling', num_parts, tmpdir,
+                    num_hops=num_hops, part_method='metis', reshuffle=True)
+
+    pserver_list = []
+    ctx = mp.get_context('spawn')
+    for i in range(num_server):
+        p = ctx.Process(target=start_server, args=(i, tmpdir, num_server > 1, 'test_sampling'))
+        p.start()
+        time.sleep(1)
+        pserver_list.append(p)
+
+    start_sample_blocks_client(0, tmpdir, num_server > 1, g, num_server)
+    for p in pserver_list:
+        p.join()
+
 def start_hetero_sample_client(rank, tmpdir, disable_shared_mem, nodes):
     gpb = None
     if disable_shared_mem:
@@ -565,6 +628,7 @@ def test_rpc_sampling_shuffle(num_server):
     with tempfile.TemporaryDirectory() as tmpdirname:
         check_rpc_sampling_shuffle(Path(tmpdirname), num_server)
         check_rpc_sampling_shuffle(Path(tmpdirname), num_server, num_groups=2)
+        check_rpc_sample_blocks_shuffle(Path(tmpdirname), num_server)
         check_rpc_hetero_sampling_shuffle(Path(tmpdirname), num_server)
         check_rpc_hetero_sampling_empty_shuffle(Path(tmpdirname), num_server)
         check_rpc_hetero_etype_sampling_shuffle(Path(tmpdirname), num_server)
@@ -748,6 +812,8 @@ if __name__ == "__main__":
         check_rpc_in_subgraph_shuffle(Path(tmpdirname), 2)
         check_rpc_sampling_shuffle(Path(tmpdirname), 1)
         check_rpc_sampling_shuffle(Path(tmpdirname), 2)
+        check_rpc_sample_blocks_shuffle(Path(tmpdirname), 1)
+        check_rpc_sample_blocks_shuffle(Path(tmpdirname), 2)
         check_rpc_hetero_sampling_shuffle(Path(tmpdirname), 1)
         check_rpc_hetero_sampling_shuffle(Path(tmpdirname), 2)
         check_rpc_hetero_sampling_empty_shuffle(Path(tmpdirname), 1)
@@ -122,6 +122,51 @@ def test_standalone(tmpdir):
     except Exception as e:
         print(e)
 
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+@unittest.skipIf(dgl.backend.backend_name != 'pytorch', reason='Only support PyTorch for now')
+def test_standalone_locality(tmpdir):
+    reset_envs()
+    generate_ip_config("mp_ip_config.txt", 1, 1)
+
+    g = CitationGraphDataset("cora")[0]
+    partition_graph(g, 'test_sampling', 1, tmpdir, num_hops=1, part_method='metis',
+                    reshuffle=True)
+
+    os.environ['DGL_DIST_MODE'] = 'standalone'
+    dgl.distributed.initialize("mp_ip_config.txt")
+    dist_graph = DistGraph("test_locality", part_config=tmpdir / 'test_sampling.json')
+    train_nid = F.arange(0, 500)
+    clusters = dgl.distributed.node_clusters(dist_graph, train_nid, 8)
+    assert F.asnumpy(clusters).min() >= 0 and F.asnumpy(clusters).max() < 8
+
+    def collate(seeds):
+        seeds = F.tensor(np.asarray(seeds))
+        frontier = dgl.distributed.sample_neighbors(dist_graph, seeds, 5)
+        return seeds, frontier.number_of_edges()
+
+    dataloader = DistDataLoader(
+        dataset=train_nid, batch_size=32, collate_fn=collate, shuffle=True,
+        partition_book=dist_graph.get_partition_book(), cluster_ids=clusters)
+    cluster_of = dict(zip(F.asnumpy(train_nid).tolist(), F.asnumpy(clusters).tolist()))
+    for _ in range(2):
+        seeds = []
+        num_edges = 0
+        for batch, num in dataloader:
+            seeds.append(F.asnumpy(batch))
+            num_edges += num
+        seeds = np.concatenate(seeds)
+        assert np.array_equal(np.sort(seeds), F.asnumpy(train_nid))
+        # every cluster forms a contiguous run
+        runs = [cluster_of[nid] for i, nid in enumerate(seeds.tolist())
+                if i == 0 or cluster_of[nid] != cluster_of[seeds[i - 1]]]
+        assert len(runs) == len(set(runs))
+        stats = dataloader.locality_stats
+        assert stats['local_edges'] == num_edges
+        assert stats['remote_edges'] == 0
+        assert stats['local_edge_ratio'] == 1.
+    del dataloader
+    dgl.distributed.exit_client()
+
 def start_dist_neg_dataloader(rank, tmpdir, num_server, num_workers, orig_nid, groundtruth_g):
     import dgl
     import torch as th
@@ -453,6 +498,7 @@ if __name__ == "__main__":
     import tempfile
     with tempfile.TemporaryDirectory() as tmpdirname:
         test_standalone(Path(tmpdirname))
+        test_standalone_locality(Path(tmpdirname))
         test_dataloader(Path(tmpdirname), 3, 4, 'node')
         test_dataloader(Path(tmpdirname), 3, 4, 'edge')
         test_neg_dataloader(Path(tmpdirname), 3, 4)
@@ -191,7 +191,8 @@ def start_client(num_clients, num_servers):
 
     # Test push and pull
     id_tensor = F.tensor([0,2,4], F.int64)
-    data_tensor = F.tensor([[6.,6.],[6.,6.],[6.,6.]], F.float32)
+    # Row i holds 10 + i so that every pulled row can be told apart.
+    data_tensor = F.tensor([[10.,10.],[12.,12.],[14.,14.]], F.float32)
     kvclient.push(name='data_0',
                   id_tensor=id_tensor,
                   data_tensor=data_tensor)
@@ -207,6 +208,15 @@ def start_client(num_clients, num_servers):
     assert_array_equal(F.asnumpy(res), F.asnumpy(data_tensor))
     res = kvclient.pull(name='data_2', id_tensor=id_tensor)
     assert_array_equal(F.asnumpy(res), F.asnumpy(data_tensor))
+    res = kvclient.pull_many({'data_0': id_tensor,
+                              'data_1': F.tensor([2, 0], F.int64),
+                              'data_2': F.tensor([4, 0, 4], F.int64)})
+    assert_array_equal(F.asnumpy(res['data_0']),
+                       np.array([[10., 10.], [12., 12.], [14., 14.]], np.float32))
+    assert_array_equal(F.asnumpy(res['data_1']),
+                       np.array([[12., 12.], [10., 10.]], np.float32))
+    assert_array_equal(F.asnumpy(res['data_2']),
+                       np.array([[14., 14.], [10., 10.], [14., 14.]], np.float32))
     # Register new push handler
     kvclient.register_push_handler('data_0', udf_push)
     kvclient.register_push_handler('data_1', udf_push)
@@ -5,7 +5,7 @@ import numpy as np
 from scipy import sparse as spsp
 from numpy.testing import assert_array_equal
 from dgl.heterograph_index import create_unitgraph_from_coo
-from dgl.distributed import partition_graph, load_partition
+from dgl.distributed import partition_graph, partition_graph_out_of_core, load_partition
 from dgl import function as fn
 import backend as F
 import unittest
@@ -374,6 +374,55 @@ def check_partition(g, part_method, reshuffle, num_parts=4, num_trainers_per_mac
         assert F.dtype(eid2pid) in (F.int32, F.int64)
         assert np.all(F.asnumpy(eid2pid) == edge_map)
 
+def check_partition_out_of_core(g, part_method, num_parts=4, num_hops=2):
+    g.ndata['feats'] = F.tensor(np.random.randn(g.number_of_nodes(), 10), F.float32)
+    g.edata['feats'] = F.tensor(np.random.randn(g.number_of_edges(), 10), F.float32)
+    g.update_all(fn.copy_src('feats', 'msg'), fn.sum('msg', 'h'))
+    src, dst = g.edges(order='eid')
+    np.save('/tmp/partition/edges.npy', np.stack([F.asnumpy(src), F.asnumpy(dst)]))
+    np.save('/tmp/partition/node_feats.npy', F.asnumpy(g.ndata['feats']))
+    orig_nids, orig_eids = partition_graph_out_of_core(
+        '/tmp/partition/edges.npy', g.number_of_nodes(), 'test_ooc', num_parts, '/tmp/partition',
+        num_hops=num_hops, part_method=part_method, chunk_size=100,
+        node_feats={'feats': '/tmp/partition/node_feats.npy'},
+        edge_feats={'feats': F.asnumpy(g.edata['feats'])}, return_mapping=True)
+    assert not any(name.startswith('tmp_') for name in os.listdir('/tmp/partition'))
+    num_inner_edges = 0
+    for i in range(num_parts):
+        part_g, node_feats, edge_feats, gpb, _, ntypes, etypes = load_partition(
+            '/tmp/partition/test_ooc.json', i)
+        assert gpb._num_nodes() == g.number_of_nodes()
+        assert gpb._num_edges() == g.number_of_edges()
+        local_nodes = F.boolean_mask(part_g.ndata[dgl.NID], part_g.ndata['inner_node'])
+        assert np.all(F.asnumpy(gpb.nid2localnid(local_nodes, i)) == np.arange(len(local_nodes)))
+        local_edges = F.boolean_mask(part_g.edata[dgl.EID], part_g.edata['inner_edge'])
+        assert np.all(F.asnumpy(gpb.eid2localeid(local_edges, i)) == np.arange(len(local_edges)))
+        num_inner_edges += len(local_edges)
+
+        # The edges of the partition are the edges of the input graph.
+        part_src, part_dst = part_g.edges(order='eid')
+        orig_src = F.gather_row(orig_nids, F.gather_row(part_g.ndata[dgl.NID], part_src))
+        orig_dst = F.gather_row(orig_nids, F.gather_row(part_g.ndata[dgl.NID], part_dst))
+        assert np.all(F.asnumpy(F.gather_row(orig_eids, part_g.edata[dgl.EID])) ==
+                      F.asnumpy(g.edge_ids(orig_src, orig_dst)))
+        assert np.all(F.asnumpy(part_g.ndata['orig_id']) ==
+                      F.asnumpy(F.gather_row(orig_nids, part_g.ndata[dgl.NID])))
+
+        # The inner nodes have all their in-edges.
+        part_g.ndata['feats'] = F.gather_row(g.ndata['feats'], part_g.ndata['orig_id'])
+        part_g.update_all(fn.copy_src('feats', 'msg'), fn.sum('msg', 'h'))
+        llocal_nodes = F.nonzero_1d(part_g.ndata['inner_node'])
+        orig_local_nodes = F.gather_row(orig_nids, local_nodes)
+        assert F.allclose(F.gather_row(g.ndata['h'], orig_local_nodes),
+                          F.gather_row(part_g.ndata['h'], llocal_nodes))
+
+        assert np.all(F.asnumpy(node_feats['_N/feats']) ==
+                      F.asnumpy(F.gather_row(g.ndata['feats'], orig_local_nodes)))
+        orig_local_edges = F.gather_row(orig_eids, local_edges)
+        assert np.all(F.asnumpy(edge_feats['_E/feats']) ==
+                      F.asnumpy(F.gather_row(g.edata['feats'], orig_local_edges)))
+    assert num_inner_edges == g.number_of_edges()
+
 @unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
 def test_partition():
     g = create_random_graph(1000)
@@ -384,6 +433,13 @@ def test_partition():
     check_partition(g, 'random', False)
     check_partition(g, 'random', True)
 
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+def test_partition_out_of_core():
+    g = create_random_graph(1000)
+    check_partition_out_of_core(g, 'metis')
+    check_partition_out_of_core(g, 'random', num_hops=1)
+    check_partition_out_of_core(g, 'random', num_parts=1)
+
 @unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
 @unittest.skipIf(dgl.backend.backend_name == "tensorflow", reason="TF doesn't support some of operations in DistGraph")
 def test_hetero_partition():
@@ -393,8 +449,95 @@ def test_hetero_partition():
     check_hetero_partition(hg, 'metis', 4, 8)
     check_hetero_partition(hg, 'random')
 
+@unittest.skipIf(dgl.backend.backend_name != 'pytorch', reason='Libra only supports PyTorch')
+def test_libra_split_node_dict():
+    from dgl.distgnn.partition.libra_partition import _local_ids, _split_node_dict
+    nodes, src, dst = _local_ids(np.array([5, 3, 5]), np.array([3, 7, 9]))
+    assert_array_equal(nodes, [5, 3, 7, 9])
+    assert_array_equal(src, [0, 1, 0])
+    assert_array_equal(dst, [1, 2, 3])
+
+    # node 5 has no edge, nodes 1 and 2 are split into 2 and 3 partitions
+    part_nodes = [np.array([0, 1, 2]), np.array([2, 3]), np.array([1, 2, 4])]
+    adj, inner_node, lf = _split_node_dict(part_nodes, 6, 3)
+    assert_array_equal(adj, [[-1, -1], [5, -1], [3, 6], [2, 6], [-1, -1], [1, -1], [2, 3],
+                             [-1, -1]])
+    assert_array_equal(inner_node, [1, 0, 0, 0, 1, 0, 0, 1])
+    assert_array_equal(lf[[0, 4, 7]], [-200, -200, -200])
+    assert lf[1] == lf[5] and lf[1] in (1, 5)
+    assert lf[2] == lf[3] == lf[6] and lf[2] in (2, 3, 6)
+
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+@unittest.skipIf(dgl.backend.backend_name != 'pytorch', reason='Libra only supports PyTorch')
+def test_libra_partition():
+    import json
+    import tempfile
+    from dgl.distgnn.partition import partition_graph as libra_partition_graph
+    g = create_random_graph(1000)
+    num_nodes = g.number_of_nodes()
+    # the features are the node IDs, to recover the global ID of every clone
+    g.ndata['feat'] = F.reshape(F.astype(F.arange(0, num_nodes), F.float32), (num_nodes, 1))
+    g.ndata['label'] = F.arange(0, num_nodes)
+    for mask in ['train_mask', 'val_mask', 'test_mask']:
+        g.ndata[mask] = F.astype(F.randint((num_nodes,), F.int64, F.cpu(), 0, 2), F.bool)
+    num_parts = 3
+    with tempfile.TemporaryDirectory() as test_dir:
+        stats = libra_partition_graph(num_parts, g, test_dir)
+        result_dir = os.path.join(test_dir, '{}Communities'.format(num_parts))
+        json_files = [f for f in os.listdir(result_dir) if f.endswith('.json')]
+        assert len(json_files) == 1
+        with open(os.path.join(result_dir, json_files[0])) as f:
+            meta = json.load(f)
+        assert meta['num_parts'] == num_parts
+        assert meta['libra_stats']['part_num_nodes'] == stats['part_num_nodes']
+        parts = [dgl.load_graphs(os.path.join(result_dir, 'part{}'.format(i), 'graph.dgl'))[0][0]
+                 for i in range(num_parts)]
+
+    # every edge is assigned to exactly one partition
+    part_nids = [F.asnumpy(part.ndata['feat'])[:, 0].astype(np.int64) for part in parts]
+    part_edges = []
+    for part, nids in zip(parts, part_nids):
+        src, dst = part.edges()
+        part_edges.append(np.stack([nids[F.asnumpy(src)], nids[F.asnumpy(dst)]], 1))
+        assert np.array_equal(F.asnumpy(part.ndata['label']), nids)
+        assert np.array_equal(F.asnumpy(part.ndata['train_mask']),
+                              F.asnumpy(g.ndata['train_mask'])[nids].astype(np.int32))
+    src, dst = g.edges()
+    assert np.array_equal(np.unique(np.concatenate(part_edges), axis=0),
+                          np.unique(np.stack([F.asnumpy(src), F.asnumpy(dst)], 1), axis=0))
+
+    # the clones of the nodes across the partitions, in partition order
+    clone_node = np.concatenate(part_nids)
+    assert meta['node_map'] == np.cumsum([len(nids) for nids in part_nids]).tolist()
+    adj = np.concatenate([F.asnumpy(part.ndata['adj']) for part in parts])
+    inner_node = np.concatenate([F.asnumpy(part.ndata['inner_node']) for part in parts])
+    lf = np.concatenate([F.asnumpy(part.ndata['lf']) for part in parts])
+    assert adj.shape == (len(clone_node), num_parts - 1)
+    for clone, nid in enumerate(clone_node):
+        clones = np.nonzero(clone_node == nid)[0]
+        others = clones[clones != clone]
+        assert np.array_equal(adj[clone], np.concatenate(
+            [others, np.full(num_parts - 1 - len(others), -1)]))
+        assert inner_node[clone] == (len(clones) == 1)
+        if len(clones) == 1:
+            assert lf[clone] == -200
+        else:
+            assert lf[clone] in clones and np.all(lf[clones] == lf[clone])
+
+    num_clones = np.bincount(clone_node, minlength=num_nodes)
+    part_num_nodes = np.array([len(nids) for nids in part_nids])
+    part_num_edges = np.array([part.number_of_edges() for part in parts])
+    assert stats['part_num_nodes'] == part_num_nodes.tolist()
+    assert stats['part_num_edges'] == part_num_edges.tolist()
+    assert np.isclose(stats['replication_factor'], len(clone_node) / np.sum(num_clones > 0))
+    assert np.isclose(stats['node_balance'], part_num_nodes.max() / part_num_nodes.mean())
+    assert np.isclose(stats['edge_balance'], part_num_edges.max() / part_num_edges.mean())
+
 
 if __name__ == '__main__':
     os.makedirs('/tmp/partition', exist_ok=True)
     test_partition()
+    test_partition_out_of_core()
     test_hetero_partition()
+    test_libra_split_node_dict()
+    test_libra_partition()
@@ -1,5 +1,6 @@
 import os
 import time
+import atexit
 import socket
 
 import dgl
@@ -16,6 +17,7 @@ if os.name != 'nt':
 INTEGER = 2
 STR = 'hello world!'
 HELLO_SERVICE_ID = 901231
+QUEUED_HELLO_SERVICE_ID = 901232
 TENSOR = F.zeros((10, 10), F.int64, F.cpu())
 
 def foo(x, y):
@@ -83,19 +85,26 @@ class HelloRequest(dgl.distributed.Request):
         res = HelloResponse(self.hello_str, self.integer, new_tensor)
         return res
 
-def start_server(num_clients, ip_config, server_id=0, keep_alive=False, num_servers=1):
+class QueuedHelloRequest(HelloRequest):
+    dispatch_queue = 'sampling'
+
+def start_server(num_clients, ip_config, server_id=0, keep_alive=False, num_servers=1,
+                 num_workers=0):
     print("Sleep 1 seconds to test client re-connect.")
     time.sleep(1)
     server_state = dgl.distributed.ServerState(
         None, local_g=None, partition_book=None, keep_alive=keep_alive)
     dgl.distributed.register_service(
         HELLO_SERVICE_ID, HelloRequest, HelloResponse)
+    dgl.distributed.register_service(
+        QUEUED_HELLO_SERVICE_ID, QueuedHelloRequest, HelloResponse)
     print("Start server {}".format(server_id))
     dgl.distributed.start_server(server_id=server_id, 
                                  ip_config=ip_config, 
                                  num_servers=num_servers,
                                  num_clients=num_clients, 
-                                 server_state=server_state)
+                                 server_state=server_state,
+                                 num_workers=num_workers)
 
 def start_client(ip_config, group_id=0, num_servers=1):
     dgl.distributed.register_service(HELLO_SERVICE_ID, HelloRequest, HelloResponse)
@@ -152,6 +161,68 @@ def test_serialize():
     res1 = deserialize_from_payload(MyResponse, data, tensors)
     assert res.x == res1.x
 
+class WireRequest(dgl.distributed.Request):
+    def __init__(self, name, ids, replace, fanout, prob, names, pos, tensors):
+        self.name = name
+        self.ids = ids
+        self.replace = replace
+        self.fanout = fanout
+        self.prob = prob
+        self.names = names
+        self.pos = pos
+        self.tensors = tensors
+
+    def __getstate__(self):
+        return (self.name, self.ids, self.replace, self.fanout, self.prob, self.names,
+                self.pos) + tuple(self.tensors)
+
+    def __setstate__(self, state):
+        self.name, self.ids, self.replace, self.fanout, self.prob, self.names, \
+            self.pos = state[:7]
+        self.tensors = list(state[7:])
+
+    def process_request(self, server_state):
+        pass
+
+def test_serialize_wire_schema():
+    reset_envs()
+    os.environ['DGL_DIST_MODE'] = 'distributed'
+    from dgl.distributed.rpc import serialize_to_payload, deserialize_from_payload
+    SERVICE_ID = 12346
+    dgl.distributed.register_service(SERVICE_ID, WireRequest, MyResponse,
+                                     req_schema='sT?qzSQT*', res_schema='q')
+    ids = F.arange(0, 100)
+    tensors = [F.randn((3, 4)), F.randn((5,))]
+    req = WireRequest('feat', ids, True, 10, None, ['a', 'bc'], [0, 1], tensors)
+    data, payload = serialize_to_payload(req)
+    assert data[:4] == b'DGLW'
+    # tensors are sent as tensor payloads as they are
+    assert len(payload) == 3 and payload[0] is ids
+    req1 = deserialize_from_payload(WireRequest, data, payload)
+    assert req1.name == 'feat' and req1.replace is True and req1.fanout == 10
+    assert req1.prob is None and req1.names == ['a', 'bc'] and req1.pos == [0, 1]
+    assert F.array_equal(req1.ids, ids)
+    assert len(req1.tensors) == 2 and F.array_equal(req1.tensors[1], tensors[1])
+
+    res = MyResponse()
+    data, payload = serialize_to_payload(res)
+    assert data[:4] == b'DGLW'
+    assert deserialize_from_payload(MyResponse, data, payload).x == res.x
+
+    # states not matching the schema are pickled
+    req = WireRequest('feat', ids, True, {'etype': 10}, 'p', [], [], [])
+    data, payload = serialize_to_payload(req)
+    assert data[:4] != b'DGLW'
+    req1 = deserialize_from_payload(WireRequest, data, payload)
+    assert req1.fanout == {'etype': 10} and req1.prob == 'p'
+
+    # pickled payloads are still accepted after disabling the codec
+    dgl.distributed.register_service(SERVICE_ID, WireRequest, MyResponse)
+    req = WireRequest('feat', ids, False, 5, 'p', ['a'], [0], [])
+    data, payload = serialize_to_payload(req)
+    assert data[:4] != b'DGLW'
+    assert deserialize_from_payload(WireRequest, data, payload).fanout == 5
+
 def test_rpc_msg():
     reset_envs()
     os.environ['DGL_DIST_MODE'] = 'distributed'
@@ -182,6 +253,90 @@ def test_rpc():
     pserver.join()
     pclient.join()
 
+def test_server_stats():
+    stats = dgl.distributed.ServerStats()
+    stats.enqueue(1)
+    stats.enqueue(1)
+    stats.record(1, 0., 3e-6)
+    stats.record(2, 0., 1., queued=False)
+    summary = stats.summary()
+    assert summary[1]['count'] == 1
+    assert summary[1]['queue_depth'] == 1
+    assert summary[1]['max_queue_depth'] == 2
+    assert summary[1]['wait_hist'][0] == 1
+    # 3us falls in the bucket [2us, 4us)
+    assert summary[1]['latency_hist'][2] == 1
+    assert summary[2]['count'] == 1
+    assert summary[2]['latency_hist'][20] == 1
+    stats.reset()
+    assert stats.summary() == {}
+    # the request still in the queue is kept
+    stats.record(1, 0., 0.)
+    assert stats.summary()[1]['queue_depth'] == 0
+
+def start_client_dispatch(ip_config):
+    dgl.distributed.register_service(
+        QUEUED_HELLO_SERVICE_ID, QueuedHelloRequest, HelloResponse)
+    dgl.distributed.connect_to_server(ip_config=ip_config, num_servers=1)
+    req = QueuedHelloRequest(STR, INTEGER, TENSOR, simple_func)
+    res_list = dgl.distributed.remote_call([(0, req)] * 20)
+    assert len(res_list) == 20
+    for res in res_list:
+        assert res.hello_str == STR
+        assert_array_equal(F.asnumpy(res.tensor), F.asnumpy(TENSOR))
+    stats = dgl.distributed.get_server_stats(reset=True)
+    assert len(stats) == 1
+    assert stats[0][QUEUED_HELLO_SERVICE_ID]['count'] == 20
+    assert stats[0][QUEUED_HELLO_SERVICE_ID]['queue_depth'] == 0
+    assert sum(stats[0][QUEUED_HELLO_SERVICE_ID]['latency_hist']) == 20
+    dgl.distributed.exit_client()
+
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+def test_rpc_dispatch():
+    reset_envs()
+    os.environ['DGL_DIST_MODE'] = 'distributed'
+    generate_ip_config("rpc_ip_config_dispatch.txt", 1, 1)
+    ctx = mp.get_context('spawn')
+    pserver = ctx.Process(target=start_server,
+                          args=(1, "rpc_ip_config_dispatch.txt", 0, False, 1, 2))
+    pclient = ctx.Process(target=start_client_dispatch, args=("rpc_ip_config_dispatch.txt",))
+    pserver.start()
+    pclient.start()
+    pclient.join()
+    pserver.join()
+
+def start_client_dispatch_error(ip_config):
+    dgl.distributed.register_service(
+        QUEUED_HELLO_SERVICE_ID, QueuedHelloRequest, HelloResponse)
+    dgl.distributed.connect_to_server(ip_config=ip_config, num_servers=1)
+    # process_request fails on a wrong string, and the client gets the error at once.
+    req = QueuedHelloRequest('wrong', INTEGER, TENSOR, simple_func)
+    dgl.distributed.send_request(0, req)
+    with pytest.raises(dgl.DGLError):
+        dgl.distributed.recv_response()
+    # The server stops at the next request, so the client cannot exit normally.
+    dgl.distributed.send_request(0, QueuedHelloRequest(STR, INTEGER, TENSOR, simple_func))
+    atexit.unregister(dgl.distributed.exit_client)
+    dgl.distributed.rpc.finalize_sender()
+    dgl.distributed.rpc.finalize_receiver()
+
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+def test_rpc_dispatch_error():
+    reset_envs()
+    os.environ['DGL_DIST_MODE'] = 'distributed'
+    generate_ip_config("rpc_ip_config_dispatch_error.txt", 1, 1)
+    ctx = mp.get_context('spawn')
+    pserver = ctx.Process(target=start_server,
+                          args=(1, "rpc_ip_config_dispatch_error.txt", 0, False, 1, 2))
+    pclient = ctx.Process(target=start_client_dispatch_error,
+                          args=("rpc_ip_config_dispatch_error.txt",))
+    pserver.start()
+    pclient.start()
+    pclient.join()
+    pserver.join()
+    assert pclient.exitcode == 0
+    assert pserver.exitcode != 0
+
 @unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
 def test_multi_client():
     reset_envs()
@@ -277,7 +432,11 @@ def test_multi_client_groups():
 
 if __name__ == '__main__':
     test_serialize()
+    test_serialize_wire_schema()
     test_rpc_msg()
     test_rpc()
+    test_server_stats()
+    test_rpc_dispatch()
+    test_rpc_dispatch_error()
     test_multi_client()
     test_multi_thread_rpc()
@@ -1,8 +1,12 @@
 import os
+import json
+import pickle
+import tempfile
 import dgl
 import dgl.ops as OPS
 import backend as F
 import unittest
+import numpy as np
 import torch
 from torch.utils.data import DataLoader
 from collections import defaultdict
@@ -21,6 +25,84 @@ def test_graph_dataloader():
         assert isinstance(graph, dgl.DGLGraph)
         assert F.asnumpy(label).shape[0] == batch_size
 
+@pytest.mark.parametrize('idtype', [F.int32, F.int64])
+def test_packed_graph_dataset(idtype):
+    graphs = []
+    for i in range(10):
+        g = dgl.rand_graph(i + 1, 2 * i, idtype=idtype)
+        g.ndata['x'] = F.randn((i + 1, 3))
+        g.edata['w'] = F.randn((2 * i, 2))
+        graphs.append(g)
+    labels = F.tensor(np.arange(10))
+    dataset = dgl.dataloading.PackedGraphDataset(graphs, labels)
+    assert len(dataset) == 10
+
+    collator = dgl.dataloading.GraphCollator()
+    for indices in [[2, 3, 4, 5], [7, 0, 9, 3], [6]]:
+        bg, label = collator.collate([dataset[i] for i in indices])
+        expected = dgl.batch([graphs[i] for i in indices])
+        assert bg.idtype == idtype
+        assert F.array_equal(bg.batch_num_nodes(), expected.batch_num_nodes())
+        assert F.array_equal(bg.batch_num_edges(), expected.batch_num_edges())
+        src, dst = bg.edges()
+        exp_src, exp_dst = expected.edges()
+        assert F.array_equal(src, exp_src) and F.array_equal(dst, exp_dst)
+        assert F.allclose(bg.ndata['x'], expected.ndata['x'])
+        assert F.allclose(bg.edata['w'], expected.edata['w'])
+        assert F.array_equal(label, F.tensor(indices))
+    # the batch does not share memory with the dataset
+    bg = dataset.batch([0, 1])
+    bg.ndata['x'][:] = 0
+    assert not F.allclose(dataset.ndata['x'][:3], F.zeros((3, 3), F.float32, F.cpu()))
+
+    data_loader = dgl.dataloading.GraphDataLoader(dataset, batch_size=4, shuffle=True)
+    num_graphs = 0
+    for bg, label in data_loader:
+        assert isinstance(bg, dgl.DGLGraph)
+        assert bg.batch_size == F.asnumpy(label).shape[0]
+        num_graphs += bg.batch_size
+    assert num_graphs == 10
+
+    with pytest.raises(dgl.DGLError):
+        dgl.dataloading.PackedGraphDataset(graphs, F.tensor(np.arange(3)))
+
+@unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
+@pytest.mark.parametrize('num_workers', [0, 2])
+def test_packed_graph_dataset_shared_memory(num_workers):
+    graphs = []
+    for i in range(10):
+        g = dgl.rand_graph(i + 1, 2 * i)
+        g.ndata['x'] = F.randn((i + 1, 3))
+        g.edata['w'] = F.randn((2 * i, 2))
+        graphs.append(g)
+    labels = {'y': F.tensor(np.arange(10))}
+    dataset = dgl.dataloading.PackedGraphDataset(graphs, labels)
+    assert not dataset.is_shared
+    shared = dataset.shared_memory('test_packed_{}'.format(num_workers))
+    assert shared.is_shared and len(shared) == 10
+    assert F.allclose(shared.ndata['x'], dataset.ndata['x'])
+
+    # unpickling in the same process reuses the shared arrays
+    copy = pickle.loads(pickle.dumps(shared))
+    assert copy.is_shared
+    assert copy.ndata['x'].data_ptr() == shared.ndata['x'].data_ptr()
+
+    data_loader = dgl.dataloading.GraphDataLoader(
+        shared, batch_size=3, shuffle=False, num_workers=num_workers)
+    num_graphs = 0
+    for bg, label in data_loader:
+        assert isinstance(bg, dgl.DGLGraph)
+        indices = F.asnumpy(label['y']).tolist()
+        expected = dgl.batch([graphs[i] for i in indices])
+        assert F.array_equal(bg.batch_num_nodes(), expected.batch_num_nodes())
+        src, dst = bg.edges()
+        exp_src, exp_dst = expected.edges()
+        assert F.array_equal(src, exp_src) and F.array_equal(dst, exp_dst)
+        assert F.allclose(bg.ndata['x'], expected.ndata['x'])
+        assert F.allclose(bg.edata['w'], expected.edata['w'])
+        num_graphs += bg.batch_size
+    assert num_graphs == 10
+
 @unittest.skipIf(os.name == 'nt', reason='Do not support windows yet')
 @pytest.mark.parametrize('num_workers', [0, 4])
 def test_cluster_gcn(num_workers):
@@ -88,6 +170,50 @@ def test_neighbor_nonuniform(num_workers):
             assert neighbors == {3, 4}
 
 
+def test_neighbor_frontier_cache():
+    g = dgl.rand_graph(100, 2000)
+    cache = dgl.dataloading.FrontierCache(refresh_every=2)
+    sampler = dgl.dataloading.NeighborSampler([3, 3], frontier_cache=cache)
+    seeds = torch.arange(50)
+    _, _, blocks = sampler.sample_blocks(g, seeds)
+    for block in blocks:
+        assert (block.in_degrees() <= 3).all()
+        src, dst = block.edges()
+        src_g, dst_g = g.find_edges(block.edata[dgl.EID])
+        assert torch.equal(block.srcdata[dgl.NID][src], src_g)
+        assert torch.equal(block.dstdata[dgl.NID][dst], dst_g)
+    assert cache.num_hits == 0 and cache.memory_usage > 0
+
+    # the same seeds get the same neighbors until the entries expire
+    cache.set_epoch(1)
+    _, _, blocks2 = sampler.sample_blocks(g, seeds)
+    assert torch.equal(blocks[-1].edata[dgl.EID].sort()[0], blocks2[-1].edata[dgl.EID].sort()[0])
+    assert cache.num_hits >= 50
+    cache.reset_stats()
+    cache.set_epoch(2)
+    sampler.sample_blocks(g, seeds)
+    assert cache.num_hits == 0 and cache.num_misses >= 50
+
+    # excluded edges are removed from the cached neighbors
+    exclude = blocks[-1].edata[dgl.EID]
+    _, _, blocks3 = sampler.sample_blocks(g, seeds, exclude_eids=exclude)
+    assert not np.isin(F.asnumpy(blocks3[-1].edata[dgl.EID]), F.asnumpy(exclude)).any()
+
+    g2 = dgl.heterograph({
+         ('user', 'follow', 'user'): ([0, 0, 0, 1, 1, 1, 2], [1, 2, 3, 0, 2, 3, 0]),
+         ('user', 'play', 'game'): ([0, 1, 1, 3, 5], [0, 1, 2, 0, 2]),
+         ('game', 'played-by', 'user'): ([0, 1, 2, 0, 2], [0, 1, 1, 3, 5])
+    })
+    cache = dgl.dataloading.FrontierCache(refresh_prob=0.5)
+    sampler = dgl.dataloading.NeighborSampler([2, 2], frontier_cache=cache)
+    dataloader = dgl.dataloading.NodeDataLoader(
+        g2, {'user': g2.nodes('user')}, sampler, batch_size=2)
+    for _ in range(2):
+        for input_nodes, output_nodes, blocks in dataloader:
+            for etype in blocks[-1].canonical_etypes:
+                assert (blocks[-1].in_degrees(etype=etype) <= 2).all()
+    assert cache.num_hits + cache.num_misses > 0
+
 def _check_device(data):
     if isinstance(data, dict):
         for k, v in data.items():
@@ -148,11 +274,113 @@ def test_node_dataloader(sampler_name, pin_graph):
     if g1.is_pinned():
         g1.unpin_memory_()
 
+@pytest.mark.parametrize('prefetch_depth', [1, (2, 3, 1), {'fetch': 4}])
+def test_node_dataloader_prefetch_pipeline(prefetch_depth):
+    g = dgl.rand_graph(100, 1000)
+    g.ndata['feat'] = F.copy_to(F.randn((100, 8)), F.cpu())
+    sampler = dgl.dataloading.MultiLayerNeighborSampler([3], prefetch_node_feats=['feat'])
+    dataloader = dgl.dataloading.NodeDataLoader(
+        g, g.nodes(), sampler, device=F.ctx(), batch_size=7, use_prefetch_thread=True,
+        prefetch_depth=prefetch_depth, num_fetch_threads=3)
+    # the batches must come in order even though their features are gathered concurrently
+    for i, (input_nodes, output_nodes, blocks) in enumerate(dataloader):
+        assert np.array_equal(F.asnumpy(output_nodes), np.arange(i * 7, min(i * 7 + 7, 100)))
+        assert np.array_equal(
+            F.asnumpy(blocks[0].srcdata['feat']),
+            F.asnumpy(g.ndata['feat'])[F.asnumpy(input_nodes)])
+    stats = dataloader.prefetch_stats
+    assert set(stats.keys()) == {'sample', 'fetch', 'transfer', 'consumer'}
+    for stage_stats in stats.values():
+        assert stage_stats['num_batches'] == len(dataloader)
+        assert 0 <= stage_stats['mean_occupancy'] <= 1
+
+    with pytest.raises(dgl.DGLError):
+        dgl.dataloading.NodeDataLoader(
+            g, g.nodes(), sampler, batch_size=7, use_prefetch_thread=True,
+            prefetch_depth=(1, 0, 1))
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+@pytest.mark.parametrize('use_prefetch_thread', [False, True])
+def test_node_dataloader_profile(num_workers, use_prefetch_thread):
+    g = dgl.rand_graph(100, 1000)
+    g.ndata['feat'] = F.copy_to(F.randn((100, 8)), F.cpu())
+    sampler = dgl.dataloading.MultiLayerNeighborSampler([3, 3], prefetch_node_feats=['feat'])
+    dataloader = dgl.dataloading.NodeDataLoader(
+        g, g.nodes(), sampler, device=F.ctx(), batch_size=20, num_workers=num_workers,
+        use_prefetch_thread=use_prefetch_thread)
+    batches = []
+    profiler = dgl.dataloading.DataLoaderProfiler(on_batch=batches.append)
+    with dataloader.profile(profiler) as prof:
+        assert prof is profiler
+        for _ in range(2):
+            for input_nodes, output_nodes, blocks in dataloader:
+                pass
+    assert len(batches) == 2 * len(dataloader)
+    summary = prof.summary()
+    assert summary['epoch'] == 1
+    assert summary['num_batches'] == len(dataloader)
+    expected_stages = {'sample', 'fetch', 'transfer', 'wait'}
+    if num_workers > 0:
+        expected_stages.add('ipc')
+    assert set(summary['time'].keys()) == expected_stages
+    assert summary['bytes']['fetch'] >= 20 * 8 * 4 * len(dataloader)
+    assert len(summary['blocks']) == 2
+    assert summary['blocks'][1]['num_dst_nodes'] == 20
+
+    # nothing is recorded once the profiling ends
+    for _ in dataloader:
+        pass
+    assert len(prof.records) == 2 * len(dataloader)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prof.export_json(os.path.join(tmpdir, 'profile.json'))
+        with open(os.path.join(tmpdir, 'profile.json')) as f:
+            result = json.load(f)
+        assert len(result['summary']) == 2
+        assert len(result['batches']) == 2 * len(dataloader)
+        prof.export_chrome_trace(os.path.join(tmpdir, 'trace.json'))
+        with open(os.path.join(tmpdir, 'trace.json')) as f:
+            events = [e for e in json.load(f)['traceEvents'] if e['ph'] == 'X']
+        assert len(events) == sum(len(r.spans) for r in prof.records)
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+@pytest.mark.parametrize('max_memory', [None, 0])
+def test_layerwise_inference(num_workers, max_memory):
+    g = dgl.rand_graph(200, 2000)
+    x = F.copy_to(F.randn((200, 5)), F.cpu())
+    layers = [dgl.nn.SAGEConv(5, 8, 'mean'), dgl.nn.SAGEConv(8, 6, 'mean'),
+              dgl.nn.SAGEConv(6, 3, 'mean')]
+    with torch.no_grad():
+        h = x
+        for l, layer in enumerate(layers):
+            h = layer(g, h)
+            if l != len(layers) - 1:
+                h = torch.relu(h)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        y = dgl.dataloading.layerwise_inference(
+            g, layers, x, 17, activation=torch.relu, max_memory=max_memory,
+            buffer_dir=tmpdir if max_memory is not None else None, num_workers=num_workers)
+        assert y.shape == (200, 3)
+        assert F.allclose(y, h)
+        if max_memory is not None:
+            assert set(os.listdir(tmpdir)) == {'buffer_0.bin', 'buffer_1.bin'}
+
+    g.ndata['x'] = x
+    layer = layers[0].to(F.ctx())
+    y = dgl.dataloading.layerwise_inference(
+        g, [layer], 'x', 64, device=F.ctx(), num_workers=num_workers)
+    with torch.no_grad():
+        assert F.allclose(y, layer(g.to(F.ctx()), F.copy_to(x, F.ctx())))
+
 @pytest.mark.parametrize('sampler_name', ['full', 'neighbor'])
 @pytest.mark.parametrize('neg_sampler', [
     dgl.dataloading.negative_sampler.Uniform(2),
     dgl.dataloading.negative_sampler.GlobalUniform(15, False, 3),
-    dgl.dataloading.negative_sampler.GlobalUniform(15, True, 3)])
+    dgl.dataloading.negative_sampler.GlobalUniform(15, True, 3),
+    dgl.dataloading.negative_sampler.GlobalUniform(15, True, exact=True),
+    dgl.dataloading.negative_sampler.InBatch(),
+    dgl.dataloading.negative_sampler.SharedUniform(2)])
 @pytest.mark.parametrize('pin_graph', [True, False])
 def test_edge_dataloader(sampler_name, neg_sampler, pin_graph):
     g1 = dgl.graph(([0, 0, 0, 1, 1], [1, 2, 3, 3, 4]))
@@ -224,8 +452,14 @@ def test_edge_dataloader(sampler_name, neg_sampler, pin_graph):
 
 if __name__ == '__main__':
     test_graph_dataloader()
+    test_packed_graph_dataset(F.int64)
+    test_packed_graph_dataset_shared_memory(2)
     test_cluster_gcn(0)
     test_neighbor_nonuniform(0)
+    test_neighbor_frontier_cache()
+    test_node_dataloader_prefetch_pipeline((2, 3, 1))
+    test_node_dataloader_profile(0, True)
+    test_layerwise_inference(0, 0)
     for sampler in ['full', 'neighbor']:
         test_node_dataloader(sampler)
         for neg_sampler in [
@@ -67,6 +67,21 @@ def initializer(shape, dtype):
     th.nn.init.uniform_(arr, 0, 1.0)
     return arr
 
+def check_sampling(g, seeds):
+    # The RPCs of the sampling interleave with those of the background update thread
+    # and must still receive their own responses.
+    sg = dgl.distributed.sample_neighbors(g, seeds, 3)
+    src, dst = sg.edges()
+    src2, dst2 = g.find_edges(sg.edata[dgl.EID])
+    assert F.array_equal(src, src2)
+    assert F.array_equal(dst, dst2)
+    in_deg = F.asnumpy(g.in_degrees(seeds))
+    seeds = F.asnumpy(seeds)
+    dst = F.asnumpy(dst)
+    assert np.all(np.isin(dst, seeds))
+    num_sampled = np.array([np.sum(dst == nid) for nid in seeds])
+    assert np.all(num_sampled == np.minimum(in_deg, 3))
+
 def run_client(graph_name, cli_id, part_id, server_count):
     device=F.ctx()
     time.sleep(5)
@@ -109,6 +124,34 @@ def run_client(graph_name, cli_id, part_id, server_count):
 
     assert F.allclose(dgl_emb.weight[0 : num_nodes//2], torch_emb.weight[0 : num_nodes//2])
 
+    # Updates in the background thread. With staleness=0, every step waits for its update.
+    for staleness in [0, 2]:
+        dgl_emb = DistEmbedding(num_nodes, emb_dim, name='optim-async{}'.format(staleness),
+                                init_func=initializer, part_policy=policy)
+        dgl_adam = SparseAdam(params=[dgl_emb], lr=0.01, staleness=staleness)
+        torch_emb = th.nn.Embedding(num_nodes, emb_dim, sparse=True)
+        th.manual_seed(0)
+        th.nn.init.uniform_(torch_emb.weight, 0, 1.0)
+        torch_adam = th.optim.SparseAdam(list(torch_emb.parameters()), lr=0.01)
+        for _ in range(3):
+            torch_adam.zero_grad()
+            torch_loss = th.nn.functional.cross_entropy(torch_emb(idx), labels)
+            torch_loss.backward()
+            torch_adam.step()
+
+            dgl_adam.zero_grad()
+            dgl_value = dgl_emb(idx, device).to(th.device('cpu'))
+            dgl_loss = th.nn.functional.cross_entropy(dgl_value, labels)
+            dgl_loss.backward()
+            dgl_adam.step()
+            for _ in range(3):
+                check_sampling(g, th.unique(th.randint(0, num_nodes, size=(100,))))
+        dgl_adam.flush()
+        assert dgl_adam.num_steps == 3
+        assert dgl_adam.total_stall_time >= dgl_adam.last_stall_time >= 0
+        if staleness == 0:
+            assert F.allclose(dgl_emb.weight[0 : num_nodes//2], torch_emb.weight[0 : num_nodes//2])
+
 def check_sparse_adam(num_trainer=1, shared_mem=True):
     prepare_dist()
     g = create_random_graph(2000)